@@ -0,0 +1,401 @@
+"""
+Throughput / latency benchmark of the traffic pipeline, on synthetic traffic (cf. traffic_generator.py):
+    - parse: cost per frame of the sniffer parsing paths (scapy dissection + ScapySniffer.parse_packet,
+      raw_http_parser.parse_ethernet_frame)
+    - collect: cost per request of collect_http_info, for each collector
+    - collect_batch: cost per request of collect_batch on batches of the traffic (as drained by the aggregator),
+      for each collector
+    - tick: latency of the periodic reads of the controller (get_highest_hits, get_total_traffic_over_period)
+      and of the alert manager, at every update period of the traffic time
+    - alert_manager: cost per call of the alert managers (for the window alert manager, cost per request of
+      counting the traffic and evaluating the limit on every second boundary)
+    - memory: peak memory allocated while collecting the traffic, for each collector
+    - snapshot: size of the snapshot of each collector filled with the traffic, time to write it (taken while
+      the aggregator is held) and to restore it in a new collector (hot restore on start)
+    - alert_rules: cost per request of counting the traffic for many alerting rules (per section, host, method),
+      and latency of evaluating all of them at every update period of the traffic time (cf. RuleAlertManager)
+Results are printed, and written as JSON with --json so that runs (e.g. before / after a change, or of a new
+collector added to COLLECTORS) can be compared.
+
+Run from the repository root: python -m benchmarks.bench_pipeline --json results.json
+"""
+import argparse
+import json
+import platform
+import sys
+import tracemalloc
+from statistics import quantiles
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Tuple
+
+from src.interfaces.abstract_clock import AbstractClock
+from src.interfaces.abstract_collector import AbstractCollector, HTTPInfo
+from src.alert_managers.basic_alert_manager import BasicAlertManager
+from src.alert_managers.rule_alert_manager import RuleAlertManager
+from src.alert_managers.window_alert_manager import WindowAlertManager
+from src.interfaces.abstract_alert_manager import AlertRule, RuleAggregation
+from src.clocks.simulated_clock import SimulatedClock
+from src.clocks.tick_scheduler import TickScheduler
+from src.collectors.basic_collector import BasicCollector
+from src.collectors.ring_buffer_collector import RingBufferCollector
+from src.collectors.space_saving_collector import SpaceSavingCollector
+from src.stores.snapshot import SnapshotReader, SnapshotWriter
+from benchmarks.traffic_generator import TrafficGenerator
+
+UPDATE_PERIOD = 10  # seconds of traffic time between two ticks, as in main.py
+TRAFFIC_HISTORY_SPAN = 120
+TRAFFIC_LIMIT = 10000
+NB_HIGHEST_HITS = 10
+BATCH_SIZE = 256  # requests per batch of collect_batch (the aggregator drains up to MAX_BATCH at once)
+
+# collectors benchmarked, built from the history span and the clock
+# sliding windows of the section hits (update period, 2 and 10 minutes)
+WINDOW_SPANS = (10, 120, 600)
+
+COLLECTORS: Dict[str, Callable[[int, AbstractClock], AbstractCollector]] = {
+    'basic': lambda history_span, clock: BasicCollector(history_span=history_span, clock=clock),
+    'ring': lambda history_span, clock: RingBufferCollector(history_span=history_span, clock=clock),
+    'ring-windows': lambda history_span, clock: RingBufferCollector(history_span=history_span, clock=clock,
+                                                                    window_spans=WINDOW_SPANS),
+    'space-saving': lambda history_span, clock: SpaceSavingCollector(history_span=history_span, clock=clock),
+}
+
+Stream = List[Tuple[float, HTTPInfo]]
+
+
+def bench_collect(build_collector: Callable[[int, AbstractClock], AbstractCollector], stream: Stream,
+                  repeat: int) -> Dict[str, float]:
+    """
+    Best cost per request of collect_http_info over repeat rounds, each on a new collector
+    (the simulated clock is set to the timestamp of each request, as the packet clock of a replay).
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        clock = SimulatedClock()
+        collect_http_info = build_collector(TRAFFIC_HISTORY_SPAN, clock).collect_http_info
+        start = perf_counter()
+        for timestamp, http_info in stream:
+            clock.timestamp = timestamp
+            collect_http_info(http_info)
+        best = min(best, perf_counter() - start)
+    return {'ns_per_request': best / len(stream) * 1e9, 'requests_per_second': len(stream) / best}
+
+
+def bench_collect_batch(build_collector: Callable[[int, AbstractClock], AbstractCollector], stream: Stream,
+                        repeat: int) -> Dict[str, float]:
+    """
+    Best cost per request of collect_batch over repeat rounds, each on a new collector, the stream being cut
+    in batches of BATCH_SIZE requests collected at the timestamp of their last request.
+    """
+    batches = [(stream[end - 1][0], [http_info for _, http_info in stream[start:end]])
+               for start, end in ((start, min(start + BATCH_SIZE, len(stream)))
+                                  for start in range(0, len(stream), BATCH_SIZE))]
+    best = float('inf')
+    for _ in range(repeat):
+        clock = SimulatedClock()
+        collect_batch = build_collector(TRAFFIC_HISTORY_SPAN, clock).collect_batch
+        start = perf_counter()
+        for timestamp, batch in batches:
+            clock.timestamp = timestamp
+            collect_batch(batch)
+        best = min(best, perf_counter() - start)
+    return {'ns_per_request': best / len(stream) * 1e9, 'requests_per_second': len(stream) / best}
+
+
+def bench_ticks(build_collector: Callable[[int, AbstractClock], AbstractCollector],
+                stream: Stream) -> Dict[str, Dict[str, float]]:
+    """
+    Latency of the reads done at every tick, with the collector filled with the traffic up to the tick.
+    """
+    clock = SimulatedClock(stream[0][0])
+    collector = build_collector(TRAFFIC_HISTORY_SPAN, clock)
+    alert_manager = BasicAlertManager(traffic_limit=TRAFFIC_LIMIT, clock=clock)
+    scheduler = TickScheduler(clock=clock, period=UPDATE_PERIOD)
+    latencies: Dict[str, List[float]] = {'get_highest_hits': [], 'get_total_traffic_over_period': [],
+                                         'get_alert_info': []}
+
+    def tick() -> None:
+        start = perf_counter()
+        collector.get_highest_hits(NB_HIGHEST_HITS)
+        highest_hits_end = perf_counter()
+        traffic = collector.get_total_traffic_over_period(TRAFFIC_HISTORY_SPAN)
+        traffic_end = perf_counter()
+        alert_manager.get_alert_info(traffic)
+        alert_end = perf_counter()
+        latencies['get_highest_hits'].append(highest_hits_end - start)
+        latencies['get_total_traffic_over_period'].append(traffic_end - highest_hits_end)
+        latencies['get_alert_info'].append(alert_end - traffic_end)
+
+    for timestamp, http_info in stream:
+        for tick_time in scheduler.due_ticks(timestamp):
+            clock.timestamp = tick_time
+            tick()
+        clock.timestamp = timestamp
+        collector.collect_http_info(http_info)
+    return {operation: summarize_latencies(values) for operation, values in latencies.items()}
+
+
+def build_alert_rules(nb_rules: int) -> List[AlertRule]:
+    """
+    nb_rules rules cycling through per section rates, per host bytes, shares of methods and total traffic,
+    over windows from 10 seconds to 10 minutes.
+    """
+    windows = [10, 60, 120, 600]
+    templates = [
+        lambda index, window: AlertRule(name=f"section rate {index}", metric='section_hits', window=window,
+                                        threshold=1 + index, aggregation=RuleAggregation.MEAN),
+        lambda index, window: AlertRule(name=f"host bytes {index}", metric='host_bytes', window=window,
+                                        threshold=100000 * (1 + index)),
+        lambda index, window: AlertRule(name=f"POST share {index}", metric='method_requests', key='POST',
+                                        ratio_to='requests', window=window, threshold=0.5),
+        lambda index, window: AlertRule(name=f"traffic {index}", metric='bytes', window=window,
+                                        threshold=TRAFFIC_LIMIT * (1 + index)),
+    ]
+    return [templates[index % len(templates)](index, windows[index % len(windows)]) for index in range(nb_rules)]
+
+
+def bench_alert_rules(stream: Stream, nb_rules: int) -> Dict[str, Any]:
+    """
+    Cost per request of counting the traffic for the rules, and latency of evaluating them at every tick.
+    """
+    clock = SimulatedClock(stream[0][0])
+    manager = RuleAlertManager(rules=build_alert_rules(nb_rules), clock=clock)
+    scheduler = TickScheduler(clock=clock, period=UPDATE_PERIOD)
+    evaluations: List[float] = []
+    collect_time = 0.0
+    for timestamp, http_info in stream:
+        for tick_time in scheduler.due_ticks(timestamp):
+            clock.timestamp = tick_time
+            start = perf_counter()
+            manager.get_alert_infos()
+            evaluations.append(perf_counter() - start)
+        clock.timestamp = timestamp
+        start = perf_counter()
+        manager.collect_http_info(http_info)
+        collect_time += perf_counter() - start
+    return {'rules': nb_rules, 'checks': len(manager.check_rule), 'series': manager.nb_series,
+            'ns_per_request': collect_time / len(stream) * 1e9, 'evaluate': summarize_latencies(evaluations)}
+
+
+def summarize_latencies(latencies: List[float]) -> Dict[str, float]:
+    """
+    Median, 99th percentile and maximum of latencies (in microseconds).
+    """
+    if not latencies:
+        return {'count': 0}
+    microseconds = sorted(latency * 1e6 for latency in latencies)
+    if len(microseconds) > 1:
+        percentiles = quantiles(microseconds, n=100, method='inclusive')
+        p50, p99 = percentiles[49], percentiles[98]
+    else:
+        p50 = p99 = microseconds[0]
+    return {'count': len(microseconds), 'p50_us': p50, 'p99_us': p99, 'max_us': microseconds[-1]}
+
+
+def bench_memory(build_collector: Callable[[int, AbstractClock], AbstractCollector],
+                 stream: Stream) -> Dict[str, int]:
+    """
+    Peak memory allocated while collecting the traffic, and memory still held by the collector at the end.
+    """
+    clock = SimulatedClock()
+    tracemalloc.start()
+    try:
+        collector = build_collector(TRAFFIC_HISTORY_SPAN, clock)
+        for timestamp, http_info in stream:
+            clock.timestamp = timestamp
+            collector.collect_http_info(http_info)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'peak_bytes': peak, 'retained_bytes': current}
+
+
+def bench_snapshot(build_collector: Callable[[int, AbstractClock], AbstractCollector], stream: Stream,
+                   repeat: int) -> Dict[str, float]:
+    """
+    Size of the snapshot of a collector filled with the traffic, best time to write it and to restore it.
+    """
+    clock = SimulatedClock()
+    collector = build_collector(TRAFFIC_HISTORY_SPAN, clock)
+    for timestamp, http_info in stream:
+        clock.timestamp = timestamp
+        collector.collect_http_info(http_info)
+    best_write = best_restore = float('inf')
+    snapshot = b''
+    for _ in range(repeat):
+        start = perf_counter()
+        writer = SnapshotWriter()
+        collector.write_state(writer)
+        snapshot = writer.getvalue()
+        best_write = min(best_write, perf_counter() - start)
+        restored = build_collector(TRAFFIC_HISTORY_SPAN, clock)
+        start = perf_counter()
+        restored.read_state(SnapshotReader(snapshot))
+        best_restore = min(best_restore, perf_counter() - start)
+    return {'bytes': len(snapshot), 'write_ms': best_write * 1e3, 'restore_ms': best_restore * 1e3}
+
+
+def bench_alert_manager(nb_calls: int, repeat: int) -> Dict[str, float]:
+    """
+    Best cost per call of get_alert_info, the traffic crossing the limit every few calls.
+    """
+    traffic_values = [TRAFFIC_LIMIT + (index % 7 - 3) * 1000 for index in range(nb_calls)]
+    best = float('inf')
+    for _ in range(repeat):
+        get_alert_info = BasicAlertManager(traffic_limit=TRAFFIC_LIMIT, clock=SimulatedClock()).get_alert_info
+        start = perf_counter()
+        for traffic in traffic_values:
+            get_alert_info(traffic)
+        best = min(best, perf_counter() - start)
+    return {'ns_per_call': best / nb_calls * 1e9}
+
+
+def bench_window_alert_manager(stream: Stream, repeat: int) -> Dict[str, float]:
+    """
+    Best cost per request of collect_http_info of the window alert manager, including the evaluations of the
+    traffic limit on the boundaries passed.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        clock = SimulatedClock()
+        alert_manager = WindowAlertManager(traffic_limit=TRAFFIC_LIMIT, history_span=TRAFFIC_HISTORY_SPAN,
+                                           clock=clock)
+        collect_http_info = alert_manager.collect_http_info
+        start = perf_counter()
+        for timestamp, http_info in stream:
+            clock.timestamp = timestamp
+            collect_http_info(http_info)
+        best = min(best, perf_counter() - start)
+    return {'ns_per_call': best / len(stream) * 1e9}
+
+
+def bench_parse(generator: TrafficGenerator, stream: Stream, repeat: int) -> Dict[str, Dict[str, float]]:
+    """
+    Best cost per frame of the sniffer parsing paths, on Ethernet frames carrying the requests of stream.
+    """
+    from scapy.all import Ether, IP, TCP, Raw, load_layer
+    from scapy.layers.http import HTTPRequest
+    from src.sniffers.scapy_sniffer import ScapySniffer
+    from src.sniffers.raw_http_parser import parse_ethernet_frame
+
+    load_layer("http")
+    frames = [bytes(Ether() / IP(src='10.0.0.1', dst='10.0.0.2') / TCP(sport=40000, dport=80, flags='PA')
+                    / Raw(load=generator.build_request(http_info)))
+              for _, http_info in stream]
+
+    def parse_scapy() -> None:
+        for frame in frames:
+            packet = Ether(frame)
+            if packet.haslayer(HTTPRequest):
+                ScapySniffer.parse_packet(packet)
+
+    def parse_raw() -> None:
+        for frame in frames:
+            parse_ethernet_frame(frame)
+
+    results = dict()
+    for name, parse in [('scapy', parse_scapy), ('raw', parse_raw)]:
+        best = float('inf')
+        for _ in range(repeat):
+            start = perf_counter()
+            parse()
+            best = min(best, perf_counter() - start)
+        results[name] = {'ns_per_frame': best / len(frames) * 1e9}
+    return results
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    generator = TrafficGenerator(rate=args.rate, nb_sections=args.sections, zipf_skew=args.zipf,
+                                 nb_hosts=args.hosts, seed=args.seed)
+    stream = list(generator.generate(args.requests))
+    results: Dict[str, Any] = {'collect': dict(), 'collect_batch': dict(), 'tick': dict(), 'memory': dict(),
+                               'snapshot': dict()}
+    for name in args.collectors:
+        build_collector = COLLECTORS[name]
+        results['collect'][name] = bench_collect(build_collector, stream, args.repeat)
+        results['collect_batch'][name] = bench_collect_batch(build_collector, stream, args.repeat)
+        results['tick'][name] = bench_ticks(build_collector, stream)
+        results['memory'][name] = bench_memory(build_collector, stream)
+        results['snapshot'][name] = bench_snapshot(build_collector, stream, args.repeat)
+    results['alert_manager'] = {'basic': bench_alert_manager(args.requests, args.repeat),
+                                'window': bench_window_alert_manager(stream, args.repeat)}
+    if args.rules > 0:
+        results['alert_rules'] = bench_alert_rules(stream, args.rules)
+    if args.frames > 0:
+        results['parse'] = bench_parse(generator, stream[:args.frames], args.repeat)
+    return {
+        'config': {'requests': args.requests, 'rate': args.rate, 'sections': args.sections, 'zipf': args.zipf,
+                   'hosts': args.hosts, 'seed': args.seed, 'repeat': args.repeat, 'frames': args.frames,
+                   'rules': args.rules,
+                   'update_period': UPDATE_PERIOD, 'traffic_history_span': TRAFFIC_HISTORY_SPAN},
+        'environment': {'python': platform.python_version(), 'implementation': platform.python_implementation(),
+                        'machine': platform.machine(), 'platform': platform.platform()},
+        'results': results,
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    results = report['results']
+    for name, collect in results['collect'].items():
+        print(f"collect {name:>12}: {collect['ns_per_request']:8.0f} ns/request "
+              f"({collect['requests_per_second']:,.0f} requests/s)")
+    for name, collect in results['collect_batch'].items():
+        print(f"batch   {name:>12}: {collect['ns_per_request']:8.0f} ns/request "
+              f"({collect['requests_per_second']:,.0f} requests/s)")
+    for name, ticks in results['tick'].items():
+        for operation, latency in ticks.items():
+            if latency['count']:
+                print(f"tick    {name:>12}: {operation:<30} p50 {latency['p50_us']:8.1f} us   "
+                      f"p99 {latency['p99_us']:8.1f} us   max {latency['max_us']:8.1f} us")
+    for name, memory in results['memory'].items():
+        print(f"memory  {name:>12}: peak {memory['peak_bytes'] / 2 ** 20:8.2f} MiB   "
+              f"retained {memory['retained_bytes'] / 2 ** 20:8.2f} MiB")
+    for name, snapshot in results['snapshot'].items():
+        print(f"snapshot {name:>11}: {snapshot['bytes'] / 2 ** 20:8.2f} MiB   write {snapshot['write_ms']:8.2f} ms   "
+              f"restore {snapshot['restore_ms']:8.2f} ms")
+    for name, alert in results['alert_manager'].items():
+        print(f"alert   {name:>12}: {alert['ns_per_call']:8.0f} ns/call")
+    if 'alert_rules' in results:
+        rules = results['alert_rules']
+        evaluate = rules['evaluate']
+        print(f"rules   {rules['rules']:>5} rules, {rules['checks']:>6} checks: {rules['ns_per_request']:8.0f} ns/request"
+              f"   evaluate p50 {evaluate['p50_us']:8.1f} us   p99 {evaluate['p99_us']:8.1f} us")
+    for name, parse in results.get('parse', dict()).items():
+        print(f"parse   {name:>6}: {parse['ns_per_frame']:8.0f} ns/frame")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Traffic pipeline benchmark on synthetic traffic.')
+    parser.add_argument('--requests', type=int, default=200000, help='number of requests (default: 200000)')
+    parser.add_argument('--rate', type=float, default=1000.0,
+                        help='mean number of requests per second of traffic time (default: 1000)')
+    parser.add_argument('--sections', type=int, default=1000, help='number of distinct sections (default: 1000)')
+    parser.add_argument('--zipf', type=float, default=1.0,
+                        help='Zipf skew of the section popularity, 0 for uniform (default: 1.0)')
+    parser.add_argument('--hosts', type=int, default=20, help='number of distinct hosts (default: 20)')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the traffic generator (default: 0)')
+    parser.add_argument('--repeat', type=int, default=5, help='number of rounds, best is kept (default: 5)')
+    parser.add_argument('--rules', type=int, default=24,
+                        help='number of alerting rules evaluated by the rule alert manager, 0 to skip (default: 24)')
+    parser.add_argument('--frames', type=int, default=2000,
+                        help='number of frames of the parsing benchmark, 0 to skip it (default: 2000)')
+    parser.add_argument('--collectors', nargs='+', default=list(COLLECTORS), choices=list(COLLECTORS),
+                        help='collectors benchmarked (default: all)')
+    parser.add_argument('--json', default=None, dest='json_path', metavar='PATH',
+                        help="write the results as JSON to PATH ('-' for the standard output)")
+    args = parser.parse_args()
+    if args.requests <= 0:
+        parser.error('--requests must be strictly positive')
+    report = run(args)
+    if args.json_path == '-':
+        json.dump(report, sys.stdout, indent=2)
+        print()
+        return
+    print_report(report)
+    if args.json_path is not None:
+        with open(args.json_path, 'w') as json_file:
+            json.dump(report, json_file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
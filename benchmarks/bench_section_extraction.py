@@ -0,0 +1,87 @@
+"""
+Micro-benchmark of the per-request section extraction and counting step:
+    - legacy: split / join / concatenation, counted by section string (former HTTPInfo.extract_section)
+    - scan: HTTPInfo.extract_section (single scan for the second '/'), counted by section string
+    - section_table: SectionTable.lookup (interned section ids, as used by the collectors), counted by section id
+
+Run from the repository root: python -m benchmarks.bench_section_extraction
+"""
+import argparse
+import random
+from time import perf_counter
+from typing import Callable, Dict, List
+
+from src.interfaces.abstract_collector import HTTPInfo
+from src.collectors.section_table import SectionTable
+
+
+def build_requests(nb_requests: int, nb_hosts: int, nb_sections: int, seed: int = 0) -> List[HTTPInfo]:
+    """
+    Build requests on hot sections, with a distinct path per request (like query strings would do).
+    Strings are decoded from bytes, as a sniffer does, so that no hash is cached beforehand.
+    """
+    rnd = random.Random(seed)
+    return [HTTPInfo(method='GET',
+                     host=f"www.site{rnd.randrange(nb_hosts)}.com".encode().decode(),
+                     path=f"/section{rnd.randrange(nb_sections)}/page?id={i}".encode().decode(),
+                     content_length=100)
+            for i in range(nb_requests)]
+
+
+def legacy_extract_section(http_info: HTTPInfo) -> str:
+    return http_info.host + '/'.join(http_info.path.split('/', 2)[:2])
+
+
+def run_legacy(requests: List[HTTPInfo]) -> None:
+    counts: Dict[str, int] = dict()
+    for http_info in requests:
+        section = legacy_extract_section(http_info)
+        counts[section] = counts.get(section, 0) + 1
+
+
+def run_scan(requests: List[HTTPInfo]) -> None:
+    counts: Dict[str, int] = dict()
+    for http_info in requests:
+        section = http_info.extract_section()
+        counts[section] = counts.get(section, 0) + 1
+
+
+def run_section_table(requests: List[HTTPInfo]) -> None:
+    counts: Dict[int, int] = dict()
+    lookup = SectionTable().lookup
+    for http_info in requests:
+        section_id = lookup(http_info.host, http_info.path)
+        counts[section_id] = counts.get(section_id, 0) + 1
+
+
+def time_per_request(runs: Dict[str, Callable[[List[HTTPInfo]], None]], requests: List[HTTPInfo],
+                     repeat: int) -> Dict[str, float]:
+    """
+    Return the best time per request of each run over repeat rounds (in nanoseconds).
+    Runs are interleaved inside each round so that noise from the host affects all of them alike.
+    """
+    best = {name: float('inf') for name in runs}
+    for _ in range(repeat):
+        for name, run in runs.items():
+            start = perf_counter()
+            run(requests)
+            best[name] = min(best[name], perf_counter() - start)
+    return {name: elapsed / len(requests) * 1e9 for name, elapsed in best.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Section extraction micro-benchmark.')
+    parser.add_argument('--requests', type=int, default=100000, help='number of requests (default: 100000)')
+    parser.add_argument('--hosts', type=int, default=20, help='number of distinct hosts (default: 20)')
+    parser.add_argument('--sections', type=int, default=30, help='number of sections per host (default: 30)')
+    parser.add_argument('--repeat', type=int, default=15, help='number of rounds, best is kept (default: 15)')
+    args = parser.parse_args()
+    requests = build_requests(args.requests, args.hosts, args.sections)
+    costs = time_per_request({'legacy': run_legacy, 'scan': run_scan, 'section_table': run_section_table},
+                             requests, args.repeat)
+    for name, cost in costs.items():
+        print(f"{name:>14}: {cost:7.1f} ns/request ({costs['legacy'] / cost:.2f}x legacy)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Startup benchmark of the monitor: wall time of fresh interpreters running each startup path, up to the point
+where the monitor would start capturing, and the heavy modules each of them imported:
+    - interpreter: empty interpreter (baseline)
+    - main: import of src/main.py (argument parsing and the components always used)
+    - scapy: main, then the scapy sniffer built (scapy imported with the first sniffer, cf. ScapySniffer)
+    - raw: main, then the raw socket sniffer imported (building it requires the capture privileges)
+    - async: main, then the asyncio runtime imported (--runtime async)
+    - headless: main, then the export views of the --no-ui daemon built (--prometheus-port, --ndjson), the
+      metrics server started
+    - scapy.all: import of every scapy layer (the former startup path of the scapy sniffer, for comparison)
+Results are printed, and written as JSON with --json so that runs can be compared.
+
+Run from the repository root: python -m benchmarks.bench_startup --json results.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from statistics import median
+from time import perf_counter
+from typing import Any, Dict, List
+
+# modules whose import dominates the startup, reported when a path imported them
+HEAVY_MODULES = ('scapy', 'scapy.all', 'numpy', 'curses', 'asyncio', 'multiprocessing', 'http.server')
+
+PATHS: Dict[str, str] = {
+    'interpreter': "pass",
+    'main': "import src.main",
+    'scapy': "import src.main\n"
+             "from src.sniffers.scapy_sniffer import ScapySniffer\n"
+             "ScapySniffer(lambda http_info: None)",
+    'raw': "import src.main\n"
+           "import src.sniffers.raw_socket_sniffer",
+    'async': "import src.main\n"
+             "import src.controllers.async_controller",
+    'headless': "import os\n"
+                "import src.main\n"
+                "from src.views.multi_view import MultiView\n"
+                "from src.views.ndjson_view import NDJSONView\n"
+                "from src.views.prometheus_view import PrometheusView\n"
+                "MultiView([PrometheusView(port=0), NDJSONView(os.devnull)])",
+    'scapy.all': "import scapy.all",
+}
+
+# prints the heavy modules imported by a path, once it ran
+REPORT_MODULES = f"\nimport sys\nprint(','.join(module for module in {HEAVY_MODULES!r} if module in sys.modules))"
+
+
+def bench_path(code: str, repeat: int) -> Dict[str, Any]:
+    """
+    Median and best wall time of repeat fresh interpreters running code from the repository root,
+    and the heavy modules imported.
+    """
+    durations: List[float] = []
+    modules = ''
+    for _ in range(repeat):
+        start = perf_counter()
+        completed = subprocess.run([sys.executable, '-c', code + REPORT_MODULES], stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE, check=True, universal_newlines=True,
+                                   cwd=os.path.join(os.path.dirname(__file__), os.pardir))
+        durations.append(perf_counter() - start)
+        modules = completed.stdout.strip().splitlines()[-1] if completed.stdout.strip() else ''
+    return {'median_ms': median(durations) * 1e3, 'best_ms': min(durations) * 1e3,
+            'modules': [module for module in modules.split(',') if module]}
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    results = dict()
+    for name, code in PATHS.items():
+        if name in args.skip:
+            continue
+        try:
+            results[name] = bench_path(code, args.repeat)
+        except subprocess.CalledProcessError as error:
+            # e.g. scapy not installed
+            results[name] = {'error': error.stderr.strip().splitlines()[-1] if error.stderr.strip() else str(error)}
+    return {
+        'config': {'repeat': args.repeat},
+        'environment': {'python': platform.python_version(), 'implementation': platform.python_implementation(),
+                        'machine': platform.machine(), 'platform': platform.platform()},
+        'results': results,
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    for name, result in report['results'].items():
+        if 'error' in result:
+            print(f"startup {name:>12}: {result['error']}")
+            continue
+        print(f"startup {name:>12}: median {result['median_ms']:8.1f} ms   best {result['best_ms']:8.1f} ms   "
+              f"imports {', '.join(result['modules']) or '-'}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Startup time of the monitor, per startup path.')
+    parser.add_argument('--repeat', type=int, default=10, help='interpreters started per path (default: 10)')
+    parser.add_argument('--skip', default=[], nargs='*', choices=list(PATHS), help='startup paths not measured')
+    parser.add_argument('--json', default=None, dest='json_path', metavar='PATH',
+                        help="write the results as JSON to PATH ('-' for the standard output)")
+    args = parser.parse_args()
+    if args.repeat <= 0:
+        parser.error('--repeat must be positive')
+    report = run(args)
+    if args.json_path == '-':
+        json.dump(report, sys.stdout, indent=2)
+        print()
+        return
+    print_report(report)
+    if args.json_path is not None:
+        with open(args.json_path, 'w') as json_file:
+            json.dump(report, json_file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Synthetic HTTP traffic for the benchmarks: reproducible streams of timestamped HTTPInfo records, with a
+configurable request rate, number of sections and Zipf skew of the section popularity.
+"""
+import random
+from itertools import accumulate
+from typing import Iterator, List, Tuple
+
+from src.interfaces.abstract_collector import HTTPInfo
+
+METHODS = ['GET', 'POST', 'PUT', 'DELETE']
+METHOD_WEIGHTS = [70, 20, 7, 3]
+
+
+class TrafficGenerator:
+
+    def __init__(self,
+                 rate: float = 1000.0,
+                 nb_sections: int = 1000,
+                 zipf_skew: float = 1.0,
+                 nb_hosts: int = 20,
+                 mean_content_length: int = 500,
+                 start: float = 1_000_000.0,
+                 seed: int = 0):
+        """
+        :param rate: mean number of requests per second (Poisson arrivals)
+        :param nb_sections: number of distinct sections
+        :param zipf_skew: exponent s of the Zipf law: the k-th most popular section is hit in proportion to 1/k^s
+               (0 for uniformly hit sections)
+        :param nb_hosts: number of distinct hosts the sections are spread on
+        :param mean_content_length: mean content length of the requests (uniform between 0 and twice the mean)
+        :param start: timestamp of the beginning of the traffic
+        :param seed: seed of the random generator: equal parameters give equal streams
+        """
+        if rate <= 0 or nb_sections <= 0 or nb_hosts <= 0:
+            raise ValueError("rate, number of sections and number of hosts must be strictly positive")
+        self.rate = rate
+        self.nb_sections = nb_sections
+        self.zipf_skew = zipf_skew
+        self.nb_hosts = nb_hosts
+        self.mean_content_length = mean_content_length
+        self.start = start
+        self.seed = seed
+        self.section_weights: List[float] = list(accumulate(1.0 / rank ** zipf_skew
+                                                            for rank in range(1, nb_sections + 1)))
+
+    def section_of(self, rank: int) -> Tuple[str, str]:
+        """
+        Host and section path of the section of the given popularity rank (0 for the most popular one).
+        """
+        return f"www.site{rank % self.nb_hosts}.com", f"/section{rank}"
+
+    def generate(self, nb_requests: int) -> Iterator[Tuple[float, HTTPInfo]]:
+        """
+        Stream of nb_requests (timestamp, HTTP information) pairs, in increasing timestamps.
+        Strings are built for each request, as a sniffer decodes them from each packet.
+        """
+        rnd = random.Random(self.seed)
+        ranks = rnd.choices(range(self.nb_sections), cum_weights=self.section_weights, k=nb_requests)
+        methods = rnd.choices(METHODS, weights=METHOD_WEIGHTS, k=nb_requests)
+        timestamp = self.start
+        for index in range(nb_requests):
+            timestamp += rnd.expovariate(self.rate)
+            host, section_path = self.section_of(ranks[index])
+            yield timestamp, HTTPInfo(method=methods[index],
+                                      host=host,
+                                      path=f"{section_path}/page{rnd.randrange(100)}?id={index}",
+                                      content_length=rnd.randint(0, 2 * self.mean_content_length))
+
+    def build_request(self, http_info: HTTPInfo) -> bytes:
+        """
+        HTTP request (line, headers and body) carrying the given HTTP information, as sent on the wire.
+        """
+        return (f"{http_info.method} {http_info.path} HTTP/1.1\r\n"
+                f"Host: {http_info.host}\r\n"
+                f"User-Agent: benchmark\r\n"
+                f"Accept: */*\r\n"
+                f"Content-Length: {http_info.content_length}\r\n"
+                f"\r\n").encode('ascii') + b'0' * http_info.content_length
@@ -1,12 +1,19 @@
 from src.interfaces.abstract_alert_manager import AbstractAlertManager, AlertStatus, AlertInfo
-from time import time
+from src.interfaces.abstract_clock import AbstractClock
+from src.clocks.real_clock import RealClock
+from src.stores.snapshot import SnapshotReader, SnapshotWriter
 from typing import Optional
 
 
 class BasicAlertManager(AbstractAlertManager):
 
-    def __init__(self, traffic_limit: int):
+    def __init__(self, traffic_limit: int, clock: Optional[AbstractClock] = None):
+        """
+        :param traffic_limit: traffic threshold used for alerting
+        :param clock: timestamps the emitted alerts (defaults to RealClock)
+        """
         self.traffic_limit = traffic_limit
+        self.clock = clock if clock is not None else RealClock()
         self.status: AlertStatus = AlertStatus.NO_ALERT
 
     def get_alert_info(self, traffic: int) -> Optional[AlertInfo]:
@@ -39,5 +46,19 @@ class BasicAlertManager(AbstractAlertManager):
         if emit_alert:
             return AlertInfo(status=self.status,
                              traffic_value=traffic,
-                             timestamp=time())
+                             timestamp=self.clock.now())
         return None
+
+    def write_state(self, writer: SnapshotWriter) -> None:
+        writer.write_tag('BasicAlertManager')
+        writer.write_status(self.status)
+
+    def read_state(self, reader: SnapshotReader) -> None:
+        """
+        Restores the alert status written by write_state (e.g. still over the threshold after a restart).
+        """
+        reader.read_tag('BasicAlertManager')
+        self.status = reader.read_status()
+
+    def clear(self) -> None:
+        self.status = AlertStatus.NO_ALERT
@@ -0,0 +1,434 @@
+import json
+from math import ceil
+from operator import attrgetter
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.interfaces.abstract_alert_manager import AlertInfo, AlertRule, AlertStatus, RuleAggregation
+from src.interfaces.abstract_clock import AbstractClock
+from src.interfaces.abstract_collector import HTTPInfo, section_path_prefix
+from src.clocks.real_clock import RealClock
+from src.stores.snapshot import SnapshotReader, SnapshotWriter
+
+# metrics counted for the rules: key of the request counted (None for the totals) and whether bytes are counted
+METRICS: Dict[str, Tuple[Optional[Callable[[HTTPInfo], str]], bool]] = {
+    'bytes': (None, True),
+    'requests': (None, False),
+    'section_hits': (HTTPInfo.extract_section, False),
+    'section_bytes': (HTTPInfo.extract_section, True),
+    'host_bytes': (attrgetter('host'), True),
+    'host_requests': (attrgetter('host'), False),
+    'method_requests': (attrgetter('method'), False),
+}
+TOTAL_METRICS = [metric for metric, (key_of, _) in METRICS.items() if key_of is None]
+# metrics per section, which may be counted at another depth of the section hierarchy (cf. AlertRule.depth)
+SECTION_METRICS = ['section_hits', 'section_bytes']
+
+# alert states of the checks, as stored in the states array
+NO_ALERT, OVER_THRESHOLD, UNDER_THRESHOLD = 0, 1, 2
+STATUS_OF_STATE = [AlertStatus.NO_ALERT, AlertStatus.OVER_THRESHOLD, AlertStatus.UNDER_THRESHOLD]
+
+INITIAL_SERIES = 64  # columns of the counters matrix allocated at first, doubled when full
+# memory of the counters and window sums of the series counted at most, when the maximum number of series is not given
+MAX_COUNTERS_BYTES = 64 * 2 ** 20
+
+
+class RuleAlertManager:
+
+    def __init__(self, rules: Sequence[AlertRule], clock: Optional[AbstractClock] = None, bucket_width: int = 1,
+                 max_series: Optional[int] = None):
+        """
+        Evaluates many threshold rules (cf. AlertRule) at once, each with its own alert state (per section / host /
+        method for the rules applying to all of them).
+        Requests are counted per series (metric and key, e.g. the hits of a section) in time buckets: a NumPy
+        matrix of buckets x series stored in a ring, plus running sums of each distinct window of the rules for
+        all the series (a closing bucket is added to them, a bucket leaving a window is subtracted from it).
+        Evaluating the rules compares every (rule, series) check to its threshold and updates its state in a
+        single pass of array operations: no Python loop per rule or per series, except to build the alerts
+        actually emitted.
+        A series costs 8 bytes per bucket of the longest window and per distinct window (e.g. 4.8 kB for a 10
+        minutes window): series of a key which is idle over all the windows (and not over a threshold) are
+        evicted after each evaluation, and their columns reused by new series.
+        :param rules: alerting rules
+        :param clock: current time of the collected requests and of the emitted alerts (defaults to RealClock)
+        :param bucket_width: width of a bucket (in seconds, defaults to 1 second)
+        :param max_series: maximum number of series counted at once, requests of new series are not counted beyond
+               (defaults to the number of series whose counters fit in MAX_COUNTERS_BYTES)
+        """
+        for rule in rules:
+            if rule.metric not in METRICS or (rule.ratio_to is not None and rule.ratio_to not in TOTAL_METRICS):
+                raise ValueError(f"rule {rule.name}: unknown metric (metrics: {list(METRICS)}, "
+                                 f"ratios to: {TOTAL_METRICS})")
+            if rule.window <= 0:
+                raise ValueError(f"rule {rule.name}: window must be strictly positive")
+            if rule.depth is not None and (rule.metric not in SECTION_METRICS or rule.depth < 0):
+                raise ValueError(f"rule {rule.name}: depth of a section metric ({SECTION_METRICS}) must be positive")
+        self.rules = list(rules)
+        # series metric of each rule: the metric, at its depth if any (e.g. 'section_hits@2')
+        self.rule_metrics = [rule.metric if rule.depth is None else f"{rule.metric}@{rule.depth}"
+                             for rule in self.rules]
+        self.clock = clock if clock is not None else RealClock()
+        self.bucket_width = bucket_width
+        # distinct windows of the rules (in buckets), rule -> index of its window
+        self.window_buckets: List[int] = sorted({ceil(rule.window / bucket_width) for rule in self.rules})
+        self.rule_window = np.array([self.window_buckets.index(ceil(rule.window / bucket_width))
+                                     for rule in self.rules], dtype=np.intp)
+        self.rule_threshold = np.array([rule.threshold for rule in self.rules], dtype=np.float64)
+        self.rule_scale = np.array([1 / rule.window if rule.aggregation == RuleAggregation.MEAN
+                                    and rule.ratio_to is None else 1.0 for rule in self.rules], dtype=np.float64)
+        # buckets [open_number - window, open_number] are in a window (cf. get_total_traffic_over_period)
+        self.nb_buckets = max(self.window_buckets, default=0) + 1
+        if max_series is None:
+            max_series = MAX_COUNTERS_BYTES // (8 * (self.nb_buckets + len(self.window_buckets)))
+        self.max_series = max_series
+        self.counters = np.zeros((self.nb_buckets, INITIAL_SERIES), dtype=np.int64)
+        # bucket number stored in each slot of the ring, -1 if none
+        self.bucket_number = np.full(self.nb_buckets, -1, dtype=np.int64)
+        # sum of the buckets [open_number - window, open_number] of each window, by series
+        self.window_sums = np.zeros((len(self.window_buckets), INITIAL_SERIES), dtype=np.int64)
+        self.series_index: Dict[Tuple[str, Optional[str]], int] = dict()
+        # series of each column of the counters matrix, None for the columns of evicted series
+        self.series_keys: List[Optional[Tuple[str, Optional[str]]]] = []
+        # columns of evicted series, reused first
+        self.free_series: List[int] = []
+        self.nb_dropped_series = 0
+        self.nb_evicted_series = 0
+        # counts of the open bucket not yet added to the matrix, by series
+        self.pending: Dict[int, int] = dict()
+        self.open_number: Optional[int] = None
+        # metrics counted for each request
+        used_metrics = set(self.rule_metrics) | {rule.ratio_to for rule in self.rules} - {None}
+        self.tracked_metrics = [(metric,) + METRICS[metric] for metric in METRICS if metric in used_metrics]
+        for rule, metric in zip(self.rules, self.rule_metrics):
+            if rule.depth is not None and all(metric != tracked for tracked, _, _ in self.tracked_metrics):
+                self.tracked_metrics.append((metric, self._section_at(rule.depth), METRICS[rule.metric][1]))
+        # checks of a rule on a series, appended as series appear: rule, series, series of the ratio denominator
+        self.check_rule: List[int] = []
+        self.check_series: List[int] = []
+        self.check_denominator: List[int] = []
+        self.check_arrays: Optional[Tuple[np.ndarray, ...]] = None
+        self.states = np.zeros(0, dtype=np.int8)
+        # totals counted from the start (ratio denominators, never evicted)
+        self.total_metrics = [metric for metric in TOTAL_METRICS if metric in used_metrics]
+        for metric in self.total_metrics:
+            self._add_series(metric, None)
+
+    def collect_http_info(self, http_info: HTTPInfo) -> None:
+        number = int(self.clock.now() // self.bucket_width)
+        if self.open_number is None or number > self.open_number:
+            self._open_bucket(number)
+        pending = self.pending
+        series_index = self.series_index
+        for metric, key_of, counts_bytes in self.tracked_metrics:
+            key = key_of(http_info) if key_of is not None else None
+            series = series_index.get((metric, key))
+            if series is None:
+                series = self._add_series(metric, key)
+                if series is None:
+                    continue
+            pending[series] = pending.get(series, 0) + (http_info.content_length if counts_bytes else 1)
+
+    def collect_batch(self, http_infos: Sequence[HTTPInfo]) -> None:
+        """
+        Count a batch of requests at the current time: the bucket is checked once, and each tracked metric adds
+        its total per key of the batch to its series.
+        """
+        if not http_infos:
+            return
+        number = int(self.clock.now() // self.bucket_width)
+        if self.open_number is None or number > self.open_number:
+            self._open_bucket(number)
+        pending = self.pending
+        series_index = self.series_index
+        for metric, key_of, counts_bytes in self.tracked_metrics:
+            totals: Dict[Optional[str], int] = {}
+            for http_info in http_infos:
+                key = key_of(http_info) if key_of is not None else None
+                totals[key] = totals.get(key, 0) + (http_info.content_length if counts_bytes else 1)
+            for key, total in totals.items():
+                series = series_index.get((metric, key))
+                if series is None:
+                    series = self._add_series(metric, key)
+                    if series is None:
+                        continue
+                pending[series] = pending.get(series, 0) + total
+
+    def get_alert_infos(self) -> List[AlertInfo]:
+        """
+        Evaluates all the rules as of now, and emits alert information for the checks crossing their threshold.
+        :return: alerts emitted, in the order of the rules
+        """
+        timestamp = self.clock.now()
+        number = int(timestamp // self.bucket_width)
+        if self.open_number is None or number > self.open_number:
+            self._open_bucket(number)
+        else:
+            self._flush()
+        if not self.check_rule:
+            return []
+        check_rule, check_series, check_denominator, check_window, has_denominator = self._checks()
+        values = self.window_sums[check_window, check_series] * self.rule_scale[check_rule]
+        denominators = self.window_sums[check_window, check_denominator]
+        values = np.where(has_denominator,
+                          np.divide(values, denominators, out=np.zeros_like(values), where=denominators > 0),
+                          values)
+        over = values > self.rule_threshold[check_rule]
+        was_over = self.states == OVER_THRESHOLD
+        # NO_ALERT / UNDER_THRESHOLD -> OVER_THRESHOLD when over, OVER_THRESHOLD -> UNDER_THRESHOLD when not,
+        # UNDER_THRESHOLD -> NO_ALERT when still not over
+        emitted = np.flatnonzero(over != was_over)
+        # checks are in the order their series appeared: alerts are sorted by rule
+        emitted = emitted[np.argsort(check_rule[emitted], kind='stable')]
+        self.states = np.where(over, OVER_THRESHOLD, np.where(was_over, UNDER_THRESHOLD, NO_ALERT)).astype(np.int8)
+        alerts = []
+        for check in emitted.tolist():
+            value = float(values[check])
+            _, key = self.series_keys[self.check_series[check]]
+            alerts.append(AlertInfo(status=STATUS_OF_STATE[self.states[check]],
+                                    traffic_value=int(value) if value.is_integer() else round(value, 3),
+                                    timestamp=timestamp,
+                                    rule=self.rules[self.check_rule[check]].name,
+                                    key=key))
+        self._evict_idle_series()
+        return alerts
+
+    @property
+    def nb_series(self) -> int:
+        """
+        Number of series counted (evicted series excepted).
+        """
+        return len(self.series_index)
+
+    def write_state(self, writer: SnapshotWriter) -> None:
+        writer.write_tag('RuleAlertManager')
+        writer.write_strings(rule.name for rule in self.rules)
+        writer.write_ints([self.bucket_width] + self.window_buckets)
+        # columns of evicted series as an empty metric
+        series_keys = [series_key if series_key is not None else ('', None) for series_key in self.series_keys]
+        writer.write_strings(metric for metric, _ in series_keys)
+        writer.write_ints(key is not None for _, key in series_keys)
+        writer.write_strings(key for _, key in series_keys if key is not None)
+        writer.write_ints([self.nb_dropped_series, self.nb_evicted_series])
+        writer.write_optional_int(self.open_number)
+        writer.write_ints(self.bucket_number.tolist())
+        nb_series = len(self.series_keys)
+        writer.write_ints(self.counters[:, :nb_series].ravel().tolist())
+        writer.write_ints(self.window_sums[:, :nb_series].ravel().tolist())
+        writer.write_ints(self.pending)
+        writer.write_ints(self.pending.values())
+        writer.write_ints(self.check_rule)
+        writer.write_ints(self.check_series)
+        writer.write_ints(self.states.tolist())
+
+    def read_state(self, reader: SnapshotReader) -> None:
+        """
+        Restores the series, counters and alert states of the checks written by write_state: the series are
+        added again in the same columns, and the checks in the same order.
+        :raise ValueError: if the snapshot is not the one of the same rules (names and windows)
+        """
+        reader.read_tag('RuleAlertManager')
+        names, configuration = reader.read_strings(), reader.read_ints().tolist()
+        if names != [rule.name for rule in self.rules] or configuration != [self.bucket_width] + self.window_buckets:
+            raise ValueError(f"snapshot of the rules {names} instead of {[rule.name for rule in self.rules]}")
+        metrics, has_keys = reader.read_strings(), reader.read_ints()
+        keys = iter(reader.read_strings())
+        self._clear_series()
+        for metric, has_key in zip(metrics, has_keys):
+            key = next(keys) if has_key else None
+            series = self._allocate_series()
+            if metric:
+                self.series_index[(metric, key)] = series
+                self.series_keys.append((metric, key))
+            else:
+                self.series_keys.append(None)
+                self.free_series.append(series)
+        nb_series = len(self.series_keys)
+        self.nb_dropped_series, self.nb_evicted_series = reader.read_ints().tolist()
+        self.open_number = reader.read_optional_int()
+        self.bucket_number = np.array(reader.read_ints(), dtype=np.int64)
+        self.counters[:, :nb_series] = np.array(reader.read_ints(), dtype=np.int64).reshape(self.nb_buckets, -1)
+        self.window_sums[:, :nb_series] = np.array(reader.read_ints(), dtype=np.int64).reshape(
+            len(self.window_buckets), -1)
+        series = reader.read_ints()
+        self.pending = dict(zip(series, reader.read_ints()))
+        self.check_rule.extend(reader.read_ints().tolist())
+        self.check_series.extend(reader.read_ints().tolist())
+        self.check_denominator.extend(self._denominator(self.rules[rule_index]) for rule_index in self.check_rule)
+        self.states = np.array(reader.read_ints(), dtype=np.int8)
+        if len(self.states) != len(self.check_rule):
+            raise ValueError("snapshot of the rule alert manager is inconsistent")
+
+    def clear(self) -> None:
+        """
+        Forget every series, count and alert state, as when the manager was created (e.g. after a snapshot
+        which could not be restored).
+        """
+        self._clear_series()
+        for metric in self.total_metrics:
+            self._add_series(metric, None)
+
+    def _clear_series(self) -> None:
+        """
+        Forget every series (the totals included), count and alert state.
+        """
+        self.series_index.clear()
+        self.series_keys.clear()
+        self.free_series.clear()
+        self.nb_dropped_series = 0
+        self.nb_evicted_series = 0
+        self.check_rule.clear()
+        self.check_series.clear()
+        self.check_denominator.clear()
+        self.check_arrays = None
+        self.states = np.zeros(0, dtype=np.int8)
+        self.counters = np.zeros((self.nb_buckets, INITIAL_SERIES), dtype=np.int64)
+        self.window_sums = np.zeros((len(self.window_buckets), INITIAL_SERIES), dtype=np.int64)
+        self.bucket_number[:] = -1
+        self.pending.clear()
+        self.open_number = None
+
+    def _add_series(self, metric: str, key: Optional[str]) -> Optional[int]:
+        """
+        Start counting a series, in the column of an evicted series if any, with the checks of the rules
+        applying to it.
+        :return: column of the series in the counters matrix, None if the maximum number of series is reached
+        """
+        if len(self.series_index) >= self.max_series:
+            self.nb_dropped_series += 1
+            return None
+        if self.free_series:
+            # counts of an evicted series are all zero
+            series = self.free_series.pop()
+            self.series_keys[series] = (metric, key)
+        else:
+            series = self._allocate_series()
+            self.series_keys.append((metric, key))
+        self.series_index[(metric, key)] = series
+        for rule_index, rule in enumerate(self.rules):
+            if self.rule_metrics[rule_index] == metric and (rule.key is None or rule.key == key):
+                self.check_rule.append(rule_index)
+                self.check_series.append(series)
+                self.check_denominator.append(self._denominator(rule))
+                self.check_arrays = None
+        return series
+
+    def _allocate_series(self) -> int:
+        """
+        Column of a new series at the end of the counters matrix, grown if full.
+        """
+        series = len(self.series_keys)
+        if series == self.counters.shape[1]:
+            capacity = max(min(2 * series, self.max_series), series + 1)
+            self.counters = np.pad(self.counters, ((0, 0), (0, capacity - series)))
+            self.window_sums = np.pad(self.window_sums, ((0, 0), (0, capacity - series)))
+        return series
+
+    def _denominator(self, rule: AlertRule) -> int:
+        """
+        Series of the ratio denominator of a rule, -1 if none.
+        """
+        return self.series_index[(rule.ratio_to, None)] if rule.ratio_to is not None else -1
+
+    def _evict_idle_series(self) -> None:
+        """
+        Evict the series of keys without requests over all the windows, unless one of their checks is over its
+        threshold (its recovery alert is still to be emitted): their columns are free for new series, and their
+        checks removed. The totals are never evicted. O(series) vectorized per evaluation.
+        """
+        nb_columns = len(self.series_keys)
+        idle = ~self.window_sums[:, :nb_columns].any(axis=0)
+        if not idle.any():
+            return
+        idle[self.free_series] = False
+        idle[list(self.pending)] = False
+        for metric in TOTAL_METRICS:
+            # totals are the ratio denominators
+            total_series = self.series_index.get((metric, None))
+            if total_series is not None:
+                idle[total_series] = False
+        check_series = self._checks()[1] if self.check_rule else np.zeros(0, dtype=np.intp)
+        idle[check_series[self.states == OVER_THRESHOLD]] = False
+        evicted = np.flatnonzero(idle).tolist()
+        if not evicted:
+            return
+        for series in evicted:
+            del self.series_index[self.series_keys[series]]
+            self.series_keys[series] = None
+        self.free_series.extend(evicted)
+        self.nb_evicted_series += len(evicted)
+        kept = ~idle[check_series]
+        kept_checks = np.flatnonzero(kept).tolist()
+        self.check_rule = [self.check_rule[check] for check in kept_checks]
+        self.check_series = [self.check_series[check] for check in kept_checks]
+        self.check_denominator = [self.check_denominator[check] for check in kept_checks]
+        self.states = self.states[kept]
+        self.check_arrays = None
+
+    @staticmethod
+    def _section_at(depth: int) -> Callable[[HTTPInfo], str]:
+        """
+        Key of the requests for the section metrics at depth: host and path prefix of depth segments.
+        """
+        return lambda http_info: http_info.host + section_path_prefix(http_info.path, depth)
+
+    def _checks(self) -> Tuple[np.ndarray, ...]:
+        """
+        Arrays of the checks (rebuilt only after new checks were appended), states of new checks are NO_ALERT.
+        """
+        if self.check_arrays is None:
+            check_rule = np.array(self.check_rule, dtype=np.intp)
+            check_denominator = np.array(self.check_denominator, dtype=np.intp)
+            self.check_arrays = (check_rule, np.array(self.check_series, dtype=np.intp),
+                                 np.maximum(check_denominator, 0), self.rule_window[check_rule],
+                                 check_denominator >= 0)
+            self.states = np.concatenate([self.states, np.zeros(len(check_rule) - len(self.states), dtype=np.int8)])
+        return self.check_arrays
+
+    def _flush(self) -> None:
+        """
+        Add the counts of the open bucket to the counters matrix and to the window sums.
+        """
+        if self.pending:
+            series = np.fromiter(self.pending.keys(), dtype=np.intp, count=len(self.pending))
+            counts = np.fromiter(self.pending.values(), dtype=np.int64, count=len(self.pending))
+            self.counters[self.open_number % self.nb_buckets, series] += counts
+            self.window_sums[:, series] += counts
+            self.pending.clear()
+
+    def _open_bucket(self, number: int) -> None:
+        """
+        Close the open bucket and open the bucket number: buckets leaving the windows are subtracted from their
+        sums, then the ring slots of the buckets opened are cleared. O(series) per bucket opened.
+        """
+        if self.open_number is not None:
+            self._flush()
+        if self.open_number is None or number - self.open_number >= self.nb_buckets:
+            # all the buckets left the windows
+            self.counters[:] = 0
+            self.window_sums[:] = 0
+            self.bucket_number[:] = -1
+            self.bucket_number[number % self.nb_buckets] = number
+        else:
+            for opened_number in range(self.open_number + 1, number + 1):
+                for window_index, nb_window_buckets in enumerate(self.window_buckets):
+                    leaving_number = opened_number - nb_window_buckets - 1
+                    leaving_slot = leaving_number % self.nb_buckets
+                    if self.bucket_number[leaving_slot] == leaving_number:
+                        self.window_sums[window_index] -= self.counters[leaving_slot]
+                slot = opened_number % self.nb_buckets
+                self.counters[slot] = 0
+                self.bucket_number[slot] = opened_number
+        self.open_number = number
+
+
+def load_rules(rules_path: str) -> List[AlertRule]:
+    """
+    Read alerting rules from a JSON file: a list of objects with the fields of AlertRule, the aggregation
+    being "sum" or "mean", e.g.
+    [{"name": "section rate", "metric": "section_hits", "threshold": 5, "window": 60, "aggregation": "mean"}]
+    """
+    with open(rules_path) as rules_file:
+        rules = json.load(rules_file)
+    return [AlertRule(**{**rule, 'aggregation': RuleAggregation[rule.get('aggregation', 'sum').upper()]})
+            for rule in rules]
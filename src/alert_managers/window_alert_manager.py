@@ -0,0 +1,148 @@
+from dataclasses import replace
+from math import ceil
+from typing import Dict, List, Optional, Sequence
+from src.interfaces.abstract_alert_manager import AlertInfo, AlertStatus
+from src.interfaces.abstract_clock import AbstractClock
+from src.interfaces.abstract_collector import HTTPInfo
+from src.alert_managers.basic_alert_manager import BasicAlertManager
+from src.clocks.real_clock import RealClock
+from src.stores.snapshot import SnapshotReader, SnapshotWriter
+
+
+class WindowAlertManager:
+
+    def __init__(self, traffic_limit: int, history_span: int = 120, bucket_width: int = 1,
+                 clock: Optional[AbstractClock] = None):
+        """
+        Alerts on the traffic over the last history_span seconds, evaluated on every bucket boundary (every second
+        by default) as the traffic is collected, instead of on every update of the view.
+        The traffic of the window is a running sum: the traffic of each request is added to it, and the traffic of
+        a bucket is subtracted from it when the bucket leaves the window, so that an evaluation is O(1). The alert
+        states are the ones of BasicAlertManager, evaluated on the window ending on each boundary.
+        Alerts are timestamped with the time the traffic actually crossed the limit: the request making the window
+        go over it, or the boundary where a bucket leaving the window made it go back under.
+        :param traffic_limit: traffic threshold used for alerting (in bytes)
+        :param history_span: span of the traffic window (in seconds, defaults to 2 minutes)
+        :param bucket_width: width of a bucket, i.e. time between two evaluations (in seconds, defaults to 1 second)
+        :param clock: time of the collected requests (defaults to RealClock)
+        """
+        if history_span <= 0 or bucket_width <= 0:
+            raise ValueError("history span and bucket width must be strictly positive")
+        self.traffic_limit = traffic_limit
+        self.bucket_width = bucket_width
+        self.clock = clock if clock is not None else RealClock()
+        self.alert_manager = BasicAlertManager(traffic_limit=traffic_limit, clock=self.clock)
+        # the window ending on a boundary is made of the nb_buckets buckets before it
+        self.nb_buckets = ceil(history_span / bucket_width)
+        self.bucket_traffic: List[int] = [0] * self.nb_buckets
+        # traffic of the buckets [open_number - nb_buckets + 1, open_number]
+        self.window_traffic = 0
+        self.open_number: Optional[int] = None
+        # capture time of the request which made the window go over the limit, if any since the last boundary
+        self.crossing_timestamp: Optional[float] = None
+        self.pending_alerts: List[AlertInfo] = []
+
+    def collect_http_info(self, http_info: HTTPInfo) -> None:
+        self.add_traffic(self.clock.now(), http_info.content_length)
+
+    def collect_batch(self, http_infos: Sequence[HTTPInfo]) -> None:
+        """
+        Count the traffic of a batch of requests at the current time, in a single addition.
+        """
+        if http_infos:
+            self.add_traffic(self.clock.now(), sum(http_info.content_length for http_info in http_infos))
+
+    def add_traffic(self, timestamp: float, traffic_len: int) -> None:
+        number = int(timestamp // self.bucket_width)
+        if self.open_number is None or number > self.open_number:
+            self.advance(timestamp)
+        self.bucket_traffic[self.open_number % self.nb_buckets] += traffic_len
+        self.window_traffic += traffic_len
+        if self.crossing_timestamp is None and self.window_traffic > self.traffic_limit \
+                and self.alert_manager.status != AlertStatus.OVER_THRESHOLD:
+            self.crossing_timestamp = timestamp
+
+    def advance(self, timestamp: float) -> None:
+        """
+        Evaluate the alert on the boundaries up to timestamp, closing the buckets before them.
+        Costs O(1) per boundary; once the window is empty and without alert, the boundaries left are skipped.
+        """
+        number = int(timestamp // self.bucket_width)
+        if self.open_number is None:
+            self.open_number = number
+            return
+        while self.open_number < number:
+            boundary = float((self.open_number + 1) * self.bucket_width)
+            alert_info = self.alert_manager.get_alert_info(self.window_traffic)
+            if alert_info is not None:
+                crossing_timestamp = self.crossing_timestamp \
+                    if alert_info.status == AlertStatus.OVER_THRESHOLD and self.crossing_timestamp is not None \
+                    else boundary
+                self.pending_alerts.append(replace(alert_info, timestamp=crossing_timestamp))
+            self.crossing_timestamp = None
+            # open the next bucket: the oldest one leaves the window
+            self.open_number += 1
+            slot = self.open_number % self.nb_buckets
+            self.window_traffic -= self.bucket_traffic[slot]
+            self.bucket_traffic[slot] = 0
+            if self.window_traffic == 0 and self.alert_manager.status == AlertStatus.NO_ALERT:
+                # later boundaries cannot raise an alert
+                self.bucket_traffic = [0] * self.nb_buckets
+                self.open_number = number
+
+    def restore(self, traffic_per_bucket: Dict[int, int]) -> None:
+        """
+        Warm restart: rebuilds the window from the traffic of its buckets (keyed by their first second), and
+        the alert state at the end of the last one. The alerts of the restored traffic are not emitted again.
+        """
+        if not traffic_per_bucket:
+            return
+        for timestamp, traffic_len in sorted(traffic_per_bucket.items()):
+            self.add_traffic(timestamp, traffic_len)
+        self.advance((self.open_number + 1) * self.bucket_width)
+        self.pending_alerts = []
+
+    def write_state(self, writer: SnapshotWriter) -> None:
+        writer.write_tag('WindowAlertManager')
+        writer.write_ints([self.bucket_width, self.nb_buckets])
+        writer.write_ints(self.bucket_traffic)
+        writer.write_int(self.window_traffic)
+        writer.write_optional_int(self.open_number)
+        writer.write_optional_float(self.crossing_timestamp)
+        writer.write_alert_infos(self.pending_alerts)
+        self.alert_manager.write_state(writer)
+
+    def read_state(self, reader: SnapshotReader) -> None:
+        """
+        Hot restore: the window and the alert state are the ones written by write_state, the boundaries since
+        then are evaluated on the next call to get_alert_infos.
+        :raise ValueError: if the snapshot is not the one of a window of the same span and bucket width
+        """
+        reader.read_tag('WindowAlertManager')
+        configuration = reader.read_ints().tolist()
+        if configuration != [self.bucket_width, self.nb_buckets]:
+            raise ValueError(f"snapshot of a window of {configuration[1]} buckets of {configuration[0]} seconds "
+                             f"instead of {self.nb_buckets} buckets of {self.bucket_width} seconds")
+        self.bucket_traffic = reader.read_ints().tolist()
+        self.window_traffic = reader.read_int()
+        self.open_number = reader.read_optional_int()
+        self.crossing_timestamp = reader.read_optional_float()
+        self.pending_alerts = reader.read_alert_infos()
+        self.alert_manager.read_state(reader)
+
+    def get_alert_infos(self) -> List[AlertInfo]:
+        """
+        Evaluates the alert on the boundaries up to now, and returns the alerts emitted since the last call.
+        :return: alerts emitted, oldest first
+        """
+        self.advance(self.clock.now())
+        alert_infos, self.pending_alerts = self.pending_alerts, []
+        return alert_infos
+
+    def clear(self) -> None:
+        self.bucket_traffic = [0] * self.nb_buckets
+        self.window_traffic = 0
+        self.open_number = None
+        self.crossing_timestamp = None
+        self.pending_alerts = []
+        self.alert_manager.status = AlertStatus.NO_ALERT
@@ -0,0 +1,25 @@
+from threading import Event
+
+from src.interfaces.abstract_clock import AbstractClock
+
+POLL_PERIOD = 0.01  # seconds between two checks of the clock by a waiting thread
+
+
+class PacketClock(AbstractClock):
+    """
+    Clock following the timestamps of the captured packets: set by the sniffer to the capture time of each
+    packet before relaying it (cf. PcapSniffer), so that the components using it see the capture time.
+    """
+
+    def __init__(self, timestamp: float = 0.0):
+        self.timestamp = timestamp
+
+    def now(self) -> float:
+        return self.timestamp
+
+    def wait_until(self, deadline: float, stop_event: Event) -> bool:
+        # the clock only moves when packets are captured: polled rather than notified for every packet
+        while self.timestamp < deadline:
+            if stop_event.wait(POLL_PERIOD):
+                return False
+        return not stop_event.is_set()
@@ -0,0 +1,19 @@
+from threading import Event
+from time import time
+
+from src.interfaces.abstract_clock import AbstractClock
+
+
+class RealClock(AbstractClock):
+    """
+    Wall clock time.
+    """
+
+    def now(self) -> float:
+        return time()
+
+    def wait_until(self, deadline: float, stop_event: Event) -> bool:
+        remaining = deadline - time()
+        if remaining > 0:
+            return not stop_event.wait(remaining)
+        return not stop_event.is_set()
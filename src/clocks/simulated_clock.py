@@ -0,0 +1,25 @@
+from threading import Event
+
+from src.interfaces.abstract_clock import AbstractClock
+
+
+class SimulatedClock(AbstractClock):
+    """
+    Clock moved forward explicitly (cf. advance), or by waiting on it: waiting for a deadline jumps to it
+    immediately, so that periodic work runs at full CPU speed (e.g. in tests).
+    """
+
+    def __init__(self, timestamp: float = 0.0):
+        self.timestamp = timestamp
+
+    def now(self) -> float:
+        return self.timestamp
+
+    def advance(self, seconds: float) -> None:
+        self.timestamp += seconds
+
+    def wait_until(self, deadline: float, stop_event: Event) -> bool:
+        if stop_event.is_set():
+            return False
+        self.timestamp = max(self.timestamp, deadline)
+        return True
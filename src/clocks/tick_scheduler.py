@@ -0,0 +1,58 @@
+from math import floor
+from threading import Event
+from typing import Iterator, Optional
+
+from src.interfaces.abstract_clock import AbstractClock
+
+
+class TickScheduler:
+
+    def __init__(self, clock: AbstractClock, period: float, start: Optional[float] = None):
+        """
+        Schedules periodic ticks on fixed boundaries: the ticks are the multiples of period following start,
+        whatever the time spent handling each tick (no drift), and traffic windows ending on a tick are aligned
+        on the traffic history buckets.
+        :param clock: clock the ticks are scheduled on
+        :param period: time between two ticks (in seconds)
+        :param start: time the first tick follows (defaults to the current time of the clock)
+        """
+        if period <= 0:
+            raise ValueError("tick period must be strictly positive")
+        self.clock = clock
+        self.period = period
+        start = start if start is not None else clock.now()
+        # ticks are computed from their index rather than accumulated, so that rounding errors do not add up
+        self.next_index = floor(start / period) + 1
+        self.nb_skipped_ticks = 0
+
+    @property
+    def next_tick(self) -> float:
+        return self.next_index * self.period
+
+    def wait_next_tick(self, stop_event: Event) -> Optional[float]:
+        """
+        Waits for the next tick. If handling the previous tick took more than a period, the ticks already
+        passed are skipped (cf. nb_skipped_ticks) rather than fired in a burst.
+        :param stop_event: interrupts the wait when set
+        :return: time of the tick, or None if the wait was interrupted by stop_event
+        """
+        missed = floor(self.clock.now() / self.period) - self.next_index
+        if missed > 0:
+            self.next_index += missed
+            self.nb_skipped_ticks += missed
+        tick = self.next_tick
+        if not self.clock.wait_until(tick, stop_event):
+            return None
+        self.next_index += 1
+        return tick
+
+    def due_ticks(self, now: float) -> Iterator[float]:
+        """
+        Returns the ticks up to now, for a time driven by events instead of waits (e.g. the capture time of a replay).
+        :param now: current time
+        :return: iterator over the times of the due ticks, in order
+        """
+        while self.next_tick <= now:
+            tick = self.next_tick
+            self.next_index += 1
+            yield tick
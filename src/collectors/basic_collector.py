@@ -1,67 +1,73 @@
-from src.interfaces.abstract_collector import AbstractCollector, HitInfo, HTTPInfo
-from dataclasses import dataclass
-from typing import List, Dict
-from time import time
+from src.interfaces.abstract_clock import AbstractClock
+from src.collectors.section_collector import SectionCollector
+from src.stores.snapshot import SnapshotReader, SnapshotWriter
+from bisect import bisect_right
+from collections import deque
+from typing import Optional, Deque, Dict, Iterable
 
 
-@dataclass(frozen=True)
-class TrafficInfo:
-    """
-    Used only internally to this module.
-    """
-    timestamp: float
-    traffic_len: int
+class BasicCollector(SectionCollector):
 
+    state_tag = 'BasicCollector'
 
-class BasicCollector(AbstractCollector):
-
-    def __init__(self, history_span: int = 120):
+    def __init__(self, history_span: int = 120, clock: Optional[AbstractClock] = None,
+                 window_spans: Iterable[int] = (), max_sections: int = 100000):
         """
-        Collect traffic information.
+        Collect traffic information, keeping the traffic history as a list of timestamped traffic lengths.
         :param history_span: number of seconds history of traffic is kept
+        :param clock: current time of the collected requests and of the traffic periods (defaults to RealClock)
+        :param window_spans: spans (in seconds) of the sliding windows over which highest hits can also be read
+               (cf. get_highest_hits), e.g. the update period, 2 and 10 minutes
+        :param max_sections: maximum number of sections counted, outside of the sliding windows
+               (cf. SectionCollector)
         """
-        self.http_container: Dict[str, HitInfo] = dict()
-        self.total_traffic = 0
-        self.traffic_history: List[TrafficInfo] = []
-        self.history_span = history_span
+        super().__init__(history_span=history_span, clock=clock, window_spans=window_spans,
+                         max_sections=max_sections)
+        # traffic history as parallel queues of request timestamps and traffic lengths (oldest first)
+        self.history_timestamps: Deque[float] = deque()
+        self.history_traffic: Deque[int] = deque()
 
-    def get_total_traffic(self) -> int:
-        return self.total_traffic
+    def get_total_traffic_over_period(self, span: int) -> int:
+        current_timestamp: float = self.clock.now()
+        total = 0
+        for timestamp, traffic_len in zip(reversed(self.history_timestamps), reversed(self.history_traffic)):
+            if timestamp < current_timestamp - span:
+                break
+            total += traffic_len
+        return total
 
-    def get_highest_hits(self) -> List[HitInfo]:
-        """
-        Return highest hits sorted by number of hits
-        :return:
-        """
-        hits: List[HitInfo] = list(self.http_container.values())
-        return sorted(hits, key=lambda hit_info: -hit_info.nb_hits)
+    def _add_history(self, current_timestamp: float, traffic_len: int) -> None:
+        self.history_timestamps.append(current_timestamp)
+        self.history_traffic.append(traffic_len)
+        self._expire_history(current_timestamp)
 
-    def collect_http_info(self, http_info: HTTPInfo) -> None:
-        section = http_info.extract_section()
-        if section in self.http_container:
-            current_hit_info: HitInfo = self.http_container[section]
-            self.http_container[section] = current_hit_info.add(section, http_info)
-        else:
-            self.http_container[section] = HitInfo().add(section, http_info)
-        content_length = http_info.content_length
-        self.total_traffic += content_length
-        self.__add_to_traffic_history(content_length)
+    def _merge_history(self, traffic_per_second: Dict[int, int]) -> None:
+        # traffic of each second is inserted at its place in the (sorted) history: at its end unless a worker lags
+        for second, traffic_len in sorted(traffic_per_second.items()):
+            if not self.history_timestamps or second >= self.history_timestamps[-1]:
+                self.history_timestamps.append(float(second))
+                self.history_traffic.append(traffic_len)
+            else:
+                index = bisect_right(self.history_timestamps, second)
+                self.history_timestamps.insert(index, float(second))
+                self.history_traffic.insert(index, traffic_len)
+        if self.history_timestamps:
+            self._expire_history(self.history_timestamps[-1])
 
-    def clear(self, clear_history:bool = False) -> None:
-        self.http_container.clear()
-        self.total_traffic = 0
-        if clear_history:
-            self.traffic_history = []
+    def _expire_history(self, current_timestamp: float) -> None:
+        # history is sorted by timestamp: expired traffic is at the head of the queues
+        while self.history_timestamps and self.history_timestamps[0] <= current_timestamp - self.history_span:
+            self.history_timestamps.popleft()
+            self.history_traffic.popleft()
 
-    def __add_to_traffic_history(self, traffic_len: int) -> None:
-        current_timestamp: float = time()
-        self.traffic_history.append(TrafficInfo(timestamp=current_timestamp, traffic_len=traffic_len))
-        self.traffic_history = \
-            list(filter(lambda traffic_info: traffic_info.timestamp > current_timestamp - self.history_span,
-                        self.traffic_history))
+    def _write_history(self, writer: SnapshotWriter) -> None:
+        writer.write_floats(self.history_timestamps)
+        writer.write_ints(self.history_traffic)
 
-    def get_total_traffic_over_period(self, span: int) -> int:
-        current_timestamp: float = time()
-        return sum([traffic_info.traffic_len for traffic_info in
-                    filter(lambda traffic_info: traffic_info.timestamp >= current_timestamp - span,
-                           self.traffic_history)])
+    def _read_history(self, reader: SnapshotReader) -> None:
+        self.history_timestamps = deque(reader.read_floats())
+        self.history_traffic = deque(reader.read_ints())
+
+    def _clear_history(self) -> None:
+        self.history_timestamps.clear()
+        self.history_traffic.clear()
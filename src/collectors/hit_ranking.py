@@ -0,0 +1,186 @@
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+
+class _CountBucket:
+    """
+    Used only internally to this module: keys sharing the same count.
+    Keys are stored in a dict used as an insertion-ordered set.
+    """
+    __slots__ = ('count', 'keys', 'higher', 'lower')
+
+    def __init__(self, count: int):
+        self.count = count
+        self.keys: Dict[Hashable, None] = dict()
+        self.higher: Optional[_CountBucket] = None
+        self.lower: Optional[_CountBucket] = None
+
+
+class HitRanking:
+
+    def __init__(self):
+        """
+        Keeps keys ranked by number of hits, updated as hits arrive (stream-summary structure):
+        buckets of keys sharing the same count form a doubly linked list sorted by count, so that
+        incrementing (or decrementing) a key is O(1) and reading the k highest keys is O(k).
+        """
+        self.bucket_of: Dict[Hashable, _CountBucket] = dict()
+        self.highest: Optional[_CountBucket] = None
+        self.lowest: Optional[_CountBucket] = None
+
+    def __len__(self) -> int:
+        return len(self.bucket_of)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.bucket_of
+
+    def count(self, key: Hashable) -> int:
+        bucket = self.bucket_of.get(key)
+        return bucket.count if bucket is not None else 0
+
+    def increment(self, key: Hashable, amount: int = 1) -> int:
+        """
+        Add hits to key (inserted if unknown). O(1) for a single hit, otherwise proportional to the number of
+        distinct counts skipped.
+        :param key: ranked key
+        :param amount: number of hits added (strictly positive)
+        :return: new count of key
+        """
+        bucket = self.bucket_of.get(key)
+        count = amount if bucket is None else bucket.count + amount
+        below = bucket
+        candidate = self.lowest if bucket is None else bucket.higher
+        while candidate is not None and candidate.count < count:
+            below = candidate
+            candidate = candidate.higher
+        if candidate is not None and candidate.count == count:
+            target = candidate
+        else:
+            target = self._insert_above(below, count)
+        if bucket is not None:
+            self._discard(bucket, key)
+        target.keys[key] = None
+        self.bucket_of[key] = target
+        return count
+
+    def decrement(self, key: Hashable, amount: int = 1) -> int:
+        """
+        Remove hits from key (removed from the ranking when its count drops to 0), e.g. when hits expire.
+        O(1) for a single hit, otherwise proportional to the number of distinct counts skipped.
+        :param key: ranked key
+        :param amount: number of hits removed (strictly positive, at most the count of key)
+        :return: new count of key
+        """
+        bucket = self.bucket_of[key]
+        count = bucket.count - amount
+        if count <= 0:
+            self._discard(bucket, key)
+            del self.bucket_of[key]
+            return 0
+        candidate = bucket.lower
+        while candidate is not None and candidate.count > count:
+            candidate = candidate.lower
+        if candidate is not None and candidate.count == count:
+            target = candidate
+        else:
+            target = self._insert_above(candidate, count)
+        self._discard(bucket, key)
+        target.keys[key] = None
+        self.bucket_of[key] = target
+        return count
+
+    def top(self, k: int) -> List[Tuple[Hashable, int]]:
+        """
+        Return the k keys with the highest counts, highest first
+        (keys with equal counts are ordered by the time they reached that count).
+        :param k: maximum number of keys returned
+        :return: list of (key, count)
+        """
+        leaders: List[Tuple[Hashable, int]] = []
+        bucket = self.highest
+        while bucket is not None and len(leaders) < k:
+            for key in bucket.keys:
+                if len(leaders) == k:
+                    break
+                leaders.append((key, bucket.count))
+            bucket = bucket.lower
+        return leaders
+
+    def remove_lowest(self) -> Tuple[Hashable, int]:
+        """
+        Remove the key with the lowest count (the oldest one to reach that count), in O(1).
+        :return: (key, count) of the removed key
+        """
+        if self.lowest is None:
+            raise KeyError("remove_lowest from an empty ranking")
+        bucket = self.lowest
+        key = next(iter(bucket.keys))
+        count = bucket.count
+        self._discard(bucket, key)
+        del self.bucket_of[key]
+        return key, count
+
+    def counts(self) -> List[Tuple[Hashable, int]]:
+        """
+        Return all the keys with their counts, lowest first (keys with equal counts in the order of top),
+        e.g. to be loaded in another ranking (cf. load).
+        :return: list of (key, count)
+        """
+        counts: List[Tuple[Hashable, int]] = []
+        bucket = self.lowest
+        while bucket is not None:
+            counts.extend((key, bucket.count) for key in bucket.keys)
+            bucket = bucket.higher
+        return counts
+
+    def load(self, counts: Iterable[Tuple[Hashable, int]]) -> None:
+        """
+        Replace the ranking by keys with their counts, in O(keys).
+        :param counts: list of (key, count), lowest first (cf. counts)
+        """
+        self.clear()
+        for key, count in counts:
+            if self.highest is None or count > self.highest.count:
+                self._insert_above(self.highest, count)
+            elif count < self.highest.count:
+                raise ValueError("counts must be loaded lowest first")
+            self.highest.keys[key] = None
+            self.bucket_of[key] = self.highest
+
+    def clear(self) -> None:
+        self.bucket_of.clear()
+        self.highest = None
+        self.lowest = None
+
+    def _insert_above(self, bucket: Optional[_CountBucket], count: int) -> _CountBucket:
+        """
+        Link a new empty bucket right above bucket (or as the lowest bucket if bucket is None).
+        """
+        new_bucket = _CountBucket(count)
+        higher = bucket.higher if bucket is not None else self.lowest
+        new_bucket.lower = bucket
+        new_bucket.higher = higher
+        if bucket is not None:
+            bucket.higher = new_bucket
+        else:
+            self.lowest = new_bucket
+        if higher is not None:
+            higher.lower = new_bucket
+        else:
+            self.highest = new_bucket
+        return new_bucket
+
+    def _discard(self, bucket: _CountBucket, key: Hashable) -> None:
+        """
+        Remove key from bucket, unlinking the bucket if it becomes empty.
+        """
+        del bucket.keys[key]
+        if bucket.keys:
+            return
+        if bucket.lower is not None:
+            bucket.lower.higher = bucket.higher
+        else:
+            self.lowest = bucket.higher
+        if bucket.higher is not None:
+            bucket.higher.lower = bucket.lower
+        else:
+            self.highest = bucket.lower
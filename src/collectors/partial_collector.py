@@ -0,0 +1,65 @@
+from src.interfaces.abstract_clock import AbstractClock
+from src.interfaces.abstract_collector import HTTPInfo, TrafficPartial
+from src.collectors.section_counter import SectionCounter, count_sections
+from src.clocks.real_clock import RealClock
+from src.stats.traffic_statistics import TrafficStatistics
+from typing import Dict, Optional, Sequence
+
+
+class PartialCollector:
+
+    def __init__(self, clock: Optional[AbstractClock] = None):
+        """
+        Collects traffic information between two flushes, as partials to be merged in a collector
+        (cf. AbstractCollector.merge_partial), e.g. by a capture worker process.
+        :param clock: current time of the collected requests (defaults to RealClock)
+        """
+        self.clock = clock if clock is not None else RealClock()
+        self.http_container: Dict[str, SectionCounter] = dict()
+        self.traffic_per_second: Dict[int, int] = dict()
+        self.statistics = TrafficStatistics()
+
+    def collect_http_info(self, http_info: HTTPInfo) -> None:
+        section = http_info.extract_section()
+        counter = self.http_container.get(section)
+        if counter is None:
+            counter = self.http_container[section] = SectionCounter()
+        current_timestamp: float = self.clock.now()
+        content_length = http_info.content_length
+        counter.add(content_length, current_timestamp)
+        self.statistics.add(http_info, current_timestamp)
+        second = int(current_timestamp)
+        self.traffic_per_second[second] = self.traffic_per_second.get(second, 0) + content_length
+
+    def collect_batch(self, http_infos: Sequence[HTTPInfo]) -> None:
+        """
+        Collect a batch of requests at the current time, grouped by section (cf. AbstractCollector.collect_batch).
+        """
+        if not http_infos:
+            return
+        current_timestamp: float = self.clock.now()
+        content_lengths = [http_info.content_length for http_info in http_infos]
+        hits, traffic, last_hit_traffic = count_sections([http_info.extract_section() for http_info in http_infos],
+                                                         content_lengths)
+        for section, nb_hits in hits.items():
+            counter = self.http_container.get(section)
+            if counter is None:
+                counter = self.http_container[section] = SectionCounter()
+            counter.add_hits(nb_hits, traffic[section], last_hit_traffic[section], current_timestamp)
+        self.statistics.add_batch(http_infos, current_timestamp)
+        second = int(current_timestamp)
+        self.traffic_per_second[second] = self.traffic_per_second.get(second, 0) + sum(content_lengths)
+
+    def flush(self) -> TrafficPartial:
+        """
+        Return the traffic collected since the previous flush, and start collecting a new partial.
+        :return: partial traffic
+        """
+        partial = TrafficPartial(section_hits=[counter.to_hit_info(section)
+                                               for section, counter in self.http_container.items()],
+                                 traffic_per_second=self.traffic_per_second,
+                                 statistics=self.statistics)
+        self.http_container = dict()
+        self.traffic_per_second = dict()
+        self.statistics = TrafficStatistics()
+        return partial
@@ -0,0 +1,52 @@
+from src.interfaces.abstract_clock import AbstractClock
+from src.collectors.section_collector import SectionCollector
+from src.collectors.traffic_ring import TrafficRing
+from src.stores.snapshot import SnapshotReader, SnapshotWriter
+from typing import Optional, Dict, Iterable
+
+
+class RingBufferCollector(SectionCollector):
+
+    state_tag = 'RingBufferCollector'
+
+    def __init__(self, history_span: int = 120, bucket_width: int = 1,
+                 clock: Optional[AbstractClock] = None, window_spans: Iterable[int] = (),
+                 max_sections: int = 100000):
+        """
+        Collect traffic information, keeping the traffic history in fixed-width time buckets
+        stored in a preallocated ring: memory is bounded whatever the request rate.
+        :param history_span: number of seconds history of traffic is kept
+        :param bucket_width: width of a traffic history bucket (in seconds, defaults to 1 second)
+        :param clock: current time of the collected requests and of the traffic periods (defaults to RealClock)
+        :param window_spans: spans (in seconds) of the sliding windows over which highest hits can also be read
+               (cf. get_highest_hits), e.g. the update period, 2 and 10 minutes
+        :param max_sections: maximum number of sections counted, outside of the sliding windows
+               (cf. SectionCollector)
+        """
+        super().__init__(history_span=history_span, clock=clock, window_spans=window_spans,
+                         bucket_width=bucket_width, max_sections=max_sections)
+        self.traffic_ring = TrafficRing(history_span=history_span, bucket_width=bucket_width)
+
+    def get_total_traffic_over_period(self, span: int) -> int:
+        """
+        Get total traffic over the last "span" seconds (or up to traffic history span),
+        with a precision of one bucket width.
+        :param span: duration in seconds over which traffic should be computed.
+        :return: total traffic over period
+        """
+        return self.traffic_ring.total_over_period(self.clock.now(), span)
+
+    def _add_history(self, current_timestamp: float, traffic_len: int) -> None:
+        self.traffic_ring.add(current_timestamp, traffic_len)
+
+    def _merge_history(self, traffic_per_second: Dict[int, int]) -> None:
+        self.traffic_ring.merge(traffic_per_second)
+
+    def _write_history(self, writer: SnapshotWriter) -> None:
+        self.traffic_ring.write_state(writer)
+
+    def _read_history(self, reader: SnapshotReader) -> None:
+        self.traffic_ring.read_state(reader)
+
+    def _clear_history(self) -> None:
+        self.traffic_ring.clear()
@@ -0,0 +1,225 @@
+from abc import abstractmethod
+from src.interfaces.abstract_clock import AbstractClock
+from src.interfaces.abstract_collector import AbstractCollector, HitInfo, HTTPInfo, TrafficPartial, TrafficSummary
+from src.collectors.hit_ranking import HitRanking
+from src.collectors.section_counter import SectionCounter, count_sections, read_counters, write_counters
+from src.collectors.section_table import SectionTable
+from src.collectors.section_windows import SectionWindows
+from src.clocks.real_clock import RealClock
+from src.stats.traffic_statistics import TrafficStatistics
+from src.stores.snapshot import SnapshotReader, SnapshotWriter
+from typing import Optional, List, Dict, Iterable, Sequence
+
+# share of the maximum number of sections kept when evicting sections
+PRUNE_RATIO = 0.75
+
+
+class SectionCollector(AbstractCollector):
+    """
+    Collector counting every section exactly: section counters, ranking since the start, sliding windows and
+    summary statistics. Subclasses only differ by the way they keep the traffic history (cf. the _history
+    methods and get_total_traffic_over_period).
+    Beyond max_sections sections, the sections with the fewest hits since the start are evicted down to
+    PRUNE_RATIO * max_sections sections (an evicted section hit again starts counting from zero), except the ones
+    still counted in the buckets of the sliding windows: those are evicted once their hits leave the windows.
+    """
+
+    # tag of the snapshots of the collector (cf. write_state)
+    state_tag = 'SectionCollector'
+
+    def __init__(self, history_span: int = 120, clock: Optional[AbstractClock] = None,
+                 window_spans: Iterable[int] = (), bucket_width: int = 1, max_sections: int = 100000):
+        """
+        :param history_span: number of seconds history of traffic is kept
+        :param clock: current time of the collected requests and of the traffic periods (defaults to RealClock)
+        :param window_spans: spans (in seconds) of the sliding windows over which highest hits can also be read
+               (cf. get_highest_hits), e.g. the update period, 2 and 10 minutes
+        :param bucket_width: width of the buckets of the sliding windows (in seconds)
+        :param max_sections: maximum number of sections counted, outside of the sliding windows
+        """
+        self.section_table = SectionTable()
+        # section counters indexed by section id (cf. self.section_table)
+        self.http_container: Dict[int, SectionCounter] = dict()
+        self.ranking = HitRanking()
+        self.section_windows = SectionWindows(window_spans=window_spans, bucket_width=bucket_width)
+        self.total_traffic = 0
+        self.history_span = history_span
+        self.clock = clock if clock is not None else RealClock()
+        self.statistics = TrafficStatistics()
+        self.max_sections = max_sections
+        # number of sections beyond which sections are evicted (higher than max_sections while the sections of the
+        # windows are too many to be evicted, so that the eviction is not attempted again on every request)
+        self.prune_threshold = max_sections
+        self.nb_pruned_sections = 0
+
+    def get_total_traffic(self) -> int:
+        return self.total_traffic
+
+    def get_traffic_summary(self) -> TrafficSummary:
+        return self.statistics.summary(self.clock.now())
+
+    def get_highest_hits(self, k: int = 10, window: Optional[int] = None) -> List[HitInfo]:
+        """
+        Return the k highest hits sorted by number of hits (read from the ranking kept up to date as hits arrive,
+        or from the ranking of the window)
+        :param k: maximum number of sections returned
+        :param window: span of one of the windows of the collector (defaults to None: since the collector started)
+        :return:
+        """
+        if window is not None:
+            return [self.http_container[section_id].to_window_hit_info(self.section_table.section(section_id),
+                                                                       nb_hits, traffic)
+                    for section_id, nb_hits, traffic in self.section_windows.top(window, k, self.clock.now())]
+        return [self.http_container[section_id].to_hit_info(self.section_table.section(section_id))
+                for section_id, _ in self.ranking.top(k)]
+
+    def collect_http_info(self, http_info: HTTPInfo) -> None:
+        section_id = self.section_table.lookup(http_info.host, http_info.path)
+        counter = self.http_container.get(section_id)
+        if counter is None:
+            counter = self.http_container[section_id] = SectionCounter()
+        current_timestamp: float = self.clock.now()
+        content_length = http_info.content_length
+        counter.add(content_length, current_timestamp)
+        self.ranking.increment(section_id)
+        self.section_windows.add(section_id, content_length, current_timestamp)
+        self.total_traffic += content_length
+        self.statistics.add(http_info, current_timestamp)
+        self._add_history(current_timestamp, content_length)
+        if len(self.http_container) > self.prune_threshold:
+            self._prune_sections()
+
+    def collect_batch(self, http_infos: Sequence[HTTPInfo]) -> None:
+        """
+        Collect a batch of requests at the current time, grouped by section: counters, rankings and windows are
+        updated once per section of the batch, the statistics and traffic history once per batch.
+        """
+        if not http_infos:
+            return
+        current_timestamp: float = self.clock.now()
+        lookup = self.section_table.lookup
+        section_ids = [lookup(http_info.host, http_info.path) for http_info in http_infos]
+        content_lengths = [http_info.content_length for http_info in http_infos]
+        hits, traffic, last_hit_traffic = count_sections(section_ids, content_lengths)
+        http_container = self.http_container
+        for section_id, nb_hits in hits.items():
+            counter = http_container.get(section_id)
+            if counter is None:
+                counter = http_container[section_id] = SectionCounter()
+            section_traffic = traffic[section_id]
+            counter.add_hits(nb_hits, section_traffic, last_hit_traffic[section_id], current_timestamp)
+            self.ranking.increment(section_id, nb_hits)
+            self.section_windows.add(section_id, section_traffic, current_timestamp, nb_hits)
+        batch_traffic = sum(content_lengths)
+        self.total_traffic += batch_traffic
+        self.statistics.add_batch(http_infos, current_timestamp)
+        self._add_history(current_timestamp, batch_traffic)
+        if len(self.http_container) > self.prune_threshold:
+            self._prune_sections()
+
+    def merge_partial(self, partial: TrafficPartial) -> None:
+        for hit_info in partial.section_hits:
+            section_id = self.section_table.lookup_section(hit_info.section)
+            counter = self.http_container.get(section_id)
+            if counter is None:
+                counter = self.http_container[section_id] = SectionCounter()
+            counter.merge(hit_info)
+            self.ranking.increment(section_id, hit_info.nb_hits)
+            # hits of a partial (sent every update period) are counted at the time of its last hit
+            self.section_windows.add(section_id, hit_info.traffic, hit_info.last_hit_timestamp, hit_info.nb_hits)
+            self.total_traffic += hit_info.traffic
+        if partial.statistics is not None:
+            self.statistics.merge(partial.statistics)
+        self._merge_history(partial.traffic_per_second)
+        if len(self.http_container) > self.prune_threshold:
+            self._prune_sections()
+
+    def write_state(self, writer: SnapshotWriter) -> None:
+        writer.write_tag(self.state_tag)
+        # released ids as empty sections
+        writer.write_strings(section if section is not None else '' for section in self.section_table.sections)
+        writer.write_ints(self.section_table.free_ids)
+        writer.write_int(self.nb_pruned_sections)
+        writer.write_ints(self.http_container)
+        write_counters(writer, self.http_container.values())
+        counts = self.ranking.counts()
+        writer.write_ints(section_id for section_id, _ in counts)
+        writer.write_ints(nb_hits for _, nb_hits in counts)
+        self.section_windows.write_state(writer)
+        writer.write_int(self.total_traffic)
+        self._write_history(writer)
+        self.statistics.write_state(writer)
+
+    def read_state(self, reader: SnapshotReader) -> None:
+        reader.read_tag(self.state_tag)
+        sections = reader.read_strings()
+        self.section_table.load(sections, reader.read_ints().tolist())
+        self.nb_pruned_sections = reader.read_int()
+        section_ids = reader.read_ints()
+        self.http_container = dict(zip(section_ids, read_counters(reader)))
+        section_ids = reader.read_ints()
+        self.ranking.load(zip(section_ids, reader.read_ints()))
+        self.section_windows.read_state(reader)
+        self.total_traffic = reader.read_int()
+        self._read_history(reader)
+        self.statistics.read_state(reader)
+
+    def clear(self, clear_history: bool = False) -> None:
+        self.http_container.clear()
+        self.ranking.clear()
+        self.section_windows.clear()
+        self.section_table.clear()
+        self.total_traffic = 0
+        self.statistics.clear()
+        self.prune_threshold = self.max_sections
+        self.nb_pruned_sections = 0
+        if clear_history:
+            self._clear_history()
+
+    def _prune_sections(self) -> None:
+        """
+        Evict the sections with the fewest hits since the start, outside of the sliding windows, down to
+        PRUNE_RATIO * max_sections sections (or as many as possible). O(sections), once every
+        (1 - PRUNE_RATIO) * max_sections new sections at most.
+        """
+        in_windows = self.section_windows.keys()
+        nb_pruned = len(self.http_container) - int(PRUNE_RATIO * self.max_sections)
+        pruned = []
+        # lowest first
+        for section_id, nb_hits in self.ranking.counts():
+            if len(pruned) == nb_pruned:
+                break
+            if section_id not in in_windows:
+                pruned.append((section_id, nb_hits))
+        for section_id, nb_hits in pruned:
+            self.ranking.decrement(section_id, nb_hits)
+            del self.http_container[section_id]
+            self.section_table.release(section_id)
+        self.nb_pruned_sections += len(pruned)
+        self.prune_threshold = max(self.max_sections,
+                                   len(self.http_container) + int((1 - PRUNE_RATIO) * self.max_sections))
+
+    @abstractmethod
+    def _add_history(self, current_timestamp: float, traffic_len: int) -> None:
+        """
+        Add traffic collected at current_timestamp to the traffic history, expiring the traffic older than
+        history_span.
+        """
+
+    @abstractmethod
+    def _merge_history(self, traffic_per_second: Dict[int, int]) -> None:
+        """
+        Add traffic collected separately (cf. TrafficPartial) to the traffic history, with the same expiry.
+        """
+
+    @abstractmethod
+    def _write_history(self, writer: SnapshotWriter) -> None:
+        pass
+
+    @abstractmethod
+    def _read_history(self, reader: SnapshotReader) -> None:
+        pass
+
+    @abstractmethod
+    def _clear_history(self) -> None:
+        pass
@@ -0,0 +1,122 @@
+from collections import Counter
+from typing import Dict, Hashable, Iterable, List, Sequence, Tuple
+from src.interfaces.abstract_collector import HitInfo
+from src.stores.snapshot import SnapshotReader, SnapshotWriter
+
+# count by section (or section id)
+Counts = Dict[Hashable, int]
+
+
+class SectionCounter:
+    """
+    Mutable hit counter of a section, updated in place for every request (no allocation per request).
+    Immutable HitInfo snapshots are only built when the view asks for them (cf. to_hit_info).
+    """
+    __slots__ = ('nb_hits', 'traffic', 'last_hit_traffic', 'last_hit_timestamp')
+
+    def __init__(self):
+        self.nb_hits = 0
+        self.traffic = 0
+        self.last_hit_traffic = 0
+        self.last_hit_timestamp = 0.0
+
+    def add(self, content_length: int, timestamp: float) -> None:
+        """
+        Count a hit on the section.
+        :param content_length: traffic of the request (in bytes)
+        :param timestamp: time of the request
+        """
+        self.nb_hits += 1
+        self.traffic += content_length
+        self.last_hit_traffic = content_length
+        self.last_hit_timestamp = timestamp
+
+    def add_hits(self, nb_hits: int, traffic: int, last_hit_traffic: int, timestamp: float) -> None:
+        """
+        Count several hits on the section at the same time (cf. count_sections).
+        :param nb_hits: number of hits
+        :param traffic: traffic of the hits (in bytes)
+        :param last_hit_traffic: traffic of the last hit
+        :param timestamp: time of the hits
+        """
+        self.nb_hits += nb_hits
+        self.traffic += traffic
+        self.last_hit_traffic = last_hit_traffic
+        self.last_hit_timestamp = timestamp
+
+    def merge(self, hit_info: HitInfo) -> None:
+        """
+        Count hits on the section collected separately.
+        :param hit_info: hits collected since the previous merge
+        """
+        self.nb_hits += hit_info.nb_hits
+        self.traffic += hit_info.traffic
+        if hit_info.last_hit_timestamp >= self.last_hit_timestamp:
+            self.last_hit_traffic = hit_info.last_hit_traffic
+            self.last_hit_timestamp = hit_info.last_hit_timestamp
+
+    def to_hit_info(self, section: str, nb_hits_error: int = 0) -> HitInfo:
+        """
+        :param section: section counted
+        :param nb_hits_error: hits possibly counted on top of the guaranteed ones (cf. SpaceSavingCollector)
+        """
+        return HitInfo(section=section,
+                       nb_hits=self.nb_hits + nb_hits_error,
+                       traffic=self.traffic,
+                       last_hit_traffic=self.last_hit_traffic,
+                       last_hit_timestamp=self.last_hit_timestamp,
+                       nb_hits_error=nb_hits_error)
+
+    def to_window_hit_info(self, section: str, nb_hits: int, traffic: int) -> HitInfo:
+        """
+        :param section: section counted
+        :param nb_hits: hits of the section over a window (cf. SectionWindows)
+        :param traffic: traffic of the section over the window
+        """
+        return HitInfo(section=section,
+                       nb_hits=nb_hits,
+                       traffic=traffic,
+                       last_hit_traffic=self.last_hit_traffic,
+                       last_hit_timestamp=self.last_hit_timestamp)
+
+
+def count_sections(keys: Sequence[Hashable], content_lengths: Sequence[int]) -> Tuple[Counts, Counts, Counts]:
+    """
+    Group a batch of requests by section, so that each section is counted once per batch.
+    :param keys: section (or section id) of each request
+    :param content_lengths: traffic of each request
+    :return: hits, traffic and traffic of the last request of each section
+    """
+    # hits and last requests are counted by C loops
+    hits = Counter(keys)
+    traffic = dict.fromkeys(hits, 0)
+    for key, content_length in zip(keys, content_lengths):
+        traffic[key] += content_length
+    return hits, traffic, dict(zip(keys, content_lengths))
+
+
+def write_counters(writer: SnapshotWriter, counters: Iterable[SectionCounter]) -> None:
+    """
+    Write section counters as one array per field (cf. read_counters).
+    """
+    counters = list(counters)
+    writer.write_ints(counter.nb_hits for counter in counters)
+    writer.write_ints(counter.traffic for counter in counters)
+    writer.write_ints(counter.last_hit_traffic for counter in counters)
+    writer.write_floats(counter.last_hit_timestamp for counter in counters)
+
+
+def read_counters(reader: SnapshotReader) -> List[SectionCounter]:
+    """
+    Read section counters written by write_counters, in the order they were written.
+    """
+    counters = []
+    for nb_hits, traffic, last_hit_traffic, last_hit_timestamp in zip(reader.read_ints(), reader.read_ints(),
+                                                                     reader.read_ints(), reader.read_floats()):
+        counter = SectionCounter()
+        counter.nb_hits = nb_hits
+        counter.traffic = traffic
+        counter.last_hit_traffic = last_hit_traffic
+        counter.last_hit_timestamp = last_hit_timestamp
+        counters.append(counter)
+    return counters
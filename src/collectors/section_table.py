@@ -0,0 +1,91 @@
+from src.interfaces.abstract_collector import section_prefix
+from sys import intern
+from typing import Dict, Iterable, List, Optional, Sequence
+
+
+class SectionTable:
+
+    def __init__(self):
+        """
+        Maps HTTP requests to section ids, assigned in order of first appearance of the sections.
+        Section strings are interned when first seen, so that collectors count hits by (small integer) section id
+        and the section string is only looked up when the view asks for it.
+        The ids of the sections released (cf. release) are assigned again to new sections.
+        """
+        self.section_ids: Dict[str, int] = dict()
+        # section of each id, None for the released ids
+        self.sections: List[Optional[str]] = []
+        self.free_ids: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.section_ids)
+
+    def lookup(self, host: str, path: str) -> int:
+        """
+        Return the id of the section of a request (same section as HTTPInfo.extract_section).
+        :param host: host of the HTTP request
+        :param path: path of the HTTP request
+        :return: section id
+        """
+        if path.startswith('/'):
+            # inlined fast path of section_prefix (usual case of an absolute path)
+            second = path.find('/', 1)
+            section = host + (path if second < 0 else path[:second])
+        else:
+            section = host + section_prefix(path)
+        # inlined lookup_section (hot path)
+        section_id = self.section_ids.get(section)
+        if section_id is None:
+            section_id = self._add(section)
+        return section_id
+
+    def lookup_section(self, section: str) -> int:
+        """
+        Return the id of a section given as a string (cf. HTTPInfo.extract_section).
+        :param section: section
+        :return: section id
+        """
+        section_id = self.section_ids.get(section)
+        if section_id is None:
+            section_id = self._add(section)
+        return section_id
+
+    def section(self, section_id: int) -> str:
+        return self.sections[section_id]
+
+    def release(self, section_id: int) -> None:
+        """
+        Forget the section of section_id (e.g. evicted by the collector), its id is assigned to the next new section.
+        """
+        del self.section_ids[self.sections[section_id]]
+        self.sections[section_id] = None
+        self.free_ids.append(section_id)
+
+    def load(self, sections: Sequence[str], free_ids: Iterable[int] = ()) -> None:
+        """
+        Replace the sections by sections, ids being their indexes (e.g. restored from a snapshot).
+        :param sections: section of each id (any string for the released ids)
+        :param free_ids: released ids, in the order they are assigned again (cf. free_ids)
+        """
+        self.sections = [intern(section) for section in sections]
+        self.free_ids = list(free_ids)
+        for section_id in self.free_ids:
+            self.sections[section_id] = None
+        self.section_ids = {section: section_id for section_id, section in enumerate(self.sections)
+                            if section is not None}
+
+    def clear(self) -> None:
+        self.section_ids.clear()
+        self.sections.clear()
+        self.free_ids.clear()
+
+    def _add(self, section: str) -> int:
+        section = intern(section)
+        if self.free_ids:
+            section_id = self.free_ids.pop()
+            self.sections[section_id] = section
+        else:
+            section_id = len(self.sections)
+            self.sections.append(section)
+        self.section_ids[section] = section_id
+        return section_id
@@ -0,0 +1,291 @@
+from heapq import nlargest
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from src.interfaces.abstract_clock import AbstractClock
+from src.interfaces.abstract_collector import HTTPInfo, HitInfo
+from src.collectors.section_counter import SectionCounter, read_counters, write_counters
+from src.clocks.real_clock import RealClock
+from src.stores.snapshot import SnapshotReader, SnapshotWriter
+
+# segment counting the requests of the segments beyond the maximum number of children of a node
+OTHER_SEGMENTS = '/*'
+# share of the maximum number of nodes kept when pruning
+PRUNE_RATIO = 0.75
+
+
+class SectionNode(SectionCounter):
+    """
+    Section of the hierarchy: hit counters of the requests of the section and of all its sub-sections,
+    children by path segment (e.g. '/users' under 'bing.it/api/v2').
+    """
+    __slots__ = ('section', 'depth', 'children', 'recent_hits', 'is_leaf')
+
+    def __init__(self, section: str, depth: int, is_leaf: bool = False):
+        super().__init__()
+        self.section = section
+        self.depth = depth
+        self.children: Dict[str, SectionNode] = dict()
+        # hits since the previous pruning, halved at each pruning: never higher than the ones of the parent
+        self.recent_hits = 0
+        # no children (deepest sections, and OTHER_SEGMENTS)
+        self.is_leaf = is_leaf
+
+
+class SectionTrie:
+
+    def __init__(self, max_depth: int = 3, max_nodes: int = 100000, max_children: int = 1000,
+                 clock: Optional[AbstractClock] = None):
+        """
+        Counts the hits of the sections at every depth of the section hierarchy in a single pass: host (depth 0),
+        first path segment (depth 1, the sections of the collectors, e.g. 'bing.it/api'), first two segments
+        (depth 2, e.g. 'bing.it/api/v2'), and so on up to max_depth. A request is counted in the node of each of
+        its prefixes, so that the counters of a node are the totals of its sub-sections.
+        Memory is bounded:
+            - a node has at most max_children children, plus an OTHER_SEGMENTS child counting the requests of the
+              other segments (e.g. identifiers in paths), which has no children ;
+            - beyond max_nodes nodes, the coldest subtrees (fewest recent hits, halved at each pruning) are pruned
+              down to PRUNE_RATIO * max_nodes nodes. A pruned section hit again starts counting from zero, its
+              ancestors keep counting all their hits.
+        :param max_depth: number of path segments of the deepest sections
+        :param max_nodes: maximum number of sections counted (hosts included)
+        :param max_children: maximum number of children of a node (hosts excepted, bounded by max_nodes)
+        :param clock: time of the collected requests (defaults to RealClock)
+        """
+        if max_depth < 0:
+            raise ValueError("maximum depth must be positive")
+        self.max_depth = max_depth
+        self.max_nodes = max_nodes
+        self.max_children = max_children
+        self.clock = clock if clock is not None else RealClock()
+        # root: hits of all the requests
+        self.root = SectionNode('', -1)
+        self.nb_nodes = 0
+        self.nb_pruned = 0
+
+    def collect_http_info(self, http_info: HTTPInfo) -> None:
+        content_length = http_info.content_length
+        self._count(http_info.host, http_info.path, 1, content_length, content_length, self.clock.now())
+
+    def collect_batch(self, http_infos: Sequence[HTTPInfo]) -> None:
+        """
+        Collect a batch of requests at the current time: each distinct host and path of the batch is counted
+        once, in the order of their last request.
+        """
+        if not http_infos:
+            return
+        current_timestamp: float = self.clock.now()
+        hits: Dict[Tuple[str, str], List[int]] = dict()
+        for http_info in reversed(http_infos):
+            key = (http_info.host, http_info.path)
+            counts = hits.get(key)
+            if counts is None:
+                hits[key] = [1, http_info.content_length, http_info.content_length]
+            else:
+                counts[0] += 1
+                counts[1] += http_info.content_length
+        for (host, path), (nb_hits, traffic, last_hit_traffic) in reversed(list(hits.items())):
+            self._count(host, path, nb_hits, traffic, last_hit_traffic, current_timestamp)
+
+    def get_highest_hits(self, k: int = 10, depth: int = 1, section: Optional[str] = None) -> List[HitInfo]:
+        """
+        Return the k sections of depth with the most hits, sorted by decreasing number of hits.
+        :param k: maximum number of sections returned
+        :param depth: depth of the sections (0: hosts, 1: first path segment, ...), at most max_depth
+        :param section: only the sub-sections of this section (e.g. 'bing.it/api'), defaults to all of them
+        :return: hits of the sections
+        """
+        if not 0 <= depth <= self.max_depth:
+            raise ValueError(f"depth must be between 0 and {self.max_depth}")
+        if section is None:
+            start = self.root
+        else:
+            start = self.get_node(section)
+            if start is None or start.depth > depth:
+                return []
+        nodes = nlargest(k, self._nodes_at(start, depth), key=lambda node: node.nb_hits)
+        return [node.to_hit_info(node.section) for node in nodes]
+
+    def get_children(self, section: str) -> List[HitInfo]:
+        """
+        :return: hits of the sub-sections one level below section, sorted by decreasing number of hits
+        """
+        node = self.get_node(section)
+        if node is None:
+            return []
+        return [child.to_hit_info(child.section)
+                for child in sorted(node.children.values(), key=lambda child: child.nb_hits, reverse=True)]
+
+    def get_node(self, section: str) -> Optional[SectionNode]:
+        """
+        :param section: host followed by a path prefix (e.g. 'bing.it/api/v2')
+        :return: node of the section, None if it is not counted
+        """
+        slash = section.find('/')
+        host, path = (section, '') if slash < 0 else (section[:slash], section[slash:])
+        node = self.root.children.get(host)
+        end = 0
+        while node is not None and end < len(path):
+            next_end = path.find('/', end + 1)
+            next_end = len(path) if next_end < 0 else next_end
+            node = node.children.get(path[end:next_end])
+            end = next_end
+        return node
+
+    def clear(self) -> None:
+        self.root = SectionNode('', -1)
+        self.nb_nodes = 0
+
+    def write_state(self, writer: SnapshotWriter) -> None:
+        writer.write_tag('SectionTrie')
+        writer.write_ints([self.max_depth, self.nb_pruned])
+        # nodes in depth-first order, with the index of their parent (-1 for the hosts)
+        nodes: List[SectionNode] = []
+        parents: List[int] = []
+        segments: List[str] = []
+        stack: List[Tuple[int, str, SectionNode]] = [(-1, segment, node)
+                                                       for segment, node in self.root.children.items()]
+        while stack:
+            parent, segment, node = stack.pop()
+            parents.append(parent)
+            segments.append(segment)
+            stack.extend((len(nodes), child_segment, child) for child_segment, child in node.children.items())
+            nodes.append(node)
+        writer.write_ints(parents)
+        writer.write_strings(segments)
+        write_counters(writer, [self.root] + nodes)
+        writer.write_ints(node.recent_hits for node in nodes)
+
+    def read_state(self, reader: SnapshotReader) -> None:
+        reader.read_tag('SectionTrie')
+        max_depth, nb_pruned = reader.read_ints()
+        if max_depth != self.max_depth:
+            raise ValueError(f"snapshot of a section trie of depth {max_depth} instead of {self.max_depth}")
+        parents, segments = reader.read_ints(), reader.read_strings()
+        counters = read_counters(reader)
+        recent_hits = reader.read_ints()
+        self.clear()
+        self.nb_pruned = nb_pruned
+        self._copy_counter(counters[0], self.root)
+        nodes: List[SectionNode] = []
+        for parent_index, segment, counter, node_recent_hits in zip(parents, segments, counters[1:], recent_hits):
+            parent = nodes[parent_index] if parent_index >= 0 else self.root
+            node = parent.children[segment] = SectionNode(parent.section + segment, parent.depth + 1,
+                                                          is_leaf=parent.depth + 1 == self.max_depth
+                                                          or segment == OTHER_SEGMENTS)
+            self._copy_counter(counter, node)
+            node.recent_hits = node_recent_hits
+            nodes.append(node)
+        self.nb_nodes = len(nodes)
+
+    def _count(self, host: str, path: str, nb_hits: int, traffic: int, last_hit_traffic: int,
+               timestamp: float) -> None:
+        """
+        Count hits in the nodes of the host and of each prefix of path, up to max_depth.
+        """
+        node = self.root
+        node.add_hits(nb_hits, traffic, last_hit_traffic, timestamp)
+        query = path.find('?')
+        if query >= 0:
+            path = path[:query]
+        length = len(path)
+        segment = host
+        end = 0
+        while True:
+            child = node.children.get(segment)
+            if child is None:
+                child = self._add_child(node, segment)
+            # inlined SectionCounter.add_hits (once per depth of every request)
+            child.nb_hits += nb_hits
+            child.traffic += traffic
+            child.last_hit_traffic = last_hit_traffic
+            child.last_hit_timestamp = timestamp
+            child.recent_hits += nb_hits
+            if child.is_leaf or end >= length:
+                break
+            node = child
+            next_end = path.find('/', end + 1)
+            if next_end < 0:
+                next_end = length
+            segment = path[end:next_end]
+            end = next_end
+        if self.nb_nodes > self.max_nodes:
+            self._prune()
+
+    def _add_child(self, node: SectionNode, segment: str) -> SectionNode:
+        if len(node.children) >= self.max_children and node.depth >= 0:
+            child = node.children.get(OTHER_SEGMENTS)
+            if child is None:
+                child = node.children[OTHER_SEGMENTS] = SectionNode(node.section + OTHER_SEGMENTS, node.depth + 1,
+                                                                     is_leaf=True)
+                self.nb_nodes += 1
+            return child
+        child = node.children[segment] = SectionNode(node.section + segment, node.depth + 1,
+                                                     is_leaf=node.depth + 1 == self.max_depth)
+        self.nb_nodes += 1
+        return child
+
+    def _nodes_at(self, start: SectionNode, depth: int) -> Iterator[SectionNode]:
+        """
+        Nodes of depth under start (start itself if it is of depth).
+        """
+        stack = [start]
+        while stack:
+            node = stack.pop()
+            if node.depth == depth:
+                yield node
+            elif node.depth < depth:
+                stack.extend(node.children.values())
+
+    def _prune(self) -> None:
+        """
+        Remove the coldest subtrees down to PRUNE_RATIO * max_nodes nodes: the nodes with fewer recent hits than
+        a threshold, plus some of the nodes with as many as the threshold. The recent hits of a node are never
+        higher than the ones of its parent, so that the nodes under the threshold are whole subtrees.
+        Costs O(n) for n nodes, once every (1 - PRUNE_RATIO) * max_nodes new nodes at most.
+        """
+        nb_removed = self.nb_nodes - int(self.max_nodes * PRUNE_RATIO)
+        nb_nodes_per_hits: Dict[int, int] = dict()
+        stack = [self.root]
+        while stack:
+            for child in stack.pop().children.values():
+                nb_nodes_per_hits[child.recent_hits] = nb_nodes_per_hits.get(child.recent_hits, 0) + 1
+                stack.append(child)
+        # threshold: lowest recent hits such that the nodes with at most as many are enough
+        threshold = 0
+        nb_colder = 0
+        for threshold in sorted(nb_nodes_per_hits):
+            if nb_colder + nb_nodes_per_hits[threshold] >= nb_removed:
+                break
+            nb_colder += nb_nodes_per_hits[threshold]
+        # nodes with as many recent hits as the threshold removed beyond the colder ones
+        nb_removed_at_threshold = nb_removed - nb_colder
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            node.recent_hits //= 2
+            for segment, child in list(node.children.items()):
+                if child.recent_hits < threshold or (child.recent_hits == threshold and nb_removed_at_threshold > 0):
+                    del node.children[segment]
+                    nb_subtree = self._subtree_size(child)
+                    self.nb_nodes -= nb_subtree
+                    self.nb_pruned += nb_subtree
+                    if child.recent_hits == threshold:
+                        nb_removed_at_threshold -= nb_subtree
+                else:
+                    stack.append(child)
+
+    @staticmethod
+    def _subtree_size(node: SectionNode) -> int:
+        size = 0
+        stack = [node]
+        while stack:
+            size += 1
+            stack.extend(stack.pop().children.values())
+        return size
+
+    @staticmethod
+    def _copy_counter(counter: SectionCounter, node: SectionNode) -> None:
+        node.nb_hits = counter.nb_hits
+        node.traffic = counter.traffic
+        node.last_hit_traffic = counter.last_hit_traffic
+        node.last_hit_timestamp = counter.last_hit_timestamp
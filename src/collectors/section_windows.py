@@ -0,0 +1,186 @@
+from itertools import chain
+from math import ceil
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+from src.collectors.hit_ranking import HitRanking
+from src.stores.snapshot import SnapshotReader, SnapshotWriter
+
+
+class _Window:
+    """
+    Used only internally to this module: hits and traffic per section over the buckets of a sliding window.
+    """
+    __slots__ = ('nb_buckets', 'expired_number', 'ranking', 'traffic')
+
+    def __init__(self, nb_buckets: int):
+        self.nb_buckets = nb_buckets
+        # buckets up to this number already left the window
+        self.expired_number: Optional[int] = None
+        self.ranking = HitRanking()
+        self.traffic: Dict[Hashable, int] = dict()
+
+    def expire(self, bucket_hits: Dict[Hashable, int], bucket_traffic: Dict[Hashable, int]) -> None:
+        for key, nb_hits in bucket_hits.items():
+            if self.ranking.decrement(key, nb_hits) == 0:
+                del self.traffic[key]
+            else:
+                self.traffic[key] -= bucket_traffic[key]
+
+    def clear(self) -> None:
+        self.expired_number = None
+        self.ranking.clear()
+        self.traffic.clear()
+
+
+class SectionWindows:
+
+    def __init__(self, window_spans: Iterable[int], bucket_width: int = 1):
+        """
+        Hits and traffic per section over sliding windows (e.g. the last update period, 2 and 10 minutes).
+        Hits are counted in fixed-width time buckets stored in a preallocated ring, and each window keeps running
+        totals of its buckets ranked by hits: when a bucket leaves a window, its counts are subtracted from the
+        window totals, so that expiring a hit is O(1) (no rescan of the window) and reading the k highest sections
+        of a window is O(k).
+        A window of span seconds covers the buckets of the last span seconds, with a precision of one bucket width
+        (exact on ticks aligned on multiples of the bucket width).
+        :param window_spans: spans of the windows (in seconds)
+        :param bucket_width: width of a bucket (in seconds, defaults to 1 second)
+        """
+        window_spans = sorted(set(window_spans))
+        if bucket_width <= 0 or any(span <= 0 for span in window_spans):
+            raise ValueError("window spans and bucket width must be strictly positive")
+        self.bucket_width = bucket_width
+        self.windows: Dict[int, _Window] = {span: _Window(ceil(span / bucket_width)) for span in window_spans}
+        # a bucket is recycled only once it left the largest window
+        self.nb_buckets = max((window.nb_buckets for window in self.windows.values()), default=0) + 2
+        # hits and traffic of each section in the bucket stored in each slot (plain dicts rather than section
+        # counters, so that a snapshot of the buckets is restored without an object per section and bucket)
+        self.bucket_hits: List[Dict[Hashable, int]] = [dict() for _ in range(self.nb_buckets)]
+        self.bucket_traffic: List[Dict[Hashable, int]] = [dict() for _ in range(self.nb_buckets)]
+        # absolute bucket number (timestamp // bucket_width) currently stored in each slot, -1 if never used
+        self.bucket_number: List[int] = [-1] * self.nb_buckets
+        self.current_number: Optional[int] = None
+
+    @property
+    def window_spans(self) -> List[int]:
+        return list(self.windows)
+
+    def add(self, key: Hashable, content_length: int, timestamp: float, nb_hits: int = 1) -> None:
+        """
+        Count hits on the section key at timestamp in the windows covering it (hits older than all windows
+        are ignored).
+        """
+        if not self.windows:
+            return
+        number = int(timestamp // self.bucket_width)
+        if number != self.current_number:
+            self.advance(timestamp)
+        slot = number % self.nb_buckets
+        if self.bucket_number[slot] != number:
+            if number <= self.current_number - self.nb_buckets:
+                return
+            self.bucket_number[slot] = number
+            self.bucket_hits[slot] = dict()
+            self.bucket_traffic[slot] = dict()
+        bucket_hits = self.bucket_hits[slot]
+        bucket_hits[key] = bucket_hits.get(key, 0) + nb_hits
+        bucket_traffic = self.bucket_traffic[slot]
+        bucket_traffic[key] = bucket_traffic.get(key, 0) + content_length
+        for window in self.windows.values():
+            if number > window.expired_number:
+                # inlined (hot path)
+                window.ranking.increment(key, nb_hits)
+                traffic = window.traffic
+                traffic[key] = traffic.get(key, 0) + content_length
+
+    def advance(self, timestamp: float) -> None:
+        """
+        Move the windows forward to timestamp, subtracting the buckets leaving them.
+        Costs the number of sections hit in the expired buckets, i.e. O(1) per hit overall.
+        """
+        number = int(timestamp // self.bucket_width)
+        if self.current_number is not None and number <= self.current_number:
+            return
+        self.current_number = number
+        for window in self.windows.values():
+            # buckets [number - nb_buckets, number] are in the window
+            expired_number = number - window.nb_buckets - 1
+            if window.expired_number is None or expired_number - window.expired_number > window.nb_buckets:
+                # no bucket left in the window
+                window.clear()
+            else:
+                for expiring_number in range(window.expired_number + 1, expired_number + 1):
+                    slot = expiring_number % self.nb_buckets
+                    if self.bucket_number[slot] == expiring_number:
+                        window.expire(self.bucket_hits[slot], self.bucket_traffic[slot])
+            window.expired_number = expired_number
+
+    def top(self, span: int, k: int, timestamp: float) -> List[Tuple[Hashable, int, int]]:
+        """
+        Return the k sections with the most hits over the window of span seconds before timestamp, highest first.
+        :return: list of (key, hits, traffic)
+        """
+        window = self.windows.get(span)
+        if window is None:
+            raise ValueError(f"no window of {span} seconds (windows: {self.window_spans})")
+        self.advance(timestamp)
+        return [(key, nb_hits, window.traffic[key]) for key, nb_hits in window.ranking.top(k)]
+
+    def keys(self) -> Set[Hashable]:
+        """
+        Sections counted in the buckets of the ring (those of the windows, and the older ones not yet recycled).
+        """
+        return set(chain.from_iterable(self.bucket_hits))
+
+    def write_state(self, writer: SnapshotWriter) -> None:
+        """
+        Write the buckets and the running totals of the windows (keys must be integers, e.g. section ids).
+        """
+        writer.write_tag('SectionWindows')
+        writer.write_ints([self.bucket_width] + self.window_spans)
+        writer.write_optional_int(self.current_number)
+        writer.write_ints(self.bucket_number)
+        writer.write_ints(len(bucket_hits) for bucket_hits in self.bucket_hits)
+        # sections are inserted in the hits and traffic of a bucket at the same time: same order in both
+        writer.write_ints(chain.from_iterable(self.bucket_hits))
+        writer.write_ints(chain.from_iterable(bucket_hits.values() for bucket_hits in self.bucket_hits))
+        writer.write_ints(chain.from_iterable(bucket_traffic.values() for bucket_traffic in self.bucket_traffic))
+        for window in self.windows.values():
+            counts = window.ranking.counts()
+            writer.write_optional_int(window.expired_number)
+            writer.write_ints(key for key, _ in counts)
+            writer.write_ints(nb_hits for _, nb_hits in counts)
+            writer.write_ints(window.traffic[key] for key, _ in counts)
+
+    def read_state(self, reader: SnapshotReader) -> None:
+        """
+        Restores the buckets and windows written by write_state.
+        :raise ValueError: if the snapshot is not the one of windows of the same spans and bucket width
+        """
+        reader.read_tag('SectionWindows')
+        configuration = reader.read_ints().tolist()
+        if configuration != [self.bucket_width] + self.window_spans:
+            raise ValueError(f"snapshot of windows {configuration[1:]} (bucket width {configuration[0]}) instead of "
+                             f"{self.window_spans} (bucket width {self.bucket_width})")
+        self.current_number = reader.read_optional_int()
+        self.bucket_number = reader.read_ints().tolist()
+        bucket_sizes, keys, hits, traffic = (reader.read_ints(), reader.read_ints().tolist(),
+                                             reader.read_ints().tolist(), reader.read_ints().tolist())
+        self.bucket_hits, self.bucket_traffic = [], []
+        start = 0
+        for size in bucket_sizes:
+            self.bucket_hits.append(dict(zip(keys[start:start + size], hits[start:start + size])))
+            self.bucket_traffic.append(dict(zip(keys[start:start + size], traffic[start:start + size])))
+            start += size
+        for window in self.windows.values():
+            window.expired_number = reader.read_optional_int()
+            keys = reader.read_ints().tolist()
+            window.ranking.load(zip(keys, reader.read_ints()))
+            window.traffic = dict(zip(keys, reader.read_ints()))
+
+    def clear(self) -> None:
+        self.bucket_hits = [dict() for _ in range(self.nb_buckets)]
+        self.bucket_traffic = [dict() for _ in range(self.nb_buckets)]
+        self.bucket_number = [-1] * self.nb_buckets
+        self.current_number = None
+        for window in self.windows.values():
+            window.clear()
@@ -0,0 +1,181 @@
+from dataclasses import replace
+from src.interfaces.abstract_clock import AbstractClock
+from src.interfaces.abstract_collector import AbstractCollector, HitInfo, HTTPInfo, TrafficPartial, TrafficSummary
+from src.collectors.hit_ranking import HitRanking
+from src.collectors.section_counter import SectionCounter, count_sections, read_counters, write_counters
+from src.collectors.traffic_ring import TrafficRing
+from src.clocks.real_clock import RealClock
+from src.stats.traffic_statistics import TrafficStatistics
+from src.stores.snapshot import SnapshotReader, SnapshotWriter
+from typing import Optional, List, Dict, Sequence
+
+
+class SpaceSavingCollector(AbstractCollector):
+
+    def __init__(self, capacity: int = 1000, history_span: int = 120, bucket_width: int = 1,
+                 clock: Optional[AbstractClock] = None):
+        """
+        Collect traffic information in fixed memory whatever the number of distinct sections (e.g. scanners
+        hitting random URLs): at most capacity sections are counted (Space-Saving algorithm). When a new section
+        arrives and the collector is full, the section with the fewest hits is evicted and the new one inherits
+        its count, which becomes the error of the new section.
+        Counts are upper bounds, reported with their error (cf. HitInfo.nb_hits_error), and the error is at most
+        N / capacity after N hits: every section with more hits than that is guaranteed to be counted.
+        Traffic of a section only includes the requests since it is counted.
+        :param capacity: maximum number of sections counted
+        :param history_span: number of seconds history of traffic is kept
+        :param bucket_width: width of a traffic history bucket (in seconds, defaults to 1 second)
+        :param clock: current time of the collected requests and of the traffic periods (defaults to RealClock)
+        """
+        if capacity <= 0:
+            raise ValueError("capacity must be strictly positive")
+        self.capacity = capacity
+        # guaranteed hits of the counted sections, the upper bound of their hits is kept by the ranking
+        self.http_container: Dict[str, SectionCounter] = dict()
+        self.ranking = HitRanking()
+        self.total_hits = 0
+        self.total_traffic = 0
+        self.history_span = history_span
+        self.clock = clock if clock is not None else RealClock()
+        self.statistics = TrafficStatistics()
+        self.traffic_ring = TrafficRing(history_span=history_span, bucket_width=bucket_width)
+
+    def get_total_traffic(self) -> int:
+        return self.total_traffic
+
+    def get_traffic_summary(self) -> TrafficSummary:
+        return self.statistics.summary(self.clock.now())
+
+    def get_error_bound(self) -> int:
+        """
+        Maximum error on the counts of sections: a section with more hits is never missed from the counted ones.
+        """
+        return self.total_hits // self.capacity
+
+    def get_highest_hits(self, k: int = 10, window: Optional[int] = None) -> List[HitInfo]:
+        """
+        Return the k highest hits sorted by number of hits (upper bounds, each one with its error)
+        :param k: maximum number of sections returned
+        :param window: not supported, sections are counted since the collector started (counting them over
+               windows would not be in fixed memory)
+        :return:
+        """
+        if window is not None:
+            raise ValueError("space-saving collector only counts hits since it started")
+        highest_hits = []
+        for section, count in self.ranking.top(k):
+            counter = self.http_container[section]
+            highest_hits.append(counter.to_hit_info(section, nb_hits_error=count - counter.nb_hits))
+        return highest_hits
+
+    def collect_http_info(self, http_info: HTTPInfo) -> None:
+        section = http_info.extract_section()
+        counter = self.http_container.get(section)
+        if counter is None:
+            counter = self.__count_section(section, 1)
+        else:
+            self.ranking.increment(section)
+        current_timestamp: float = self.clock.now()
+        content_length = http_info.content_length
+        counter.add(content_length, current_timestamp)
+        self.total_hits += 1
+        self.total_traffic += content_length
+        self.statistics.add(http_info, current_timestamp)
+        self.traffic_ring.add(current_timestamp, content_length)
+
+    def collect_batch(self, http_infos: Sequence[HTTPInfo]) -> None:
+        """
+        Collect a batch of requests at the current time, grouped by section: a section of the batch is counted
+        (or evicts the section with the fewest hits) once, with all its hits.
+        """
+        if not http_infos:
+            return
+        current_timestamp: float = self.clock.now()
+        sections = [http_info.extract_section() for http_info in http_infos]
+        content_lengths = [http_info.content_length for http_info in http_infos]
+        hits, traffic, last_hit_traffic = count_sections(sections, content_lengths)
+        for section, nb_hits in hits.items():
+            counter = self.http_container.get(section)
+            if counter is None:
+                counter = self.__count_section(section, nb_hits)
+            else:
+                self.ranking.increment(section, nb_hits)
+            counter.add_hits(nb_hits, traffic[section], last_hit_traffic[section], current_timestamp)
+        batch_traffic = sum(content_lengths)
+        self.total_hits += len(content_lengths)
+        self.total_traffic += batch_traffic
+        self.statistics.add_batch(http_infos, current_timestamp)
+        self.traffic_ring.add(current_timestamp, batch_traffic)
+
+    def merge_partial(self, partial: TrafficPartial) -> None:
+        for hit_info in partial.section_hits:
+            counter = self.http_container.get(hit_info.section)
+            if counter is None:
+                counter = self.__count_section(hit_info.section, hit_info.nb_hits)
+            else:
+                self.ranking.increment(hit_info.section, hit_info.nb_hits)
+            # only the guaranteed hits of an approximate partial are guaranteed here
+            counter.merge(replace(hit_info, nb_hits=hit_info.nb_hits - hit_info.nb_hits_error))
+            self.total_hits += hit_info.nb_hits
+            self.total_traffic += hit_info.traffic
+        if partial.statistics is not None:
+            self.statistics.merge(partial.statistics)
+        self.traffic_ring.merge(partial.traffic_per_second)
+
+    def write_state(self, writer: SnapshotWriter) -> None:
+        writer.write_tag('SpaceSavingCollector')
+        writer.write_int(self.capacity)
+        writer.write_strings(self.http_container)
+        write_counters(writer, self.http_container.values())
+        # upper bounds of the hits, in the order of the ranking
+        counts = self.ranking.counts()
+        writer.write_strings(section for section, _ in counts)
+        writer.write_ints(count for _, count in counts)
+        writer.write_int(self.total_hits)
+        writer.write_int(self.total_traffic)
+        self.traffic_ring.write_state(writer)
+        self.statistics.write_state(writer)
+
+    def read_state(self, reader: SnapshotReader) -> None:
+        reader.read_tag('SpaceSavingCollector')
+        capacity = reader.read_int()
+        if capacity != self.capacity:
+            raise ValueError(f"snapshot of a collector of capacity {capacity} instead of {self.capacity}")
+        sections = reader.read_strings()
+        self.http_container = dict(zip(sections, read_counters(reader)))
+        sections = reader.read_strings()
+        self.ranking.load(zip(sections, reader.read_ints()))
+        self.total_hits = reader.read_int()
+        self.total_traffic = reader.read_int()
+        self.traffic_ring.read_state(reader)
+        self.statistics.read_state(reader)
+
+    def clear(self, clear_history: bool = False) -> None:
+        self.http_container.clear()
+        self.ranking.clear()
+        self.total_hits = 0
+        self.total_traffic = 0
+        self.statistics.clear()
+        if clear_history:
+            self.traffic_ring.clear()
+
+    def get_total_traffic_over_period(self, span: int) -> int:
+        """
+        Get total traffic over the last "span" seconds (or up to traffic history span),
+        with a precision of one bucket width.
+        :param span: duration in seconds over which traffic should be computed.
+        :return: total traffic over period
+        """
+        return self.traffic_ring.total_over_period(self.clock.now(), span)
+
+    def __count_section(self, section: str, nb_hits: int) -> SectionCounter:
+        """
+        Start counting a section, evicting the section with the fewest hits if the collector is full.
+        """
+        inherited_hits = 0
+        if len(self.http_container) >= self.capacity:
+            evicted, inherited_hits = self.ranking.remove_lowest()
+            del self.http_container[evicted]
+        self.ranking.increment(section, inherited_hits + nb_hits)
+        counter = self.http_container[section] = SectionCounter()
+        return counter
@@ -0,0 +1,85 @@
+from math import ceil
+from typing import Dict, List
+from src.stores.snapshot import SnapshotReader, SnapshotWriter
+
+
+class TrafficRing:
+
+    def __init__(self, history_span: int, bucket_width: int = 1):
+        """
+        Traffic history in fixed-width time buckets stored in a preallocated ring: adding traffic is O(1),
+        summing it over a period is O(buckets), and memory is bounded whatever the request rate.
+        :param history_span: number of seconds history of traffic is kept
+        :param bucket_width: width of a bucket (in seconds, defaults to 1 second)
+        """
+        if history_span <= 0 or bucket_width <= 0:
+            raise ValueError("history span and bucket width must be strictly positive")
+        self.history_span = history_span
+        self.bucket_width = bucket_width
+        # one extra bucket so that the bucket being filled does not overwrite the oldest one of the span
+        self.nb_buckets = ceil(history_span / bucket_width) + 1
+        self.bucket_traffic: List[int] = [0] * self.nb_buckets
+        # absolute bucket number (timestamp // bucket_width) currently stored in each slot, -1 if never used
+        self.bucket_number: List[int] = [-1] * self.nb_buckets
+
+    def add(self, timestamp: float, traffic_len: int) -> None:
+        number = int(timestamp // self.bucket_width)
+        slot = number % self.nb_buckets
+        if self.bucket_number[slot] != number:
+            # slot holds an expired bucket (or none yet): recycle it
+            self.bucket_number[slot] = number
+            self.bucket_traffic[slot] = traffic_len
+        else:
+            self.bucket_traffic[slot] += traffic_len
+
+    def merge(self, traffic_per_second: Dict[int, int]) -> None:
+        """
+        Add traffic collected separately (cf. TrafficPartial), ignoring the traffic older than the ring.
+        """
+        for second, traffic_len in traffic_per_second.items():
+            number = int(second // self.bucket_width)
+            slot = number % self.nb_buckets
+            if self.bucket_number[slot] < number:
+                self.bucket_number[slot] = number
+                self.bucket_traffic[slot] = traffic_len
+            elif self.bucket_number[slot] == number:
+                self.bucket_traffic[slot] += traffic_len
+            # else the bucket of this traffic already left the ring
+
+    def traffic_per_second(self) -> Dict[int, int]:
+        """
+        Traffic of the buckets in the ring, keyed by their first second (to be merged in another ring, cf. merge).
+        """
+        return {number * self.bucket_width: traffic
+                for number, traffic in zip(self.bucket_number, self.bucket_traffic) if number >= 0}
+
+    def total_over_period(self, current_timestamp: float, span: int) -> int:
+        """
+        Total traffic over the span seconds before current_timestamp (or up to the history span),
+        with a precision of one bucket width.
+        """
+        span = min(span, self.history_span)
+        last_number = int(current_timestamp // self.bucket_width)
+        first_number = int((current_timestamp - span) // self.bucket_width)
+        return sum(traffic for number, traffic in zip(self.bucket_number, self.bucket_traffic)
+                   if first_number <= number <= last_number)
+
+    def write_state(self, writer: SnapshotWriter) -> None:
+        writer.write_tag('TrafficRing')
+        writer.write_ints(self.bucket_number)
+        writer.write_ints(self.bucket_traffic)
+
+    def read_state(self, reader: SnapshotReader) -> None:
+        """
+        Restores the buckets written by write_state (cf. SnapshotWriter).
+        :raise ValueError: if the snapshot is not the one of a ring of the same number of buckets
+        """
+        reader.read_tag('TrafficRing')
+        bucket_number, bucket_traffic = reader.read_ints().tolist(), reader.read_ints().tolist()
+        if len(bucket_number) != self.nb_buckets:
+            raise ValueError(f"snapshot of a ring of {len(bucket_number)} buckets instead of {self.nb_buckets}")
+        self.bucket_number, self.bucket_traffic = bucket_number, bucket_traffic
+
+    def clear(self) -> None:
+        self.bucket_traffic = [0] * self.nb_buckets
+        self.bucket_number = [-1] * self.nb_buckets
@@ -0,0 +1,182 @@
+import asyncio
+from asyncio import Future, Queue
+from concurrent.futures import ThreadPoolExecutor
+from logging import getLogger
+from typing import Awaitable, Callable, List, Optional, Sequence, TypeVar
+
+from src.interfaces.abstract_alert_manager import AlertInfo
+from src.clocks.tick_scheduler import TickScheduler
+from src.controllers.controller import Controller
+from src.instrumentation.metrics import MetricsSnapshot
+
+logger = getLogger("AsyncController")
+
+# receives every alert emitted, e.g. to forward it to another system
+AlertSink = Callable[[AlertInfo], Awaitable[None]]
+
+SINK_CAPACITY = 1000  # alerts queued for a sink slower than the alerts, the oldest ones are dropped beyond
+SINK_DRAIN_TIMEOUT = 1.0  # seconds given to the sinks to handle their queued alerts when stopping
+
+Read = TypeVar('Read')
+
+
+class AsyncController(Controller):
+
+    def __init__(self, *args, alert_sinks: Sequence[AlertSink] = (), sink_capacity: int = SINK_CAPACITY,
+                 **kwargs):
+        """
+        Controller running as asyncio tasks with their own cadences: alerts evaluation (every alert period),
+        view updates (every update period) and one task per alert sink. The capture and the aggregation keep
+        running in their own threads (cf. Controller) and the view is updated in a dedicated thread, so that
+        a slow terminal or sink never delays the aggregation nor the alerts evaluation:
+            - an update due while the view is still busy with the previous one is skipped
+              (cf. nb_skipped_updates), the alerts not yet shown are shown by the next one ;
+            - each sink has a bounded queue of alerts, the oldest ones are dropped when it is full
+              (cf. nb_dropped_alerts).
+        :param alert_sinks: coroutine functions called with every alert emitted, in order
+        :param sink_capacity: maximum number of alerts queued for each sink
+        Other parameters are the ones of Controller.
+        """
+        super().__init__(*args, **kwargs)
+        self.alert_sinks = list(alert_sinks)
+        self.sink_capacity = sink_capacity
+        self.sink_queues: List[Queue] = []
+        # alerts not yet shown by the view
+        self.pending_alerts: List[AlertInfo] = []
+        self.view_executor: Optional[ThreadPoolExecutor] = None
+        self.view_future: Optional[Future] = None
+        self.nb_skipped_updates = 0
+        self.nb_dropped_alerts = 0
+
+    async def run(self) -> None:
+        """
+        Starts the capture and runs the tasks until stopped (cf. stop, callable from any thread) or cancelled.
+        In both cases the tasks are cancelled, the sinks are given SINK_DRAIN_TIMEOUT seconds to handle the
+        alerts left in their queues, then the view thread and the capture are stopped.
+        """
+        loop = asyncio.get_running_loop()
+        # queues are bound to the running loop
+        self.sink_queues = [Queue() for _ in self.alert_sinks]
+        self.view_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="View")
+        self._start_capture()
+        tasks = [asyncio.create_task(self._evaluate_alerts()), asyncio.create_task(self._update_view_periodically())]
+        sink_tasks = [asyncio.create_task(self._run_sink(sink, queue))
+                      for sink, queue in zip(self.alert_sinks, self.sink_queues)]
+        try:
+            await loop.run_in_executor(None, self.stop_event.wait)
+        finally:
+            # also releases the threads waiting for a tick
+            self.stop_event.set()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            try:
+                await asyncio.wait_for(asyncio.gather(*[queue.join() for queue in self.sink_queues]),
+                                       SINK_DRAIN_TIMEOUT)
+            except asyncio.TimeoutError:
+                logger.warning('Alert sinks stopped before handling all the alerts')
+            for task in sink_tasks:
+                task.cancel()
+            await asyncio.gather(*sink_tasks, return_exceptions=True)
+            self.view_executor.shutdown(wait=True)
+            self._stop_capture()
+
+    async def _wait_tick(self, scheduler: TickScheduler) -> Optional[float]:
+        """
+        Waits for the next tick of scheduler without blocking the loop (cf. TickScheduler.wait_next_tick).
+        """
+        return await asyncio.get_running_loop().run_in_executor(None, scheduler.wait_next_tick, self.stop_event)
+
+    async def _evaluate_alerts(self) -> None:
+        scheduler = TickScheduler(clock=self.clock, period=self.alert_period)
+        while await self._wait_tick(scheduler) is not None:
+            alert_infos = await self._read_off_loop(self._read_alerts, lambda alert_infos: alert_infos)
+            if alert_infos:
+                self._dispatch_alerts(alert_infos)
+                if not self._view_busy():
+                    self._run_in_view(self._show_alerts, self._take_pending_alerts())
+
+    async def _update_view_periodically(self) -> None:
+        scheduler = TickScheduler(clock=self.clock, period=self.update_period)
+        while await self._wait_tick(scheduler) is not None:
+            update = await self._read_off_loop(self._read_update, lambda update: update.alert_infos)
+            self._dispatch_alerts(update.alert_infos)
+            if self._view_busy():
+                self.nb_skipped_updates += 1
+                continue
+            update.alert_infos = self._take_pending_alerts()
+            self._run_in_view(self._show_update, update)
+
+    def _read_alerts(self) -> List[AlertInfo]:
+        with self.aggregator.lock:
+            return self._manage_alerts()
+
+    async def _read_off_loop(self, read: Callable[[], Read], alert_infos_of: Callable[[Read], List[AlertInfo]]) -> Read:
+        """
+        Runs a read of the aggregated state in the default executor: it takes the aggregator lock, and may write
+        to files (snapshot, alerts of the traffic store), which would block the loop. The alerts of a read still
+        running when the task is cancelled (stopping) are dispatched before the cancellation is propagated.
+        :param read: reads the state (e.g. _read_update)
+        :param alert_infos_of: alerts emitted by a read, from its result
+        """
+        future = asyncio.get_running_loop().run_in_executor(None, read)
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            self._dispatch_alerts(alert_infos_of(await future))
+            raise
+
+    async def _run_sink(self, sink: AlertSink, queue: Queue) -> None:
+        while True:
+            alert_info = await queue.get()
+            try:
+                await sink(alert_info)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception('Alert sink failed')
+            finally:
+                queue.task_done()
+
+    def _dispatch_alerts(self, alert_infos: List[AlertInfo]) -> None:
+        """
+        Queues alerts for the view and the sinks, dropping the oldest alerts of the sinks with a full queue.
+        """
+        self.pending_alerts.extend(alert_infos)
+        for queue in self.sink_queues:
+            for alert_info in alert_infos:
+                if queue.qsize() >= self.sink_capacity:
+                    queue.get_nowait()
+                    queue.task_done()
+                    self.nb_dropped_alerts += 1
+                queue.put_nowait(alert_info)
+
+    def _take_pending_alerts(self) -> List[AlertInfo]:
+        alert_infos, self.pending_alerts = self.pending_alerts, []
+        return alert_infos
+
+    def _view_busy(self) -> bool:
+        # no more updates once stopping
+        return self.stop_event.is_set() or (self.view_future is not None and not self.view_future.done())
+
+    def _run_in_view(self, function: Callable, *args) -> None:
+        """
+        Runs a view update in the view thread, without waiting for it.
+        """
+        self.view_future = asyncio.get_running_loop().run_in_executor(self.view_executor, function, *args)
+        self.view_future.add_done_callback(self._log_view_error)
+
+    @staticmethod
+    def _log_view_error(future: Future) -> None:
+        if not future.cancelled() and future.exception() is not None:
+            logger.error('View update failed', exc_info=future.exception())
+
+    def get_metrics(self) -> MetricsSnapshot:
+        """
+        Self-instrumentation snapshot (cf. Controller.get_metrics), plus the updates skipped while the view was
+        busy and the alerts dropped by the sinks.
+        """
+        metrics = super().get_metrics()
+        metrics.counters['skipped_updates'] = self.nb_skipped_updates
+        metrics.counters['dropped_alerts'] = self.nb_dropped_alerts
+        return metrics
@@ -1,12 +1,47 @@
-import time
-
+from collections import deque
+from dataclasses import dataclass
+from logging import getLogger
+from math import floor
 from threading import Event
-from typing import Optional
+from time import perf_counter_ns
+from typing import TYPE_CHECKING, Callable, Deque, List, Optional, Sequence
 from src.alert_managers.basic_alert_manager import BasicAlertManager, AlertInfo
-from src.interfaces.abstract_collector import HTTPInfo
+from src.alert_managers.window_alert_manager import WindowAlertManager
+from src.interfaces.abstract_alert_manager import AlertRule
+from src.interfaces.abstract_clock import AbstractClock
+from src.interfaces.abstract_collector import HTTPInfo, HitInfo, AbstractCollector, TrafficSummary
 from src.collectors.basic_collector import BasicCollector
-from src.sniffers.scapy_sniffer import ScapySniffer
-from src.interfaces.abstract_view import AbstractView
+from src.collectors.section_trie import SectionTrie
+from src.clocks.real_clock import RealClock
+from src.clocks.tick_scheduler import TickScheduler
+from src.interfaces.abstract_sniffer import AbstractSniffer
+from src.interfaces.abstract_view import AbstractView, LIMIT_HIGHEST_HITS, LIMIT_TOTAL_ALERT
+from src.pipelines.batch_queue import BatchQueue, DropPolicy, QueueCounters
+from src.pipelines.aggregator import Aggregator
+from src.instrumentation.latency_histogram import LatencyHistogram
+from src.instrumentation.metrics import MetricsSnapshot
+from src.stores.snapshot import SnapshotReader, SnapshotWriter, read_snapshot_file, write_snapshot_file
+
+if TYPE_CHECKING:
+    from src.pipelines.sharded_capture import ShardedCapture
+    from src.stores.traffic_store import TrafficStore
+
+logger = getLogger("Controller")
+
+# builds a sniffer from the callback receiving the detected HTTP traffic information
+SnifferFactory = Callable[[Callable[[HTTPInfo], None]], AbstractSniffer]
+
+
+@dataclass
+class TrafficUpdate:
+    """
+    Information read from the collector and the alert managers for an update of the view.
+    """
+
+    highest_hits: List[HitInfo]
+    alert_infos: List[AlertInfo]
+    traffic_summary: TrafficSummary
+    read_latency: int  # time spent reading (in nanoseconds)
 
 
 class Controller:
@@ -15,7 +50,24 @@ class Controller:
                  view: AbstractView,
                  update_period: int = 10,
                  traffic_history_span: int = 120,
-                 traffic_limit: int = 10000):
+                 traffic_limit: int = 10000,
+                 http_collector: Optional[AbstractCollector] = None,
+                 nb_highest_hits: int = LIMIT_HIGHEST_HITS,
+                 hits_window: Optional[int] = None,
+                 sniffer_factory: Optional[SnifferFactory] = None,
+                 queue_capacity: int = 100000,
+                 drop_policy: DropPolicy = DropPolicy.DROP_NEWEST,
+                 nb_workers: int = 1,
+                 clock: Optional[AbstractClock] = None,
+                 metrics_callback: Optional[Callable[[MetricsSnapshot], None]] = None,
+                 alert_rules: Sequence[AlertRule] = (),
+                 alert_period: int = 1,
+                 traffic_store: Optional['TrafficStore'] = None,
+                 restore_span: Optional[int] = None,
+                 snapshot_path: Optional[str] = None,
+                 snapshot_period: int = 60,
+                 section_depth: Optional[int] = None,
+                 hits_depth: Optional[int] = None):
         """
         Controller for monitoring traffic and displaying information and alerts
 
@@ -24,27 +76,245 @@ class Controller:
         :param traffic_history_span: duration during which traffic is monitored for alerting
                (in seconds, defaults to 2minutes)
         :param traffic_limit: traffic threshold used for alerting (in bytes, defaults to 10 thousand bytes - very low)
+        :param http_collector: HTTP traffic collector (defaults to a BasicCollector keeping traffic_history_span history)
+        :param nb_highest_hits: number of highest hits sections relayed to the view
+        :param hits_window: span of the sliding window of the collector over which the highest hits are counted
+               (defaults to None: since the start)
+        :param sniffer_factory: builds the HTTP traffic sniffer from its callback (defaults to ScapySniffer)
+        :param queue_capacity: maximum number of HTTP information records captured but not yet aggregated
+        :param drop_policy: records dropped when the capture outpaces aggregation (defaults to the newest ones)
+        :param nb_workers: number of capture processes ; if more than one, each process runs a sniffer built by
+               sniffer_factory (which must share the traffic between them) and sends partial traffic merged
+               into the collector every update_period
+        :param clock: clock of the update period ticks, the default collector and the alert manager
+               (defaults to RealClock, cf. PacketClock for replays)
+        :param metrics_callback: called with the self-instrumentation snapshot after every update (cf. get_metrics)
+        :param alert_rules: threshold rules evaluated on top of the traffic limit
+               (cf. RuleAlertManager, not available when capturing in several processes)
+        :param alert_period: periodicity of the alerts evaluation, independent of the view updates
+               (in seconds, defaults to 1 second) ; when capturing in several processes, the traffic is only merged
+               every update period, and the traffic limit is evaluated on the view updates
+        :param traffic_store: persistent store where the traffic and alerts are recorded (cf. TrafficRecorder,
+               not available when capturing in several processes) ; on start, the collector, the traffic limit
+               window and the alerts of the view are restored from it (warm restart)
+        :param restore_span: traffic restored from the store into the collector (in seconds, defaults to
+               traffic_history_span ; e.g. the largest sliding window of the collector)
+        :param snapshot_path: file where the state of the collector and of the alert managers is saved (binary
+               snapshot, cf. SnapshotWriter) every snapshot_period and when stopping ; on start, the state is
+               restored from it if it exists (hot restore, instead of the warm restart from the traffic store)
+        :param snapshot_period: periodicity of the snapshots (in seconds, defaults to 1 minute), taken on the
+               view updates
+        :param section_depth: also count the hits of the sections at every depth of the section hierarchy up to
+               section_depth path segments (cf. SectionTrie, not available when capturing in several processes)
+        :param hits_depth: depth of the highest hits sections relayed to the view, read from the section trie
+               (0: hosts, 1: first path segment, ... ; defaults to None: the sections of the collector)
         """
-        self.http_collector = BasicCollector(history_span=traffic_history_span)
-        self.alert_manager = BasicAlertManager(traffic_limit=traffic_limit)
+        self.clock = clock if clock is not None else RealClock()
+        self.http_collector = http_collector if http_collector is not None \
+            else BasicCollector(history_span=traffic_history_span, clock=self.clock)
+        self.alert_manager = BasicAlertManager(traffic_limit=traffic_limit, clock=self.clock)
+        # traffic limit evaluated on every alert period as the traffic is collected
+        self.window_alert_manager: Optional[WindowAlertManager] = None
+        if nb_workers <= 1:
+            self.window_alert_manager = WindowAlertManager(traffic_limit=traffic_limit,
+                                                           history_span=traffic_history_span,
+                                                           bucket_width=alert_period, clock=self.clock)
+        self.rule_alert_manager = None
+        if alert_rules:
+            if nb_workers > 1:
+                raise ValueError("alert rules are not available when capturing in several processes")
+            # imported only if needed (requires numpy)
+            from src.alert_managers.rule_alert_manager import RuleAlertManager
+            self.rule_alert_manager = RuleAlertManager(rules=alert_rules, clock=self.clock)
+        self.section_trie: Optional[SectionTrie] = None
+        if hits_depth is not None and (section_depth is None or not 0 <= hits_depth <= section_depth):
+            raise ValueError("the highest hits depth must be between 0 and the depth of the section trie")
+        if hits_depth is not None and hits_window is not None:
+            raise ValueError("the section trie only counts hits since the start")
+        if section_depth is not None:
+            if nb_workers > 1:
+                raise ValueError("the section trie is not available when capturing in several processes")
+            self.section_trie = SectionTrie(max_depth=section_depth, clock=self.clock)
+        self.hits_depth = hits_depth
+        self.traffic_store = traffic_store
+        self.traffic_recorder = None
+        if traffic_store is not None:
+            if nb_workers > 1:
+                raise ValueError("the traffic store is not available when capturing in several processes")
+            # imported only if needed (requires numpy)
+            from src.stores.traffic_recorder import TrafficRecorder
+            self.traffic_recorder = TrafficRecorder(store=traffic_store, clock=self.clock)
         self.update_period = update_period
-        self.sniffer = ScapySniffer(receive_http_callback=lambda http_info: self._receive_http_callback(http_info))
+        self.alert_period = alert_period
+        # capture -> aggregation pipeline: the sniffer never blocks on the collector
+        self.http_queue: BatchQueue[HTTPInfo] = BatchQueue(capacity=queue_capacity, drop_policy=drop_policy)
+        # relayed the traffic along with the collector (alert managers, recorder, section trie): per request when
+        # replaying, per batch by the aggregator
+        consumers = [consumer for consumer in [self.window_alert_manager, self.rule_alert_manager,
+                                               self.traffic_recorder, self.section_trie]
+                     if consumer is not None]
+        self.consumers: List[Callable[[HTTPInfo], None]] = [consumer.collect_http_info for consumer in consumers]
+        self.aggregator = Aggregator(http_queue=self.http_queue, http_collector=self.http_collector,
+                                     consumers=[consumer.collect_batch for consumer in consumers])
+        if sniffer_factory is None:
+            # scapy only imported when it is the capture backend
+            from src.sniffers.scapy_sniffer import ScapySniffer
+            sniffer_factory = ScapySniffer
+        self.sharded_capture: Optional['ShardedCapture'] = None
+        self.sniffer: Optional[AbstractSniffer] = None
+        if nb_workers > 1:
+            from src.pipelines.sharded_capture import ShardedCapture
+            self.sharded_capture = ShardedCapture(nb_workers=nb_workers, sniffer_factory=sniffer_factory,
+                                                  http_collector=self.http_collector, lock=self.aggregator.lock,
+                                                  flush_period=update_period, clock=self.clock)
+        else:
+            self.sniffer = sniffer_factory(lambda http_info: self._receive_http_callback(http_info))
+            self.sniffer.receive_batch_callback = self.http_queue.put_batch
         self.view = view
         self.stop_event = Event()
         self.traffic_history_span = traffic_history_span
+        self.nb_highest_hits = nb_highest_hits
+        self.hits_window = hits_window
+        self.metrics_callback = metrics_callback
+        # self-instrumentation of the updates: whole tick, collector / alert manager reads, view update
+        self.nb_ticks = 0
+        self.tick_duration = LatencyHistogram()
+        self.tick_read_latency = LatencyHistogram()
+        self.view_latency = LatencyHistogram()
+        self.snapshot_path = snapshot_path
+        self.snapshot_period = snapshot_period
+        self.next_snapshot: Optional[float] = None
+        self.snapshot_latency = LatencyHistogram()
+        # alerts emitted lately, saved in the snapshots so that the view shows them again after a restart
+        self.recent_alerts: Deque[AlertInfo] = deque(maxlen=LIMIT_TOTAL_ALERT)
+        restored = snapshot_path is not None and self._restore_snapshot()
+        if traffic_store is not None and not restored:
+            self._restore(restore_span if restore_span is not None else traffic_history_span)
 
     def start(self) -> None:
         """
-        Starts sniffer, then periodically (period of self.update_period, defaults to 10 seconds) checks for alerts
-        and updates the view with the traffic and alerting information.
+        Starts sniffer, then periodically (period of self.alert_period, defaults to 1 second) checks for alerts,
+        and updates the view with the traffic and alerting information every self.update_period (defaults to
+        10 seconds). The ticks are on fixed boundaries of the clock (multiples of the periods), whatever the time
+        taken by each update.
         Stops when the stop event is set (cf. call to self.stop())
         """
-        self.sniffer.start()
-        while not self.stop_event.is_set():
-            time.sleep(self.update_period)
-            alert_info: AlertInfo = self._manage_alert()
-            self._update_view(alert_info)
-        self.sniffer.stop()
+        self._start_capture()
+        scheduler = TickScheduler(clock=self.clock, period=self.alert_period)
+        update_scheduler = TickScheduler(clock=self.clock, period=self.update_period)
+        while True:
+            tick = scheduler.wait_next_tick(self.stop_event)
+            if tick is None:
+                break
+            if any(True for _ in update_scheduler.due_ticks(tick)):
+                self._tick()
+            else:
+                self._check_alerts()
+        self._stop_capture()
+
+    def replay(self) -> None:
+        """
+        Replays a capture (the sniffer must be a PcapSniffer) as fast as possible, in the calling thread:
+        the traffic goes straight to the collector and the update period ticks are fired on capture time,
+        so that the alerts are the ones raised while the traffic was captured (provided the clock of the
+        controller and of the collector is the packet clock of the sniffer).
+        """
+        if self.consumers:
+            self.sniffer.receive_http_callback = self._collect_http_info
+        else:
+            self.sniffer.receive_http_callback = self.http_collector.collect_http_info
+        self.sniffer.replay(tick_period=self.update_period, tick_callback=self._tick)
+        if self.traffic_recorder is not None:
+            self.traffic_recorder.flush(close_bucket=True)
+        if self.snapshot_path is not None:
+            self._take_snapshot()
+
+    def _tick(self) -> None:
+        """
+        Checks for alerts and updates the view with the traffic and alerting information.
+        """
+        update = self._read_update()
+        self._show_update(update)
+
+    def _read_update(self) -> TrafficUpdate:
+        """
+        Reads the traffic and alerting information of an update.
+        """
+        start = perf_counter_ns()
+        snapshot = None
+        # collector is only read while the aggregator is not writing to it, view is updated afterwards
+        with self.aggregator.lock:
+            alert_infos = self._manage_alerts()
+            if self.traffic_recorder is not None:
+                # records written in batches, at least every update
+                self.traffic_recorder.flush()
+            if self.hits_depth is not None:
+                highest_hits = self.section_trie.get_highest_hits(self.nb_highest_hits, self.hits_depth)
+            else:
+                highest_hits = self.http_collector.get_highest_hits(self.nb_highest_hits, self.hits_window)
+            traffic_summary = self.http_collector.get_traffic_summary()
+            if self._snapshot_due():
+                snapshot = self._dump_state()
+        read_latency = perf_counter_ns() - start
+        if snapshot is not None:
+            # written once the aggregator is released
+            write_snapshot_file(self.snapshot_path, snapshot)
+        return TrafficUpdate(highest_hits=highest_hits, alert_infos=alert_infos, traffic_summary=traffic_summary,
+                             read_latency=read_latency)
+
+    def _show_update(self, update: TrafficUpdate) -> None:
+        """
+        Updates the view with the information read (cf. _read_update) and with the self-instrumentation.
+        """
+        start = perf_counter_ns()
+        self._update_view(update.highest_hits, update.alert_infos)
+        self.view.update_traffic_summary(update.traffic_summary)
+        view_latency = perf_counter_ns() - start
+        self.nb_ticks += 1
+        self.tick_read_latency.record(update.read_latency)
+        self.view_latency.record(view_latency)
+        self.tick_duration.record(update.read_latency + view_latency)
+        metrics = self.get_metrics()
+        self.view.update_metrics(metrics)
+        if self.metrics_callback is not None:
+            self.metrics_callback(metrics)
+
+    def _check_alerts(self) -> None:
+        """
+        Checks for alerts between two updates, and displays them if any.
+        """
+        with self.aggregator.lock:
+            alert_infos = self._manage_alerts()
+        if alert_infos:
+            self._show_alerts(alert_infos)
+
+    def _show_alerts(self, alert_infos: List[AlertInfo]) -> None:
+        """
+        Updates the view with alerting information only.
+        """
+        for alert_info in alert_infos:
+            self.view.update_alert_info(alert_info)
+        self.view.print_alert_info()
+
+    def _start_capture(self) -> None:
+        if self.sharded_capture is not None:
+            self.sharded_capture.start()
+        else:
+            self.aggregator.start()
+            self.sniffer.start()
+
+    def _stop_capture(self) -> None:
+        if self.sharded_capture is not None:
+            self.sharded_capture.stop()
+        else:
+            self.sniffer.stop()
+            self.aggregator.stop()
+            # records captured before stopping are relayed to the collector
+            self.aggregator.join()
+            if self.traffic_recorder is not None:
+                self.traffic_recorder.flush(close_bucket=True)
+        if self.snapshot_path is not None:
+            self._take_snapshot()
 
     def stop(self):
         """
@@ -53,31 +323,180 @@ class Controller:
         """
         self.stop_event.set()
 
+    def get_queue_counters(self) -> QueueCounters:
+        """
+        Counters of the capture -> aggregation pipeline (enqueued, dropped, processed and pending records).
+        """
+        return self.http_queue.counters()
+
+    def get_metrics(self) -> MetricsSnapshot:
+        """
+        Self-instrumentation snapshot of the stages of the monitor: sniffer (packets seen, HTTP requests parsed,
+        decode failures, TCP flows evicted and stream gaps of the reassembly, parsing latency),
+        capture -> aggregation queue, collector (time per batch of requests), traffic recorder (records of buckets
+        older than the store not recorded), section trie (sections counted and pruned) and updates (tick duration,
+        split between collector reads and view update).
+        Sniffer counters are not available when capturing in several processes.
+        """
+        counters = dict()
+        latencies = dict()
+        sniffer_metrics = self.sniffer.get_metrics() if self.sniffer is not None else None
+        if sniffer_metrics is not None:
+            counters['packets_seen'] = sniffer_metrics.packets_seen
+            counters['http_parsed'] = sniffer_metrics.http_parsed
+            counters['decode_failures'] = sniffer_metrics.decode_failures
+            counters['flows_evicted'] = sniffer_metrics.flows_evicted
+            counters['stream_gaps'] = sniffer_metrics.stream_gaps
+            latencies['parse'] = sniffer_metrics.parse_latency.summary()
+            if sniffer_metrics.capture_delay.count:
+                latencies['capture_delay'] = sniffer_metrics.capture_delay.summary()
+        queue_counters = self.http_queue.counters()
+        counters['queue_enqueued'] = queue_counters.enqueued
+        counters['queue_dropped'] = queue_counters.dropped
+        counters['queue_pending'] = queue_counters.pending
+        counters['collected'] = queue_counters.processed
+        counters['ticks'] = self.nb_ticks
+        if self.traffic_recorder is not None:
+            counters['stale_records'] = self.traffic_recorder.nb_stale_records
+        if self.section_trie is not None:
+            counters['section_nodes'] = self.section_trie.nb_nodes
+            counters['sections_pruned'] = self.section_trie.nb_pruned
+        latencies['collect_batch'] = self.aggregator.batch_latency.summary()
+        latencies['tick'] = self.tick_duration.summary()
+        latencies['tick_reads'] = self.tick_read_latency.summary()
+        latencies['view_update'] = self.view_latency.summary()
+        if self.snapshot_latency.count:
+            latencies['snapshot'] = self.snapshot_latency.summary()
+        return MetricsSnapshot(timestamp=self.clock.now(), counters=counters, latencies=latencies)
+
+    def _collect_http_info(self, http_info: HTTPInfo) -> None:
+        """
+        Relays HTTP traffic information to the collector and to the alert managers (replays).
+        """
+        self.http_collector.collect_http_info(http_info)
+        for consumer in self.consumers:
+            consumer(http_info)
+
     def _receive_http_callback(self, http_info: HTTPInfo) -> None:
         """
         Callback for the HTTP traffic sniffer in case HTTP traffic is detected:
-        collects the traffic if self.http_collector.
+        queues the traffic information for the aggregator, which relays it to self.http_collector.
+        Never blocks: traffic is dropped if the queue is full (cf. drop policy).
         :param http_info: detected HTTP traffic information
         """
-        self.http_collector.collect_http_info(http_info)
+        self.http_queue.put(http_info)
+
+    def _manage_alerts(self) -> List[AlertInfo]:
+        """
+        Gets the alerts raised since the last check: traffic over last self.traffic_history_span period
+        (defaults to 2 minutes) evaluated on every alert period boundary by the window alert manager, or relayed
+        to the alert manager when the traffic is merged from several processes, then the alerting rules if any.
+        :return: alert information emitted, if any
+        """
+        if self.window_alert_manager is not None:
+            alert_infos = self.window_alert_manager.get_alert_infos()
+        else:
+            traffic_over_span = self.http_collector.get_total_traffic_over_period(self.traffic_history_span)
+            alert_info = self.alert_manager.get_alert_info(traffic_over_span)
+            alert_infos = [alert_info] if alert_info is not None else []
+        if self.rule_alert_manager is not None:
+            alert_infos += self.rule_alert_manager.get_alert_infos()
+        if self.traffic_store is not None and alert_infos:
+            self.traffic_store.append_alerts(alert_infos)
+        self.recent_alerts.extend(alert_infos)
+        return alert_infos
+
+    def _restore(self, restore_span: int) -> None:
+        """
+        Warm restart from the traffic store: traffic of the last restore_span seconds merged into the collector,
+        traffic window of the traffic limit and latest alerts of the view.
+        """
+        from src.stores.traffic_recorder import restore_collector
+        now = self.clock.now()
+        restore_collector(self.traffic_store, self.http_collector, int(now) - restore_span, int(now) + 1)
+        if self.window_alert_manager is not None:
+            self.window_alert_manager.restore(
+                self.traffic_store.traffic_per_bucket(int(now) - self.traffic_history_span, int(now) + 1))
+        for alert_info in self.traffic_store.read_alerts()[-LIMIT_TOTAL_ALERT:]:
+            self.view.restore_alert_info(alert_info)
+            self.recent_alerts.append(alert_info)
+
+    def _state_components(self) -> list:
+        """
+        Components whose state is saved in the snapshots, in order.
+        """
+        return [component for component in [self.http_collector, self.alert_manager, self.window_alert_manager,
+                                             self.rule_alert_manager, self.section_trie] if component is not None]
+
+    def _snapshot_due(self) -> bool:
+        """
+        Whether a snapshot is due (on the first update, then on the first update of every snapshot period).
+        """
+        if self.snapshot_path is None:
+            return False
+        now = self.clock.now()
+        if self.next_snapshot is not None and now < self.next_snapshot:
+            return False
+        self.next_snapshot = (floor(now / self.snapshot_period) + 1) * self.snapshot_period
+        return True
+
+    def _dump_state(self) -> bytes:
+        """
+        Snapshot of the state of the collector and alert managers, and of the recent alerts
+        (to be called while the aggregator is not writing to them).
+        """
+        start = perf_counter_ns()
+        writer = SnapshotWriter()
+        for component in self._state_components():
+            component.write_state(writer)
+        writer.write_alert_infos(list(self.recent_alerts))
+        snapshot = writer.getvalue()
+        self.snapshot_latency.record(perf_counter_ns() - start)
+        return snapshot
+
+    def _take_snapshot(self) -> None:
+        with self.aggregator.lock:
+            snapshot = self._dump_state()
+        write_snapshot_file(self.snapshot_path, snapshot)
 
-    def _manage_alert(self) -> Optional[AlertInfo]:
+    def _restore_snapshot(self) -> bool:
         """
-        Gets HTTP traffic over last self.traffic_history_span period (defaults to 2 minutes),
-        relays this information to the alert manager and returns the alert information if any.
-        :return: alert information if any, or None
+        Hot restore from the latest snapshot, if any: state of the collector and alert managers (e.g. an alert
+        still over the threshold), and recent alerts of the view. A snapshot which cannot be restored (corrupted,
+        or taken with another configuration) is ignored.
+        :return: True if the state was restored
         """
-        traffic_over_span = self.http_collector.get_total_traffic_over_period(self.traffic_history_span)
-        return self.alert_manager.get_alert_info(traffic_over_span)
+        snapshot = read_snapshot_file(self.snapshot_path)
+        if snapshot is None:
+            return False
+        try:
+            reader = SnapshotReader(snapshot)
+            for component in self._state_components():
+                component.read_state(reader)
+            alert_infos = reader.read_alert_infos()
+        except ValueError:
+            logger.warning('Snapshot %s not restored', self.snapshot_path, exc_info=True)
+            # components restored before the error start again from scratch
+            for component in self._state_components():
+                if component is self.http_collector:
+                    component.clear(clear_history=True)
+                else:
+                    component.clear()
+            return False
+        for alert_info in alert_infos:
+            self.view.restore_alert_info(alert_info)
+        self.recent_alerts.extend(alert_infos)
+        return True
 
-    def _update_view(self, opt_alert_info: Optional[AlertInfo]) -> None:
+    def _update_view(self, highest_hits: List[HitInfo], alert_infos: List[AlertInfo]) -> None:
         """
-        Update the view with the (optional) alerting information and the traffic information (highest section hits).
-        :param opt_alert_info: optional input alert information
+        Update the view with the alerting information and the traffic information (highest section hits).
+        :param highest_hits: highest section hits
+        :param alert_infos: alert information emitted since the last check
         :return:
         """
-        self.view.update_highest_hits(self.http_collector.get_highest_hits())
-        if opt_alert_info:
-            self.view.update_alert_info(opt_alert_info)
+        self.view.update_highest_hits(highest_hits)
+        for alert_info in alert_infos:
+            self.view.update_alert_info(alert_info)
         self.view.print_alert_info()
 
@@ -0,0 +1,75 @@
+from dataclasses import dataclass
+from typing import List
+
+NB_BUCKETS = 65  # bucket i counts the latencies of i bits (in nanoseconds), up to 64 bits
+
+
+@dataclass(frozen=True)
+class LatencySummary:
+    """
+    Summary of recorded latencies (in nanoseconds). Percentiles are upper bounds, within a factor 2
+    of the actual latencies (cf. LatencyHistogram).
+    """
+
+    count: int
+    total_ns: int
+    max_ns: int
+    p50_ns: int
+    p99_ns: int
+
+    @property
+    def mean_ns(self) -> float:
+        return self.total_ns / self.count if self.count else 0.0
+
+
+class LatencyHistogram:
+    """
+    Histogram of latencies in power of 2 buckets of nanoseconds: recording a latency is a few integer
+    operations (no allocation, no sort), so that it can stay enabled on the hot path. Histograms of
+    the same stage can be merged (e.g. across workers).
+    Written by a single thread, read by any (a read may miss the latencies being recorded).
+    """
+    __slots__ = ('buckets', 'count', 'total_ns', 'max_ns')
+
+    def __init__(self):
+        self.buckets: List[int] = [0] * NB_BUCKETS
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, latency_ns: int) -> None:
+        """
+        Record a latency.
+        :param latency_ns: latency in nanoseconds (e.g. a difference of time.perf_counter_ns() values)
+        """
+        self.buckets[latency_ns.bit_length()] += 1
+        self.count += 1
+        self.total_ns += latency_ns
+        if latency_ns > self.max_ns:
+            self.max_ns = latency_ns
+
+    def merge(self, other: 'LatencyHistogram') -> None:
+        for index, count in enumerate(other.buckets):
+            self.buckets[index] += count
+        self.count += other.count
+        self.total_ns += other.total_ns
+        self.max_ns = max(self.max_ns, other.max_ns)
+
+    def percentile(self, fraction: float) -> int:
+        """
+        Upper bound of the latency under which fraction of the latencies are (bounded by the maximum latency).
+        :param fraction: between 0 and 1 (e.g. 0.99 for the 99th percentile)
+        :return: latency in nanoseconds, 0 if no latency was recorded
+        """
+        rank = fraction * self.count
+        cumulated = 0
+        for index, count in enumerate(self.buckets):
+            cumulated += count
+            if count and cumulated >= rank:
+                # latencies of index bits are below 2^index
+                return min((1 << index) - 1, self.max_ns)
+        return self.max_ns
+
+    def summary(self) -> LatencySummary:
+        return LatencySummary(count=self.count, total_ns=self.total_ns, max_ns=self.max_ns,
+                              p50_ns=self.percentile(0.5), p99_ns=self.percentile(0.99))
@@ -0,0 +1,59 @@
+import json
+import os
+from dataclasses import asdict, dataclass
+from typing import Any, Dict
+
+from src.instrumentation.latency_histogram import LatencyHistogram, LatencySummary
+
+
+class SnifferMetrics:
+    """
+    Counters and parsing latency of a sniffer, written by its capture thread only.
+    packets_seen: packets handed to the parser ; http_parsed: HTTP requests relayed ;
+    decode_failures: packets looking like HTTP requests whose request line or headers could not be decoded ;
+    parse_latency: time spent parsing the packets into HTTP information ;
+    capture_delay: time between the capture of a packet by the kernel and its parsing (if known, e.g. including
+    the dissection by scapy) ;
+    flows_evicted: TCP flows dropped by the reassembly before their end, idle or to bound its memory
+    (cf. TCPReassembler) ;
+    stream_gaps: missing parts of TCP streams skipped by the reassembly (segments lost, or too many out of order).
+    """
+    __slots__ = ('packets_seen', 'http_parsed', 'decode_failures', 'parse_latency', 'capture_delay',
+                 'flows_evicted', 'stream_gaps')
+
+    def __init__(self):
+        self.packets_seen = 0
+        self.http_parsed = 0
+        self.decode_failures = 0
+        self.flows_evicted = 0
+        self.stream_gaps = 0
+        self.parse_latency = LatencyHistogram()
+        self.capture_delay = LatencyHistogram()
+
+
+@dataclass(frozen=True)
+class MetricsSnapshot:
+    """
+    Self-instrumentation of the monitor at a given time (cf. Controller.get_metrics):
+    counters of each stage, and latencies of each stage (cf. LatencySummary).
+    """
+
+    timestamp: float
+    counters: Dict[str, int]
+    latencies: Dict[str, LatencySummary]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Machine-readable snapshot (JSON serializable).
+        """
+        return asdict(self)
+
+
+def write_snapshot(metrics: MetricsSnapshot, path: str) -> None:
+    """
+    Write a snapshot as JSON to path, replacing the previous one atomically (readers never see a partial file).
+    """
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, 'w') as snapshot_file:
+        json.dump(metrics.to_dict(), snapshot_file)
+    os.replace(temporary_path, path)
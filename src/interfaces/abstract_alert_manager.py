@@ -15,8 +15,41 @@ class AlertStatus(Enum):
 class AlertInfo:
 
     status: AlertStatus
-    traffic_value: int
+    traffic_value: float  # value compared to the threshold (traffic in bytes for the traffic limit)
     timestamp: float
+    rule: str = ""  # name of the alerting rule, if any (cf. AlertRule)
+    key: Optional[str] = None  # section, host or method the rule alerted on, if any
+
+
+class RuleAggregation(Enum):
+
+    SUM = 0  # sum over the window
+    MEAN = 1  # mean per second over the window (rate)
+
+
+@dataclass(frozen=True)
+class AlertRule:
+    """
+    Threshold rule evaluated over a window of traffic counters, with the same hysteresis as the traffic limit
+    (OVER_THRESHOLD when the value goes over the threshold, UNDER_THRESHOLD when it goes back under).
+    metric: counter of the rule, total ('bytes', 'requests') or per section / host / method ('section_hits',
+    'section_bytes', 'host_bytes', 'host_requests', 'method_requests') ;
+    key: section / host / method the rule applies to, None for every one of them (one alert state each) ;
+    ratio_to: total metric dividing the metric over the window (e.g. share of the requests of a method),
+    in which case the aggregation is ignored ;
+    depth: depth of the sections of the section metrics in the section hierarchy (cf. SectionTrie): 0 for the
+    hosts, 1 for the first path segment, 2 for the first two (e.g. 'bing.it/api/v2'), ... ; None for the sections
+    of the collectors.
+    """
+
+    name: str
+    metric: str
+    threshold: float
+    window: int = 120
+    aggregation: RuleAggregation = RuleAggregation.SUM
+    key: Optional[str] = None
+    ratio_to: Optional[str] = None
+    depth: Optional[int] = None
 
 
 class AbstractAlertManager(ABC):
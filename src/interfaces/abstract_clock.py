@@ -0,0 +1,20 @@
+from abc import ABC, abstractmethod
+from threading import Event
+
+
+class AbstractClock(ABC):
+
+    @abstractmethod
+    def now(self) -> float:
+        """
+        Returns the current time of the clock (seconds since the epoch).
+        """
+
+    @abstractmethod
+    def wait_until(self, deadline: float, stop_event: Event) -> bool:
+        """
+        Waits until the clock reaches deadline, or until stop_event is set.
+        :param deadline: time to wait for
+        :param stop_event: interrupts the wait when set
+        :return: True if the deadline was reached, False if the wait was interrupted by stop_event
+        """
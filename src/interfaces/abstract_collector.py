@@ -1,8 +1,47 @@
-from typing import List
-from time import time
+from typing import Dict, List, Optional, Sequence, TYPE_CHECKING
 from datetime import datetime
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+if TYPE_CHECKING:
+    from src.stats.traffic_statistics import TrafficStatistics
+    from src.stores.snapshot import SnapshotReader, SnapshotWriter
+
+
+def section_prefix(path: str) -> str:
+    """
+    Return the part of path before its second '/' (scans for the two first '/' without splitting the whole path).
+    :param path: path of the HTTP request
+    :return: path prefix defining the section
+    """
+    if path.startswith('/'):
+        # usual case of an absolute path: a single scan is needed
+        second = path.find('/', 1)
+    else:
+        first = path.find('/')
+        if first < 0:
+            return path
+        second = path.find('/', first + 1)
+    return path if second < 0 else path[:second]
+
+
+def section_path_prefix(path: str, depth: int) -> str:
+    """
+    Return the part of path made of its depth first segments: the part before the depth-th '/' following its
+    first character, without the query string (cf. SectionTrie). Depth 1 is the prefix of section_prefix for the
+    usual paths (e.g. '/api' for '/api/v2/users'), depth 0 the empty prefix (the host alone).
+    :param path: path of the HTTP request
+    :param depth: number of segments kept
+    :return: path prefix of the section at depth
+    """
+    query = path.find('?')
+    if query >= 0:
+        path = path[:query]
+    end = 0
+    for _ in range(depth):
+        end = path.find('/', end + 1)
+        if end < 0:
+            return path
+    return path[:end]
 
 
 @dataclass(frozen=True)
@@ -14,7 +53,12 @@ class HTTPInfo:
     content_length: int
 
     def extract_section(self):
-        return self.host + '/'.join(self.path.split('/', 2)[:2])
+        path = self.path
+        if path.startswith('/'):
+            # inlined fast path of section_prefix (usual case of an absolute path)
+            second = path.find('/', 1)
+            return self.host + (path if second < 0 else path[:second])
+        return self.host + section_prefix(path)
 
 
 @dataclass(frozen=True)
@@ -25,20 +69,49 @@ class HitInfo:
     traffic: int = 0
     last_hit_traffic: int = 0
     last_hit_timestamp: float = 0.0
-
-    def add(self, section: str, http_info: HTTPInfo): # -> HitInfo:
-        return HitInfo(section=section,
-                       nb_hits=self.nb_hits + 1,
-                       traffic=self.traffic + http_info.content_length,
-                       last_hit_traffic=http_info.content_length,
-                       last_hit_timestamp=time())
+    # maximum overestimation of nb_hits by approximate collectors (nb_hits - nb_hits_error hits are guaranteed)
+    nb_hits_error: int = 0
 
     def __repr__(self):
         last_dt = datetime.fromtimestamp(self.last_hit_timestamp)
-        return f"{self.section}: hits {self.nb_hits} | total traffic {self.traffic} " \
+        hits = f"{self.nb_hits} ± {self.nb_hits_error}" if self.nb_hits_error else f"{self.nb_hits}"
+        return f"{self.section}: hits {hits} | total traffic {self.traffic} " \
                f"| last request traffic {self.last_hit_traffic} @ {last_dt}"
 
 
+@dataclass(frozen=True)
+class TrafficPartial:
+    """
+    Traffic collected separately (e.g. by a capture worker process) since the previous partial,
+    to be merged into a collector: hits per section plus traffic (in bytes) per second.
+    """
+
+    section_hits: List[HitInfo]
+    traffic_per_second: Dict[int, int]
+    # summary statistics of the traffic of the partial, if collected (sketches, not compared)
+    statistics: Optional['TrafficStatistics'] = field(default=None, compare=False)
+
+
+@dataclass(frozen=True)
+class TrafficSummary:
+    """
+    Summary statistics of the traffic as a whole, at a given time (cf. TrafficStatistics):
+    number of requests and traffic (in bytes) since the start, request and traffic rates over the last seconds,
+    requests per method, estimated number of distinct hosts, and percentiles of the request content length.
+    """
+
+    timestamp: float
+    nb_requests: int
+    total_traffic: int
+    request_rate: float
+    traffic_rate: float
+    methods: Dict[str, int]
+    nb_hosts: int
+    content_length_p50: int
+    content_length_p95: int
+    content_length_p99: int
+
+
 class AbstractCollector(ABC):
 
     @abstractmethod
@@ -49,9 +122,12 @@ class AbstractCollector(ABC):
         """
 
     @abstractmethod
-    def get_highest_hits(self) -> List[HitInfo]:
+    def get_highest_hits(self, k: int = 10, window: Optional[int] = None) -> List[HitInfo]:
         """
-        Return highest hits as sections
+        Return the k highest hits as sections, sorted by decreasing number of hits
+        :param k: maximum number of sections returned
+        :param window: span in seconds of the sliding window over which hits and traffic are counted, one of the
+               windows of the collector (defaults to None: since the collector started)
         :return:
         """
 
@@ -62,6 +138,15 @@ class AbstractCollector(ABC):
         :param http_info: HTTP traffic information
         """
 
+    def collect_batch(self, http_infos: Sequence[HTTPInfo]) -> None:
+        """
+        Collect a batch of HTTP traffic information (e.g. drained at once from the capture queue). Collectors
+        count the requests of a batch grouped by section, all at the time of the batch, instead of one at a time.
+        :param http_infos: HTTP traffic information of the batch
+        """
+        for http_info in http_infos:
+            self.collect_http_info(http_info)
+
     @abstractmethod
     def clear(self, clear_history: bool = False) -> None:
         """
@@ -76,3 +161,33 @@ class AbstractCollector(ABC):
         :param span: duration in seconds over which traffic should be computed.
         :return: total traffic over period
         """
+
+    @abstractmethod
+    def get_traffic_summary(self) -> TrafficSummary:
+        """
+        Return the summary statistics of the traffic as a whole (request and traffic rates, methods, hosts,
+        content length percentiles)
+        :return: traffic summary as of now
+        """
+
+    @abstractmethod
+    def merge_partial(self, partial: TrafficPartial) -> None:
+        """
+        Merge traffic collected separately (cf. TrafficPartial) into this collector
+        :param partial: hits and traffic collected since the previous partial
+        """
+
+    @abstractmethod
+    def write_state(self, writer: 'SnapshotWriter') -> None:
+        """
+        Write the traffic information collected to a snapshot (cf. SnapshotWriter)
+        :param writer: snapshot written
+        """
+
+    @abstractmethod
+    def read_state(self, reader: 'SnapshotReader') -> None:
+        """
+        Replace the traffic information by the one of a snapshot written by write_state (hot restore)
+        :param reader: snapshot read
+        :raise ValueError: if the snapshot is not the one of a collector of the same type and configuration
+        """
@@ -1,12 +1,26 @@
 from abc import ABC, abstractmethod
+from typing import Callable, List, Optional
+
+from src.instrumentation.metrics import SnifferMetrics
+from src.interfaces.abstract_collector import HTTPInfo
 
 
 class AbstractSniffer(ABC):
 
+    # if set, sniffers reading packets in batches (e.g. RawSocketSniffer) relay the requests of each batch to it
+    # in a single call instead of calling their receive_http_callback per request
+    receive_batch_callback: Optional[Callable[[List[HTTPInfo]], None]] = None
+
     @abstractmethod
     def start(self):
         pass
 
     @abstractmethod
     def stop(self):
-        pass
\ No newline at end of file
+        pass
+
+    def get_metrics(self) -> Optional[SnifferMetrics]:
+        """
+        Counters and parsing latency of the sniffer, None if it is not instrumented.
+        """
+        return None
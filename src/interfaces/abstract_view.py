@@ -1,15 +1,25 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Optional
 from src.interfaces.abstract_alert_manager import AlertInfo, AlertStatus
-from src.interfaces.abstract_collector import HitInfo
+from src.interfaces.abstract_clock import AbstractClock
+from src.interfaces.abstract_collector import HitInfo, TrafficSummary
+from src.clocks.real_clock import RealClock
+from src.instrumentation.metrics import MetricsSnapshot
 
 LIMIT_TOTAL_ALERT = 10  # limit on the maximum number of alerts kept in history
+LIMIT_HIGHEST_HITS = 10  # limit on the number of highest hits sections displayed
 
 
 class AbstractView(ABC):
 
-    def __init__(self):
+    def __init__(self, clock: Optional[AbstractClock] = None):
+        '''
+        :param clock: time of the displayed updates (defaults to RealClock)
+        '''
         self.all_alerts: List[AlertInfo] = []
+        self.clock = clock if clock is not None else RealClock()
+        self.metrics: Optional[MetricsSnapshot] = None
+        self.traffic_summary: Optional[TrafficSummary] = None
 
     @abstractmethod
     def update_highest_hits(self, highest_hits: List[HitInfo]) -> None:
@@ -31,6 +41,31 @@ class AbstractView(ABC):
         '''
         if alert_info.status == AlertStatus.NO_ALERT:
             pass
+        self._add_to_history(alert_info)
+
+    def restore_alert_info(self, alert_info: AlertInfo) -> None:
+        '''
+        Seed the alerts history with an alert emitted before a restart (cf. Controller snapshot and traffic store):
+        displayed as the other alerts, but not emitted again by the views exporting the alerts as events
+        :param alert_info:
+        '''
+        self._add_to_history(alert_info)
+
+    def _add_to_history(self, alert_info: AlertInfo) -> None:
         self.all_alerts.append(alert_info)
         if len(self.all_alerts) > LIMIT_TOTAL_ALERT:
-            self.all_alerts = self.all_alerts[-LIMIT_TOTAL_ALERT:]
\ No newline at end of file
+            self.all_alerts = self.all_alerts[-LIMIT_TOTAL_ALERT:]
+
+    def update_traffic_summary(self, traffic_summary: TrafficSummary) -> None:
+        '''
+        Update the summary statistics of the traffic as a whole (not displayed unless overridden)
+        :param traffic_summary: latest traffic summary
+        '''
+        self.traffic_summary = traffic_summary
+
+    def update_metrics(self, metrics: MetricsSnapshot) -> None:
+        '''
+        Update the self-instrumentation of the monitor (not displayed unless overridden)
+        :param metrics: latest self-instrumentation snapshot
+        '''
+        self.metrics = metrics
@@ -4,17 +4,29 @@ import sys
 path = os.path.join(os.path.dirname(__file__), os.pardir)
 sys.path.append(path)
 
-print(f"SYSPATH {sys.path}")
-
 import argparse
-import time
+import signal
+from functools import partial
+from typing import TYPE_CHECKING, Callable, Optional, Sequence
 from threading import Thread
-from src.controllers.controller import Controller
-
-
-from interfaces.abstract_view import AbstractView
+from src.controllers.controller import Controller, SnifferFactory
+from src.interfaces.abstract_collector import AbstractCollector
+from src.interfaces.abstract_alert_manager import AlertRule
+from src.collectors.basic_collector import BasicCollector
+from src.collectors.ring_buffer_collector import RingBufferCollector
+from src.collectors.space_saving_collector import SpaceSavingCollector
+from src.sniffers.pcap_sniffer import PcapSniffer
+from src.interfaces.abstract_clock import AbstractClock
+from src.clocks.real_clock import RealClock
+from src.clocks.packet_clock import PacketClock
+from src.instrumentation.metrics import MetricsSnapshot, write_snapshot
 from src.views.print_view import PrintView
-from src.views.curses_view import CursesView
+from src.views.multi_view import MultiView
+# the capture backends (scapy, raw socket), the curses view, the asyncio runtime and the numpy-based components
+# are imported once selected: starting only imports what is used
+if TYPE_CHECKING:
+    from src.interfaces.abstract_view import AbstractView
+    from src.stores.traffic_store import TrafficStore
 
 
 class ControllerThread(Thread):
@@ -27,32 +39,246 @@ class ControllerThread(Thread):
         self.controller.start()
 
 
-def main(selected_view: AbstractView):
+UPDATE_PERIOD = 10
+TRAFFIC_HISTORY_SPAN = 120
+# sliding windows over which the collectors also count the section hits (cf. --hits-window)
+HITS_WINDOWS = {'period': UPDATE_PERIOD, '2min': 120, '10min': 600, 'all': None}
+# traffic restored from the store on start: enough to rebuild all the sliding windows
+RESTORE_SPAN = max([TRAFFIC_HISTORY_SPAN] + [span for span in HITS_WINDOWS.values() if span is not None])
+# state of the collector and alert managers saved every minute (cf. --snapshot)
+SNAPSHOT_PERIOD = 60
+# signals stopping the monitor cleanly (as Ctrl-C does): sent by supervisors and container runtimes, and when the
+# terminal is closed
+STOP_SIGNALS = (signal.SIGTERM, signal.SIGHUP) if hasattr(signal, 'SIGHUP') else (signal.SIGTERM,)
+
+
+def metrics_writer(metrics_path: Optional[str]) -> Optional[Callable[[MetricsSnapshot], None]]:
+    # self-instrumentation snapshot written as JSON after every update, if requested
+    return partial(write_snapshot, path=metrics_path) if metrics_path is not None else None
+
+
+def main(selected_view: 'AbstractView', selected_collector: AbstractCollector, selected_sniffer: SnifferFactory,
+         clock: AbstractClock, nb_workers: int = 1, metrics_path: Optional[str] = None,
+         hits_window: Optional[int] = None, alert_rules: Sequence[AlertRule] = (), runtime: str = 'thread',
+         traffic_store: Optional['TrafficStore'] = None, snapshot_path: Optional[str] = None,
+         snapshot_period: int = SNAPSHOT_PERIOD, section_depth: Optional[int] = None,
+         hits_depth: Optional[int] = None, headless: bool = False):
     # update period: 10 seconds
     # traffic history for alerting: 2 minutes / 120 seconds
     # traffic limit: 10k bytes (which is low)
+    if runtime == 'async':
+        from src.controllers.async_controller import AsyncController
+        controller_class = AsyncController
+    else:
+        controller_class = Controller
+    controller = controller_class(view=selected_view,
+                                  update_period=UPDATE_PERIOD,
+                                  traffic_history_span=TRAFFIC_HISTORY_SPAN,
+                                  traffic_limit=10000,
+                                  http_collector=selected_collector,
+                                  hits_window=hits_window,
+                                  sniffer_factory=selected_sniffer,
+                                  nb_workers=nb_workers,
+                                  clock=clock,
+                                  metrics_callback=metrics_writer(metrics_path),
+                                  alert_rules=alert_rules,
+                                  traffic_store=traffic_store,
+                                  restore_span=RESTORE_SPAN,
+                                  snapshot_path=snapshot_path,
+                                  snapshot_period=snapshot_period,
+                                  section_depth=section_depth,
+                                  hits_depth=hits_depth)
+    if not headless:
+        print("start controller")
+    # in principle application should run 'forever': until interrupted (Ctrl-C) or stopped by one of STOP_SIGNALS,
+    # then stops cleanly (capture drained, snapshot saved)
+    previous_handlers = {stop_signal: signal.signal(stop_signal, lambda signum, frame: controller.stop())
+                         for stop_signal in STOP_SIGNALS}
+    try:
+        if runtime == 'async':
+            import asyncio
+            try:
+                # the tasks of the controller are cancelled on interruption
+                asyncio.run(controller.run())
+            except KeyboardInterrupt:
+                pass
+            return
+        controller_thread = ControllerThread(controller)
+        controller_thread.start()
+        try:
+            controller_thread.join()
+        except KeyboardInterrupt:
+            controller.stop()
+            controller_thread.join()
+    finally:
+        for stop_signal, handler in previous_handlers.items():
+            signal.signal(stop_signal, handler)
+
+
+def replay(selected_view: 'AbstractView', selected_collector: AbstractCollector, capture_path: str,
+           clock: PacketClock, metrics_path: Optional[str] = None, hits_window: Optional[int] = None,
+           alert_rules: Sequence[AlertRule] = (), traffic_store: Optional['TrafficStore'] = None,
+           snapshot_path: Optional[str] = None, reassemble: bool = False, section_depth: Optional[int] = None,
+           hits_depth: Optional[int] = None):
+    # same settings as main, ticks and alerts follow the capture time
     controller = Controller(view=selected_view,
-                            update_period=10,
-                            traffic_history_span=120,
-                            traffic_limit=10000)
-    print("start controller")
-    controller_thread = ControllerThread(controller)
-    controller_thread.start()
-    '''
-    # in principle application should run 'forever'
-    time.sleep(3000)
-    controller.stop()
-    controller_thread.join()
-    '''
+                            update_period=UPDATE_PERIOD,
+                            traffic_history_span=TRAFFIC_HISTORY_SPAN,
+                            traffic_limit=10000,
+                            http_collector=selected_collector,
+                            hits_window=hits_window,
+                            sniffer_factory=partial(PcapSniffer, capture_path=capture_path, clock=clock,
+                                                    reassemble=reassemble),
+                            clock=clock,
+                            metrics_callback=metrics_writer(metrics_path),
+                            alert_rules=alert_rules,
+                            traffic_store=traffic_store,
+                            snapshot_path=snapshot_path,
+                            section_depth=section_depth,
+                            hits_depth=hits_depth)
+    controller.replay()
 
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Console scroll or curses.')
     parser.add_argument('--ncurses', default=False, dest='ncurses', action='store_true',
                         help='ncurses mode (default: scrolling)')
+    parser.add_argument('--collector', default='basic', dest='collector', choices=['basic', 'ring', 'space-saving'],
+                        help='traffic collector: basic list history, ring buffer of time buckets, or approximate '
+                             'top sections in fixed memory (default: basic)')
+    parser.add_argument('--sections-capacity', default=1000, type=int, dest='sections_capacity',
+                        help='maximum number of sections counted by the space-saving collector, counts of the top '
+                             'sections are within total hits / capacity (default: 1000)')
+    parser.add_argument('--hits-window', default=None, dest='hits_window', choices=list(HITS_WINDOWS),
+                        help='sliding window over which the sections with the most hits are counted: last update '
+                             'period, 2 or 10 minutes, or since the start (default: period, all for the '
+                             'space-saving collector which only counts since the start)')
+    parser.add_argument('--section-depth', default=None, type=int, dest='section_depth', metavar='DEPTH',
+                        help='also count the hits of the hosts and of the path prefixes of up to DEPTH segments '
+                             '(section hierarchy, e.g. bing.it/api/v2 at depth 2) in a bounded prefix tree')
+    parser.add_argument('--hits-depth', default=None, type=int, dest='hits_depth', metavar='DEPTH',
+                        help='show the sections of DEPTH path segments with the most hits since the start '
+                             '(0: hosts), read from the prefix tree (implies --section-depth DEPTH at least)')
+    parser.add_argument('--sniffer', default='scapy', dest='sniffer', choices=['scapy', 'raw'],
+                        help='HTTP sniffer: scapy dissection or Linux raw socket with kernel BPF filter '
+                             '(default: scapy)')
+    parser.add_argument('--interface', default=None, dest='interface',
+                        help='network interface captured by the raw socket sniffer (default: all interfaces)')
+    parser.add_argument('--reassembly', default=False, dest='reassembly', action='store_true',
+                        help='reassemble the TCP streams of the raw socket sniffer or of a replay: requests split in '
+                             'several segments are parsed, and the traffic of a request is the bytes transferred '
+                             'by the request and its response')
+    parser.add_argument('--workers', default=1, type=int, dest='workers',
+                        help='number of capture processes sharing the traffic by flow hash, '
+                             'requires the raw socket sniffer (default: 1)')
+    parser.add_argument('--replay', default=None, dest='replay', metavar='CAPTURE',
+                        help='replay a pcap / pcapng capture as fast as possible instead of sniffing, '
+                             'with the update period and alerts following the capture time')
+    parser.add_argument('--metrics-file', default=None, dest='metrics_file', metavar='PATH',
+                        help='write the self-instrumentation snapshot (stage counters and latencies) as JSON to PATH '
+                             'after every update')
+    parser.add_argument('--alert-rules', default=None, dest='alert_rules', metavar='PATH',
+                        help='JSON file of threshold rules (e.g. per section rate, per host bytes, share of a method) '
+                             'alerting on top of the traffic limit, requires numpy')
+    parser.add_argument('--runtime', default='thread', dest='runtime', choices=['thread', 'async'],
+                        help='controller runtime: updates in a thread, or asyncio tasks evaluating the alerts, '
+                             'updating the view in its own thread and feeding the alert sinks with their own '
+                             'cadences (default: thread)')
+    parser.add_argument('--store', default=None, dest='store', metavar='DIRECTORY',
+                        help='record the traffic and alerts in a persistent store in DIRECTORY, and restore the '
+                             'latest traffic and alerts from it on start, requires numpy')
+    parser.add_argument('--snapshot', default=None, dest='snapshot', metavar='PATH',
+                        help='save the state of the collector and alert managers (binary snapshot) to PATH '
+                             'periodically and when stopping, and restore it from PATH on start')
+    parser.add_argument('--prometheus-port', default=None, type=int, dest='prometheus_port', metavar='PORT',
+                        help='also serve the highest hits, alert states, traffic summary and self-instrumentation as '
+                             'text metrics (Prometheus format) on http://127.0.0.1:PORT/metrics')
+    parser.add_argument('--ndjson', default=None, dest='ndjson', metavar='PATH',
+                        help='also append the highest hits and the alerts as JSON lines to PATH (- for the standard '
+                             'output)')
+    parser.add_argument('--no-ui', default=False, dest='no_ui', action='store_true',
+                        help='headless daemon: no console view, the traffic and alerts are only exported '
+                             '(--prometheus-port, --ndjson, --metrics-file, --store), stops cleanly on SIGTERM')
+    parser.add_argument('--snapshot-period', default=SNAPSHOT_PERIOD, type=int, dest='snapshot_period',
+                        metavar='SECONDS', help=f'time between two snapshots (default: {SNAPSHOT_PERIOD})')
     args = vars(parser.parse_args())
-    if "ncurses" in args and args["ncurses"]:
-        view = CursesView()
+    if args["workers"] > 1 and args["sniffer"] != 'raw':
+        parser.error('--workers requires --sniffer raw')
+    if args["no_ui"] and args["ncurses"]:
+        parser.error('--no-ui and --ncurses are exclusive')
+    if args["no_ui"] and all(args[output] is None for output in ['prometheus_port', 'ndjson', 'metrics_file', 'store']):
+        parser.error('--no-ui requires an output: --prometheus-port, --ndjson, --metrics-file or --store')
+    if args["reassembly"] and args["sniffer"] != 'raw' and args["replay"] is None:
+        parser.error('--reassembly requires --sniffer raw or --replay')
+    section_depth, hits_depth = args["section_depth"], args["hits_depth"]
+    if hits_depth is not None:
+        section_depth = max(hits_depth, section_depth if section_depth is not None else hits_depth)
+    if section_depth is not None and args["workers"] > 1:
+        parser.error('--section-depth is not available with --workers')
+    if args["collector"] == 'space-saving' or hits_depth is not None:
+        if args["hits_window"] not in (None, 'all'):
+            parser.error('--collector space-saving and --hits-depth only count hits since the start '
+                         '(--hits-window all)')
+        hits_window = None
+    else:
+        hits_window = HITS_WINDOWS[args["hits_window"] or 'period']
+    window_spans = [span for span in HITS_WINDOWS.values() if span is not None]
+    alert_rules = []
+    if args["alert_rules"] is not None:
+        if args["workers"] > 1:
+            parser.error('--alert-rules is not available with --workers')
+        from src.alert_managers.rule_alert_manager import load_rules
+        alert_rules = load_rules(args["alert_rules"])
+    traffic_store = None
+    if args["store"] is not None:
+        if args["workers"] > 1:
+            parser.error('--store is not available with --workers')
+        from src.stores.traffic_store import TrafficStore
+        traffic_store = TrafficStore(args["store"])
+    # clock shared by all components: the capture time on replays
+    clock = PacketClock() if args["replay"] is not None else RealClock()
+    views = []
+    if args["ncurses"]:
+        from src.views.curses_view import CursesView
+        views.append(CursesView(clock=clock))
+    elif not args["no_ui"]:
+        views.append(PrintView(clock=clock))
+    # non-interactive export views, updated along with the console view
+    if args["prometheus_port"] is not None:
+        from src.views.prometheus_view import PrometheusView
+        views.append(PrometheusView(port=args["prometheus_port"], clock=clock))
+    if args["ndjson"] is not None:
+        from src.views.ndjson_view import NDJSONView
+        views.append(NDJSONView(args["ndjson"], clock=clock))
+    view = views[0] if len(views) == 1 and not args["no_ui"] else MultiView(views, clock=clock)
+    if args["collector"] == 'ring':
+        collector = RingBufferCollector(history_span=TRAFFIC_HISTORY_SPAN, clock=clock, window_spans=window_spans)
+    elif args["collector"] == 'space-saving':
+        collector = SpaceSavingCollector(capacity=args["sections_capacity"], history_span=TRAFFIC_HISTORY_SPAN,
+                                         clock=clock)
+    else:
+        collector = BasicCollector(history_span=TRAFFIC_HISTORY_SPAN, clock=clock, window_spans=window_spans)
+    if args["replay"] is not None:
+        replay(view, collector, args["replay"], clock, args["metrics_file"], hits_window, alert_rules,
+               traffic_store, args["snapshot"], args["reassembly"], section_depth, hits_depth)
+        if traffic_store is not None:
+            traffic_store.close()
+        if isinstance(view, MultiView):
+            view.close()
+        sys.exit(0)
+    if args["sniffer"] == 'raw':
+        from src.sniffers.raw_socket_sniffer import RawSocketSniffer
+        # fanout group shared by the capture processes (unused with a single process)
+        fanout_group = os.getpid() & 0xffff if args["workers"] > 1 else None
+        sniffer_factory = partial(RawSocketSniffer, interface=args["interface"], fanout_group=fanout_group,
+                                  reassemble=args["reassembly"])
     else:
-        view = PrintView()
-    main(view)
+        from src.sniffers.scapy_sniffer import ScapySniffer
+        sniffer_factory = ScapySniffer
+    main(view, collector, sniffer_factory, clock, args["workers"], args["metrics_file"], hits_window,
+         alert_rules, args["runtime"], traffic_store, args["snapshot"], args["snapshot_period"], section_depth,
+         hits_depth, args["no_ui"])
+    if traffic_store is not None:
+        traffic_store.close()
+    if isinstance(view, MultiView):
+        view.close()
@@ -0,0 +1,65 @@
+from threading import Event, Lock, Thread
+from time import perf_counter_ns
+from typing import Callable, List, Sequence
+
+from src.interfaces.abstract_collector import AbstractCollector, HTTPInfo
+from src.pipelines.batch_queue import BatchQueue
+from src.instrumentation.latency_histogram import LatencyHistogram
+
+DRAIN_PERIOD = 0.05  # seconds between two drains of the queue when it is empty
+MAX_BATCH = 4096  # maximum number of records applied to the collector at once
+
+
+class Aggregator(Thread):
+
+    def __init__(self, http_queue: BatchQueue[HTTPInfo], http_collector: AbstractCollector,
+                 drain_period: float = DRAIN_PERIOD, max_batch: int = MAX_BATCH,
+                 consumers: Sequence[Callable[[List[HTTPInfo]], None]] = ()):
+        """
+        Aggregation stage of the capture pipeline: drains the HTTP information queued by the sniffer in batches
+        and relays each batch to the collector at once (cf. AbstractCollector.collect_batch), which thus has a
+        single writer (this thread).
+        Readers of the collector (the controller) must hold self.lock, which is only taken once per batch here.
+        :param http_queue: queue filled by the sniffer
+        :param http_collector: collector of the HTTP traffic information
+        :param drain_period: seconds waited when the queue is empty
+        :param max_batch: maximum number of records applied to the collector while holding the lock
+        :param consumers: also receive every batch, after the collector (e.g. collect_batch of the rule alert
+               manager)
+        """
+        super().__init__(name="Aggregator", daemon=True)
+        self.http_queue = http_queue
+        self.http_collector = http_collector
+        self.drain_period = drain_period
+        self.max_batch = max_batch
+        self.consumers = list(consumers)
+        self.lock = Lock()
+        self.stop_event = Event()
+        # time spent applying each batch to the collector (lock held)
+        self.batch_latency = LatencyHistogram()
+
+    def run(self) -> None:
+        while not self.stop_event.is_set():
+            if not self.drain():
+                self.stop_event.wait(self.drain_period)
+        # last records captured before stopping
+        while self.drain():
+            pass
+
+    def drain(self) -> int:
+        """
+        Relay one batch of queued HTTP information to the collector.
+        :return: number of records relayed
+        """
+        batch = self.http_queue.drain(self.max_batch)
+        if batch:
+            with self.lock:
+                start = perf_counter_ns()
+                self.http_collector.collect_batch(batch)
+                for consume in self.consumers:
+                    consume(batch)
+                self.batch_latency.record(perf_counter_ns() - start)
+        return len(batch)
+
+    def stop(self) -> None:
+        self.stop_event.set()
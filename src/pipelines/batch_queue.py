@@ -0,0 +1,106 @@
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+from typing import Deque, Generic, List, Sequence, TypeVar
+
+Record = TypeVar('Record')
+
+
+class DropPolicy(Enum):
+
+    DROP_NEWEST = 0  # a full queue rejects incoming records (records already queued are kept)
+    DROP_OLDEST = 1  # a full queue evicts its oldest record to make room for the incoming one
+
+
+@dataclass(frozen=True)
+class QueueCounters:
+    """
+    enqueued: records accepted in the queue ; dropped: records lost (rejected when full, or evicted) ;
+    processed: records drained by the consumer ; pending: records waiting in the queue.
+    """
+
+    enqueued: int
+    dropped: int
+    processed: int
+    pending: int
+
+
+class BatchQueue(Generic[Record]):
+
+    def __init__(self, capacity: int = 100000, drop_policy: DropPolicy = DropPolicy.DROP_NEWEST):
+        """
+        Bounded queue between a single producer (capture thread) and a single consumer (aggregator) draining
+        records in batches. The producer never blocks nor takes a lock: deque appends and pops are atomic,
+        and when the queue is full records are dropped according to the drop policy (and counted).
+        Each counter is only written by one side: enqueued / dropped by the producer, processed by the consumer.
+        :param capacity: maximum number of pending records
+        :param drop_policy: what to drop when the queue is full
+        """
+        if capacity <= 0:
+            raise ValueError("queue capacity must be strictly positive")
+        self.capacity = capacity
+        self.drop_policy = drop_policy
+        self.records: Deque[Record] = deque(maxlen=capacity) if drop_policy == DropPolicy.DROP_OLDEST else deque()
+        self.enqueued = 0
+        self.dropped = 0
+        self.processed = 0
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def put(self, record: Record) -> bool:
+        """
+        Enqueue a record (called by the producer).
+        :param record: record to enqueue
+        :return: True if the record was enqueued, False if it was dropped
+        """
+        if len(self.records) >= self.capacity:
+            self.dropped += 1
+            if self.drop_policy == DropPolicy.DROP_NEWEST:
+                return False
+            # bounded deque evicts its oldest record on append
+        self.records.append(record)
+        self.enqueued += 1
+        return True
+
+    def put_batch(self, records: Sequence[Record]) -> int:
+        """
+        Enqueue records at once (called by the producer), with the drop policy of put.
+        :param records: records to enqueue, oldest first
+        :return: number of records enqueued (the others were dropped)
+        """
+        nb_records = len(records)
+        free = max(self.capacity - len(self.records), 0)
+        if nb_records > free:
+            self.dropped += nb_records - free
+            if self.drop_policy == DropPolicy.DROP_NEWEST:
+                records = records[:free]
+                nb_records = free
+            # otherwise the bounded deque evicts its oldest records on extend
+        self.records.extend(records)
+        self.enqueued += nb_records
+        return nb_records
+
+    def drain(self, max_batch: int) -> List[Record]:
+        """
+        Dequeue up to max_batch records, oldest first (called by the consumer).
+        Records dequeued are counted as processed.
+        :param max_batch: maximum number of records returned
+        :return: batch of records (empty if nothing is pending)
+        """
+        batch: List[Record] = []
+        popleft = self.records.popleft
+        try:
+            for _ in range(min(max_batch, len(self.records))):
+                batch.append(popleft())
+        except IndexError:
+            # oldest records evicted by the producer meanwhile (DROP_OLDEST policy)
+            pass
+        self.processed += len(batch)
+        return batch
+
+    def counters(self) -> QueueCounters:
+        return QueueCounters(enqueued=self.enqueued,
+                             dropped=self.dropped,
+                             processed=self.processed,
+                             pending=len(self.records))
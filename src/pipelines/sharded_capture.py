@@ -0,0 +1,117 @@
+import signal
+import multiprocessing
+from queue import Empty
+from threading import Event, Lock, Thread
+from typing import Callable, List, Optional
+
+from src.interfaces.abstract_clock import AbstractClock
+from src.interfaces.abstract_collector import AbstractCollector, HTTPInfo
+from src.interfaces.abstract_sniffer import AbstractSniffer
+from src.collectors.partial_collector import PartialCollector
+from src.clocks.real_clock import RealClock
+from src.pipelines.batch_queue import BatchQueue
+from src.pipelines.aggregator import DRAIN_PERIOD, MAX_BATCH
+
+MERGE_TIMEOUT = 0.5  # seconds between two checks of the stop event by the merger when no partial is received
+JOIN_TIMEOUT = 5.0  # seconds waited for each worker process to stop
+
+
+def run_capture_worker(sniffer_factory: Callable[[Callable[[HTTPInfo], None]], AbstractSniffer],
+                       partial_queue, stop_event, flush_period: float, clock: AbstractClock) -> None:
+    """
+    Capture worker process: sniffs its share of the traffic, aggregates it in partial section counters and
+    traffic buckets (through its own capture -> aggregation queue), and sends the partials every flush_period
+    of the clock (the worker's copy of the clock of the controller).
+    """
+    # interruption is managed by the parent process, through stop_event
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    http_queue: BatchQueue[HTTPInfo] = BatchQueue()
+    partial_collector = PartialCollector(clock=clock)
+    sniffer = sniffer_factory(http_queue.put)
+    sniffer.receive_batch_callback = http_queue.put_batch
+    sniffer.start()
+
+    def flush() -> None:
+        partial = partial_collector.flush()
+        if partial.section_hits:
+            partial_queue.put(partial)
+
+    next_flush = clock.now() + flush_period
+    while not stop_event.is_set():
+        batch = http_queue.drain(MAX_BATCH)
+        partial_collector.collect_batch(batch)
+        if clock.now() >= next_flush:
+            flush()
+            next_flush += flush_period
+        if not batch:
+            stop_event.wait(DRAIN_PERIOD)
+    sniffer.stop()
+    partial_collector.collect_batch(http_queue.drain(len(http_queue)))
+    flush()
+
+
+class ShardedCapture:
+
+    def __init__(self,
+                 nb_workers: int,
+                 sniffer_factory: Callable[[Callable[[HTTPInfo], None]], AbstractSniffer],
+                 http_collector: AbstractCollector,
+                 lock: Lock,
+                 flush_period: float = 10,
+                 clock: Optional[AbstractClock] = None):
+        """
+        Runs the capture and parsing in nb_workers processes, each taking a share of the traffic (the sniffers
+        built by sniffer_factory must split the traffic between them, e.g. RawSocketSniffer with a fanout group).
+        Each worker keeps its own partial counters and sends them every flush_period; a merger thread combines
+        the partials into the collector, which thus has a single writer in this process.
+        :param nb_workers: number of capture processes
+        :param sniffer_factory: builds the sniffer of a worker from its callback (called in the worker process)
+        :param http_collector: collector the partials are merged into
+        :param lock: held while merging into the collector (readers of the collector must hold it)
+        :param flush_period: seconds between two partials sent by a worker
+        :param clock: time of the requests collected by the workers and of their flushes (defaults to RealClock),
+               copied to each worker along with its sniffer factory (e.g. the packet clock of a PcapSniffer)
+        """
+        if nb_workers <= 0:
+            raise ValueError("at least one capture worker is needed")
+        self.http_collector = http_collector
+        self.lock = lock
+        self.partial_queue = multiprocessing.Queue()
+        self.workers_stop_event = multiprocessing.Event()
+        self.merger_stop_event = Event()
+        clock = clock if clock is not None else RealClock()
+        self.workers: List[multiprocessing.Process] = [
+            multiprocessing.Process(target=run_capture_worker,
+                                    args=(sniffer_factory, self.partial_queue, self.workers_stop_event, flush_period,
+                                          clock),
+                                    name=f"CaptureWorker-{index}", daemon=True)
+            for index in range(nb_workers)]
+        self.merger = Thread(target=self._merge, name="PartialMerger", daemon=True)
+        self.nb_merged_partials = 0
+
+    def start(self) -> None:
+        for worker in self.workers:
+            worker.start()
+        self.merger.start()
+
+    def stop(self) -> None:
+        """
+        Stops the workers, then the merger once the last partials of the workers are merged.
+        """
+        self.workers_stop_event.set()
+        for worker in self.workers:
+            worker.join(JOIN_TIMEOUT)
+        self.merger_stop_event.set()
+        self.merger.join()
+
+    def _merge(self) -> None:
+        while True:
+            try:
+                partial = self.partial_queue.get(timeout=MERGE_TIMEOUT)
+            except Empty:
+                if self.merger_stop_event.is_set():
+                    return
+                continue
+            with self.lock:
+                self.http_collector.merge_partial(partial)
+            self.nb_merged_partials += 1
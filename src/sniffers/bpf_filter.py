@@ -0,0 +1,152 @@
+import ctypes
+import socket
+import struct
+from typing import Dict, List, Sequence, Tuple, Union
+
+# classic BPF opcodes (cf. linux/filter.h)
+BPF_LD_W_ABS = 0x20
+BPF_LD_H_ABS = 0x28
+BPF_LD_B_ABS = 0x30
+BPF_LD_W_IND = 0x40
+BPF_LD_H_IND = 0x48
+BPF_LD_B_IND = 0x50
+BPF_LDX_B_MSH = 0xb1
+BPF_ALU_ADD_X = 0x0c
+BPF_ALU_LSH_K = 0x64
+BPF_ALU_RSH_K = 0x74
+BPF_JMP_JEQ_K = 0x15
+BPF_JMP_JSET_K = 0x45
+BPF_MISC_TAX = 0x07
+BPF_RET_K = 0x06
+
+SO_ATTACH_FILTER = 26
+
+ETHERNET_HEADER_LEN = 14
+ETH_P_IP = 0x0800
+IPPROTO_TCP = 6
+
+HTTP_PORTS = (80, 8000, 8080)
+HTTP_METHODS = ('GET', 'POST', 'PUT', 'DELETE', 'HEAD', 'PATCH', 'OPTIONS', 'CONNECT', 'TRACE')
+
+# a BPF instruction (code, jump if true, jump if false, constant)
+BpfInstruction = Tuple[int, int, int, int]
+
+# labels used in jumps of the program before it is assembled
+_ACCEPT = 'accept'
+_DROP = 'drop'
+_PAYLOAD = 'payload'
+
+
+def _method_word(method: str) -> int:
+    """
+    Return the 4 first bytes of a request starting with method (as a big endian word, padded with the space
+    following the method if it is shorter than 4 characters).
+    """
+    prefix = (method + ' ')[:4].encode('ascii')
+    return struct.unpack('!I', prefix)[0]
+
+
+def compile_http_filter(ports: Sequence[int] = HTTP_PORTS,
+                        methods: Sequence[str] = HTTP_METHODS,
+                        snap_length: int = 65535) -> List[BpfInstruction]:
+    """
+    Build a classic BPF program accepting only Ethernet/IPv4 TCP segments sent to one of the given ports
+    (non fragmented), whose payload starts with one of the given HTTP methods: all other traffic is dropped
+    by the kernel and never copied to the capture socket.
+    :param ports: TCP destination ports of HTTP servers
+    :param methods: HTTP methods of the requests to capture
+    :param snap_length: number of bytes of accepted packets copied to the capture socket
+    :return: list of BPF instructions
+    """
+    if not ports or not methods:
+        raise ValueError("at least one port and one method are needed to build the filter")
+    # instructions whose jumps are given as labels or as instruction indexes, resolved in a second pass
+    program: List[Tuple[int, Union[int, str], Union[int, str], int]] = [
+        (BPF_LD_H_ABS, 0, 0, 12),  # ethertype
+        (BPF_JMP_JEQ_K, 0, _DROP, ETH_P_IP),
+        (BPF_LD_B_ABS, 0, 0, ETHERNET_HEADER_LEN + 9),  # IP protocol
+        (BPF_JMP_JEQ_K, 0, _DROP, IPPROTO_TCP),
+        (BPF_LD_H_ABS, 0, 0, ETHERNET_HEADER_LEN + 6),  # IP flags and fragment offset
+        (BPF_JMP_JSET_K, _DROP, 0, 0x1fff),
+        (BPF_LDX_B_MSH, 0, 0, ETHERNET_HEADER_LEN),  # X = IP header length
+        (BPF_LD_H_IND, 0, 0, ETHERNET_HEADER_LEN + 2),  # TCP destination port
+    ]
+    for index, port in enumerate(ports):
+        last = index == len(ports) - 1
+        program.append((BPF_JMP_JEQ_K, _PAYLOAD, _DROP if last else 0, port))
+    labels: Dict[str, int] = {_PAYLOAD: len(program)}
+    program += [
+        (BPF_LD_B_IND, 0, 0, ETHERNET_HEADER_LEN + 12),  # TCP data offset
+        (BPF_ALU_RSH_K, 0, 0, 4),
+        (BPF_ALU_LSH_K, 0, 0, 2),  # A = TCP header length
+        (BPF_ALU_ADD_X, 0, 0, 0),
+        (BPF_MISC_TAX, 0, 0, 0),  # X = IP + TCP headers length
+        (BPF_LD_W_IND, 0, 0, ETHERNET_HEADER_LEN),  # 4 first bytes of the TCP payload
+    ]
+    for index, method in enumerate(methods):
+        last = index == len(methods) - 1
+        program.append((BPF_JMP_JEQ_K, _ACCEPT, _DROP if last else 0, _method_word(method)))
+    labels[_ACCEPT] = len(program)
+    program.append((BPF_RET_K, 0, 0, snap_length))
+    labels[_DROP] = len(program)
+    program.append((BPF_RET_K, 0, 0, 0))
+
+    def offset(position: int, target: Union[int, str]) -> int:
+        # jumps are relative to the next instruction, plain integers are already relative
+        if isinstance(target, int):
+            return target
+        jump = labels[target] - position - 1
+        if jump > 0xff:
+            raise ValueError("too many ports or methods for the BPF filter")
+        return jump
+
+    return [(code, offset(position, jump_true), offset(position, jump_false), k)
+            for position, (code, jump_true, jump_false, k) in enumerate(program)]
+
+
+def compile_tcp_ports_filter(ports: Sequence[int] = HTTP_PORTS, snap_length: int = 65535) -> List[BpfInstruction]:
+    """
+    Build a classic BPF program accepting the Ethernet/IPv4 TCP segments (non fragmented) sent from or to one of
+    the given ports, whatever their payload: both directions of the HTTP connections, for their reassembly.
+    :param ports: TCP ports of HTTP servers
+    :param snap_length: number of bytes of accepted packets copied to the capture socket
+    :return: list of BPF instructions
+    """
+    if not ports:
+        raise ValueError("at least one port is needed to build the filter")
+    # longest jump: from the ethertype comparison to the drop instruction
+    if 2 * len(ports) + 8 > 0xff:
+        raise ValueError("too many ports for the BPF filter")
+    # the program ends with the accept and drop instructions, jumps are relative to the next instruction
+    program: List[BpfInstruction] = [
+        (BPF_LD_H_ABS, 0, 0, 12),  # ethertype
+        (BPF_JMP_JEQ_K, 0, 2 * len(ports) + 8, ETH_P_IP),
+        (BPF_LD_B_ABS, 0, 0, ETHERNET_HEADER_LEN + 9),  # IP protocol
+        (BPF_JMP_JEQ_K, 0, 2 * len(ports) + 6, IPPROTO_TCP),
+        (BPF_LD_H_ABS, 0, 0, ETHERNET_HEADER_LEN + 6),  # IP flags and fragment offset
+        (BPF_JMP_JSET_K, 2 * len(ports) + 4, 0, 0x1fff),
+        (BPF_LDX_B_MSH, 0, 0, ETHERNET_HEADER_LEN),  # X = IP header length
+        (BPF_LD_H_IND, 0, 0, ETHERNET_HEADER_LEN),  # TCP source port
+    ]
+    # jumps to the accept instruction, which follows the destination port comparisons
+    program += [(BPF_JMP_JEQ_K, 2 * len(ports) - index, 0, port) for index, port in enumerate(ports)]
+    program.append((BPF_LD_H_IND, 0, 0, ETHERNET_HEADER_LEN + 2))  # TCP destination port
+    program += [(BPF_JMP_JEQ_K, len(ports) - 1 - index, 1 if index == len(ports) - 1 else 0, port)
+                for index, port in enumerate(ports)]
+    program.append((BPF_RET_K, 0, 0, snap_length))
+    program.append((BPF_RET_K, 0, 0, 0))
+    return program
+
+
+def attach_filter(sock, program: List[BpfInstruction]) -> None:
+    """
+    Attach a BPF program to a (Linux) socket.
+    :param sock: capture socket
+    :param program: list of BPF instructions
+    """
+    instructions = b''.join(struct.pack('HBBI', code, jump_true, jump_false, k)
+                            for code, jump_true, jump_false, k in program)
+    buffer = ctypes.create_string_buffer(instructions)
+    # struct sock_fprog { unsigned short len; struct sock_filter *filter; }
+    fprog = struct.pack('HL', len(program), ctypes.addressof(buffer))
+    sock.setsockopt(socket.SOL_SOCKET, SO_ATTACH_FILTER, fprog)
@@ -0,0 +1,130 @@
+import logging
+from struct import Struct, unpack_from
+from typing import BinaryIO, Dict, Iterator, List, NamedTuple
+
+logger = logging.getLogger("PcapReader")
+
+# link types of the captured frames (cf. tcpdump LINKTYPE_ values)
+LINKTYPE_ETHERNET = 1
+LINKTYPE_LINUX_SLL = 113
+
+# pcap: magic number of the global header, in the byte order of the writer (microsecond / nanosecond timestamps)
+PCAP_MAGIC_MICROSECONDS = 0xa1b2c3d4
+PCAP_MAGIC_NANOSECONDS = 0xa1b23c4d
+PCAP_GLOBAL_HEADER_LEN = 24
+PCAP_RECORD_HEADER_LEN = 16
+
+# pcapng: block types and byte order magic of the section header block
+PCAPNG_SECTION_HEADER_BLOCK = 0x0A0D0D0A
+PCAPNG_INTERFACE_DESCRIPTION_BLOCK = 0x00000001
+PCAPNG_ENHANCED_PACKET_BLOCK = 0x00000006
+PCAPNG_BYTE_ORDER_MAGIC = 0x1A2B3C4D
+PCAPNG_OPTION_END = 0
+PCAPNG_OPTION_IF_TSRESOL = 9
+
+
+class CapturedFrame(NamedTuple):
+    timestamp: float  # capture time (seconds since the epoch)
+    link_type: int  # link type of the frame (cf. LINKTYPE_ constants)
+    data: bytes  # captured bytes of the frame (possibly truncated to the snapshot length)
+
+
+def read_capture(capture_file: BinaryIO) -> Iterator[CapturedFrame]:
+    """
+    Stream the frames of a pcap or pcapng capture, in file order: the frames are read one at a time,
+    the capture is never loaded as a whole.
+    :param capture_file: capture opened in binary mode
+    :return: iterator over the captured frames
+    """
+    magic = capture_file.read(4)
+    if len(magic) < 4:
+        return
+    if unpack_from('<I', magic)[0] == PCAPNG_SECTION_HEADER_BLOCK:
+        yield from _read_pcapng(capture_file, magic)
+    else:
+        yield from _read_pcap(capture_file, magic)
+
+
+def _read_pcap(capture_file: BinaryIO, magic: bytes) -> Iterator[CapturedFrame]:
+    for byte_order in '<>':
+        magic_number = unpack_from(byte_order + 'I', magic)[0]
+        if magic_number in (PCAP_MAGIC_MICROSECONDS, PCAP_MAGIC_NANOSECONDS):
+            break
+    else:
+        raise ValueError("not a pcap or pcapng capture")
+    resolution = 1e-6 if magic_number == PCAP_MAGIC_MICROSECONDS else 1e-9
+    header = capture_file.read(PCAP_GLOBAL_HEADER_LEN - 4)
+    if len(header) < PCAP_GLOBAL_HEADER_LEN - 4:
+        raise ValueError("truncated pcap global header")
+    # the 16 low bits of the link type field hold the link type, the others FCS information
+    link_type = unpack_from(byte_order + 'I', header, 16)[0] & 0xffff
+    record_header = Struct(byte_order + 'IIII')
+    while True:
+        header = capture_file.read(PCAP_RECORD_HEADER_LEN)
+        if len(header) < PCAP_RECORD_HEADER_LEN:
+            return
+        seconds, fraction, captured_length, _ = record_header.unpack(header)
+        data = capture_file.read(captured_length)
+        if len(data) < captured_length:
+            logger.warning('Truncated capture: last frame dropped')
+            return
+        yield CapturedFrame(seconds + fraction * resolution, link_type, data)
+
+
+def _read_pcapng(capture_file: BinaryIO, magic: bytes) -> Iterator[CapturedFrame]:
+    byte_order = '<'
+    # link type and timestamp resolution of the interfaces described in the current section
+    link_types: List[int] = []
+    resolutions: List[float] = []
+    header = magic + capture_file.read(4)
+    while len(header) == 8:
+        # the type of a section header block reads the same in both byte orders
+        block_type = unpack_from(byte_order + 'I', header)[0]
+        if block_type == PCAPNG_SECTION_HEADER_BLOCK:
+            # the byte order of a section is given by the byte order magic starting its body
+            body = capture_file.read(4)
+            if len(body) < 4:
+                break
+            byte_order = '<' if unpack_from('<I', body)[0] == PCAPNG_BYTE_ORDER_MAGIC else '>'
+            link_types, resolutions = [], []
+        else:
+            body = b''
+        block_length = unpack_from(byte_order + 'I', header, 4)[0]
+        if block_length < 12:
+            break
+        # body followed by the repeated block length
+        body += capture_file.read(block_length - 8 - len(body))
+        if len(body) < block_length - 8:
+            break
+        if block_type == PCAPNG_INTERFACE_DESCRIPTION_BLOCK:
+            link_types.append(unpack_from(byte_order + 'H', body)[0])
+            resolutions.append(_read_timestamp_resolution(body, 8, block_length - 12, byte_order))
+        elif block_type == PCAPNG_ENHANCED_PACKET_BLOCK:
+            interface_id, timestamp_high, timestamp_low, captured_length, _ = \
+                unpack_from(byte_order + 'IIIII', body)
+            if interface_id < len(link_types):
+                timestamp = ((timestamp_high << 32) | timestamp_low) * resolutions[interface_id]
+                yield CapturedFrame(timestamp, link_types[interface_id], body[20:20 + captured_length])
+        header = capture_file.read(8)
+    if header:
+        logger.warning('Truncated capture: last block dropped')
+
+
+def _read_timestamp_resolution(body: bytes, offset: int, end: int, byte_order: str) -> float:
+    """
+    Timestamp resolution of an interface, from the options of its description block (defaults to microseconds).
+    """
+    options: Dict[int, bytes] = dict()
+    while offset + 4 <= end:
+        code, length = unpack_from(byte_order + 'HH', body, offset)
+        if code == PCAPNG_OPTION_END:
+            break
+        options[code] = body[offset + 4:offset + 4 + length]
+        offset += 4 + (length + 3) // 4 * 4
+    resolution = options.get(PCAPNG_OPTION_IF_TSRESOL)
+    if not resolution:
+        return 1e-6
+    # most significant bit set: negative power of 2, otherwise negative power of 10
+    if resolution[0] & 0x80:
+        return 2.0 ** -(resolution[0] & 0x7f)
+    return 10.0 ** -resolution[0]
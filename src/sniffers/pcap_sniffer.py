@@ -0,0 +1,130 @@
+from threading import Event, Thread
+from time import perf_counter_ns
+from typing import Callable, Optional
+
+from src.interfaces.abstract_sniffer import AbstractSniffer
+from src.interfaces.abstract_collector import HTTPInfo
+from src.instrumentation.metrics import SnifferMetrics
+from src.clocks.packet_clock import PacketClock
+from src.clocks.tick_scheduler import TickScheduler
+from src.sniffers.pcap_reader import LINKTYPE_ETHERNET, LINKTYPE_LINUX_SLL, read_capture
+from src.sniffers.raw_http_parser import (parse_ethernet_frame, parse_ethernet_segment, parse_linux_cooked_frame,
+                                          parse_linux_cooked_segment)
+from src.sniffers.tcp_reassembly import TCPReassembler
+
+from logging import getLogger
+
+logger = getLogger("PcapSniffer")
+
+# frame parsers by link type of the capture
+FRAME_PARSERS = {
+    LINKTYPE_ETHERNET: parse_ethernet_frame,
+    LINKTYPE_LINUX_SLL: parse_linux_cooked_frame,
+}
+# TCP segment parsers by link type of the capture (with reassembly)
+SEGMENT_PARSERS = {
+    LINKTYPE_ETHERNET: parse_ethernet_segment,
+    LINKTYPE_LINUX_SLL: parse_linux_cooked_segment,
+}
+
+
+class PcapSniffer(AbstractSniffer):
+
+    def __init__(self,
+                 receive_http_callback: Callable[[HTTPInfo], None],
+                 capture_path: str,
+                 clock: Optional[PacketClock] = None,
+                 reassemble: bool = False):
+        """
+        HTTP sniffer replaying a pcap or pcapng capture file, streamed frame by frame from disk.
+        Frames are parsed as by RawSocketSniffer (Ethernet or Linux cooked captures), and the clock is set to
+        the timestamp of each frame before its HTTP request is relayed.
+        :param receive_http_callback: called for each detected HTTP request
+        :param capture_path: path of the capture file
+        :param clock: packet clock set to the capture time during the replay (defaults to a new clock)
+        :param reassemble: reassemble the TCP streams (cf. TCPReassembler): requests are relayed when their
+               exchange ends, with the bytes transferred by the request and its response as content length
+        """
+        self.receive_http_callback = receive_http_callback
+        self.capture_path = capture_path
+        self.clock = clock if clock is not None else PacketClock()
+        self.metrics = SnifferMetrics()
+        self.reassembler = TCPReassembler(metrics=self.metrics) if reassemble else None
+        self.stop_event = Event()
+        self.replay_thread: Optional[Thread] = None
+
+    def start(self):
+        """
+        Replays the capture in a background thread, as fast as possible.
+        """
+        self.replay_thread = Thread(target=self.replay, name="PcapSniffer", daemon=True)
+        self.replay_thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def get_metrics(self) -> SnifferMetrics:
+        return self.metrics
+
+    def replay(self, tick_period: Optional[float] = None, tick_callback: Optional[Callable[[], None]] = None) -> None:
+        """
+        Replays the capture in the calling thread, as fast as possible. If tick_callback is given, it is called
+        on every multiple of tick_period of the capture time following the first frame (cf. TickScheduler): before
+        relaying the first frame captured at or after a tick, with the clock set to the tick time. A last tick is
+        fired at the end of the capture.
+        :param tick_period: capture time between two ticks (in seconds)
+        :param tick_callback: called on each tick
+        """
+        if tick_callback is not None and (tick_period is None or tick_period <= 0):
+            raise ValueError("ticks require a strictly positive tick period")
+        clock = self.clock
+        receive_http_callback = self.receive_http_callback
+        metrics = self.metrics
+        reassembler = self.reassembler
+        parsers = FRAME_PARSERS if reassembler is None else SEGMENT_PARSERS
+        scheduler: Optional[TickScheduler] = None
+        unsupported_link_types = set()
+        with open(self.capture_path, 'rb') as capture_file:
+            for timestamp, link_type, frame in read_capture(capture_file):
+                if self.stop_event.is_set():
+                    return
+                if tick_callback is not None:
+                    if scheduler is None:
+                        scheduler = TickScheduler(clock=clock, period=tick_period, start=timestamp)
+                    # every boundary is ticked, including the ones in the gaps of the capture
+                    for tick in scheduler.due_ticks(timestamp):
+                        clock.timestamp = tick
+                        tick_callback()
+                parse_frame = parsers.get(link_type)
+                if parse_frame is None:
+                    if link_type not in unsupported_link_types:
+                        logger.warning(f'Unsupported link type {link_type}: frames ignored')
+                        unsupported_link_types.add(link_type)
+                    continue
+                clock.timestamp = timestamp
+                metrics.packets_seen += 1
+                start = perf_counter_ns()
+                if reassembler is None:
+                    http_info = parse_frame(frame, None, metrics)
+                    metrics.parse_latency.record(perf_counter_ns() - start)
+                    if http_info is not None:
+                        metrics.http_parsed += 1
+                        receive_http_callback(http_info)
+                    continue
+                segment = parse_frame(frame)
+                if segment is not None:
+                    reassembler.add_segment(frame, segment, timestamp)
+                metrics.parse_latency.record(perf_counter_ns() - start)
+                self._relay_exchanges()
+        if reassembler is not None:
+            # exchanges still in progress at the end of the capture
+            reassembler.flush()
+            self._relay_exchanges()
+        if scheduler is not None:
+            clock.timestamp = scheduler.next_tick
+            tick_callback()
+
+    def _relay_exchanges(self) -> None:
+        for http_info in self.reassembler.pop_exchanges():
+            self.metrics.http_parsed += 1
+            self.receive_http_callback(http_info)
@@ -0,0 +1,289 @@
+from struct import unpack_from
+from typing import NamedTuple, Optional, Tuple, Union
+
+from src.interfaces.abstract_collector import HTTPInfo
+from src.instrumentation.metrics import SnifferMetrics
+
+from logging import getLogger
+
+logger = getLogger("RawHTTPParser")
+
+ETHERNET_HEADER_LEN = 14
+ETH_P_IP = 0x0800
+ETH_P_IPV6 = 0x86DD
+ETH_P_8021Q = 0x8100
+IPV6_HEADER_LEN = 40
+SLL_HEADER_LEN = 16
+TCP_MIN_HEADER_LEN = 20
+IPPROTO_TCP = 6
+
+Buffer = Union[bytes, bytearray]
+
+
+class TCPSegment(NamedTuple):
+    """
+    Addressing of a TCP segment and location of its payload in the frame (cf. parse_tcp_segment).
+    """
+
+    source: bytes  # IPv4 or IPv6 address
+    source_port: int
+    destination: bytes
+    destination_port: int
+    sequence: int
+    flags: int
+    payload_start: int
+    payload_end: int
+
+
+class HTTPResponseHead(NamedTuple):
+    """
+    Status and body length of an HTTP response (cf. parse_http_response_head).
+    """
+
+    status: int
+    content_length: Optional[int]  # None if not given
+    chunked: bool
+
+
+def parse_ethernet_frame(frame: Buffer, length: Optional[int] = None,
+                         metrics: Optional[SnifferMetrics] = None) -> Optional[HTTPInfo]:
+    """
+    Parse the HTTP request carried by an Ethernet frame (IPv4 or IPv6, TCP), reading the headers
+    straight from the raw buffer: only the request line and the Host / Content-Length headers are decoded.
+    :param frame: raw frame
+    :param length: length of the frame in the buffer (defaults to the whole buffer)
+    :param metrics: counts the decode failures (if given)
+    :return: HTTP information if the frame carries a complete HTTP request line and headers, None otherwise
+    """
+    end = len(frame) if length is None else length
+    if end < ETHERNET_HEADER_LEN:
+        return None
+    ethertype, offset = _ethernet_network_header(frame, end)
+    return parse_network_packet(frame, ethertype, offset, end, metrics)
+
+
+def parse_linux_cooked_frame(frame: Buffer, length: Optional[int] = None,
+                             metrics: Optional[SnifferMetrics] = None) -> Optional[HTTPInfo]:
+    """
+    Parse the HTTP request carried by a Linux cooked capture (SLL) frame, as captured on the 'any' interface.
+    :param frame: raw frame
+    :param length: length of the frame in the buffer (defaults to the whole buffer)
+    :param metrics: counts the decode failures (if given)
+    :return: HTTP information if the frame carries a complete HTTP request line and headers, None otherwise
+    """
+    end = len(frame) if length is None else length
+    if end < SLL_HEADER_LEN:
+        return None
+    return parse_network_packet(frame, unpack_from('!H', frame, 14)[0], SLL_HEADER_LEN, end, metrics)
+
+
+def parse_network_packet(frame: Buffer, ethertype: int, offset: int, end: int,
+                         metrics: Optional[SnifferMetrics] = None) -> Optional[HTTPInfo]:
+    """
+    Parse the HTTP request carried by an IPv4 or IPv6 packet (TCP) starting at offset of frame.
+    :param frame: raw frame
+    :param ethertype: protocol of the packet (ETH_P_IP or ETH_P_IPV6)
+    :param offset: offset of the packet in the frame
+    :param end: offset of the end of the frame
+    :param metrics: counts the decode failures (if given)
+    :return: HTTP information if the packet carries a complete HTTP request line and headers, None otherwise
+    """
+    located = locate_tcp_header(frame, ethertype, offset, end)
+    if located is None:
+        return None
+    offset, end = located
+    return parse_http_request(frame, offset + (frame[offset + 12] >> 4) * 4, end, metrics)
+
+
+def locate_tcp_header(frame: Buffer, ethertype: int, offset: int, end: int) -> Optional[Tuple[int, int]]:
+    """
+    Locate the TCP header of an IPv4 or IPv6 packet starting at offset of frame.
+    :param frame: raw frame
+    :param ethertype: protocol of the packet (ETH_P_IP or ETH_P_IPV6)
+    :param offset: offset of the packet in the frame
+    :param end: offset of the end of the frame
+    :return: offsets of the TCP header and of the end of the segment, None if the packet is not a TCP segment
+    """
+    if ethertype == ETH_P_IP:
+        if end < offset + 20 or frame[offset + 9] != IPPROTO_TCP:
+            return None
+        # total length excludes the Ethernet padding of small frames
+        end = min(end, offset + unpack_from('!H', frame, offset + 2)[0])
+        offset += (frame[offset] & 0x0F) * 4
+    elif ethertype == ETH_P_IPV6:
+        if end < offset + IPV6_HEADER_LEN or frame[offset + 6] != IPPROTO_TCP:
+            return None
+        end = min(end, offset + IPV6_HEADER_LEN + unpack_from('!H', frame, offset + 4)[0])
+        offset += IPV6_HEADER_LEN
+    else:
+        return None
+    if end < offset + TCP_MIN_HEADER_LEN:
+        return None
+    return offset, end
+
+
+def parse_ethernet_segment(frame: Buffer, length: Optional[int] = None) -> Optional[TCPSegment]:
+    """
+    Parse the addressing of the TCP segment carried by an Ethernet frame (IPv4 or IPv6), for the reassembly of
+    the TCP streams (cf. TCPReassembler).
+    :param frame: raw frame
+    :param length: length of the frame in the buffer (defaults to the whole buffer)
+    :return: TCP segment, None if the frame does not carry a TCP segment
+    """
+    end = len(frame) if length is None else length
+    if end < ETHERNET_HEADER_LEN:
+        return None
+    ethertype, offset = _ethernet_network_header(frame, end)
+    return parse_tcp_segment(frame, ethertype, offset, end)
+
+
+def parse_linux_cooked_segment(frame: Buffer, length: Optional[int] = None) -> Optional[TCPSegment]:
+    """
+    Parse the addressing of the TCP segment carried by a Linux cooked capture (SLL) frame.
+    :param frame: raw frame
+    :param length: length of the frame in the buffer (defaults to the whole buffer)
+    :return: TCP segment, None if the frame does not carry a TCP segment
+    """
+    end = len(frame) if length is None else length
+    if end < SLL_HEADER_LEN:
+        return None
+    return parse_tcp_segment(frame, unpack_from('!H', frame, 14)[0], SLL_HEADER_LEN, end)
+
+
+def parse_tcp_segment(frame: Buffer, ethertype: int, offset: int, end: int) -> Optional[TCPSegment]:
+    """
+    Parse the addressing of the TCP segment carried by an IPv4 or IPv6 packet starting at offset of frame.
+    :param frame: raw frame
+    :param ethertype: protocol of the packet (ETH_P_IP or ETH_P_IPV6)
+    :param offset: offset of the packet in the frame
+    :param end: offset of the end of the frame
+    :return: TCP segment, None if the packet is not a TCP segment
+    """
+    located = locate_tcp_header(frame, ethertype, offset, end)
+    if located is None:
+        return None
+    tcp_offset, end = located
+    if ethertype == ETH_P_IP:
+        source, destination = bytes(frame[offset + 12:offset + 16]), bytes(frame[offset + 16:offset + 20])
+    else:
+        source, destination = bytes(frame[offset + 8:offset + 24]), bytes(frame[offset + 24:offset + 40])
+    source_port, destination_port, sequence = unpack_from('!HHI', frame, tcp_offset)
+    payload_start = min(end, tcp_offset + (frame[tcp_offset + 12] >> 4) * 4)
+    return TCPSegment(source=source, source_port=source_port, destination=destination,
+                      destination_port=destination_port, sequence=sequence, flags=frame[tcp_offset + 13],
+                      payload_start=payload_start, payload_end=end)
+
+
+def parse_http_request(buffer: Buffer, start: int, end: int,
+                       metrics: Optional[SnifferMetrics] = None,
+                       require_content_length: bool = True) -> Optional[HTTPInfo]:
+    """
+    Parse an HTTP request starting at offset start of buffer (up to offset end).
+    As for the scapy sniffer, only requests with method, path, Host and Content-Length are reported.
+    :param buffer: raw buffer
+    :param start: offset of the request in the buffer
+    :param end: offset of the end of the request in the buffer
+    :param metrics: counts the decode failures (if given)
+    :param require_content_length: if False, requests without Content-Length are reported too, with a content
+           length of 0 (e.g. when the bytes transferred are counted by the TCP reassembly)
+    :return: HTTP information, or None if the request line or headers are missing or incomplete
+    """
+    try:
+        line_end = buffer.find(b'\r\n', start, end)
+        if line_end < 0:
+            return None
+        method_end = buffer.find(b' ', start, line_end)
+        if method_end <= start:
+            return None
+        path_end = buffer.find(b' ', method_end + 1, line_end)
+        if path_end < 0:
+            return None
+        view = memoryview(buffer)
+        host: Optional[str] = None
+        content_length: Optional[int] = None
+        position = line_end + 2
+        while True:
+            header_end = buffer.find(b'\r\n', position, end)
+            if header_end < 0:
+                # headers are not complete in this packet
+                return None
+            if header_end == position:
+                break
+            colon = buffer.find(b':', position, header_end)
+            name_length = colon - position
+            if name_length == 4 and buffer[position:colon].lower() == b'host':
+                host = str(view[colon + 1:header_end], 'utf-8').strip()
+            elif name_length == 14 and buffer[position:colon].lower() == b'content-length':
+                content_length = int(str(view[colon + 1:header_end], 'ascii'))
+            position = header_end + 2
+        if content_length is None and not require_content_length:
+            content_length = 0
+        if host is None or content_length is None:
+            return None
+        method = str(view[start:method_end], 'ascii')
+        if not method.isupper():
+            return None
+        return HTTPInfo(method=method,
+                        host=host,
+                        path=str(view[method_end + 1:path_end], 'utf-8'),
+                        content_length=content_length)
+    except (ValueError, UnicodeDecodeError):
+        logger.warning('Unable to decode packet')
+        if metrics is not None:
+            metrics.decode_failures += 1
+    return None
+
+
+def parse_http_response_head(buffer: Buffer, start: int, end: int,
+                             metrics: Optional[SnifferMetrics] = None) -> Optional[HTTPResponseHead]:
+    """
+    Parse the status line and headers of an HTTP response starting at offset start of buffer: only the status
+    code and the Content-Length / Transfer-Encoding headers are decoded.
+    :param buffer: raw buffer
+    :param start: offset of the response in the buffer
+    :param end: offset of the end of the response headers in the buffer
+    :param metrics: counts the decode failures (if given)
+    :return: response status and body length, None if the status line or headers are invalid or incomplete
+    """
+    try:
+        line_end = buffer.find(b'\r\n', start, end)
+        if line_end < 0 or not buffer.startswith(b'HTTP/', start, line_end):
+            return None
+        status_start = buffer.find(b' ', start, line_end) + 1
+        if status_start <= 0:
+            return None
+        status = int(bytes(buffer[status_start:status_start + 3]))
+        content_length: Optional[int] = None
+        chunked = False
+        position = line_end + 2
+        while True:
+            header_end = buffer.find(b'\r\n', position, end)
+            if header_end < 0:
+                return None
+            if header_end == position:
+                break
+            colon = buffer.find(b':', position, header_end)
+            name_length = colon - position
+            if name_length == 14 and buffer[position:colon].lower() == b'content-length':
+                content_length = int(bytes(buffer[colon + 1:header_end]))
+            elif name_length == 17 and buffer[position:colon].lower() == b'transfer-encoding':
+                chunked = bytes(buffer[colon + 1:header_end]).strip().lower().endswith(b'chunked')
+            position = header_end + 2
+        return HTTPResponseHead(status=status, content_length=content_length, chunked=chunked)
+    except ValueError:
+        logger.warning('Unable to decode packet')
+        if metrics is not None:
+            metrics.decode_failures += 1
+    return None
+
+
+def _ethernet_network_header(frame: Buffer, end: int) -> Tuple[int, int]:
+    """
+    :return: ethertype and offset of the network packet of an Ethernet frame (after an optional 802.1Q tag)
+    """
+    offset = ETHERNET_HEADER_LEN
+    ethertype = unpack_from('!H', frame, 12)[0]
+    if ethertype == ETH_P_8021Q and end >= ETHERNET_HEADER_LEN + 4:
+        ethertype = unpack_from('!H', frame, 16)[0]
+        offset += 4
+    return ethertype, offset
@@ -0,0 +1,146 @@
+import select
+import socket
+from threading import Event, Thread
+from time import perf_counter_ns, time
+from typing import Callable, List, Optional, Sequence
+
+from src.interfaces.abstract_sniffer import AbstractSniffer
+from src.interfaces.abstract_collector import HTTPInfo
+from src.instrumentation.metrics import SnifferMetrics
+from src.sniffers.bpf_filter import (HTTP_METHODS, HTTP_PORTS, attach_filter, compile_http_filter,
+                                     compile_tcp_ports_filter)
+from src.sniffers.raw_http_parser import parse_ethernet_frame, parse_ethernet_segment
+from src.sniffers.tcp_reassembly import TCPReassembler
+
+from logging import getLogger
+
+logger = getLogger("RawSocketSniffer")
+
+ETH_P_ALL = 0x0003
+SOL_PACKET = 263
+PACKET_FANOUT = 18
+PACKET_FANOUT_HASH = 0  # packets of a flow go to the same socket of the fanout group
+ARPHRD_LOOPBACK = 772
+SNAP_LENGTH = 65535
+RECEIVE_TIMEOUT = 0.5  # seconds between checks of the stop event when no packet is received
+MAX_BATCH = 1024  # maximum number of frames read from the socket before relaying their requests
+
+
+class RawSocketSniffer(AbstractSniffer):
+
+    def __init__(self,
+                 receive_http_callback: Callable[[HTTPInfo], None],
+                 interface: Optional[str] = None,
+                 ports: Sequence[int] = HTTP_PORTS,
+                 methods: Sequence[str] = HTTP_METHODS,
+                 fanout_group: Optional[int] = None,
+                 reassemble: bool = False):
+        """
+        HTTP sniffer reading packets from a Linux AF_PACKET socket. A BPF filter attached to the socket makes the
+        kernel drop everything but TCP segments to the HTTP ports starting with an HTTP method, and accepted
+        frames are parsed straight from the receive buffer (no per-layer dissection).
+        Once a frame is ready, the frames already queued in the socket are read without waiting (up to MAX_BATCH),
+        and the requests they hold are relayed at once to receive_batch_callback if it is set.
+        :param receive_http_callback: called for each detected HTTP request (if receive_batch_callback is not set)
+        :param interface: network interface to capture on (defaults to all interfaces)
+        :param ports: TCP ports of HTTP servers
+        :param methods: HTTP methods of the requests to capture
+        :param fanout_group: id (16 bits) of a PACKET_FANOUT group: the traffic is split by flow hash between
+               the sniffers of the group (e.g. in several processes) instead of being copied to each of them
+        :param reassemble: reassemble the TCP streams (cf. TCPReassembler): the filter accepts all the TCP
+               segments from or to the HTTP ports, and requests are relayed when their exchange ends, with the
+               bytes transferred by the request and its response as content length
+        """
+        if not hasattr(socket, 'AF_PACKET'):
+            raise OSError("raw socket capture requires Linux AF_PACKET sockets")
+        self.receive_http_callback = receive_http_callback
+        self.interface = interface
+        if reassemble:
+            self.bpf_program = compile_tcp_ports_filter(ports=ports, snap_length=SNAP_LENGTH)
+        else:
+            self.bpf_program = compile_http_filter(ports=ports, methods=methods, snap_length=SNAP_LENGTH)
+        self.fanout_group = fanout_group
+        self.metrics = SnifferMetrics()
+        self.reassembler = TCPReassembler(server_ports=ports, metrics=self.metrics) if reassemble else None
+        self.stop_event = Event()
+        self.sock: Optional[socket.socket] = None
+        self.capture_thread = Thread(target=self._capture, name="RawSocketSniffer", daemon=True)
+
+    def open_socket(self) -> socket.socket:
+        sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETH_P_ALL))
+        attach_filter(sock, self.bpf_program)
+        if self.interface is not None:
+            sock.bind((self.interface, ETH_P_ALL))
+        if self.fanout_group is not None:
+            sock.setsockopt(SOL_PACKET, PACKET_FANOUT, (self.fanout_group & 0xffff) | (PACKET_FANOUT_HASH << 16))
+        # frames are waited for with poll, then read until the socket has none left
+        sock.setblocking(False)
+        return sock
+
+    def _capture(self) -> None:
+        sock = self.sock
+        poller = select.poll()
+        poller.register(sock, select.POLLIN)
+        # frames are received in a single preallocated buffer
+        buffer = bytearray(SNAP_LENGTH)
+        metrics = self.metrics
+        reassembler = self.reassembler
+        try:
+            while not self.stop_event.is_set():
+                if not poller.poll(RECEIVE_TIMEOUT * 1000):
+                    if reassembler is not None:
+                        # no segment: the exchanges of the idle flows still end
+                        reassembler.evict_idle(time())
+                        self._relay(reassembler.pop_exchanges())
+                    continue
+                batch: List[HTTPInfo] = []
+                nb_frames = 0
+                while nb_frames < MAX_BATCH:
+                    try:
+                        length, (_, _, packet_type, hardware_type, _) = sock.recvfrom_into(buffer)
+                    except BlockingIOError:
+                        break
+                    nb_frames += 1
+                    if packet_type == socket.PACKET_OUTGOING and hardware_type == ARPHRD_LOOPBACK:
+                        # loopback packets are seen both outgoing and incoming: count them once
+                        continue
+                    metrics.packets_seen += 1
+                    start = perf_counter_ns()
+                    if reassembler is None:
+                        http_info = parse_ethernet_frame(buffer, length, metrics)
+                        if http_info is not None:
+                            batch.append(http_info)
+                    else:
+                        segment = parse_ethernet_segment(buffer, length)
+                        if segment is not None:
+                            reassembler.add_segment(buffer, segment, time())
+                    metrics.parse_latency.record(perf_counter_ns() - start)
+                if reassembler is not None:
+                    batch.extend(reassembler.pop_exchanges())
+                self._relay(batch)
+            if reassembler is not None:
+                reassembler.flush()
+                self._relay(reassembler.pop_exchanges())
+        finally:
+            sock.close()
+
+    def _relay(self, batch: List[HTTPInfo]) -> None:
+        if not batch:
+            return
+        self.metrics.http_parsed += len(batch)
+        if self.receive_batch_callback is not None:
+            self.receive_batch_callback(batch)
+        else:
+            for http_info in batch:
+                self.receive_http_callback(http_info)
+
+    def start(self) -> None:
+        # socket opened by the caller thread, so that missing privileges are reported to it
+        self.sock = self.open_socket()
+        self.capture_thread.start()
+
+    def stop(self) -> None:
+        self.stop_event.set()
+
+    def get_metrics(self) -> SnifferMetrics:
+        return self.metrics
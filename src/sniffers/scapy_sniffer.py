@@ -1,11 +1,10 @@
 from typing import Callable, Optional
 from threading import Event
-
-import scapy.all as scapy_all
-from scapy.layers.http import HTTPRequest
+from time import perf_counter_ns, time
 
 from src.interfaces.abstract_sniffer import AbstractSniffer
 from src.interfaces.abstract_collector import HTTPInfo
+from src.instrumentation.metrics import SnifferMetrics
 
 from logging import getLogger
 
@@ -15,14 +14,19 @@ logger = getLogger("ScapySniffer")
 class ScapySniffer(AbstractSniffer):
 
     def __init__(self, receive_http_callback: Callable[[HTTPInfo], None]):
-        scapy_all.load_layer("http")
+        # scapy is imported with the first sniffer: only the sniffing and the layers up to HTTP, not scapy.all
+        # (every layer, about twice as long to import)
+        from scapy.sendrecv import AsyncSniffer
+        from scapy.layers.http import HTTPRequest
+        self.http_request_layer = HTTPRequest
         self.stop_event = Event()
         self.receive_http_callback = receive_http_callback
-        self.sniffer = scapy_all.AsyncSniffer(prn=self.manage_http_pkt, store=False, filter="tcp",
-                                              stop_filter=lambda x: self.stop_event.is_set())
+        self.metrics = SnifferMetrics()
+        self.sniffer = AsyncSniffer(prn=self.manage_http_pkt, store=False, filter="tcp",
+                                    stop_filter=lambda x: self.stop_event.is_set())
 
     @staticmethod
-    def parse_packet(pkt) -> Optional[HTTPInfo]:
+    def parse_packet(pkt, metrics: Optional[SnifferMetrics] = None) -> Optional[HTTPInfo]:
         try:
             if pkt.Content_Length is not None and pkt.Host is not None \
                     and pkt.Method is not None and pkt.Path is not None:
@@ -36,12 +40,21 @@ class ScapySniffer(AbstractSniffer):
                 return None
         except (ValueError, UnicodeDecodeError):
             logger.warning('Unable to decode packet')
+            if metrics is not None:
+                metrics.decode_failures += 1
         return None
 
     def manage_http_pkt(self, pkt) -> None:
-        if pkt.haslayer(HTTPRequest):
-            http_info = ScapySniffer.parse_packet(pkt)
+        metrics = self.metrics
+        metrics.packets_seen += 1
+        # packets are handed over once dissected: the delay since capture includes the dissection time
+        metrics.capture_delay.record(max(0, int((time() - float(pkt.time)) * 1e9)))
+        if pkt.haslayer(self.http_request_layer):
+            start = perf_counter_ns()
+            http_info = ScapySniffer.parse_packet(pkt, metrics)
+            metrics.parse_latency.record(perf_counter_ns() - start)
             if http_info is not None:
+                metrics.http_parsed += 1
                 self.receive_http_callback(http_info)
 
     def start(self) -> None:
@@ -49,3 +62,6 @@ class ScapySniffer(AbstractSniffer):
 
     def stop(self) -> None:
         self.stop_event.set()
+
+    def get_metrics(self) -> SnifferMetrics:
+        return self.metrics
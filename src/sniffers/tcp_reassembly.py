@@ -0,0 +1,358 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.interfaces.abstract_collector import HTTPInfo
+from src.instrumentation.metrics import SnifferMetrics
+from src.sniffers.bpf_filter import HTTP_METHODS, HTTP_PORTS
+from src.sniffers.raw_http_parser import Buffer, TCPSegment, parse_http_request, parse_http_response_head
+
+MAX_FLOWS = 32768  # flows followed at once, the least recently active one is evicted beyond
+MAX_HEAD_SIZE = 16384  # requests or responses with longer headers are not parsed
+MAX_OUT_OF_ORDER = 65536  # bytes of segments received ahead of a missing one, per direction of a flow
+MAX_BUFFERED = 32 * 1024 * 1024  # bytes buffered by all the flows, the least recently active ones are evicted beyond
+IDLE_TIMEOUT = 30.0  # seconds without a segment after which a flow is evicted
+EVICTION_PERIOD = 1.0  # seconds between two checks of the idle flows
+
+TCP_FIN = 0x01
+TCP_SYN = 0x02
+TCP_RST = 0x04
+SEQUENCE_MODULO = 1 << 32
+HEAD_END = b'\r\n\r\n'
+CHUNKED_END = b'0\r\n\r\n'
+# 4 first bytes of a request (as matched by the BPF filter of the raw socket sniffer)
+REQUEST_PREFIXES = frozenset((method + ' ')[:4].encode('ascii') for method in HTTP_METHODS)
+
+# remaining bytes of a response body whose length is not given: until the end of the connection, or chunked
+UNTIL_CLOSE = -1
+CHUNKED = -2
+
+# (client address, client port, server address, server port)
+FlowKey = Tuple[bytes, int, bytes, int]
+
+
+class _Stream:
+    """
+    One direction of a TCP connection.
+    """
+    __slots__ = ('next_sequence', 'out_of_order', 'out_of_order_size', 'head')
+
+    def __init__(self):
+        self.next_sequence: Optional[int] = None
+        # segments received ahead of a missing one, by sequence number
+        self.out_of_order: Dict[int, bytes] = dict()
+        self.out_of_order_size = 0
+        # headers received so far, when they span several segments
+        self.head = bytearray()
+
+
+class _Flow:
+    """
+    TCP connection to an HTTP server, and its HTTP exchange in progress.
+    """
+    __slots__ = ('client', 'server', 'last_seen', 'request', 'request_bytes', 'body_remaining', 'response_bytes',
+                 'response_remaining', 'chunk_tail')
+
+    def __init__(self, timestamp: float):
+        self.client = _Stream()
+        self.server = _Stream()
+        self.last_seen = timestamp
+        # request of the exchange in progress (its content length is the one announced)
+        self.request: Optional[HTTPInfo] = None
+        self.request_bytes = 0
+        self.body_remaining = 0
+        self.response_bytes = 0
+        # remaining bytes of the response body, None until the response headers are received
+        self.response_remaining: Optional[int] = None
+        # last bytes of a chunked response, to detect its last chunk across segments
+        self.chunk_tail = b''
+
+
+class TCPReassembler:
+
+    def __init__(self,
+                 server_ports: Sequence[int] = HTTP_PORTS,
+                 max_flows: int = MAX_FLOWS,
+                 max_head_size: int = MAX_HEAD_SIZE,
+                 max_out_of_order: int = MAX_OUT_OF_ORDER,
+                 max_buffered: int = MAX_BUFFERED,
+                 idle_timeout: float = IDLE_TIMEOUT,
+                 metrics: Optional[SnifferMetrics] = None):
+        """
+        Reassembles both directions of the TCP connections to HTTP servers, so that requests whose headers span
+        several segments are parsed once their headers are complete, and that the traffic of each request is the
+        payload actually transferred: request headers and body, plus the response. An exchange ends, and its
+        HTTP information is made available (cf. pop_exchanges), when its response is complete (Content-Length,
+        last chunk, or response without body), when the next request starts on the connection, or when the
+        connection is closed or evicted.
+        The memory is bounded: a flow is only created by a segment starting with a request (handshakes keep no
+        state, e.g. under a SYN flood), headers are buffered only when they span segments (up to max_head_size),
+        segments ahead of a missing one up to max_out_of_order bytes per direction (the gap is skipped beyond),
+        and the least recently active flows are evicted beyond max_flows flows or max_buffered bytes buffered,
+        as well as the flows idle for idle_timeout.
+        Pipelined responses are counted with the last request received.
+        :param server_ports: TCP ports of HTTP servers
+        :param max_flows: maximum number of flows followed
+        :param max_head_size: maximum size of the headers of a request or response
+        :param max_out_of_order: maximum bytes of out of order segments buffered per direction of a flow
+        :param max_buffered: maximum bytes buffered by all the flows
+        :param idle_timeout: seconds without a segment after which a flow is evicted
+        :param metrics: counts the decode failures, evicted flows and stream gaps (defaults to new metrics)
+        """
+        self.server_ports = frozenset(server_ports)
+        self.max_flows = max_flows
+        self.max_head_size = max_head_size
+        self.max_out_of_order = max_out_of_order
+        self.max_buffered = max_buffered
+        self.idle_timeout = idle_timeout
+        self.metrics = metrics if metrics is not None else SnifferMetrics()
+        # flows from the least to the most recently active
+        self.flows: 'OrderedDict[FlowKey, _Flow]' = OrderedDict()
+        self.buffered = 0
+        self.next_eviction: Optional[float] = None
+        self.exchanges: List[HTTPInfo] = []
+
+    def add_segment(self, frame: Buffer, segment: TCPSegment, timestamp: float) -> None:
+        """
+        Reassemble a TCP segment (cf. parse_tcp_segment), segments to other ports than the server ones are ignored.
+        :param frame: raw frame carrying the segment
+        :param segment: addressing of the segment and location of its payload in frame
+        :param timestamp: capture time of the segment (in seconds)
+        """
+        if self.next_eviction is None or timestamp >= self.next_eviction:
+            self.evict_idle(timestamp)
+            self.next_eviction = timestamp + EVICTION_PERIOD
+        if segment.destination_port in self.server_ports:
+            key = (segment.source, segment.source_port, segment.destination, segment.destination_port)
+            from_client = True
+        elif segment.source_port in self.server_ports:
+            key = (segment.destination, segment.destination_port, segment.source, segment.source_port)
+            from_client = False
+        else:
+            return
+        flows = self.flows
+        flow = flows.get(key)
+        flags = segment.flags
+        if flow is not None and flags & TCP_SYN:
+            # new connection between the same ports
+            self._close(key)
+            flow = None
+        start, end = segment.payload_start, segment.payload_end
+        if flow is None:
+            # only the start of a request opens a flow
+            if not from_client or bytes(frame[start:start + 4]) not in REQUEST_PREFIXES:
+                return
+            if len(flows) >= self.max_flows:
+                self._close(next(iter(flows)), evicted=True)
+            flow = flows[key] = _Flow(timestamp)
+        else:
+            flows.move_to_end(key)
+            flow.last_seen = timestamp
+        if end > start:
+            self._receive_segment(flow, from_client, frame, segment.sequence, start, end)
+        if flags & TCP_RST or (flags & TCP_FIN and (not from_client or flow.request is None)):
+            self._close(key)
+        while self.buffered > self.max_buffered:
+            self._close(next(iter(flows)), evicted=True)
+
+    def evict_idle(self, now: float) -> None:
+        """
+        Evict the flows without segment for idle_timeout (their exchanges in progress end).
+        :param now: current capture time (in seconds)
+        """
+        flows = self.flows
+        while flows:
+            key, flow = next(iter(flows.items()))
+            if now - flow.last_seen < self.idle_timeout:
+                break
+            self._close(key, evicted=True)
+
+    def flush(self) -> None:
+        """
+        End all the flows (e.g. at the end of a capture): their exchanges in progress end.
+        """
+        for key in list(self.flows):
+            self._close(key)
+
+    def pop_exchanges(self) -> List[HTTPInfo]:
+        """
+        :return: HTTP information of the exchanges ended since the previous call, the content length being the
+                 bytes transferred by the request and its response
+        """
+        exchanges = self.exchanges
+        self.exchanges = []
+        return exchanges
+
+    def _receive_segment(self, flow: _Flow, from_client: bool, buffer: Buffer, sequence: int,
+                         start: int, end: int) -> None:
+        stream = flow.client if from_client else flow.server
+        receive = self._receive_request if from_client else self._receive_response
+        if stream.next_sequence is None:
+            stream.next_sequence = sequence
+        offset = (sequence - stream.next_sequence) % SEQUENCE_MODULO
+        if offset >= SEQUENCE_MODULO // 2:
+            # starts before the next byte expected: retransmitted, only its new bytes are received
+            start += SEQUENCE_MODULO - offset
+            if start >= end:
+                return
+        elif offset > 0:
+            size = end - start
+            if offset < self.max_out_of_order and stream.out_of_order_size + size <= self.max_out_of_order:
+                if sequence not in stream.out_of_order:
+                    stream.out_of_order[sequence] = bytes(buffer[start:end])
+                    stream.out_of_order_size += size
+                    self.buffered += size
+                return
+            # the missing bytes are given up: the stream resumes at this segment
+            self.metrics.stream_gaps += 1
+            self._skip_gap(flow, stream, from_client)
+            stream.next_sequence = sequence
+        receive(flow, buffer, start, end)
+        next_sequence = (stream.next_sequence + end - start) % SEQUENCE_MODULO
+        # segments received ahead which are now in order
+        while stream.out_of_order:
+            data = stream.out_of_order.pop(next_sequence, None)
+            if data is None:
+                break
+            stream.out_of_order_size -= len(data)
+            self.buffered -= len(data)
+            receive(flow, data, 0, len(data))
+            next_sequence = (next_sequence + len(data)) % SEQUENCE_MODULO
+        stream.next_sequence = next_sequence
+
+    def _skip_gap(self, flow: _Flow, stream: _Stream, from_client: bool) -> None:
+        self.buffered -= stream.out_of_order_size + len(stream.head)
+        stream.out_of_order = dict()
+        stream.out_of_order_size = 0
+        stream.head = bytearray()
+        if from_client:
+            # the next request is recognized by its method
+            flow.body_remaining = 0
+        elif flow.request is not None:
+            # the end of the response cannot be known anymore
+            flow.response_remaining = UNTIL_CLOSE
+
+    def _receive_request(self, flow: _Flow, buffer: Buffer, start: int, end: int) -> None:
+        while start < end:
+            if flow.body_remaining > 0:
+                received = min(flow.body_remaining, end - start)
+                flow.request_bytes += received
+                flow.body_remaining -= received
+                start += received
+                continue
+            if not flow.client.head:
+                if bytes(buffer[start:start + 4]) not in REQUEST_PREFIXES:
+                    # not a request (e.g. chunked body): counted with the request in progress
+                    if flow.request is not None:
+                        flow.request_bytes += end - start
+                    return
+                if flow.request is not None:
+                    # next request on the connection (previous response without known end, or not captured)
+                    self._finish_exchange(flow)
+            head = self._receive_head(flow.client, buffer, start, end)
+            if head is None:
+                return
+            head_buffer, head_start, head_end, start = head
+            flow.request = parse_http_request(head_buffer, head_start, head_end, self.metrics,
+                                              require_content_length=False)
+            flow.request_bytes = head_end - head_start
+            flow.body_remaining = flow.request.content_length if flow.request is not None else 0
+            flow.response_bytes = 0
+            flow.response_remaining = None
+            flow.chunk_tail = b''
+
+    def _receive_response(self, flow: _Flow, buffer: Buffer, start: int, end: int) -> None:
+        if flow.request is None:
+            # response of a request which was not captured or not decoded
+            return
+        flow.response_bytes += end - start
+        while start < end:
+            remaining = flow.response_remaining
+            if remaining is None:
+                head = self._receive_head(flow.server, buffer, start, end)
+                if head is None:
+                    if not flow.server.head:
+                        # headers too long
+                        flow.response_remaining = UNTIL_CLOSE
+                    return
+                head_buffer, head_start, head_end, start = head
+                response = parse_http_response_head(head_buffer, head_start, head_end, self.metrics)
+                if response is None:
+                    flow.response_remaining = UNTIL_CLOSE
+                    return
+                if 100 <= response.status < 200:
+                    # interim response (e.g. 100 Continue), followed by the final one
+                    continue
+                if flow.request.method == 'HEAD' or response.status in (204, 304):
+                    remaining = 0
+                elif response.chunked:
+                    remaining = CHUNKED
+                else:
+                    remaining = response.content_length if response.content_length is not None else UNTIL_CLOSE
+            elif remaining > 0:
+                remaining -= min(remaining, end - start)
+                start = end
+            elif remaining == CHUNKED:
+                # the body ends with the last (empty) chunk
+                flow.chunk_tail = (flow.chunk_tail + bytes(buffer[max(start, end - 5):end]))[-5:]
+                if flow.chunk_tail == CHUNKED_END:
+                    remaining = 0
+                start = end
+            else:
+                return
+            flow.response_remaining = remaining
+            if remaining == 0:
+                self._finish_exchange(flow)
+                return
+
+    def _receive_head(self, stream: _Stream, buffer: Buffer, start: int,
+                      end: int) -> Optional[Tuple[Buffer, int, int, int]]:
+        """
+        Receive the headers of a request or response, buffered while they span several segments.
+        :return: buffer holding the complete headers, their start and end in it, and the offset of the bytes
+                 following them in buffer ; None if they are not complete (stream.head is then empty if they are
+                 too long, and dropped)
+        """
+        head = stream.head
+        if not head:
+            head_end = buffer.find(HEAD_END, start, end)
+            if head_end >= 0:
+                # usual case: complete headers in the segment, parsed in place
+                return buffer, start, head_end + 4, head_end + 4
+            if end - start <= self.max_head_size:
+                stream.head = bytearray(buffer[start:end])
+                self.buffered += end - start
+            else:
+                self.metrics.decode_failures += 1
+            return None
+        previous = len(head)
+        head += buffer[start:end]
+        head_end = head.find(HEAD_END, max(0, previous - 3))
+        if head_end < 0:
+            if len(head) > self.max_head_size:
+                self.metrics.decode_failures += 1
+                stream.head = bytearray()
+                self.buffered -= previous
+            else:
+                self.buffered += end - start
+            return None
+        stream.head = bytearray()
+        self.buffered -= previous
+        return head, 0, head_end + 4, start + head_end + 4 - previous
+
+    def _finish_exchange(self, flow: _Flow) -> None:
+        request = flow.request
+        self.exchanges.append(HTTPInfo(method=request.method, host=request.host, path=request.path,
+                                       content_length=flow.request_bytes + flow.response_bytes))
+        flow.request = None
+        if flow.server.head:
+            self.buffered -= len(flow.server.head)
+            flow.server.head = bytearray()
+
+    def _close(self, key: FlowKey, evicted: bool = False) -> None:
+        flow = self.flows.pop(key)
+        if flow.request is not None:
+            self._finish_exchange(flow)
+        for stream in (flow.client, flow.server):
+            self.buffered -= stream.out_of_order_size + len(stream.head)
+        if evicted:
+            self.metrics.flows_evicted += 1
@@ -0,0 +1,82 @@
+from math import ceil, log
+from typing import Dict
+from src.stores.snapshot import SnapshotReader, SnapshotWriter
+
+
+class QuantileSketch:
+    """
+    Streaming quantiles of positive values with a relative accuracy guarantee (DDSketch): values are counted in
+    buckets of geometrically increasing width, so that every quantile is within relative_accuracy of an actual
+    value. Adding a value is O(1), memory is bounded by the range of the values (about 2200 buckets at 1% for
+    values up to 2^63) and sketches of the same accuracy can be merged exactly (e.g. across workers).
+    """
+    __slots__ = ('relative_accuracy', 'gamma', 'log_gamma', 'buckets', 'zero_count', 'count')
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = log(self.gamma)
+        # number of values in ]gamma^(index-1), gamma^index], by index
+        self.buckets: Dict[int, int] = dict()
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, value: float, count: int = 1) -> None:
+        """
+        :param value: value added
+        :param count: number of times it is added
+        """
+        self.count += count
+        if value <= 0:
+            self.zero_count += count
+            return
+        index = ceil(log(value) / self.log_gamma)
+        self.buckets[index] = self.buckets.get(index, 0) + count
+
+    def merge(self, other: 'QuantileSketch') -> None:
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("only sketches of the same relative accuracy can be merged")
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+    def quantile(self, fraction: float) -> float:
+        """
+        :param fraction: between 0 and 1 (e.g. 0.99 for the 99th percentile)
+        :return: value under which fraction of the values are (within the relative accuracy), 0 if no value
+        """
+        if self.count == 0:
+            return 0.0
+        rank = fraction * (self.count - 1)
+        cumulated = self.zero_count
+        if cumulated > rank:
+            return 0.0
+        for index in sorted(self.buckets):
+            cumulated += self.buckets[index]
+            if cumulated > rank:
+                # middle of the bucket in relative terms
+                return 2 * self.gamma ** index / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+    def write_state(self, writer: SnapshotWriter) -> None:
+        writer.write_float(self.relative_accuracy)
+        writer.write_ints(self.buckets)
+        writer.write_ints(self.buckets.values())
+        writer.write_int(self.zero_count)
+        writer.write_int(self.count)
+
+    def read_state(self, reader: SnapshotReader) -> None:
+        if reader.read_float() != self.relative_accuracy:
+            raise ValueError("only sketches of the same relative accuracy can be restored")
+        indexes, counts = reader.read_ints(), reader.read_ints()
+        self.buckets = dict(zip(indexes, counts))
+        self.zero_count = reader.read_int()
+        self.count = reader.read_int()
+
+    def clear(self) -> None:
+        self.buckets.clear()
+        self.zero_count = 0
+        self.count = 0
@@ -0,0 +1,149 @@
+from collections import Counter
+from typing import Dict, Sequence, Set
+from src.interfaces.abstract_collector import HTTPInfo, TrafficSummary
+from src.collectors.traffic_ring import TrafficRing
+from src.stats.hyper_log_log import HyperLogLog, hash64
+from src.stats.quantile_sketch import QuantileSketch
+from src.stores.snapshot import SnapshotReader, SnapshotWriter
+
+MAX_METHODS = 16  # methods counted separately, the other ones are counted together as OTHER_METHODS
+OTHER_METHODS = 'OTHER'
+MAX_SEEN_HOSTS = 1024  # hosts remembered as already added, so that the hosts seen over and over again are skipped
+
+
+class TrafficStatistics:
+
+    def __init__(self, rate_span: int = 10, host_precision: int = 12, content_length_accuracy: float = 0.01):
+        """
+        Summary statistics of the traffic as a whole, in fixed memory and O(1) per request: requests and traffic
+        since the start, request and traffic rates over the last rate_span seconds (ring of 1 second buckets),
+        requests per method, distinct hosts (HyperLogLog) and content length percentiles (QuantileSketch).
+        Statistics collected separately (e.g. by capture workers) can be merged.
+        :param rate_span: seconds over which the request and traffic rates are computed
+        :param host_precision: precision of the distinct hosts estimate (cf. HyperLogLog)
+        :param content_length_accuracy: relative accuracy of the content length percentiles (cf. QuantileSketch)
+        """
+        self.rate_span = rate_span
+        self.nb_requests = 0
+        self.total_traffic = 0
+        self.request_ring = TrafficRing(history_span=rate_span)
+        self.traffic_ring = TrafficRing(history_span=rate_span)
+        self.methods: Dict[str, int] = dict()
+        self.hosts = HyperLogLog(precision=host_precision)
+        # hosts already added to the sketch (adding them again would not change it), bounded
+        self.seen_hosts: Set[str] = set()
+        self.content_lengths = QuantileSketch(relative_accuracy=content_length_accuracy)
+
+    def add(self, http_info: HTTPInfo, timestamp: float) -> None:
+        content_length = http_info.content_length
+        self.nb_requests += 1
+        self.total_traffic += content_length
+        self.request_ring.add(timestamp, 1)
+        self.traffic_ring.add(timestamp, content_length)
+        methods = self.methods
+        method = http_info.method
+        if method in methods:
+            methods[method] += 1
+        elif len(methods) < MAX_METHODS:
+            methods[method] = 1
+        else:
+            methods[OTHER_METHODS] = methods.get(OTHER_METHODS, 0) + 1
+        host = http_info.host
+        if host not in self.seen_hosts:
+            if len(self.seen_hosts) >= MAX_SEEN_HOSTS:
+                self.seen_hosts.clear()
+            self.seen_hosts.add(host)
+            self.hosts.add_hash(hash64(host))
+        self.content_lengths.add(content_length)
+
+    def add_batch(self, http_infos: Sequence[HTTPInfo], timestamp: float) -> None:
+        """
+        Add a batch of requests at the same time: methods, hosts and content lengths are counted once per
+        distinct value of the batch.
+        """
+        content_lengths = [http_info.content_length for http_info in http_infos]
+        batch_traffic = sum(content_lengths)
+        self.nb_requests += len(content_lengths)
+        self.total_traffic += batch_traffic
+        self.request_ring.add(timestamp, len(content_lengths))
+        self.traffic_ring.add(timestamp, batch_traffic)
+        methods = self.methods
+        for method, count in Counter(http_info.method for http_info in http_infos).items():
+            if method not in methods and len(methods) >= MAX_METHODS:
+                method = OTHER_METHODS
+            methods[method] = methods.get(method, 0) + count
+        seen_hosts = self.seen_hosts
+        for host in {http_info.host for http_info in http_infos}:
+            if host not in seen_hosts:
+                if len(seen_hosts) >= MAX_SEEN_HOSTS:
+                    seen_hosts.clear()
+                seen_hosts.add(host)
+                self.hosts.add_hash(hash64(host))
+        for content_length, count in Counter(content_lengths).items():
+            self.content_lengths.add(content_length, count)
+
+    def merge(self, other: 'TrafficStatistics') -> None:
+        self.nb_requests += other.nb_requests
+        self.total_traffic += other.total_traffic
+        self.request_ring.merge(other.request_ring.traffic_per_second())
+        self.traffic_ring.merge(other.traffic_ring.traffic_per_second())
+        for method, count in other.methods.items():
+            if method not in self.methods and len(self.methods) >= MAX_METHODS:
+                method = OTHER_METHODS
+            self.methods[method] = self.methods.get(method, 0) + count
+        self.hosts.merge(other.hosts)
+        self.content_lengths.merge(other.content_lengths)
+
+    def summary(self, timestamp: float) -> TrafficSummary:
+        """
+        :param timestamp: current time, end of the period of the rates
+        """
+        return TrafficSummary(timestamp=timestamp,
+                              nb_requests=self.nb_requests,
+                              total_traffic=self.total_traffic,
+                              request_rate=self.request_ring.total_over_period(timestamp, self.rate_span)
+                              / self.rate_span,
+                              traffic_rate=self.traffic_ring.total_over_period(timestamp, self.rate_span)
+                              / self.rate_span,
+                              methods=dict(self.methods),
+                              nb_hosts=self.hosts.estimate(),
+                              content_length_p50=round(self.content_lengths.quantile(0.5)),
+                              content_length_p95=round(self.content_lengths.quantile(0.95)),
+                              content_length_p99=round(self.content_lengths.quantile(0.99)))
+
+    def write_state(self, writer: SnapshotWriter) -> None:
+        writer.write_tag('TrafficStatistics')
+        writer.write_int(self.nb_requests)
+        writer.write_int(self.total_traffic)
+        self.request_ring.write_state(writer)
+        self.traffic_ring.write_state(writer)
+        writer.write_strings(self.methods)
+        writer.write_ints(self.methods.values())
+        self.hosts.write_state(writer)
+        self.content_lengths.write_state(writer)
+
+    def read_state(self, reader: SnapshotReader) -> None:
+        """
+        Restores the statistics written by write_state (the hosts already seen are not, they are only skipped
+        again once seen again).
+        """
+        reader.read_tag('TrafficStatistics')
+        self.nb_requests = reader.read_int()
+        self.total_traffic = reader.read_int()
+        self.request_ring.read_state(reader)
+        self.traffic_ring.read_state(reader)
+        methods = reader.read_strings()
+        self.methods = dict(zip(methods, reader.read_ints()))
+        self.hosts.read_state(reader)
+        self.seen_hosts.clear()
+        self.content_lengths.read_state(reader)
+
+    def clear(self) -> None:
+        self.nb_requests = 0
+        self.total_traffic = 0
+        self.request_ring.clear()
+        self.traffic_ring.clear()
+        self.methods.clear()
+        self.hosts.clear()
+        self.seen_hosts.clear()
+        self.content_lengths.clear()
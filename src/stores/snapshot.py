@@ -0,0 +1,199 @@
+import os
+import struct
+import sys
+from array import array
+from typing import Iterable, List, Optional
+from zlib import crc32
+
+from src.interfaces.abstract_alert_manager import AlertInfo, AlertStatus
+
+MAGIC = b'HTSNAP'
+VERSION = 1
+HEADER = struct.Struct('<6sH')  # magic, version
+CHECKSUM = struct.Struct('<I')  # CRC-32 of the payload
+INT = struct.Struct('<q')
+FLOAT = struct.Struct('<d')
+# alert statuses, stored by index
+STATUSES = list(AlertStatus)
+
+
+class SnapshotWriter:
+
+    def __init__(self):
+        """
+        Serializes the state of the collectors and alert managers (cf. their write_state) in a compact binary
+        format: fixed-width little-endian values, arrays written as a length followed by their raw values, strings
+        as their UTF-8 lengths followed by their concatenated bytes. Nothing is pickled.
+        """
+        self.payload = bytearray()
+
+    def write_int(self, value: int) -> None:
+        self.payload += INT.pack(value)
+
+    def write_optional_int(self, value: Optional[int]) -> None:
+        self.payload.append(value is not None)
+        if value is not None:
+            self.write_int(value)
+
+    def write_float(self, value: float) -> None:
+        self.payload += FLOAT.pack(value)
+
+    def write_optional_float(self, value: Optional[float]) -> None:
+        self.payload.append(value is not None)
+        if value is not None:
+            self.write_float(value)
+
+    def write_ints(self, values: Iterable[int]) -> None:
+        self._write_array(array('q', values))
+
+    def write_floats(self, values: Iterable[float]) -> None:
+        self._write_array(array('d', values))
+
+    def write_bytes(self, value: bytes) -> None:
+        self.write_int(len(value))
+        self.payload += value
+
+    def write_strings(self, values: Iterable[str]) -> None:
+        encoded = [value.encode('utf-8', 'surrogateescape') for value in values]
+        self.write_ints(len(value) for value in encoded)
+        self.payload += b''.join(encoded)
+
+    def write_tag(self, tag: str) -> None:
+        """
+        Name of the component written next, checked when it is read (cf. SnapshotReader.read_tag).
+        """
+        self.write_strings([tag])
+
+    def write_status(self, status: AlertStatus) -> None:
+        self.write_int(STATUSES.index(status))
+
+    def write_alert_infos(self, alert_infos: List[AlertInfo]) -> None:
+        self.write_ints(STATUSES.index(alert_info.status) for alert_info in alert_infos)
+        self.write_floats(alert_info.traffic_value for alert_info in alert_infos)
+        # traffic values of the traffic limit are integers
+        self.write_ints(isinstance(alert_info.traffic_value, int) for alert_info in alert_infos)
+        self.write_floats(alert_info.timestamp for alert_info in alert_infos)
+        self.write_strings(alert_info.rule for alert_info in alert_infos)
+        self.write_ints(alert_info.key is not None for alert_info in alert_infos)
+        self.write_strings(alert_info.key for alert_info in alert_infos if alert_info.key is not None)
+
+    def getvalue(self) -> bytes:
+        """
+        :return: snapshot: header, payload and checksum of the payload
+        """
+        return HEADER.pack(MAGIC, VERSION) + self.payload + CHECKSUM.pack(crc32(self.payload))
+
+    def _write_array(self, values: array) -> None:
+        if sys.byteorder == 'big':
+            values.byteswap()
+        self.write_int(len(values))
+        self.payload += values.tobytes()
+
+
+class SnapshotReader:
+
+    def __init__(self, snapshot: bytes):
+        """
+        Reads a snapshot written by SnapshotWriter, in the order it was written.
+        :param snapshot: snapshot read (cf. SnapshotWriter.getvalue)
+        :raise ValueError: if the snapshot is not a snapshot of this version, or is corrupted
+        """
+        if len(snapshot) < HEADER.size + CHECKSUM.size:
+            raise ValueError("snapshot is truncated")
+        magic, version = HEADER.unpack_from(snapshot)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"not a snapshot of version {VERSION}")
+        self.payload = memoryview(snapshot)[HEADER.size:len(snapshot) - CHECKSUM.size]
+        if crc32(self.payload) != CHECKSUM.unpack_from(snapshot, len(snapshot) - CHECKSUM.size)[0]:
+            raise ValueError("snapshot is corrupted (checksum mismatch)")
+        self.offset = 0
+
+    def read_int(self) -> int:
+        return INT.unpack(self._read(INT.size))[0]
+
+    def read_optional_int(self) -> Optional[int]:
+        return self.read_int() if self._read(1)[0] else None
+
+    def read_float(self) -> float:
+        return FLOAT.unpack(self._read(FLOAT.size))[0]
+
+    def read_optional_float(self) -> Optional[float]:
+        return self.read_float() if self._read(1)[0] else None
+
+    def read_ints(self) -> array:
+        return self._read_array('q')
+
+    def read_floats(self) -> array:
+        return self._read_array('d')
+
+    def read_bytes(self) -> bytes:
+        return bytes(self._read(self.read_int()))
+
+    def read_strings(self) -> List[str]:
+        lengths = self.read_ints()
+        encoded = self._read(sum(lengths))
+        strings = []
+        start = 0
+        for length in lengths:
+            strings.append(str(encoded[start:start + length], 'utf-8', 'surrogateescape'))
+            start += length
+        return strings
+
+    def read_tag(self, tag: str) -> None:
+        """
+        :raise ValueError: if the component written next is not tag (e.g. snapshot of another collector)
+        """
+        written = self.read_strings()
+        if written != [tag]:
+            raise ValueError(f"snapshot of {written[0] if written else 'nothing'} instead of {tag}")
+
+    def read_status(self) -> AlertStatus:
+        return STATUSES[self.read_int()]
+
+    def read_alert_infos(self) -> List[AlertInfo]:
+        statuses, values, integers, timestamps, rules = (self.read_ints(), self.read_floats(), self.read_ints(),
+                                                         self.read_floats(), self.read_strings())
+        has_keys = self.read_ints()
+        keys = iter(self.read_strings())
+        return [AlertInfo(status=STATUSES[status], traffic_value=int(value) if integer else value,
+                          timestamp=timestamp, rule=rule, key=next(keys) if has_key else None)
+                for status, value, integer, timestamp, rule, has_key
+                in zip(statuses, values, integers, timestamps, rules, has_keys)]
+
+    def _read(self, size: int) -> memoryview:
+        if self.offset + size > len(self.payload):
+            raise ValueError("snapshot is truncated")
+        value = self.payload[self.offset:self.offset + size]
+        self.offset += size
+        return value
+
+    def _read_array(self, typecode: str) -> array:
+        values = array(typecode)
+        values.frombytes(self._read(self.read_int() * values.itemsize))
+        if sys.byteorder == 'big':
+            values.byteswap()
+        return values
+
+
+def write_snapshot_file(path: str, snapshot: bytes) -> None:
+    """
+    Replaces the snapshot file at path atomically: the snapshot is written to a temporary file renamed over it,
+    so that the file is always a complete snapshot (the previous one if the write is interrupted).
+    """
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, 'wb') as snapshot_file:
+        snapshot_file.write(snapshot)
+        snapshot_file.flush()
+        os.fsync(snapshot_file.fileno())
+    os.replace(temporary_path, path)
+
+
+def read_snapshot_file(path: str) -> Optional[bytes]:
+    """
+    :return: snapshot stored at path, None if there is none
+    """
+    try:
+        with open(path, 'rb') as snapshot_file:
+            return snapshot_file.read()
+    except FileNotFoundError:
+        return None
@@ -0,0 +1,129 @@
+from logging import getLogger
+from typing import Dict, List, Optional, Sequence
+
+from src.interfaces.abstract_clock import AbstractClock
+from src.interfaces.abstract_collector import AbstractCollector, HTTPInfo, HitInfo, TrafficPartial
+from src.clocks.real_clock import RealClock
+from src.stores.traffic_store import Record, TrafficStore
+
+FLUSH_RECORDS = 4096  # records of the closed buckets written to the store at once
+
+logger = getLogger("TrafficRecorder")
+
+
+class TrafficRecorder:
+
+    def __init__(self, store: TrafficStore, clock: Optional[AbstractClock] = None, bucket_width: int = 1,
+                 flush_records: int = FLUSH_RECORDS):
+        """
+        Records the traffic in a store: hits and bytes per section are counted for the open time bucket, and the
+        records of the closed buckets are written to the store in batches (when flush_records of them are
+        waiting, or on flush). Buckets older than the last one stored (e.g. an older capture replayed into an
+        existing store) are not recorded, they are counted in nb_stale_records.
+        :param store: store written
+        :param clock: time of the collected requests (defaults to RealClock)
+        :param bucket_width: width of a bucket (in seconds, defaults to 1 second)
+        :param flush_records: number of records of closed buckets written at once
+        """
+        self.store = store
+        self.clock = clock if clock is not None else RealClock()
+        self.bucket_width = bucket_width
+        self.flush_records = flush_records
+        self.open_number: Optional[int] = None
+        # section -> [hits, bytes] of the open bucket
+        self.open_bucket: Dict[str, List[int]] = dict()
+        self.closed_records: List[Record] = []
+        self.nb_stale_records = 0
+
+    def collect_http_info(self, http_info: HTTPInfo) -> None:
+        number = int(self.clock.now() // self.bucket_width)
+        # late requests are counted in the open bucket
+        if self.open_number is None or number > self.open_number:
+            self._close_bucket()
+            self.open_number = number
+        section = http_info.extract_section()
+        counts = self.open_bucket.get(section)
+        if counts is None:
+            counts = self.open_bucket[section] = [0, 0]
+        counts[0] += 1
+        counts[1] += http_info.content_length
+
+    def collect_batch(self, http_infos: Sequence[HTTPInfo]) -> None:
+        """
+        Count a batch of requests in the bucket open at the current time.
+        """
+        if not http_infos:
+            return
+        number = int(self.clock.now() // self.bucket_width)
+        if self.open_number is None or number > self.open_number:
+            self._close_bucket()
+            self.open_number = number
+        open_bucket = self.open_bucket
+        for http_info in http_infos:
+            section = http_info.extract_section()
+            counts = open_bucket.get(section)
+            if counts is None:
+                counts = open_bucket[section] = [0, 0]
+            counts[0] += 1
+            counts[1] += http_info.content_length
+
+    def flush(self, close_bucket: bool = False) -> None:
+        """
+        Write the records of the closed buckets to the store.
+        :param close_bucket: also write the open bucket (e.g. when stopping)
+        """
+        if close_bucket:
+            self._close_bucket()
+        if self.closed_records:
+            records = self.closed_records
+            self.closed_records = []
+            last_timestamp = self.store.last_timestamp
+            if last_timestamp is not None and records[0][0] < last_timestamp:
+                # records are in bucket order: the stale ones are first
+                stale = next((index for index, record in enumerate(records) if record[0] >= last_timestamp),
+                             len(records))
+                if not self.nb_stale_records:
+                    logger.warning('Buckets older than the last one stored (%d) are not recorded', last_timestamp)
+                self.nb_stale_records += stale
+                records = records[stale:]
+            self.store.append(records)
+
+    def _close_bucket(self) -> None:
+        if self.open_bucket:
+            timestamp = self.open_number * self.bucket_width
+            self.closed_records.extend((timestamp, section, nb_hits, traffic)
+                                       for section, (nb_hits, traffic) in self.open_bucket.items())
+            self.open_bucket = dict()
+            if len(self.closed_records) >= self.flush_records:
+                self.flush()
+
+
+def restore_collector(store: TrafficStore, collector: AbstractCollector, start: int, end: int) -> int:
+    """
+    Warm restart: merges the traffic stored for the buckets starting in [start, end) into the collector, one
+    bucket at a time (cf. merge_partial), so that its traffic history and sliding windows are rebuilt without
+    the raw traffic. The traffic of the last request of a section is not stored: the mean traffic of its hits
+    in the bucket is restored instead.
+    :return: number of buckets restored
+    """
+    nb_buckets = 0
+    section_hits: List[HitInfo] = []
+    bucket_timestamp = None
+    for timestamp, section, nb_hits, traffic in store.records(start, end):
+        if timestamp != bucket_timestamp:
+            if section_hits:
+                _merge_bucket(collector, bucket_timestamp, section_hits)
+                nb_buckets += 1
+            bucket_timestamp, section_hits = timestamp, []
+        section_hits.append(HitInfo(section=section, nb_hits=nb_hits, traffic=traffic,
+                                    last_hit_traffic=traffic // nb_hits if nb_hits else 0,
+                                    last_hit_timestamp=float(timestamp)))
+    if section_hits:
+        _merge_bucket(collector, bucket_timestamp, section_hits)
+        nb_buckets += 1
+    return nb_buckets
+
+
+def _merge_bucket(collector: AbstractCollector, timestamp: int, section_hits: List[HitInfo]) -> None:
+    collector.merge_partial(TrafficPartial(section_hits=section_hits,
+                                           traffic_per_second={timestamp: sum(hit.traffic for hit in section_hits)}))
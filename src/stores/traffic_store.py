@@ -0,0 +1,203 @@
+import json
+import os
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from src.interfaces.abstract_alert_manager import AlertInfo, AlertStatus
+
+# columns of the records: one file of fixed-width values each
+COLUMNS: Dict[str, np.dtype] = {
+    'timestamp': np.dtype('<i8'),  # first second of the bucket
+    'bytes': np.dtype('<i8'),
+    'hits': np.dtype('<i8'),
+    'section': np.dtype('<i4'),  # id of the section in the section dictionary
+}
+SECTIONS_FILE = 'sections.txt'
+ALERTS_FILE = 'alerts.jsonl'
+
+# (bucket timestamp, section, hits, bytes)
+Record = Tuple[int, str, int, int]
+
+
+class TrafficStore:
+
+    def __init__(self, directory: str):
+        """
+        Persistent, append-only columnar store of the traffic and alerts history, in directory:
+            - one record per section hit in a time bucket: bucket timestamp, bytes, hits and section id, each
+              field in its own file of fixed-width little-endian values (e.g. timestamp.i8), memory-mapped for
+              reading, so that a query only reads the columns it needs ;
+            - the section dictionary: section of each id, one per line ('\\n' in a section written escaped), in
+              order of appearance ;
+            - the alerts, one JSON object per line.
+        Records are appended in bucket order: a range query finds its records by binary search on the
+        timestamps, then aggregates them with array operations, whatever the length of the history.
+        Records written partially (e.g. on a crash) are dropped when the store is opened.
+        :param directory: directory of the store (created if needed)
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.sections: List[str] = []
+        self.section_ids: Dict[str, int] = dict()
+        self.nb_records = self._recover()
+        self.last_timestamp = int(self._map('timestamp')[-1]) if self.nb_records else None
+        self.column_files = {name: open(self._column_path(name), 'ab') for name in COLUMNS}
+        self.sections_file = open(os.path.join(directory, SECTIONS_FILE), 'a', encoding='utf-8', newline='\n')
+        self.alerts_file = open(os.path.join(directory, ALERTS_FILE), 'a', encoding='utf-8')
+        # columns mapped for the nb_records records
+        self.mapped: Dict[str, np.ndarray] = dict()
+
+    def append(self, records: Iterable[Record]) -> None:
+        """
+        Append a batch of records, in bucket order (after the records already stored).
+        :raise ValueError: if the records are not in bucket order (nothing is appended then)
+        """
+        records = list(records)
+        timestamps = [record[0] for record in records]
+        if not timestamps:
+            return
+        if (self.last_timestamp is not None and timestamps[0] < self.last_timestamp) \
+                or any(later < earlier for earlier, later in zip(timestamps, timestamps[1:])):
+            raise ValueError("records must be appended in bucket order")
+        byte_counts, hit_counts, section_ids = [], [], []
+        new_sections = []
+        for _, section, nb_hits, traffic in records:
+            section_id = self.section_ids.get(section)
+            if section_id is None and '\n' in section:
+                # '\n' separates the sections in the dictionary file
+                section = section.replace('\n', '\\n')
+                section_id = self.section_ids.get(section)
+            if section_id is None:
+                section_id = self.section_ids[section] = len(self.sections)
+                self.sections.append(section)
+                new_sections.append(section)
+            byte_counts.append(traffic)
+            hit_counts.append(nb_hits)
+            section_ids.append(section_id)
+        # sections are written before the records referring to them
+        self.sections_file.writelines(f"{section}\n" for section in new_sections)
+        self.sections_file.flush()
+        for name, values in zip(COLUMNS, [timestamps, byte_counts, hit_counts, section_ids]):
+            self.column_files[name].write(np.asarray(values, dtype=COLUMNS[name]).tobytes())
+            self.column_files[name].flush()
+        self.nb_records += len(timestamps)
+        self.last_timestamp = timestamps[-1]
+
+    def append_alerts(self, alert_infos: Iterable[AlertInfo]) -> None:
+        for alert_info in alert_infos:
+            self.alerts_file.write(json.dumps({'status': alert_info.status.name,
+                                               'traffic_value': alert_info.traffic_value,
+                                               'timestamp': alert_info.timestamp,
+                                               'rule': alert_info.rule,
+                                               'key': alert_info.key}) + '\n')
+        self.alerts_file.flush()
+
+    def read_alerts(self, start: Optional[float] = None, end: Optional[float] = None) -> List[AlertInfo]:
+        """
+        Alerts stored with a timestamp in [start, end), oldest first.
+        """
+        alert_infos = []
+        with open(os.path.join(self.directory, ALERTS_FILE), encoding='utf-8') as alerts_file:
+            for line in alerts_file:
+                if not line.endswith('\n'):
+                    # written partially
+                    break
+                alert = json.loads(line)
+                if (start is None or alert['timestamp'] >= start) and (end is None or alert['timestamp'] < end):
+                    alert_infos.append(AlertInfo(**{**alert, 'status': AlertStatus[alert['status']]}))
+        return alert_infos
+
+    def total_traffic(self, start: int, end: int) -> int:
+        """
+        Bytes of the buckets starting in [start, end).
+        """
+        first, last = self._range(start, end)
+        return int(self._column('bytes')[first:last].sum())
+
+    def traffic_per_bucket(self, start: int, end: int) -> Dict[int, int]:
+        """
+        Bytes of each bucket starting in [start, end), keyed by the first second of the bucket.
+        """
+        first, last = self._range(start, end)
+        timestamps, inverse = np.unique(self._column('timestamp')[first:last], return_inverse=True)
+        traffic = np.bincount(inverse, weights=self._column('bytes')[first:last], minlength=len(timestamps))
+        return {int(timestamp): int(bucket_traffic) for timestamp, bucket_traffic in zip(timestamps, traffic)}
+
+    def section_totals(self, start: int, end: int) -> Dict[str, Tuple[int, int]]:
+        """
+        Hits and bytes of each section hit in the buckets starting in [start, end).
+        :return: section -> (hits, bytes)
+        """
+        first, last = self._range(start, end)
+        section_ids = self._column('section')[first:last]
+        nb_sections = len(self.sections)
+        hits = np.bincount(section_ids, weights=self._column('hits')[first:last], minlength=nb_sections)
+        traffic = np.bincount(section_ids, weights=self._column('bytes')[first:last], minlength=nb_sections)
+        return {self.sections[section_id]: (int(hits[section_id]), int(traffic[section_id]))
+                for section_id in np.flatnonzero(hits)}
+
+    def records(self, start: int, end: int) -> Iterator[Record]:
+        """
+        Records of the buckets starting in [start, end), in bucket order.
+        """
+        first, last = self._range(start, end)
+        columns = [self._column(name)[first:last].tolist() for name in COLUMNS]
+        for timestamp, traffic, nb_hits, section_id in zip(*columns):
+            yield timestamp, self.sections[section_id], nb_hits, traffic
+
+    def close(self) -> None:
+        self.mapped.clear()
+        for column_file in self.column_files.values():
+            column_file.close()
+        self.sections_file.close()
+        self.alerts_file.close()
+
+    def _range(self, start: int, end: int) -> Tuple[int, int]:
+        """
+        Indexes of the first record of a bucket starting at or after start, and of the first one at or after end.
+        """
+        timestamps = self._column('timestamp')
+        first, last = np.searchsorted(timestamps, [start, end], side='left')
+        return int(first), int(last)
+
+    def _column(self, name: str) -> np.ndarray:
+        """
+        Column of the records stored, mapped again when records were appended since it was mapped.
+        """
+        column = self.mapped.get(name)
+        if column is None or len(column) != self.nb_records:
+            column = self.mapped[name] = self._map(name)
+        return column
+
+    def _map(self, name: str) -> np.ndarray:
+        if self.nb_records == 0:
+            return np.empty(0, dtype=COLUMNS[name])
+        return np.memmap(self._column_path(name), dtype=COLUMNS[name], mode='r', shape=(self.nb_records,))
+
+    def _column_path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.{COLUMNS[name].kind}{COLUMNS[name].itemsize}")
+
+    def _recover(self) -> int:
+        """
+        Loads the section dictionary, and truncates the files to the records (and sections) written entirely.
+        :return: number of records stored
+        """
+        sections_path = os.path.join(self.directory, SECTIONS_FILE)
+        if os.path.exists(sections_path):
+            with open(sections_path, 'rb') as sections_file:
+                content = sections_file.read()
+            complete = content[:content.rfind(b'\n') + 1]
+            if len(complete) != len(content):
+                os.truncate(sections_path, len(complete))
+            # sections are separated by '\n' only: splitlines would also split the sections on '\r', '\x85', ...
+            # of the request paths
+            self.sections = [section.decode('utf-8') for section in complete.split(b'\n')[:-1]]
+            self.section_ids = {section: section_id for section_id, section in enumerate(self.sections)}
+        nb_records = min(os.path.getsize(self._column_path(name)) // dtype.itemsize
+                         if os.path.exists(self._column_path(name)) else 0 for name, dtype in COLUMNS.items())
+        for name, dtype in COLUMNS.items():
+            if os.path.exists(self._column_path(name)) \
+                    and os.path.getsize(self._column_path(name)) != nb_records * dtype.itemsize:
+                os.truncate(self._column_path(name), nb_records * dtype.itemsize)
+        return nb_records
@@ -2,3 +2,10 @@ FORMAT_MSG_HIGH_ALERT = "High traffic generated an alert - hits = %s, triggered
 FORMAT_MSG_RECOVERED_ALERT = "Traffic recovered - hits = %s, triggered at %s"
 HIGHEST_HITS_HEADER = "Highest hits"
 ALERTS_HEADER = "Alerts"
+METRICS_HEADER = "Monitor"
+FORMAT_MSG_LATENCY = "%s: p50 %s | p99 %s | max %s | count %d"
+SUMMARY_HEADER = "Traffic summary"
+FORMAT_MSG_SUMMARY_RATES = "requests %d (%.1f/s) | traffic %d bytes (%.1f bytes/s) | distinct hosts ~%d"
+FORMAT_MSG_SUMMARY_CONTENT_LENGTH = "content length: p50 %d | p95 %d | p99 %d"
+FORMAT_MSG_RULE_HIGH_ALERT = "Rule %s generated an alert - value = %s, triggered at %s"
+FORMAT_MSG_RULE_RECOVERED_ALERT = "Rule %s recovered - value = %s, triggered at %s"
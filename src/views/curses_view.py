@@ -1,50 +1,123 @@
 import curses
-from typing import List
-from .constants_view import HIGHEST_HITS_HEADER, ALERTS_HEADER
-from src.interfaces.abstract_view import AbstractView, LIMIT_TOTAL_ALERT
-from .constants_view import FORMAT_MSG_RECOVERED_ALERT, FORMAT_MSG_HIGH_ALERT
-from src.interfaces.abstract_alert_manager import AlertStatus
-from src.interfaces.abstract_collector import HitInfo
+from shutil import get_terminal_size
+from typing import Dict, List, Optional, Sequence, Tuple
+from src.interfaces.abstract_alert_manager import AlertInfo
+from src.interfaces.abstract_clock import AbstractClock
+from .constants_view import HIGHEST_HITS_HEADER, ALERTS_HEADER, METRICS_HEADER, SUMMARY_HEADER
+from .format_alert import format_alert
+from .format_metrics import format_metrics
+from .format_summary import format_summary
+from .screen_frame import ScreenFrame, layout_panels
+from src.instrumentation.metrics import MetricsSnapshot
+from src.interfaces.abstract_view import AbstractView, LIMIT_TOTAL_ALERT, LIMIT_HIGHEST_HITS
+from src.interfaces.abstract_collector import HitInfo, TrafficSummary
 from datetime import datetime
 
 
+HEIGHT_SUMMARY = 4  # header + rates + methods + content length
+HEIGHT_METRICS = 12  # header + counters + latencies
+
+# panels of the view, from the top of the terminal
+HITS_PANEL, ALERTS_PANEL, SUMMARY_PANEL, METRICS_PANEL = range(4)
+PANEL_HEIGHTS = [LIMIT_HIGHEST_HITS + 1,  # header + max number of hits
+                 LIMIT_TOTAL_ALERT + 1,
+                 HEIGHT_SUMMARY,
+                 HEIGHT_METRICS]
+
+
 class CursesView(AbstractView):
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, clock: Optional[AbstractClock] = None):
+        """
+        Displays the traffic and alerting information in panels laid out to the size of the terminal (and laid out
+        again when it is resized). Only the rows which changed since the previous update are rewritten
+        (cf. ScreenFrame), and the lines of the sections and alerts are only formatted when they change.
+        :param clock: time of the displayed updates (defaults to RealClock)
+        """
+        super().__init__(clock)
         self.stdscr = curses.initscr()
-        begin_hits_x = 0
-        begin_y = 0
-        height_hits = 11  # important since <-> max number of hits - 1
-        height_alerts = LIMIT_TOTAL_ALERT + 1
-        width = 120
-        self.win_highest_hits = curses.newwin(height_hits, width, begin_hits_x, begin_y)
-        self.win_alerts = curses.newwin(height_alerts, width, begin_hits_x + height_hits + 1, begin_y)
-        self.win_highest_hits.clear()
-        self.win_alerts.clear()
+        # line of each section displayed, with the hit information it was formatted from
+        self.hit_lines: Dict[str, Tuple[HitInfo, str]] = dict()
+        # line of each alert displayed
+        self.alert_lines: Dict[AlertInfo, Optional[str]] = dict()
+        self.panels: List[Optional[Tuple['curses.window', ScreenFrame]]] = []
+        # lines last drawn in each panel, drawn again when the panels are laid out again
+        self.panel_lines: List[Sequence[str]] = [[] for _ in PANEL_HEIGHTS]
+        self.nb_rows, self.nb_columns = self.stdscr.getmaxyx()
+        self._layout()
 
     def update_highest_hits(self, highest_hits: List[HitInfo]) -> None:
-        self.win_highest_hits.clear()
-        try:
-            self.win_highest_hits.addstr(f'{HIGHEST_HITS_HEADER} @ {datetime.now()}\n')
-            for highest_hit in highest_hits:
-                self.win_highest_hits.addstr(f"{highest_hit}\n")
-        except curses.error:
-            pass
-        self.win_highest_hits.refresh()
+        hit_lines = dict()
+        for highest_hit in highest_hits:
+            cached = self.hit_lines.get(highest_hit.section)
+            hit_lines[highest_hit.section] = cached if cached is not None and cached[0] == highest_hit \
+                else (highest_hit, f"{highest_hit}")
+        self.hit_lines = hit_lines
+        self._draw(HITS_PANEL, [f'{HIGHEST_HITS_HEADER} @ {datetime.fromtimestamp(self.clock.now())}'] +
+                   [hit_lines[highest_hit.section][1] for highest_hit in highest_hits])
 
     def print_alert_info(self) -> None:
-        self.win_alerts.clear()
+        alert_lines = {alert: self.alert_lines[alert] if alert in self.alert_lines else format_alert(alert)
+                       for alert in self.all_alerts}
+        self.alert_lines = alert_lines
+        self._draw(ALERTS_PANEL, [ALERTS_HEADER] +
+                   [alert_lines[alert] for alert in self.all_alerts if alert_lines[alert] is not None])
+
+    def update_traffic_summary(self, traffic_summary: TrafficSummary) -> None:
+        super().update_traffic_summary(traffic_summary)
+        self._draw(SUMMARY_PANEL, [SUMMARY_HEADER] + format_summary(traffic_summary))
+
+    def update_metrics(self, metrics: MetricsSnapshot) -> None:
+        super().update_metrics(metrics)
+        self._draw(METRICS_PANEL, [METRICS_HEADER] + format_metrics(metrics))
+
+    def _draw(self, panel_index: int, lines: Sequence[str]) -> None:
+        """
+        Draws lines in a panel, rewriting only the rows which changed since its previous frame.
+        """
+        self.panel_lines[panel_index] = lines
+        if self._follow_terminal_size():
+            for index in range(len(self.panels)):
+                self._paint(index)
+        else:
+            self._paint(panel_index)
+        curses.doupdate()
+
+    def _paint(self, panel_index: int) -> None:
+        panel = self.panels[panel_index]
+        if panel is None:
+            # no room left in the terminal
+            return
+        window, frame = panel
         try:
-            self.win_alerts.addstr(f'{ALERTS_HEADER}\n')
-            for alert in self.all_alerts:
-                dt = datetime.fromtimestamp(alert.timestamp)
-                if alert.status == AlertStatus.OVER_THRESHOLD:
-                    self.win_alerts.addstr(FORMAT_MSG_HIGH_ALERT % (str(alert.traffic_value), str(dt)))
-                    self.win_alerts.addstr('\n')
-                elif alert.status == AlertStatus.UNDER_THRESHOLD:
-                    self.win_alerts.addstr(FORMAT_MSG_RECOVERED_ALERT % (str(alert.traffic_value), str(dt)))
-                    self.win_alerts.addstr('\n')
+            for row, line in frame.damaged_rows(self.panel_lines[panel_index]):
+                window.move(row, 0)
+                window.clrtoeol()
+                window.addstr(row, 0, line)
         except curses.error:
             pass
-        self.win_alerts.refresh()
+        window.noutrefresh()
+
+    def _follow_terminal_size(self) -> bool:
+        """
+        Lays the panels out again if the terminal was resized.
+        :return: True if the panels were laid out again
+        """
+        nb_columns, nb_rows = get_terminal_size((self.nb_columns, self.nb_rows))
+        if (nb_rows, nb_columns) == (self.nb_rows, self.nb_columns):
+            return False
+        curses.resizeterm(nb_rows, nb_columns)
+        self.nb_rows, self.nb_columns = nb_rows, nb_columns
+        self._layout()
+        return True
+
+    def _layout(self) -> None:
+        """
+        Creates the windows of the panels for the size of the terminal, with empty frames (the panels are then
+        drawn entirely).
+        """
+        self.stdscr.clear()
+        self.stdscr.refresh()
+        self.panels = [(curses.newwin(*geometry), ScreenFrame(geometry[0], geometry[1]))
+                       if geometry is not None else None
+                       for geometry in layout_panels(PANEL_HEIGHTS, self.nb_rows, self.nb_columns)]
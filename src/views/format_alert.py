@@ -0,0 +1,25 @@
+from datetime import datetime
+from typing import Optional
+
+from src.interfaces.abstract_alert_manager import AlertInfo, AlertStatus
+from .constants_view import FORMAT_MSG_HIGH_ALERT, FORMAT_MSG_RECOVERED_ALERT, FORMAT_MSG_RULE_HIGH_ALERT, \
+    FORMAT_MSG_RULE_RECOVERED_ALERT
+
+
+def format_alert(alert: AlertInfo) -> Optional[str]:
+    """
+    Line displaying an alert (traffic limit or rule alert), None if there is nothing to display.
+    """
+    dt = str(datetime.fromtimestamp(alert.timestamp))
+    if alert.rule:
+        rule = f"{alert.rule} [{alert.key}]" if alert.key is not None else alert.rule
+        if alert.status == AlertStatus.OVER_THRESHOLD:
+            return FORMAT_MSG_RULE_HIGH_ALERT % (rule, str(alert.traffic_value), dt)
+        if alert.status == AlertStatus.UNDER_THRESHOLD:
+            return FORMAT_MSG_RULE_RECOVERED_ALERT % (rule, str(alert.traffic_value), dt)
+        return None
+    if alert.status == AlertStatus.OVER_THRESHOLD:
+        return FORMAT_MSG_HIGH_ALERT % (str(alert.traffic_value), dt)
+    if alert.status == AlertStatus.UNDER_THRESHOLD:
+        return FORMAT_MSG_RECOVERED_ALERT % (str(alert.traffic_value), dt)
+    return None
@@ -0,0 +1,23 @@
+from typing import List
+
+from src.instrumentation.metrics import MetricsSnapshot
+from .constants_view import FORMAT_MSG_LATENCY
+
+
+def format_duration(nanoseconds: float) -> str:
+    for unit, scale in (('s', 1e9), ('ms', 1e6), ('us', 1e3)):
+        if nanoseconds >= scale:
+            return f"{nanoseconds / scale:.1f}{unit}"
+    return f"{nanoseconds:.0f}ns"
+
+
+def format_metrics(metrics: MetricsSnapshot) -> List[str]:
+    """
+    Lines displaying a self-instrumentation snapshot: counters on the first line, then one line per latency.
+    """
+    lines = [' | '.join(f"{name} {value}" for name, value in metrics.counters.items())]
+    for name, latency in metrics.latencies.items():
+        if latency.count:
+            lines.append(FORMAT_MSG_LATENCY % (name, format_duration(latency.p50_ns), format_duration(latency.p99_ns),
+                                               format_duration(latency.max_ns), latency.count))
+    return lines
@@ -0,0 +1,18 @@
+from typing import List
+
+from src.interfaces.abstract_collector import TrafficSummary
+from .constants_view import FORMAT_MSG_SUMMARY_CONTENT_LENGTH, FORMAT_MSG_SUMMARY_RATES
+
+
+def format_summary(summary: TrafficSummary) -> List[str]:
+    """
+    Lines displaying the traffic summary: requests, traffic and hosts, then the method mix (most used first),
+    then the content length percentiles.
+    """
+    methods = sorted(summary.methods.items(), key=lambda method_count: method_count[1], reverse=True)
+    nb_requests = max(summary.nb_requests, 1)
+    return [FORMAT_MSG_SUMMARY_RATES % (summary.nb_requests, summary.request_rate, summary.total_traffic,
+                                        summary.traffic_rate, summary.nb_hosts),
+            'methods: ' + ' | '.join(f"{method} {100 * count / nb_requests:.1f}%" for method, count in methods),
+            FORMAT_MSG_SUMMARY_CONTENT_LENGTH % (summary.content_length_p50, summary.content_length_p95,
+                                                 summary.content_length_p99)]
@@ -0,0 +1,55 @@
+from typing import List, Optional, Sequence
+from src.interfaces.abstract_alert_manager import AlertInfo
+from src.interfaces.abstract_clock import AbstractClock
+from src.interfaces.abstract_view import AbstractView
+from src.interfaces.abstract_collector import HitInfo, TrafficSummary
+from src.instrumentation.metrics import MetricsSnapshot
+
+
+class MultiView(AbstractView):
+
+    def __init__(self, views: Sequence[AbstractView], clock: Optional[AbstractClock] = None):
+        '''
+        View relaying every update to several views (e.g. a console view and export views), in order.
+        :param views: views updated
+        :param clock: time of the updates (defaults to RealClock)
+        '''
+        super().__init__(clock)
+        self.views = list(views)
+
+    def update_highest_hits(self, highest_hits: List[HitInfo]) -> None:
+        for view in self.views:
+            view.update_highest_hits(highest_hits)
+
+    def update_alert_info(self, alert_info: AlertInfo) -> None:
+        super().update_alert_info(alert_info)
+        for view in self.views:
+            view.update_alert_info(alert_info)
+
+    def restore_alert_info(self, alert_info: AlertInfo) -> None:
+        super().restore_alert_info(alert_info)
+        for view in self.views:
+            view.restore_alert_info(alert_info)
+
+    def print_alert_info(self) -> None:
+        for view in self.views:
+            view.print_alert_info()
+
+    def update_traffic_summary(self, traffic_summary: TrafficSummary) -> None:
+        super().update_traffic_summary(traffic_summary)
+        for view in self.views:
+            view.update_traffic_summary(traffic_summary)
+
+    def update_metrics(self, metrics: MetricsSnapshot) -> None:
+        super().update_metrics(metrics)
+        for view in self.views:
+            view.update_metrics(metrics)
+
+    def close(self) -> None:
+        '''
+        Close the views which hold resources (files, servers).
+        '''
+        for view in self.views:
+            close = getattr(view, 'close', None)
+            if close is not None:
+                close()
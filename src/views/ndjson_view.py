@@ -0,0 +1,85 @@
+import json
+import sys
+from typing import List, Optional, TextIO
+from src.interfaces.abstract_alert_manager import AlertInfo, AlertStatus
+from src.interfaces.abstract_clock import AbstractClock
+from src.interfaces.abstract_view import AbstractView
+from src.interfaces.abstract_collector import HitInfo
+from src.instrumentation.metrics import MetricsSnapshot
+
+# maximum number of events buffered before they are written without waiting for the end of the update
+MAX_BUFFERED_EVENTS = 1000
+
+
+def _dumps(event: dict) -> str:
+    return json.dumps(event, separators=(',', ':'))
+
+
+class NDJSONView(AbstractView):
+
+    def __init__(self, path: str, max_buffered: int = MAX_BUFFERED_EVENTS, clock: Optional[AbstractClock] = None):
+        '''
+        Non-interactive view writing the highest hits and the alerts as an event stream, one JSON object per line
+        (NDJSON), appended to a file:
+            {"event":"highest_hits","timestamp":...,"hits":[{"section":...,"hits":...,"bytes":...}, ...]}
+            {"event":"alert","timestamp":...,"status":"OVER_THRESHOLD","value":...,"rule":...,"key":...}
+        Events are buffered and written in a single write followed by a flush: at the end of each update of the
+        controller (cf. update_metrics), with alerts, or beyond max_buffered events.
+        :param path: file the events are appended to, '-' for the standard output
+        :param max_buffered: maximum number of events buffered
+        :param clock: time of the highest hits (defaults to RealClock)
+        '''
+        super().__init__(clock)
+        self.output: TextIO = sys.stdout if path == '-' else open(path, 'a', encoding='utf-8')
+        self.max_buffered = max_buffered
+        self.events: List[str] = []
+        self.nb_written = 0
+        # alerts among the buffered events
+        self.alerts_buffered = False
+
+    def update_highest_hits(self, highest_hits: List[HitInfo]) -> None:
+        self._add(_dumps({'event': 'highest_hits', 'timestamp': self.clock.now(),
+                          'hits': [{'section': hit_info.section, 'hits': hit_info.nb_hits, 'bytes': hit_info.traffic}
+                                   for hit_info in highest_hits]}))
+
+    def update_alert_info(self, alert_info: AlertInfo) -> None:
+        super().update_alert_info(alert_info)
+        if alert_info.status != AlertStatus.NO_ALERT:
+            self.alerts_buffered = True
+            self._add(_dumps({'event': 'alert', 'timestamp': alert_info.timestamp, 'status': alert_info.status.name,
+                              'value': alert_info.traffic_value, 'rule': alert_info.rule, 'key': alert_info.key}))
+
+    def print_alert_info(self) -> None:
+        # alerts are written right away, with the highest hits of the update if any
+        if self.alerts_buffered:
+            self.flush()
+
+    def update_metrics(self, metrics: MetricsSnapshot) -> None:
+        # last call of an update of the controller
+        super().update_metrics(metrics)
+        self.flush()
+
+    def flush(self) -> None:
+        '''
+        Write the buffered events.
+        '''
+        if not self.events:
+            return
+        self.output.write('\n'.join(self.events) + '\n')
+        self.output.flush()
+        self.nb_written += len(self.events)
+        self.events = []
+        self.alerts_buffered = False
+
+    def close(self) -> None:
+        '''
+        Write the buffered events and close the file.
+        '''
+        self.flush()
+        if self.output is not sys.stdout:
+            self.output.close()
+
+    def _add(self, event: str) -> None:
+        self.events.append(event)
+        if len(self.events) >= self.max_buffered:
+            self.flush()
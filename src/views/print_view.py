@@ -1,29 +1,42 @@
-from typing import List
-from src.interfaces.abstract_alert_manager import AlertInfo, AlertStatus
+from typing import List, Optional
+from src.interfaces.abstract_clock import AbstractClock
+from src.interfaces.abstract_alert_manager import AlertInfo
 from src.interfaces.abstract_view import AbstractView
-from .constants_view import FORMAT_MSG_RECOVERED_ALERT, FORMAT_MSG_HIGH_ALERT
-from src.interfaces.abstract_collector import HitInfo
+from src.interfaces.abstract_collector import HitInfo, TrafficSummary
 from datetime import datetime
-from .constants_view import HIGHEST_HITS_HEADER
+from .constants_view import HIGHEST_HITS_HEADER, METRICS_HEADER, SUMMARY_HEADER
+from .format_alert import format_alert
+from .format_metrics import format_metrics
+from .format_summary import format_summary
+from src.instrumentation.metrics import MetricsSnapshot
 
 
 class PrintView(AbstractView):
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, clock: Optional[AbstractClock] = None):
+        super().__init__(clock)
         self.all_alerts: List[AlertInfo] = []
 
     def update_highest_hits(self, highest_hits: List[HitInfo]) -> None:
-        print(f"{HIGHEST_HITS_HEADER} @ {datetime.now()}")
+        print(f"{HIGHEST_HITS_HEADER} @ {datetime.fromtimestamp(self.clock.now())}")
         for highest_hit in highest_hits:
             print(f"{highest_hit}")
 
     def print_alert_info(self) -> None:
         # don't use alerts header
         for alert in self.all_alerts:
-            dt = datetime.fromtimestamp(alert.timestamp)
-            if alert.status == AlertStatus.OVER_THRESHOLD:
-                print(FORMAT_MSG_HIGH_ALERT % (str(alert.traffic_value), str(dt)))
-            elif alert.status == AlertStatus.UNDER_THRESHOLD:
-                print(FORMAT_MSG_RECOVERED_ALERT % (str(alert.traffic_value), str(dt)))
+            line = format_alert(alert)
+            if line is not None:
+                print(line)
 
+    def update_traffic_summary(self, traffic_summary: TrafficSummary) -> None:
+        super().update_traffic_summary(traffic_summary)
+        print(f"{SUMMARY_HEADER} @ {datetime.fromtimestamp(traffic_summary.timestamp)}")
+        for line in format_summary(traffic_summary):
+            print(line)
+
+    def update_metrics(self, metrics: MetricsSnapshot) -> None:
+        super().update_metrics(metrics)
+        print(f"{METRICS_HEADER} @ {datetime.fromtimestamp(metrics.timestamp)}")
+        for line in format_metrics(metrics):
+            print(line)
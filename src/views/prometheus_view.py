@@ -0,0 +1,175 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+from typing import Dict, List, Optional, Tuple
+from src.interfaces.abstract_alert_manager import AlertInfo, AlertStatus
+from src.interfaces.abstract_clock import AbstractClock
+from src.interfaces.abstract_view import AbstractView
+from src.interfaces.abstract_collector import HitInfo, TrafficSummary
+from src.instrumentation.metrics import MetricsSnapshot
+
+# prefix of the names of the exported metrics
+METRIC_PREFIX = 'httpmonitor_'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+METRICS_PATH = '/metrics'
+# self-instrumentation counters which are levels rather than totals (cf. Controller.get_metrics), exported as gauges
+GAUGE_COUNTERS = frozenset(['queue_pending', 'section_nodes'])
+
+
+def escape_label(value: str) -> str:
+    """
+    Label value of the text exposition format: backslashes, double quotes and line feeds escaped.
+    """
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_family(name: str, metric_type: str, help_text: str, samples: List[Tuple[str, float]]) -> List[str]:
+    """
+    Lines of a metric family in the text exposition format.
+    :param name: name of the metric, without METRIC_PREFIX
+    :param metric_type: 'counter' or 'gauge'
+    :param help_text: description of the metric
+    :param samples: labels (e.g. 'section="bing.it/api"', empty for none) and value of each sample
+    """
+    name = METRIC_PREFIX + name
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+    for labels, value in samples:
+        lines.append(f"{name}{{{labels}}} {value}" if labels else f"{name} {value}")
+    return lines
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serves the latest rendered metrics of the view of the server (cf. PrometheusView.body), as is.
+    """
+
+    def do_GET(self) -> None:
+        if self.path.split('?', 1)[0] != METRICS_PATH:
+            self.send_error(404)
+            return
+        body = self.server.view.body
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        # no line per scrape on the terminal
+        pass
+
+
+class PrometheusView(AbstractView):
+
+    def __init__(self, port: int = 9108, host: str = '127.0.0.1', clock: Optional[AbstractClock] = None):
+        '''
+        Non-interactive view serving the traffic and alerting information to scrapers as text metrics
+        (Prometheus text exposition format) on http://host:port/metrics: hits and bytes of the highest hits
+        sections, alert state of the traffic limit and of each rule, traffic summary and self-instrumentation.
+        Each part of the page is rendered when the view is updated with it (once per update of the controller, or
+        on alerts), and the page is served as is: a scrape costs no formatting nor lock.
+        The server runs in a daemon thread, started with the view (cf. close).
+        :param port: port of the HTTP server, 0 for any free port (cf. port attribute)
+        :param host: address of the HTTP server (default: local only)
+        :param clock: time of the updates (defaults to RealClock)
+        '''
+        super().__init__(clock)
+        # latest alert of the traffic limit (empty rule) and of each rule, by rule and key
+        self.alert_states: Dict[Tuple[str, Optional[str]], AlertInfo] = dict()
+        self.nb_alerts = 0
+        # rendered parts of the page: highest hits, alerts, traffic summary, self-instrumentation
+        self.parts: List[bytes] = [b''] * 4
+        self.body = b''
+        self.server = ThreadingHTTPServer((host, port), MetricsRequestHandler)
+        self.server.daemon_threads = True
+        self.server.view = self
+        self.port: int = self.server.server_address[1]
+        self.server_thread = Thread(target=self.server.serve_forever, name='metrics-server', daemon=True)
+        self.server_thread.start()
+
+    def update_highest_hits(self, highest_hits: List[HitInfo]) -> None:
+        hits = [(f'section="{escape_label(hit_info.section)}"', hit_info.nb_hits) for hit_info in highest_hits]
+        traffic = [(f'section="{escape_label(hit_info.section)}"', hit_info.traffic) for hit_info in highest_hits]
+        self._set_part(0, render_family('section_hits', 'gauge', 'Hits of the sections with the most hits.', hits)
+                       + render_family('section_bytes', 'gauge', 'Traffic in bytes of the sections with the most '
+                                                                 'hits.', traffic))
+
+    def update_alert_info(self, alert_info: AlertInfo) -> None:
+        super().update_alert_info(alert_info)
+        if alert_info.status != AlertStatus.NO_ALERT:
+            self.alert_states[(alert_info.rule, alert_info.key)] = alert_info
+            self.nb_alerts += 1
+
+    def restore_alert_info(self, alert_info: AlertInfo) -> None:
+        # state of the alerts before the restart, not counted again in alerts_total
+        super().restore_alert_info(alert_info)
+        if alert_info.status != AlertStatus.NO_ALERT:
+            self.alert_states[(alert_info.rule, alert_info.key)] = alert_info
+
+    def print_alert_info(self) -> None:
+        states = []
+        values = []
+        for (rule, key), alert_info in self.alert_states.items():
+            labels = f'rule="{escape_label(rule)}"'
+            if key is not None:
+                labels += f',key="{escape_label(key)}"'
+            states.append((labels, int(alert_info.status == AlertStatus.OVER_THRESHOLD)))
+            values.append((labels, alert_info.traffic_value))
+        self._set_part(1, render_family('alerts_total', 'counter', 'Alerts raised or recovered.',
+                                        [('', self.nb_alerts)])
+                       + render_family('alert_active', 'gauge', '1 while over the threshold of the traffic limit '
+                                                                '(empty rule) or of a rule.', states)
+                       + render_family('alert_value', 'gauge', 'Value compared to the threshold at the latest '
+                                                               'alert.', values))
+
+    def update_traffic_summary(self, traffic_summary: TrafficSummary) -> None:
+        super().update_traffic_summary(traffic_summary)
+        summary = traffic_summary
+        methods = [(f'method="{escape_label(method)}"', count) for method, count in summary.methods.items()]
+        content_length = [('quantile="0.5"', summary.content_length_p50),
+                          ('quantile="0.95"', summary.content_length_p95),
+                          ('quantile="0.99"', summary.content_length_p99)]
+        self._set_part(2, render_family('requests_total', 'counter', 'Requests since the start.',
+                                        [('', summary.nb_requests)])
+                       + render_family('bytes_total', 'counter', 'Traffic in bytes since the start.',
+                                       [('', summary.total_traffic)])
+                       + render_family('request_rate', 'gauge', 'Requests per second over the last seconds.',
+                                       [('', summary.request_rate)])
+                       + render_family('traffic_rate', 'gauge', 'Bytes per second over the last seconds.',
+                                       [('', summary.traffic_rate)])
+                       + render_family('hosts', 'gauge', 'Estimated number of distinct hosts.',
+                                       [('', summary.nb_hosts)])
+                       + render_family('method_requests_total', 'counter', 'Requests per method.', methods)
+                       + render_family('content_length_bytes', 'gauge', 'Percentiles of the request content length.',
+                                       content_length))
+
+    def update_metrics(self, metrics: MetricsSnapshot) -> None:
+        super().update_metrics(metrics)
+        lines = []
+        for name, value in metrics.counters.items():
+            if name in GAUGE_COUNTERS:
+                lines += render_family(name, 'gauge', f"Self-instrumentation level {name}.", [('', value)])
+            else:
+                lines += render_family(f"{name}_total", 'counter', f"Self-instrumentation counter {name}.",
+                                       [('', value)])
+        latencies = []
+        for name, latency in metrics.latencies.items():
+            stage = f'stage="{escape_label(name)}"'
+            latencies += [(f'{stage},quantile="0.5"', latency.p50_ns / 1e9),
+                          (f'{stage},quantile="0.99"', latency.p99_ns / 1e9),
+                          (f'{stage},quantile="1"', latency.max_ns / 1e9)]
+        lines += render_family('stage_latency_seconds', 'gauge', 'Latencies of the stages of the monitor (upper '
+                                                                 'bounds, within a factor 2).', latencies)
+        self._set_part(3, lines)
+
+    def close(self) -> None:
+        '''
+        Stop the HTTP server and release its port.
+        '''
+        self.server.shutdown()
+        self.server.server_close()
+        self.server_thread.join()
+
+    def _set_part(self, index: int, lines: List[str]) -> None:
+        self.parts[index] = ('\n'.join(lines) + '\n').encode()
+        # replaced at once: a scrape serves either the previous page or the new one
+        self.body = b''.join(self.parts)
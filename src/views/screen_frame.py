@@ -0,0 +1,53 @@
+from typing import List, Optional, Sequence, Tuple
+
+# (height, width, begin_y, begin_x) of a window
+Geometry = Tuple[int, int, int, int]
+
+
+class ScreenFrame:
+
+    def __init__(self, height: int, width: int):
+        """
+        Lines last drawn in a window, to only rewrite the rows which changed since the previous frame (damage
+        tracking) instead of clearing and repainting the whole window: a row is rewritten when its text differs,
+        and the rows left over from a longer previous frame are blanked.
+        :param height: rows of the window, lines beyond are not drawn
+        :param width: columns of the window, lines are truncated to width - 1 characters (curses cannot write the
+               bottom right cell of a window)
+        """
+        self.height = height
+        self.width = width
+        self.lines: List[str] = []
+
+    def damaged_rows(self, lines: Sequence[str]) -> List[Tuple[int, str]]:
+        """
+        Rows to rewrite to draw lines over the previous frame, which becomes lines.
+        :return: list of (row, text), text being empty for the rows to blank
+        """
+        lines = [line[:self.width - 1] for line in lines[:self.height]]
+        previous = self.lines
+        damaged = [(row, line) for row, line in enumerate(lines) if row >= len(previous) or previous[row] != line]
+        damaged.extend((row, '') for row in range(len(lines), len(previous)))
+        self.lines = lines
+        return damaged
+
+
+def layout_panels(heights: Sequence[int], nb_rows: int, nb_columns: int) -> List[Optional[Geometry]]:
+    """
+    Geometries of panels stacked from the top of the terminal, separated by a blank row, as wide as the terminal.
+    Panels are clipped to the rows of the terminal: the last visible one gets the rows left, the ones after it
+    are hidden (None).
+    :param heights: rows of each panel
+    :param nb_rows: rows of the terminal
+    :param nb_columns: columns of the terminal
+    """
+    geometries: List[Optional[Geometry]] = []
+    begin_y = 0
+    for height in heights:
+        height = min(height, nb_rows - begin_y)
+        if height <= 0 or nb_columns <= 1:
+            geometries.append(None)
+            continue
+        geometries.append((height, nb_columns, begin_y, 0))
+        begin_y += height + 1
+    return geometries
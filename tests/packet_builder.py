@@ -0,0 +1,71 @@
+"""
+Builds raw Ethernet frames and capture files for the sniffer tests.
+"""
+import struct
+from typing import List, Tuple
+
+
+def build_tcp_frame(payload: bytes,
+                    dst_port: int = 80,
+                    src_port: int = 40000,
+                    src_ip: bytes = bytes([10, 0, 0, 1]),
+                    dst_ip: bytes = bytes([10, 0, 0, 2]),
+                    seq: int = 0,
+                    flags: int = 0x18,
+                    ip_options: bytes = b'',
+                    tcp_options: bytes = b'',
+                    fragment_offset: int = 0) -> bytes:
+    """
+    Build an Ethernet / IPv4 / TCP frame carrying payload (checksums are left to zero).
+    """
+    tcp_header_len = 20 + len(tcp_options)
+    tcp = struct.pack('!HHIIBBHHH', src_port, dst_port, seq, 0, (tcp_header_len // 4) << 4, flags, 65535, 0, 0) \
+        + tcp_options
+    ip_header_len = 20 + len(ip_options)
+    total_length = ip_header_len + len(tcp) + len(payload)
+    ip = struct.pack('!BBHHHBBH4s4s', 0x40 | (ip_header_len // 4), 0, total_length, 0, fragment_offset,
+                     64, 6, 0, src_ip, dst_ip) + ip_options
+    ethernet = b'\x00\x11\x22\x33\x44\x55' + b'\x66\x77\x88\x99\xaa\xbb' + struct.pack('!H', 0x0800)
+    return ethernet + ip + tcp + payload
+
+
+def build_http_request(method: str = 'POST', path: str = '/section/page', host: str = 'bing.it',
+                       content_length: int = 100) -> bytes:
+    return (f"{method} {path} HTTP/1.1\r\n"
+            f"Host: {host}\r\n"
+            f"User-Agent: test\r\n"
+            f"Content-Length: {content_length}\r\n"
+            f"\r\n").encode('ascii') + b'0' * content_length
+
+
+def build_pcap(frames: List[Tuple[float, bytes]], byte_order: str = '<') -> bytes:
+    """
+    Build a pcap capture (microsecond timestamps, Ethernet) of the (timestamp, frame) pairs.
+    """
+    capture = [struct.pack(byte_order + 'IHHiIII', 0xa1b2c3d4, 2, 4, 0, 0, 65535, 1)]
+    for timestamp, frame in frames:
+        seconds = int(timestamp)
+        capture.append(struct.pack(byte_order + 'IIII', seconds, round((timestamp - seconds) * 1e6), len(frame),
+                                   len(frame)) + frame)
+    return b''.join(capture)
+
+
+def build_pcapng(frames: List[Tuple[float, bytes]], byte_order: str = '<') -> bytes:
+    """
+    Build a pcapng capture (one Ethernet interface with nanosecond timestamps) of the (timestamp, frame) pairs.
+    """
+    def block(block_type: int, body: bytes) -> bytes:
+        body += b'\x00' * (-len(body) % 4)
+        return struct.pack(byte_order + 'II', block_type, len(body) + 12) + body \
+            + struct.pack(byte_order + 'I', len(body) + 12)
+
+    section_header = block(0x0A0D0D0A, struct.pack(byte_order + 'IHHq', 0x1A2B3C4D, 1, 0, -1))
+    # if_tsresol option: 10^-9
+    options = struct.pack(byte_order + 'HH', 9, 1) + b'\x09\x00\x00\x00' + struct.pack(byte_order + 'HH', 0, 0)
+    interface = block(1, struct.pack(byte_order + 'HHI', 1, 0, 65535) + options)
+    capture = [section_header, interface]
+    for timestamp, frame in frames:
+        nanoseconds = round(timestamp * 1e9)
+        capture.append(block(6, struct.pack(byte_order + 'IIIII', 0, nanoseconds >> 32, nanoseconds & 0xffffffff,
+                                            len(frame), len(frame)) + frame))
+    return b''.join(capture)
@@ -1,6 +1,10 @@
+import random
 from unittest import TestCase
 from typing import Optional
 from src.alert_managers.basic_alert_manager import BasicAlertManager, AlertInfo, AlertStatus
+from src.alert_managers.window_alert_manager import WindowAlertManager
+from src.clocks.simulated_clock import SimulatedClock
+from src.interfaces.abstract_collector import HTTPInfo
 
 
 class TestAlertManager(TestCase):
@@ -56,4 +60,63 @@ class TestAlertManager(TestCase):
 
         # traffic stays under threshold -> no alert
         alert_info: Optional[AlertInfo] = self.alert_manager.get_alert_info(total_traffic)
-        self.assertIsNone(alert_info)
\ No newline at end of file
+        self.assertIsNone(alert_info)
+
+
+class TestWindowAlertManager(TestCase):
+
+    def setUp(self):
+        self.clock = SimulatedClock(1000.0)
+
+    def _request(self, alert_manager, timestamp, content_length):
+        self.clock.timestamp = timestamp
+        alert_manager.collect_http_info(HTTPInfo(method='GET', host='bing.it', path='/', content_length=content_length))
+
+    def test_spike_between_updates(self):
+        '''
+        Test case: traffic spike over a 5 seconds window, gone before the next update 10 seconds later
+        Test output: the spike raises an alert timestamped with the request crossing the limit, then a recovery
+                     on the second it left the window
+        '''
+        alert_manager = WindowAlertManager(traffic_limit=1000, history_span=5, clock=self.clock)
+        self._request(alert_manager, 1000.5, 100)
+        self._request(alert_manager, 1003.2, 800)
+        self._request(alert_manager, 1003.7, 800)
+        self._request(alert_manager, 1003.9, 800)
+        self.clock.timestamp = 1010.0
+        self.assertEqual(alert_manager.get_alert_infos(),
+                         [AlertInfo(status=AlertStatus.OVER_THRESHOLD, traffic_value=2500, timestamp=1003.7),
+                          AlertInfo(status=AlertStatus.UNDER_THRESHOLD, traffic_value=0, timestamp=1009.0)])
+        self.assertEqual(alert_manager.get_alert_infos(), [])
+        self.assertEqual(alert_manager.alert_manager.status, AlertStatus.NO_ALERT)
+
+    def test_boundaries_match_full_recount(self):
+        '''
+        Test case: random traffic over 10 minutes, and the basic alert manager fed with a full recount of the
+                   traffic of the window ending on every second
+        Test output: same alert statuses and values, recoveries on the same seconds
+        '''
+        generator = random.Random(3)
+        alert_manager = WindowAlertManager(traffic_limit=55000, history_span=30, clock=self.clock)
+        basic_alert_manager = BasicAlertManager(traffic_limit=55000, clock=self.clock)
+        requests = sorted((1000 + generator.random() * 600, generator.choice([10, 100, 1000]))
+                          for _ in range(3000))
+        for timestamp, content_length in requests:
+            self._request(alert_manager, timestamp, content_length)
+        self.clock.timestamp = 1700.0
+        alerts = alert_manager.get_alert_infos()
+        expected = []
+        for boundary in range(1001, 1701):
+            traffic = sum(content_length for timestamp, content_length in requests
+                          if boundary - 30 <= timestamp < boundary)
+            alert_info = basic_alert_manager.get_alert_info(traffic)
+            if alert_info is not None:
+                expected.append((alert_info.status, alert_info.traffic_value, boundary))
+        self.assertGreater(len(expected), 4)
+        self.assertEqual([(alert.status, alert.traffic_value) for alert in alerts],
+                         [(status, traffic) for status, traffic, _ in expected])
+        for alert, (status, _, boundary) in zip(alerts, expected):
+            if status == AlertStatus.OVER_THRESHOLD:
+                self.assertTrue(boundary - 1 <= alert.timestamp < boundary)
+            else:
+                self.assertEqual(alert.timestamp, boundary)
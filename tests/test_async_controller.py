@@ -0,0 +1,135 @@
+import asyncio
+import threading
+import time
+from typing import List
+from unittest import TestCase
+from src.interfaces.abstract_alert_manager import AlertInfo, AlertStatus
+from src.interfaces.abstract_collector import HitInfo
+from src.clocks.simulated_clock import SimulatedClock
+from src.controllers.async_controller import AsyncController
+from tests.test_tick_scheduler import IdleSniffer, StoppingView
+
+
+class SlowView(StoppingView):
+    """
+    View taking 50 milliseconds (of the wall clock) per update.
+    """
+
+    def update_highest_hits(self, highest_hits: List[HitInfo]) -> None:
+        time.sleep(0.05)
+        super().update_highest_hits(highest_hits)
+
+
+class AlertingController(AsyncController):
+    """
+    Controller raising an alert at every check.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.nb_checks = 0
+
+    def _manage_alerts(self) -> List[AlertInfo]:
+        self.nb_checks += 1
+        return [AlertInfo(status=AlertStatus.OVER_THRESHOLD, traffic_value=self.nb_checks,
+                          timestamp=self.clock.now())]
+
+
+class SlowReadController(AsyncController):
+    """
+    Controller taking 50 milliseconds (of the wall clock) to read an update, recording the threads reading the
+    updates and evaluating the alerts.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.read_threads: List[threading.Thread] = []
+        self.alert_threads: List[threading.Thread] = []
+
+    def _manage_alerts(self):
+        self.alert_threads.append(threading.current_thread())
+        return super()._manage_alerts()
+
+    def _read_update(self):
+        self.read_threads.append(threading.current_thread())
+        time.sleep(0.05)
+        return super()._read_update()
+
+
+class TestAsyncController(TestCase):
+
+    def setUp(self):
+        self.clock = SimulatedClock(1000.0)
+
+    def test_slow_view_and_sink_do_not_delay_alerts(self):
+        '''
+        Test case: view taking 50 ms per update and a sink never done with its first alert, on a simulated clock,
+                   the view stopping the controller after 3 updates
+        Test output: alerts keep being checked while the view and the sink are busy, the updates due meanwhile are
+                     skipped, the sink queue stays bounded, and the controller stops cleanly
+        '''
+        sink_alerts = []
+
+        async def stuck_sink(alert_info: AlertInfo) -> None:
+            sink_alerts.append(alert_info)
+            await asyncio.sleep(3600)
+
+        view = SlowView(self.clock, nb_updates=3)
+        controller = AlertingController(view=view, update_period=10, sniffer_factory=IdleSniffer, clock=self.clock,
+                                        alert_sinks=[stuck_sink], sink_capacity=5)
+        view.controller = controller
+        # the sink is not done with its alerts when stopping
+        with self.assertLogs('AsyncController', level='WARNING'):
+            asyncio.run(controller.run())
+        self.assertEqual(len(view.update_times), 3)
+        self.assertGreater(controller.nb_checks, 10 * len(view.update_times))
+        self.assertGreater(controller.nb_skipped_updates, 0)
+        self.assertEqual(len(sink_alerts), 1)
+        self.assertEqual(controller.nb_dropped_alerts, controller.nb_checks - 6)
+        self.assertTrue(view.all_alerts)
+        self.assertEqual(controller.get_metrics().counters['dropped_alerts'], controller.nb_dropped_alerts)
+        self.assertFalse(controller.aggregator.is_alive())
+
+    def test_cancellation_stops_capture(self):
+        '''
+        Test case: controller run as a task, cancelled while running
+        Test output: the cancellation is propagated after the sniffer and the aggregator are stopped
+        '''
+        stopped = []
+
+        class RecordingSniffer(IdleSniffer):
+
+            def stop(self):
+                stopped.append(True)
+
+        async def run_then_cancel(controller: AsyncController) -> None:
+            task = asyncio.create_task(controller.run())
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        view = StoppingView(self.clock, nb_updates=-1)
+        controller = AsyncController(view=view, update_period=10, sniffer_factory=RecordingSniffer, clock=self.clock)
+        asyncio.run(run_then_cancel(controller))
+        self.assertEqual(stopped, [True])
+        self.assertTrue(controller.stop_event.is_set())
+        self.assertFalse(controller.aggregator.is_alive())
+        self.assertGreater(controller.nb_ticks, 0)
+
+    def test_reads_off_the_loop(self):
+        '''
+        Test case: controller taking 50 ms to read each update (e.g. writing a snapshot), the view stopping it
+                   after 3 updates
+        Test output: updates are read and alerts evaluated outside of the thread of the event loop, the updates
+                     are all shown
+        '''
+        view = StoppingView(self.clock, nb_updates=3)
+        controller = SlowReadController(view=view, update_period=10, sniffer_factory=IdleSniffer, clock=self.clock)
+        view.controller = controller
+        asyncio.run(controller.run())
+        self.assertEqual(len(view.update_times), 3)
+        self.assertTrue(controller.read_threads)
+        self.assertNotIn(threading.main_thread(), set(controller.read_threads))
+        self.assertGreater(len(controller.alert_threads), len(controller.read_threads))
+        self.assertNotIn(threading.main_thread(), set(controller.alert_threads))
@@ -0,0 +1,80 @@
+from unittest import TestCase
+from src.clocks.simulated_clock import SimulatedClock
+from src.interfaces.abstract_collector import HTTPInfo, HitInfo
+from src.collectors.basic_collector import BasicCollector
+from src.stores.snapshot import SnapshotReader, SnapshotWriter
+
+
+class TestBasicCollector(TestCase):
+
+    def setUp(self):
+        self.history_span = 120
+        self.clock = SimulatedClock()
+        self.collector = BasicCollector(history_span=self.history_span, clock=self.clock)
+
+    def _collect_at(self, timestamp, path, content_length):
+        http_info = HTTPInfo(method='GET', host='http://bing.it', path=path, content_length=content_length)
+        self.clock.timestamp = timestamp
+        self.collector.collect_http_info(http_info)
+
+    def _traffic_at(self, timestamp, span):
+        self.clock.timestamp = timestamp
+        return self.collector.get_total_traffic_over_period(span)
+
+    def test_highest_hits_snapshots(self):
+        '''
+        Test case: hits on two sections
+        Test output: immutable HitInfo snapshots reflect the section counters, later hits do not alter them
+        '''
+        self._collect_at(1000.0, '/a/1', 100)
+        self._collect_at(1001.0, '/a/2', 300)
+        self._collect_at(1002.0, '/b', 50)
+        highest_hits = self.collector.get_highest_hits(1)
+        self.assertEqual(highest_hits, [HitInfo(section='http://bing.it/a', nb_hits=2, traffic=400,
+                                                last_hit_traffic=300, last_hit_timestamp=1001.0)])
+        self._collect_at(1003.0, '/a', 10)
+        self.assertEqual(highest_hits[0].nb_hits, 2)
+        self.assertEqual(self.collector.get_highest_hits(1)[0].nb_hits, 3)
+
+    def test_traffic_history_expires(self):
+        '''
+        Test case: traffic collected over more than the history span
+        Test output: traffic over period only accounts for the requests inside the span
+        '''
+        self._collect_at(1000.0, '/a', 100)
+        self._collect_at(1060.0, '/a', 200)
+        self._collect_at(1130.0, '/a', 300)
+        self.assertEqual(len(self.collector.history_timestamps), 2)
+        self.assertEqual(self._traffic_at(1130.0, self.history_span), 500)
+        self.assertEqual(self._traffic_at(1130.0, 30), 300)
+
+    def test_sections_are_bounded(self):
+        '''
+        Test case: collector of at most 100 sections with a 10 seconds window, a hot section and a new section hit
+                   every second for 1000 seconds, then the collector saved in a snapshot and restored
+        Test output: the coldest sections outside of the window are evicted (their ids reused), the hot section
+                     and the sections of the window are kept with the counts of a collector without bound, also
+                     once restored
+        '''
+        collector = BasicCollector(clock=self.clock, window_spans=[10], max_sections=100)
+        reference = BasicCollector(clock=self.clock, window_spans=[10])
+        for index in range(1000):
+            self.clock.timestamp = 1000.0 + index
+            for current in [collector, reference]:
+                current.collect_batch([HTTPInfo(method='GET', host='bing.it', path='/hot', content_length=10),
+                                       HTTPInfo(method='GET', host='bing.it', path=f"/{index}", content_length=1)])
+        self.assertLessEqual(len(collector.http_container), 100)
+        self.assertLessEqual(len(collector.section_table.sections), 101)
+        self.assertGreater(collector.nb_pruned_sections, 900)
+        writer = SnapshotWriter()
+        collector.write_state(writer)
+        restored = BasicCollector(clock=self.clock, window_spans=[10], max_sections=100)
+        restored.read_state(SnapshotReader(writer.getvalue()))
+        for current in [collector, restored]:
+            self.assertEqual(current.get_highest_hits(1), reference.get_highest_hits(1))
+            self.assertEqual(current.get_highest_hits(20, window=10), reference.get_highest_hits(20, window=10))
+            self.assertEqual(current.get_total_traffic(), reference.get_total_traffic())
+            nb_ids = len(current.section_table.sections)
+            current.collect_http_info(HTTPInfo(method='GET', host='bing.it', path='/0', content_length=1))
+            self.assertEqual(len(current.section_table.sections), nb_ids)
+            self.assertEqual(current.http_container[current.section_table.lookup('bing.it', '/0')].nb_hits, 1)
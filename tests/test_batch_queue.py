@@ -0,0 +1,136 @@
+import random
+from functools import partial
+from unittest import TestCase
+from src.alert_managers.rule_alert_manager import RuleAlertManager
+from src.alert_managers.window_alert_manager import WindowAlertManager
+from src.clocks.simulated_clock import SimulatedClock
+from src.interfaces.abstract_alert_manager import AlertRule, RuleAggregation
+from src.interfaces.abstract_collector import HTTPInfo
+from src.collectors.basic_collector import BasicCollector
+from src.collectors.partial_collector import PartialCollector
+from src.collectors.ring_buffer_collector import RingBufferCollector
+from src.collectors.space_saving_collector import SpaceSavingCollector
+from src.pipelines.batch_queue import BatchQueue, DropPolicy, QueueCounters
+from src.pipelines.aggregator import Aggregator
+
+
+class TestBatchQueue(TestCase):
+
+    def test_drain_in_batches(self):
+        queue = BatchQueue(capacity=10)
+        for record in range(5):
+            self.assertTrue(queue.put(record))
+        self.assertEqual(queue.drain(3), [0, 1, 2])
+        self.assertEqual(queue.drain(3), [3, 4])
+        self.assertEqual(queue.drain(3), [])
+        self.assertEqual(queue.counters(), QueueCounters(enqueued=5, dropped=0, processed=5, pending=0))
+
+    def test_drop_newest_when_full(self):
+        '''
+        Test case: more records than the queue capacity, drop newest policy
+        Test output: incoming records are rejected and counted as dropped, queued ones are kept
+        '''
+        queue = BatchQueue(capacity=3, drop_policy=DropPolicy.DROP_NEWEST)
+        accepted = [queue.put(record) for record in range(5)]
+        self.assertEqual(accepted, [True, True, True, False, False])
+        self.assertEqual(queue.counters(), QueueCounters(enqueued=3, dropped=2, processed=0, pending=3))
+        self.assertEqual(queue.drain(10), [0, 1, 2])
+
+    def test_drop_oldest_when_full(self):
+        '''
+        Test case: more records than the queue capacity, drop oldest policy
+        Test output: oldest records are evicted and counted as dropped, incoming ones are kept
+        '''
+        queue = BatchQueue(capacity=3, drop_policy=DropPolicy.DROP_OLDEST)
+        for record in range(5):
+            self.assertTrue(queue.put(record))
+        self.assertEqual(queue.counters(), QueueCounters(enqueued=5, dropped=2, processed=0, pending=3))
+        self.assertEqual(queue.drain(10), [2, 3, 4])
+
+    def test_put_batch(self):
+        '''
+        Test case: batches of records put in queues with room for part of them, with each drop policy
+        Test output: the records and counters are the ones of the records put one by one
+        '''
+        for drop_policy in DropPolicy:
+            queue = BatchQueue(capacity=5, drop_policy=drop_policy)
+            self.assertEqual(queue.put_batch([0, 1, 2]), 3)
+            self.assertEqual(queue.put_batch([3, 4, 5, 6]), 2 if drop_policy == DropPolicy.DROP_NEWEST else 4)
+            self.assertEqual(queue.put_batch(list(range(7, 15))), 0 if drop_policy == DropPolicy.DROP_NEWEST else 8)
+            expected = BatchQueue(capacity=5, drop_policy=drop_policy)
+            for record in range(15):
+                expected.put(record)
+            self.assertEqual(queue.counters(), expected.counters())
+            self.assertEqual(queue.drain(10), expected.drain(10))
+
+
+class TestAggregator(TestCase):
+
+    def test_aggregator_relays_queued_traffic(self):
+        '''
+        Test case: HTTP information queued then aggregator thread started and stopped
+        Test output: all queued traffic reaches the collector
+        '''
+        queue = BatchQueue()
+        collector = BasicCollector()
+        aggregator = Aggregator(http_queue=queue, http_collector=collector, max_batch=2)
+        for _ in range(5):
+            queue.put(HTTPInfo(method='POST', host='bing.it', path='/a/b', content_length=100))
+        aggregator.start()
+        aggregator.stop()
+        aggregator.join(timeout=5)
+        self.assertFalse(aggregator.is_alive())
+        self.assertEqual(collector.get_total_traffic(), 500)
+        self.assertEqual(queue.counters().processed, 5)
+
+
+class TestCollectBatch(TestCase):
+
+    def _random_batches(self, generator, clock, nb_batches):
+        for _ in range(nb_batches):
+            clock.timestamp += generator.random() * 2
+            yield [HTTPInfo(method=generator.choice(['GET', 'POST']), host=f"host{generator.randrange(3)}",
+                            path=f"/{generator.randrange(40)}/x", content_length=generator.randrange(1000))
+                   for _ in range(generator.randrange(50))]
+
+    def test_batches_collected_as_records(self):
+        '''
+        Test case: random batches of requests collected at once, and the same requests collected one by one
+                   at the time of their batch, by each collector and alert manager
+        Test output: same hits and traffic per section (since the start and over each window), traffic over
+                     the history, summary statistics, partials and alerts
+        '''
+        rule = AlertRule(name='section', metric='section_hits', threshold=0.15, window=10,
+                         aggregation=RuleAggregation.MEAN)
+        factories = [partial(BasicCollector, window_spans=[10, 120]),
+                     partial(RingBufferCollector, window_spans=[10, 120]),
+                     partial(SpaceSavingCollector, capacity=200),
+                     PartialCollector,
+                     partial(WindowAlertManager, traffic_limit=200000, history_span=20),
+                     partial(RuleAlertManager, rules=[rule])]
+        for factory in factories:
+            clock = SimulatedClock(1000.0)
+            by_batch, by_record = factory(clock=clock), factory(clock=clock)
+            alerts = []
+            for batch in self._random_batches(random.Random(5), clock, 300):
+                by_batch.collect_batch(batch)
+                for http_info in batch:
+                    by_record.collect_http_info(http_info)
+                if hasattr(by_batch, 'get_alert_infos'):
+                    alerts.append(by_batch.get_alert_infos())
+                    self.assertEqual(alerts[-1], by_record.get_alert_infos())
+            if alerts:
+                self.assertTrue(any(alerts))
+            elif isinstance(by_batch, PartialCollector):
+                self.assertEqual(by_batch.flush(), by_record.flush())
+            else:
+                windows = [None] if isinstance(by_batch, SpaceSavingCollector) else [None, 10, 120]
+                for window in windows:
+                    self.assertEqual(self._section_hits(by_batch, window), self._section_hits(by_record, window))
+                self.assertEqual(by_batch.get_total_traffic_over_period(120),
+                                 by_record.get_total_traffic_over_period(120))
+                self.assertEqual(by_batch.get_traffic_summary(), by_record.get_traffic_summary())
+
+    def _section_hits(self, collector, window):
+        # sections of equal hits may be ranked in another order
+        return sorted((hit.section, hit.nb_hits, hit.traffic) for hit in collector.get_highest_hits(200, window))
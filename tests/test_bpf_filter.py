@@ -0,0 +1,123 @@
+import struct
+from unittest import TestCase
+from src.sniffers import bpf_filter
+from src.sniffers.bpf_filter import compile_http_filter, compile_tcp_ports_filter
+from tests.packet_builder import build_tcp_frame, build_http_request
+
+
+def run_bpf(program, packet: bytes) -> int:
+    """
+    Minimal classic BPF interpreter, covering the instructions used by compile_http_filter.
+    Out of bounds loads drop the packet, as in the kernel.
+    """
+    a = x = 0
+    pc = 0
+    while True:
+        code, jump_true, jump_false, k = program[pc]
+        pc += 1
+        try:
+            if code == bpf_filter.BPF_LD_W_ABS:
+                a = struct.unpack_from('!I', packet, k)[0]
+            elif code == bpf_filter.BPF_LD_H_ABS:
+                a = struct.unpack_from('!H', packet, k)[0]
+            elif code == bpf_filter.BPF_LD_B_ABS:
+                a = packet[k]
+            elif code == bpf_filter.BPF_LD_W_IND:
+                a = struct.unpack_from('!I', packet, x + k)[0]
+            elif code == bpf_filter.BPF_LD_H_IND:
+                a = struct.unpack_from('!H', packet, x + k)[0]
+            elif code == bpf_filter.BPF_LD_B_IND:
+                a = packet[x + k]
+            elif code == bpf_filter.BPF_LDX_B_MSH:
+                x = (packet[k] & 0x0f) * 4
+            elif code == bpf_filter.BPF_ALU_ADD_X:
+                a = (a + x) & 0xffffffff
+            elif code == bpf_filter.BPF_ALU_LSH_K:
+                a = (a << k) & 0xffffffff
+            elif code == bpf_filter.BPF_ALU_RSH_K:
+                a >>= k
+            elif code == bpf_filter.BPF_MISC_TAX:
+                x = a
+            elif code == bpf_filter.BPF_JMP_JEQ_K:
+                pc += jump_true if a == k else jump_false
+            elif code == bpf_filter.BPF_JMP_JSET_K:
+                pc += jump_true if a & k else jump_false
+            elif code == bpf_filter.BPF_RET_K:
+                return k
+            else:
+                raise ValueError(f"unexpected BPF instruction {code:#x}")
+        except (IndexError, struct.error):
+            return 0
+
+
+class TestBpfFilter(TestCase):
+
+    def setUp(self):
+        self.program = compile_http_filter(ports=(80, 8080), methods=('GET', 'POST', 'DELETE'))
+
+    def test_accepts_http_requests(self):
+        for port in (80, 8080):
+            for method in ('GET', 'POST', 'DELETE'):
+                frame = build_tcp_frame(build_http_request(method=method), dst_port=port)
+                self.assertGreater(run_bpf(self.program, frame), 0, f"{method} on port {port}")
+
+    def test_accepts_with_ip_and_tcp_options(self):
+        frame = build_tcp_frame(build_http_request(), ip_options=b'\x01' * 8, tcp_options=b'\x01' * 12)
+        self.assertGreater(run_bpf(self.program, frame), 0)
+
+    def test_drops_other_traffic(self):
+        '''
+        Test case: other ports, other methods, responses, TLS, empty segments, fragments, non IPv4 frames
+        Test output: all packets dropped
+        '''
+        dropped = [build_tcp_frame(build_http_request(), dst_port=443),
+                   build_tcp_frame(build_http_request(method='PUT')),
+                   build_tcp_frame(b"HTTP/1.1 200 OK\r\n\r\n", src_port=80, dst_port=40000),
+                   build_tcp_frame(b"\x16\x03\x01\x02\x00\x01\x00\x01\xfc\x03\x03"),
+                   build_tcp_frame(b"", flags=0x10),
+                   build_tcp_frame(build_http_request(), fragment_offset=185),
+                   build_tcp_frame(build_http_request())[:12] + b'\x86\xdd' + b'\x00' * 80]
+        for frame in dropped:
+            self.assertEqual(run_bpf(self.program, frame), 0)
+
+    def test_invalid_configuration(self):
+        with self.assertRaises(ValueError):
+            compile_http_filter(ports=(), methods=('GET',))
+        with self.assertRaises(ValueError):
+            compile_http_filter(ports=range(300), methods=('GET',))
+
+    def test_tcp_ports_filter(self):
+        '''
+        Test case: filter of the TCP segments of the HTTP ports (reassembly), on requests, continuation segments,
+                   responses, acknowledgments, other ports, fragments and non IPv4 frames
+        Test output: both directions of the HTTP connections accepted, the rest dropped
+        '''
+        program = compile_tcp_ports_filter(ports=(80, 8080))
+        accepted = [build_tcp_frame(build_http_request(), dst_port=8080),
+                    build_tcp_frame(b"Content-Length: 10\r\n\r\n", tcp_options=b'\x01' * 12),
+                    build_tcp_frame(b"HTTP/1.1 200 OK\r\n\r\n", src_port=80, dst_port=40000),
+                    build_tcp_frame(b"", src_port=40000, dst_port=80, flags=0x10)]
+        for frame in accepted:
+            self.assertGreater(run_bpf(program, frame), 0)
+        dropped = [build_tcp_frame(build_http_request(), dst_port=443),
+                   build_tcp_frame(b"HTTP/1.1 200 OK\r\n\r\n", src_port=443, dst_port=40000),
+                   build_tcp_frame(build_http_request(), fragment_offset=185),
+                   build_tcp_frame(build_http_request())[:12] + b'\x86\xdd' + b'\x00' * 80]
+        for frame in dropped:
+            self.assertEqual(run_bpf(program, frame), 0)
+
+    def test_tcp_ports_filter_jumps(self):
+        '''
+        Test case: filters of the largest number of ports whose jumps fit in a BPF instruction, and of one more
+        Test output: the first one is built with jumps of at most 255 instructions and accepts the last port,
+                     the second one is rejected with a ValueError
+        '''
+        ports = range(1000, 1123)
+        program = compile_tcp_ports_filter(ports=ports)
+        self.assertLessEqual(max(max(jump_true, jump_false) for _, jump_true, jump_false, _ in program), 0xff)
+        for code, jump_true, jump_false, k in program:
+            struct.pack('HBBI', code, jump_true, jump_false, k)
+        self.assertGreater(run_bpf(program, build_tcp_frame(build_http_request(), dst_port=1122)), 0)
+        self.assertEqual(run_bpf(program, build_tcp_frame(build_http_request(), dst_port=1123)), 0)
+        with self.assertRaises(ValueError):
+            compile_tcp_ports_filter(ports=range(1000, 1124))
@@ -0,0 +1,197 @@
+import json
+import os
+import tempfile
+from functools import partial
+from unittest import TestCase
+from urllib.error import HTTPError
+from urllib.request import urlopen
+from src.clocks.packet_clock import PacketClock
+from src.clocks.simulated_clock import SimulatedClock
+from src.collectors.basic_collector import BasicCollector
+from src.controllers.controller import Controller
+from src.instrumentation.latency_histogram import LatencySummary
+from src.instrumentation.metrics import MetricsSnapshot
+from src.interfaces.abstract_alert_manager import AlertInfo, AlertStatus
+from src.interfaces.abstract_collector import HitInfo, TrafficSummary
+from src.sniffers.pcap_sniffer import PcapSniffer
+from src.stores.traffic_store import TrafficStore
+from src.views.multi_view import MultiView
+from src.views.ndjson_view import NDJSONView
+from src.views.prometheus_view import PrometheusView
+from tests.packet_builder import build_http_request, build_pcap, build_tcp_frame
+from tests.test_pcap_sniffer import RecordingView
+
+
+def _scrape(view: PrometheusView, path: str = '/metrics') -> str:
+    with urlopen(f"http://127.0.0.1:{view.port}{path}", timeout=5) as response:
+        return response.read().decode()
+
+
+def _read_events(path: str):
+    with open(path) as events_file:
+        return [json.loads(line) for line in events_file]
+
+
+class TestExportViews(TestCase):
+
+    def setUp(self):
+        self.clock = SimulatedClock(1000.0)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.events_path = os.path.join(directory.name, 'events.ndjson')
+
+    def test_metrics_endpoint(self):
+        '''
+        Test case: view updated with highest hits (one section with a double quote), alerts of the traffic limit
+                   and of a rule, traffic summary and self-instrumentation, then scraped several times
+        Test output: metrics of each of them in the text format, labels escaped, latest state of each alert,
+                     the same page served by every scrape until the next update, 404 on other paths
+        '''
+        view = PrometheusView(port=0, clock=self.clock)
+        self.addCleanup(view.close)
+        self.assertEqual(_scrape(view), '')
+        view.update_highest_hits([HitInfo(section='bing.it/a', nb_hits=3, traffic=300),
+                                  HitInfo(section='bing.it/"b"', nb_hits=1, traffic=50)])
+        for alert_info in [AlertInfo(status=AlertStatus.OVER_THRESHOLD, traffic_value=1200, timestamp=1001.0),
+                           AlertInfo(status=AlertStatus.OVER_THRESHOLD, traffic_value=2.5, timestamp=1002.0,
+                                     rule='rate', key='bing.it/a'),
+                           AlertInfo(status=AlertStatus.UNDER_THRESHOLD, traffic_value=600, timestamp=1021.0)]:
+            view.update_alert_info(alert_info)
+        view.print_alert_info()
+        view.update_traffic_summary(TrafficSummary(timestamp=1021.0, nb_requests=4, total_traffic=350,
+                                                   request_rate=0.5, traffic_rate=40.0, methods={'GET': 4},
+                                                   nb_hosts=1, content_length_p50=100, content_length_p95=200,
+                                                   content_length_p99=200))
+        view.update_metrics(MetricsSnapshot(timestamp=1021.0, counters={'queue_dropped': 2, 'queue_pending': 1},
+                                            latencies={'tick': LatencySummary(count=1, total_ns=2000, max_ns=2000,
+                                                                              p50_ns=2048, p99_ns=2048)}))
+        body = view.body
+        page = _scrape(view)
+        lines = page.splitlines()
+        for line in ['httpmonitor_section_hits{section="bing.it/a"} 3',
+                     'httpmonitor_section_bytes{section="bing.it/\\"b\\""} 50',
+                     'httpmonitor_alerts_total 3',
+                     'httpmonitor_alert_active{rule=""} 0',
+                     'httpmonitor_alert_value{rule=""} 600',
+                     'httpmonitor_alert_active{rule="rate",key="bing.it/a"} 1',
+                     'httpmonitor_requests_total 4',
+                     'httpmonitor_bytes_total 350',
+                     'httpmonitor_method_requests_total{method="GET"} 4',
+                     'httpmonitor_content_length_bytes{quantile="0.95"} 200',
+                     'httpmonitor_queue_dropped_total 2',
+                     '# TYPE httpmonitor_queue_dropped_total counter',
+                     'httpmonitor_queue_pending 1',
+                     '# TYPE httpmonitor_queue_pending gauge',
+                     'httpmonitor_stage_latency_seconds{stage="tick",quantile="0.5"} 2.048e-06',
+                     '# TYPE httpmonitor_requests_total counter']:
+            self.assertIn(line, lines)
+        self.assertEqual(_scrape(view), page)
+        self.assertIs(view.body, body)
+        with self.assertRaises(HTTPError) as error:
+            _scrape(view, '/other')
+        self.assertEqual(error.exception.code, 404)
+
+    def test_events_written_in_batches(self):
+        '''
+        Test case: highest hits of an update, an alert between two updates, then more highest hits than the
+                   buffer holds without an update
+        Test output: nothing written until the end of the update, the alert written right away, the events
+                     beyond the buffer written at once, every event as a JSON line in order
+        '''
+        view = NDJSONView(self.events_path, max_buffered=3, clock=self.clock)
+        self.addCleanup(view.close)
+        view.update_highest_hits([HitInfo(section='bing.it/a', nb_hits=3, traffic=300)])
+        self.assertEqual(_read_events(self.events_path), [])
+        view.update_metrics(MetricsSnapshot(timestamp=1000.0, counters={}, latencies={}))
+        self.assertEqual(_read_events(self.events_path),
+                         [{'event': 'highest_hits', 'timestamp': 1000.0,
+                           'hits': [{'section': 'bing.it/a', 'hits': 3, 'bytes': 300}]}])
+        view.update_alert_info(AlertInfo(status=AlertStatus.OVER_THRESHOLD, traffic_value=2.5, timestamp=1005.0,
+                                         rule='rate', key='bing.it/a'))
+        view.print_alert_info()
+        self.assertEqual(_read_events(self.events_path)[1],
+                         {'event': 'alert', 'timestamp': 1005.0, 'status': 'OVER_THRESHOLD', 'value': 2.5,
+                          'rule': 'rate', 'key': 'bing.it/a'})
+        for _ in range(4):
+            view.update_highest_hits([])
+        self.assertEqual(len(_read_events(self.events_path)), 5)
+        view.close()
+        self.assertEqual(len(_read_events(self.events_path)), 6)
+        self.assertEqual(view.nb_written, 6)
+
+    def test_controller_exports(self):
+        '''
+        Test case: capture over the traffic limit replayed by a controller updating a console view and both
+                   export views
+        Test output: the events of the updates and of the alerts are written, the endpoint serves the latest
+                     hits, the recovered alert and the instrumentation of the controller
+        '''
+        capture_file, capture_path = tempfile.mkstemp(suffix='.pcap')
+        self.addCleanup(os.remove, capture_path)
+        with os.fdopen(capture_file, 'wb') as capture:
+            capture.write(build_pcap([(1000.0, build_tcp_frame(build_http_request(path='/a', content_length=600))),
+                                      (1001.0, build_tcp_frame(build_http_request(path='/a', content_length=600))),
+                                      (1050.0, build_tcp_frame(b'', flags=0x10))]))
+        clock = PacketClock()
+        console_view = RecordingView()
+        metrics_view = PrometheusView(port=0, clock=clock)
+        view = MultiView([console_view, metrics_view, NDJSONView(self.events_path, clock=clock)], clock=clock)
+        self.addCleanup(view.close)
+        Controller(view=view, update_period=10, traffic_history_span=20, traffic_limit=1000,
+                   http_collector=BasicCollector(history_span=20, clock=clock),
+                   sniffer_factory=partial(PcapSniffer, capture_path=capture_path, clock=clock),
+                   clock=clock).replay()
+        events = _read_events(self.events_path)
+        self.assertEqual(len([event for event in events if event['event'] == 'highest_hits']),
+                         len(console_view.updates))
+        self.assertEqual([(event['status'], event['timestamp']) for event in events if event['event'] == 'alert'],
+                         [('OVER_THRESHOLD', 1001.0), ('UNDER_THRESHOLD', 1021.0)])
+        self.assertEqual(view.all_alerts, console_view.all_alerts)
+        lines = _scrape(metrics_view).splitlines()
+        for line in ['httpmonitor_section_hits{section="bing.it/a"} 2', 'httpmonitor_alert_active{rule=""} 0',
+                     f"httpmonitor_ticks_total {len(console_view.updates)}"]:
+            self.assertIn(line, lines)
+
+    def test_restart_does_not_export_alerts_again(self):
+        '''
+        Test case: capture over the traffic limit replayed by a controller saving snapshots and exporting to both
+                   export views, then a new controller with new export views (same event file) started from the
+                   snapshot, and from the traffic store
+        Test output: the restored alert is shown by the console view and active on the endpoint, but no alert
+                     event is appended again and alerts_total only counts the alerts raised since the restart
+        '''
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        capture_path = os.path.join(directory.name, 'capture.pcap')
+        with open(capture_path, 'wb') as capture:
+            capture.write(build_pcap([(1000.0, build_tcp_frame(build_http_request(path='/a', content_length=600))),
+                                      (1001.0, build_tcp_frame(build_http_request(path='/a', content_length=600)))]))
+        for restore in [{'snapshot_path': os.path.join(directory.name, 'state.snapshot')},
+                        {'traffic_store': TrafficStore(os.path.join(directory.name, 'store'))}]:
+            if 'traffic_store' in restore:
+                self.addCleanup(restore['traffic_store'].close)
+            views = []
+            for _ in range(2):
+                clock = PacketClock()
+                console_view = RecordingView()
+                metrics_view = PrometheusView(port=0, clock=clock)
+                events_view = NDJSONView(self.events_path, clock=clock)
+                view = MultiView([console_view, metrics_view, events_view], clock=clock)
+                self.addCleanup(view.close)
+                controller = Controller(view=view, update_period=10, traffic_history_span=20, traffic_limit=1000,
+                                        http_collector=BasicCollector(history_span=20, clock=clock),
+                                        sniffer_factory=partial(PcapSniffer, capture_path=capture_path, clock=clock),
+                                        clock=clock, **restore)
+                if not views:
+                    controller.replay()
+                view.print_alert_info()
+                events_view.flush()
+                views.append((console_view, metrics_view))
+            (console_view, _), (restarted_console_view, restarted_metrics_view) = views
+            self.assertEqual(restarted_console_view.all_alerts, console_view.all_alerts)
+            events = _read_events(self.events_path)
+            self.assertEqual([event['status'] for event in events if event['event'] == 'alert'], ['OVER_THRESHOLD'])
+            lines = _scrape(restarted_metrics_view).splitlines()
+            for line in ['httpmonitor_alerts_total 0', 'httpmonitor_alert_active{rule=""} 1']:
+                self.assertIn(line, lines)
+            os.remove(self.events_path)
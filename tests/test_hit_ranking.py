@@ -0,0 +1,93 @@
+from unittest import TestCase
+from src.collectors.hit_ranking import HitRanking
+
+
+class TestHitRanking(TestCase):
+
+    def setUp(self):
+        self.ranking = HitRanking()
+
+    def _hit(self, key, nb_hits):
+        for _ in range(nb_hits):
+            self.ranking.increment(key)
+
+    def test_top_returns_highest_counts_first(self):
+        '''
+        Test case: keys hit a different number of times, in interleaved order
+        Test output: top(k) returns the k keys with the most hits, highest first
+        '''
+        self._hit('a', 3)
+        self._hit('b', 5)
+        self._hit('c', 1)
+        self._hit('a', 4)
+        self.assertEqual(self.ranking.top(2), [('a', 7), ('b', 5)])
+        self.assertEqual(self.ranking.top(10), [('a', 7), ('b', 5), ('c', 1)])
+        self.assertEqual(self.ranking.count('a'), 7)
+        self.assertEqual(self.ranking.count('unknown'), 0)
+
+    def test_equal_counts_ordered_by_arrival(self):
+        self._hit('a', 2)
+        self._hit('b', 2)
+        self._hit('c', 2)
+        self.assertEqual(self.ranking.top(3), [('a', 2), ('b', 2), ('c', 2)])
+
+    def test_top_matches_full_sort(self):
+        '''
+        Test case: many keys with many hits
+        Test output: ranking counts are identical to a full sort of the counts
+        '''
+        counts = dict()
+        for i in range(2000):
+            key = (i * 7919) % 97
+            counts[key] = counts.get(key, 0) + 1
+            self.ranking.increment(key)
+        expected = sorted(counts.values(), reverse=True)[:10]
+        self.assertEqual([count for _, count in self.ranking.top(10)], expected)
+        self.assertEqual(len(self.ranking), len(counts))
+
+    def test_clear(self):
+        self._hit('a', 2)
+        self.ranking.clear()
+        self.assertEqual(self.ranking.top(10), [])
+        self.assertNotIn('a', self.ranking)
+        self._hit('a', 1)
+        self.assertEqual(self.ranking.top(10), [('a', 1)])
+
+    def test_increment_by_amount(self):
+        '''
+        Test case: keys incremented by several hits at once, skipping over other counts
+        Test output: ranking is the same as with single hits
+        '''
+        self._hit('a', 2)
+        self._hit('b', 4)
+        self.assertEqual(self.ranking.increment('c', 3), 3)
+        self.assertEqual(self.ranking.increment('a', 5), 7)
+        self.assertEqual(self.ranking.top(3), [('a', 7), ('b', 4), ('c', 3)])
+
+    def test_remove_lowest(self):
+        self._hit('a', 2)
+        self._hit('b', 1)
+        self._hit('c', 1)
+        self.assertEqual(self.ranking.remove_lowest(), ('b', 1))
+        self.assertEqual(self.ranking.remove_lowest(), ('c', 1))
+        self.assertEqual(self.ranking.top(10), [('a', 2)])
+        self.assertEqual(self.ranking.remove_lowest(), ('a', 2))
+        self.assertEqual(len(self.ranking), 0)
+        with self.assertRaises(KeyError):
+            self.ranking.remove_lowest()
+
+    def test_decrement(self):
+        '''
+        Test case: keys decremented by one or several hits, down to 0
+        Test output: ranking follows the decreased counts, keys without hits are removed
+        '''
+        self._hit('a', 5)
+        self._hit('b', 3)
+        self._hit('c', 1)
+        self.assertEqual(self.ranking.decrement('a', 3), 2)
+        self.assertEqual(self.ranking.top(3), [('b', 3), ('a', 2), ('c', 1)])
+        self.assertEqual(self.ranking.decrement('b'), 2)
+        self.assertEqual(self.ranking.top(3), [('a', 2), ('b', 2), ('c', 1)])
+        self.assertEqual(self.ranking.decrement('c'), 0)
+        self.assertNotIn('c', self.ranking)
+        self.assertEqual(self.ranking.top(3), [('a', 2), ('b', 2)])
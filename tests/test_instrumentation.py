@@ -0,0 +1,92 @@
+import json
+import os
+import tempfile
+from functools import partial
+from unittest import TestCase
+from src.instrumentation.latency_histogram import LatencyHistogram
+from src.instrumentation.metrics import MetricsSnapshot, SnifferMetrics, write_snapshot
+from src.clocks.packet_clock import PacketClock
+from src.controllers.controller import Controller
+from src.collectors.basic_collector import BasicCollector
+from src.sniffers.pcap_sniffer import PcapSniffer
+from src.sniffers.raw_http_parser import parse_ethernet_frame
+from tests.packet_builder import build_http_request, build_pcap, build_tcp_frame
+from tests.test_pcap_sniffer import RecordingView
+
+
+class TestLatencyHistogram(TestCase):
+
+    def test_percentiles_are_upper_bounds(self):
+        '''
+        Test case: 99 latencies of 1000ns and one of 1ms
+        Test output: percentiles are the upper bounds of the power of 2 buckets, the maximum is exact
+        '''
+        histogram = LatencyHistogram()
+        for _ in range(99):
+            histogram.record(1000)
+        histogram.record(1000000)
+        summary = histogram.summary()
+        self.assertEqual((summary.count, summary.max_ns, summary.total_ns), (100, 1000000, 1099000))
+        self.assertEqual(summary.p50_ns, 1023)
+        self.assertEqual(summary.p99_ns, 1023)
+        self.assertEqual(histogram.percentile(1.0), 1000000)
+        self.assertEqual(LatencyHistogram().summary().p99_ns, 0)
+
+    def test_merge(self):
+        first, second = LatencyHistogram(), LatencyHistogram()
+        first.record(10)
+        second.record(5000)
+        second.record(7)
+        first.merge(second)
+        self.assertEqual((first.count, first.total_ns, first.max_ns), (3, 5017, 5000))
+        self.assertEqual(first.percentile(0.5), 15)
+
+
+class TestSnifferMetrics(TestCase):
+
+    def test_decode_failures_are_counted(self):
+        metrics = SnifferMetrics()
+        payload = b"POST / HTTP/1.1\r\nHost: bing.it\r\nContent-Length: abc\r\n\r\n"
+        with self.assertLogs('RawHTTPParser', level='WARNING'):
+            self.assertIsNone(parse_ethernet_frame(build_tcp_frame(payload), metrics=metrics))
+        self.assertIsNone(parse_ethernet_frame(build_tcp_frame(b"not HTTP"), metrics=metrics))
+        self.assertEqual(metrics.decode_failures, 1)
+
+    def test_controller_snapshot(self):
+        '''
+        Test case: capture with two requests, one of them undecodable, and a TCP acknowledgment replayed
+        Test output: the snapshot counts the packets seen, the requests parsed and the decode failures,
+                     and times the ticks; it is shown to the view and machine-readable
+        '''
+        frames = [(1000.0, build_tcp_frame(build_http_request(path='/a'))),
+                  (1001.0, build_tcp_frame(b"GET / HTTP/1.1\r\nHost: bing.it\r\nContent-Length: -\r\n\r\n")),
+                  (1002.0, build_tcp_frame(b'', flags=0x10)),
+                  (1023.0, build_tcp_frame(build_http_request(path='/b')))]
+        capture_file, capture_path = tempfile.mkstemp(suffix='.pcap')
+        self.addCleanup(os.remove, capture_path)
+        with os.fdopen(capture_file, 'wb') as capture:
+            capture.write(build_pcap(frames))
+        clock = PacketClock()
+        view = RecordingView()
+        snapshots = []
+        controller = Controller(view=view, update_period=10, http_collector=BasicCollector(clock=clock),
+                                sniffer_factory=partial(PcapSniffer, capture_path=capture_path, clock=clock),
+                                clock=clock, metrics_callback=snapshots.append)
+        with self.assertLogs('RawHTTPParser', level='WARNING'):
+            controller.replay()
+        metrics = controller.get_metrics()
+        self.assertEqual({name: metrics.counters[name]
+                          for name in ['packets_seen', 'http_parsed', 'decode_failures', 'ticks']},
+                         {'packets_seen': 4, 'http_parsed': 2, 'decode_failures': 1, 'ticks': 3})
+        self.assertEqual(metrics.latencies['parse'].count, 4)
+        self.assertEqual(metrics.latencies['tick'].count, 3)
+        self.assertEqual([snapshot.timestamp for snapshot in snapshots], [1010.0, 1020.0, 1030.0])
+        self.assertIs(view.metrics, snapshots[-1])
+        with tempfile.TemporaryDirectory() as snapshot_directory:
+            snapshot_path = os.path.join(snapshot_directory, 'metrics.json')
+            write_snapshot(metrics, snapshot_path)
+            with open(snapshot_path) as snapshot_file:
+                written = json.load(snapshot_file)
+        self.assertEqual(written['counters'], metrics.counters)
+        self.assertEqual(written['latencies']['tick']['count'], 3)
+        self.assertIsInstance(metrics, MetricsSnapshot)
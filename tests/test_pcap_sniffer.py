@@ -0,0 +1,111 @@
+import os
+import tempfile
+from functools import partial
+from io import BytesIO
+from typing import List
+from unittest import TestCase
+from src.interfaces.abstract_alert_manager import AlertInfo, AlertStatus
+from src.interfaces.abstract_collector import HitInfo
+from src.interfaces.abstract_view import AbstractView
+from src.collectors.basic_collector import BasicCollector
+from src.controllers.controller import Controller
+from src.sniffers.pcap_reader import LINKTYPE_ETHERNET, read_capture
+from src.clocks.packet_clock import PacketClock
+from src.sniffers.pcap_sniffer import PcapSniffer
+from tests.packet_builder import build_http_request, build_pcap, build_pcapng, build_tcp_frame
+
+
+class RecordingView(AbstractView):
+    """
+    View keeping the highest hits of every update.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.updates: List[List[HitInfo]] = []
+
+    def update_highest_hits(self, highest_hits: List[HitInfo]) -> None:
+        self.updates.append(highest_hits)
+
+    def print_alert_info(self) -> None:
+        pass
+
+
+class TestPcapReader(TestCase):
+
+    def setUp(self):
+        self.frames = [(1000.25, build_tcp_frame(build_http_request(path='/a/1'))),
+                       (1001.5, build_tcp_frame(b'', flags=0x10)),
+                       (1002.75, build_tcp_frame(build_http_request(path='/b')))]
+
+    def test_read_pcap(self):
+        for byte_order in '<>':
+            captured = list(read_capture(BytesIO(build_pcap(self.frames, byte_order))))
+            self.assertEqual([(frame.timestamp, frame.link_type, frame.data) for frame in captured],
+                             [(timestamp, LINKTYPE_ETHERNET, data) for timestamp, data in self.frames])
+
+    def test_read_pcapng(self):
+        for byte_order in '<>':
+            captured = list(read_capture(BytesIO(build_pcapng(self.frames, byte_order))))
+            self.assertEqual([frame.data for frame in captured], [data for _, data in self.frames])
+            for frame, (timestamp, _) in zip(captured, self.frames):
+                self.assertAlmostEqual(frame.timestamp, timestamp, places=6)
+
+    def test_truncated_capture(self):
+        '''
+        Test case: capture cut in the middle of its last frame (e.g. still being written)
+        Test output: the complete frames are read, the truncated one is dropped
+        '''
+        for capture in [build_pcap(self.frames), build_pcapng(self.frames)]:
+            self.assertEqual(len(list(read_capture(BytesIO(capture[:-10])))), 2)
+
+    def test_not_a_capture(self):
+        with self.assertRaises(ValueError):
+            list(read_capture(BytesIO(b'GET / HTTP/1.1\r\n\r\n' * 2)))
+
+
+class TestPcapReplay(TestCase):
+
+    def setUp(self):
+        capture_file, self.capture_path = tempfile.mkstemp(suffix='.pcap')
+        self.addCleanup(os.remove, self.capture_path)
+        frames = [(timestamp, build_tcp_frame(build_http_request(path=path, content_length=content_length)))
+                  for timestamp, path, content_length in [(1000.0, '/a/1', 600), (1001.0, '/a/2', 600),
+                                                          (1050.0, '/b', 100)]]
+        with os.fdopen(capture_file, 'wb') as capture:
+            capture.write(build_pcap(frames))
+
+    def test_ticks_follow_capture_time(self):
+        '''
+        Test case: capture with a gap of several tick periods between requests
+        Test output: requests are relayed with the clock at their capture time, ticks are fired on every period
+                     boundary since the first request, including the gap, and at the end of the capture
+        '''
+        clock = PacketClock()
+        events = []
+        sniffer = PcapSniffer(lambda http_info: events.append((http_info.path, clock.now())), self.capture_path, clock)
+        sniffer.replay(tick_period=10, tick_callback=lambda: events.append(('tick', clock.now())))
+        self.assertEqual(events, [('/a/1', 1000.0), ('/a/2', 1001.0), ('tick', 1010.0), ('tick', 1020.0),
+                                  ('tick', 1030.0), ('tick', 1040.0), ('tick', 1050.0), ('/b', 1050.0),
+                                  ('tick', 1060.0)])
+
+    def test_controller_replay_raises_capture_time_alerts(self):
+        '''
+        Test case: capture replayed by the controller, with traffic over the limit then back under it
+        Test output: the alerts are the ones of a live capture, timestamped with the capture time of the crossings
+                     (the request going over the limit, the second its traffic left the window)
+        '''
+        clock = PacketClock()
+        view = RecordingView()
+        controller = Controller(view=view, update_period=10, traffic_history_span=20, traffic_limit=1000,
+                                http_collector=BasicCollector(history_span=20, clock=clock),
+                                sniffer_factory=partial(PcapSniffer, capture_path=self.capture_path, clock=clock),
+                                clock=clock)
+        controller.replay()
+        self.assertEqual(view.all_alerts, [AlertInfo(status=AlertStatus.OVER_THRESHOLD, traffic_value=1200,
+                                                     timestamp=1001.0),
+                                           AlertInfo(status=AlertStatus.UNDER_THRESHOLD, traffic_value=600,
+                                                     timestamp=1021.0)])
+        self.assertEqual(len(view.updates), 6)
+        self.assertEqual(view.updates[-1][0], HitInfo(section='bing.it/a', nb_hits=2, traffic=1200,
+                                                      last_hit_traffic=600, last_hit_timestamp=1001.0))
@@ -0,0 +1,46 @@
+from unittest import TestCase
+from src.interfaces.abstract_collector import HTTPInfo
+from src.sniffers.raw_http_parser import parse_ethernet_frame
+from tests.packet_builder import build_tcp_frame, build_http_request
+
+
+class TestRawHTTPParser(TestCase):
+
+    def test_parse_request(self):
+        frame = build_tcp_frame(build_http_request(method='POST', path='/pages/create', host='my.site.com',
+                                                   content_length=42))
+        self.assertEqual(parse_ethernet_frame(frame),
+                         HTTPInfo(method='POST', host='my.site.com', path='/pages/create', content_length=42))
+
+    def test_parse_request_in_larger_buffer(self):
+        '''
+        Test case: frame received in a larger (reused) buffer, with IP and TCP options
+        Test output: only the frame length is parsed
+        '''
+        frame = build_tcp_frame(build_http_request(content_length=5), ip_options=b'\x01' * 4,
+                                tcp_options=b'\x01' * 12)
+        buffer = bytearray(2048)
+        buffer[:len(frame)] = frame
+        http_info = parse_ethernet_frame(buffer, len(frame))
+        self.assertEqual(http_info, HTTPInfo(method='POST', host='bing.it', path='/section/page', content_length=5))
+
+    def test_header_names_are_case_insensitive(self):
+        payload = b"PUT /a/b HTTP/1.1\r\nhOsT:  bing.it \r\ncontent-LENGTH: 7\r\n\r\n"
+        self.assertEqual(parse_ethernet_frame(build_tcp_frame(payload)),
+                         HTTPInfo(method='PUT', host='bing.it', path='/a/b', content_length=7))
+
+    def test_incomplete_or_missing_headers(self):
+        '''
+        Test case: requests without Content-Length, truncated headers, non HTTP payload
+        Test output: nothing is parsed
+        '''
+        self.assertIsNone(parse_ethernet_frame(build_tcp_frame(b"GET / HTTP/1.1\r\nHost: bing.it\r\n\r\n")))
+        self.assertIsNone(parse_ethernet_frame(build_tcp_frame(b"POST / HTTP/1.1\r\nHost: bing.it\r\nContent-Le")))
+        self.assertIsNone(parse_ethernet_frame(build_tcp_frame(b"\x16\x03\x01\x02\x00\x01\x00\x01\xfc\x03\x03")))
+        self.assertIsNone(parse_ethernet_frame(build_tcp_frame(b"")))
+        self.assertIsNone(parse_ethernet_frame(b"\x00" * 10))
+
+    def test_invalid_content_length(self):
+        payload = b"POST / HTTP/1.1\r\nHost: bing.it\r\nContent-Length: abc\r\n\r\n"
+        with self.assertLogs('RawHTTPParser', level='WARNING'):
+            self.assertIsNone(parse_ethernet_frame(build_tcp_frame(payload)))
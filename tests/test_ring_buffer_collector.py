@@ -0,0 +1,63 @@
+from unittest import TestCase
+from src.clocks.simulated_clock import SimulatedClock
+from src.interfaces.abstract_collector import HTTPInfo
+from src.collectors.ring_buffer_collector import RingBufferCollector
+
+
+class TestRingBufferCollector(TestCase):
+
+    def setUp(self):
+        self.history_span = 120
+        self.clock = SimulatedClock()
+        self.collector = RingBufferCollector(history_span=self.history_span, clock=self.clock)
+
+    @staticmethod
+    def _build_http_info(content_length):
+        return HTTPInfo(method='GET',
+                        host='http://bing.it',
+                        path='/section/subsection',
+                        content_length=content_length)
+
+    def _collect_at(self, timestamp, content_length):
+        self.clock.timestamp = timestamp
+        self.collector.collect_http_info(TestRingBufferCollector._build_http_info(content_length))
+
+    def _traffic_at(self, timestamp, span):
+        self.clock.timestamp = timestamp
+        return self.collector.get_total_traffic_over_period(span)
+
+    def test_traffic_over_period_sums_buckets_in_span(self):
+        '''
+        Test case: traffic collected at several instants, some of them outside the queried span
+        Test output: only the traffic of buckets inside the span is summed
+        '''
+        self._collect_at(1000.2, 100)
+        self._collect_at(1000.7, 100)
+        self._collect_at(1050.0, 200)
+        self._collect_at(1100.0, 300)
+        self.assertEqual(self._traffic_at(1100.5, 10), 300)
+        self.assertEqual(self._traffic_at(1100.5, 60), 500)
+        self.assertEqual(self._traffic_at(1100.5, 120), 700)
+
+    def test_old_buckets_expire(self):
+        '''
+        Test case: traffic older than the history span, and ring slots reused by newer traffic
+        Test output: expired traffic is not counted anymore, memory stays bounded
+        '''
+        self._collect_at(1000.0, 100)
+        self.assertEqual(self._traffic_at(1000.0, self.history_span), 100)
+        self.assertEqual(self._traffic_at(1000.0 + self.history_span + 2, self.history_span), 0)
+        # same ring slot as the first bucket, one full ring later
+        self._collect_at(1000.0 + self.collector.traffic_ring.nb_buckets, 50)
+        self.assertEqual(self._traffic_at(1000.0 + self.collector.traffic_ring.nb_buckets, self.history_span), 50)
+        self.assertEqual(len(self.collector.traffic_ring.bucket_traffic), self.collector.traffic_ring.nb_buckets)
+
+    def test_highest_hits_and_clear(self):
+        self._collect_at(1000.0, 100)
+        self._collect_at(1001.0, 100)
+        self.assertEqual(self.collector.get_total_traffic(), 200)
+        self.assertEqual(self.collector.get_highest_hits()[0].nb_hits, 2)
+        self.collector.clear(clear_history=True)
+        self.assertEqual(self.collector.get_total_traffic(), 0)
+        self.assertEqual(self.collector.get_highest_hits(), [])
+        self.assertEqual(self._traffic_at(1001.0, self.history_span), 0)
@@ -0,0 +1,168 @@
+import json
+import os
+import random
+import tempfile
+from unittest import TestCase
+from src.clocks.simulated_clock import SimulatedClock
+from src.interfaces.abstract_alert_manager import AlertRule, AlertStatus, RuleAggregation
+from src.interfaces.abstract_collector import HTTPInfo
+from src.alert_managers.basic_alert_manager import BasicAlertManager
+from src.alert_managers.rule_alert_manager import RuleAlertManager, load_rules
+from src.stores.snapshot import SnapshotReader, SnapshotWriter
+
+
+class TestRuleAlertManager(TestCase):
+
+    def setUp(self):
+        self.clock = SimulatedClock(1000.0)
+
+    def _request(self, manager, timestamp, path='/a', host='bing.it', method='GET', content_length=100):
+        self.clock.timestamp = timestamp
+        manager.collect_http_info(HTTPInfo(method=method, host=host, path=path, content_length=content_length))
+
+    def _alerts_at(self, manager, timestamp):
+        self.clock.timestamp = timestamp
+        return [(alert.rule, alert.key, alert.status, alert.traffic_value) for alert in manager.get_alert_infos()]
+
+    def test_hysteresis_per_section(self):
+        '''
+        Test case: a per-section rate rule, two sections going over the rate at different times
+        Test output: each section has its own alert state: over, recovered, then no alert (the series of an idle
+                     section is evicted once recovered)
+        '''
+        rule = AlertRule(name='rate', metric='section_hits', threshold=0.5, window=10,
+                         aggregation=RuleAggregation.MEAN)
+        manager = RuleAlertManager(rules=[rule], clock=self.clock)
+        for second in range(10):
+            self._request(manager, 1000.0 + second, path='/a')
+        self._request(manager, 1005.0, path='/b')
+        self.assertEqual(self._alerts_at(manager, 1010.0), [('rate', 'bing.it/a', AlertStatus.OVER_THRESHOLD, 1)])
+        self.assertEqual(self._alerts_at(manager, 1011.0), [])
+        for second in range(10, 20):
+            self._request(manager, 1000.0 + second, path='/b')
+        self.assertEqual(self._alerts_at(manager, 1020.0),
+                         [('rate', 'bing.it/a', AlertStatus.UNDER_THRESHOLD, 0),
+                          ('rate', 'bing.it/b', AlertStatus.OVER_THRESHOLD, 1)])
+        self.assertEqual(manager.states.tolist(), [1])
+        self.assertEqual(self._alerts_at(manager, 1030.0), [('rate', 'bing.it/b', AlertStatus.UNDER_THRESHOLD, 0)])
+        self.assertEqual(manager.states.tolist(), [])
+
+    def test_traffic_rule_matches_basic_alert_manager(self):
+        '''
+        Test case: random traffic, a total bytes rule over 2 minutes and the basic alert manager fed with the
+                   traffic of the same window, evaluated at every 10 seconds tick
+        Test output: same alerts
+        '''
+        generator = random.Random(2)
+        manager = RuleAlertManager(rules=[AlertRule(name='traffic', metric='bytes', threshold=10000)],
+                                   clock=self.clock)
+        basic_alert_manager = BasicAlertManager(traffic_limit=10000, clock=self.clock)
+        requests = sorted((1000 + generator.random() * 1000, generator.choice([10, 100, 500]))
+                          for _ in range(2000))
+        index = 0
+        for tick in range(1010, 2000, 10):
+            while requests[index][0] < tick:
+                self._request(manager, *requests[index][:1], content_length=requests[index][1])
+                index += 1
+            traffic = sum(content_length for timestamp, content_length in requests[:index]
+                          if int(timestamp) >= tick - 120)
+            expected = basic_alert_manager.get_alert_info(traffic)
+            alerts = manager.get_alert_infos()
+            self.assertEqual([(alert.status, alert.traffic_value) for alert in alerts],
+                             [(expected.status, expected.traffic_value)] if expected else [])
+
+    def test_ratio_and_keyed_rules(self):
+        '''
+        Test case: rules on the share of POST requests and on the bytes of a single host, plus a host not covered
+        Test output: ratio is computed over the window, keyed rules only check their key
+        '''
+        rules = [AlertRule(name='post share', metric='method_requests', key='POST', ratio_to='requests',
+                           threshold=0.5, window=60),
+                 AlertRule(name='qwant bytes', metric='host_bytes', key='qwant.fr', threshold=1000, window=60)]
+        manager = RuleAlertManager(rules=rules, clock=self.clock)
+        self._request(manager, 1000.0, method='GET', host='bing.it', content_length=5000)
+        self._request(manager, 1001.0, method='POST', host='qwant.fr', content_length=600)
+        self._request(manager, 1002.0, method='POST', host='qwant.fr', content_length=600)
+        self.assertEqual(self._alerts_at(manager, 1010.0),
+                         [('post share', 'POST', AlertStatus.OVER_THRESHOLD, 0.667),
+                          ('qwant bytes', 'qwant.fr', AlertStatus.OVER_THRESHOLD, 1200)])
+        self.assertEqual(len(manager.states), 2)
+        self.assertEqual(self._alerts_at(manager, 1100.0),
+                         [('post share', 'POST', AlertStatus.UNDER_THRESHOLD, 0),
+                          ('qwant bytes', 'qwant.fr', AlertStatus.UNDER_THRESHOLD, 0)])
+
+    def test_rules_at_section_depths(self):
+        '''
+        Test case: rules on the hits of the hosts, of an endpoint two segments deep and of the sections of the
+                   collectors, requests spread over the endpoints of a section, with query strings
+        Test output: each rule counts the sections of its depth: the host and the endpoint go over their
+                     threshold, the sections of the collectors do not
+        '''
+        rules = [AlertRule(name='host', metric='section_hits', threshold=5, depth=0),
+                 AlertRule(name='endpoint', metric='section_bytes', threshold=300, depth=2, key='bing.it/api/v2'),
+                 AlertRule(name='section', metric='section_hits', threshold=5)]
+        manager = RuleAlertManager(rules=rules, clock=self.clock)
+        for index in range(6):
+            self._request(manager, 1000.0 + index, path=f"/api/v2/users?id={index}" if index % 2 else f"/x{index}")
+        self.assertEqual(self._alerts_at(manager, 1010.0),
+                         [('host', 'bing.it', AlertStatus.OVER_THRESHOLD, 6)])
+        self._request(manager, 1010.0, path='/api/v2/orders/1')
+        self.assertEqual(self._alerts_at(manager, 1011.0),
+                         [('endpoint', 'bing.it/api/v2', AlertStatus.OVER_THRESHOLD, 400)])
+        with self.assertRaises(ValueError):
+            RuleAlertManager(rules=[AlertRule(name='depth', metric='host_bytes', threshold=1, depth=2)])
+
+    def test_series_are_bounded(self):
+        manager = RuleAlertManager(rules=[AlertRule(name='rate', metric='section_hits', threshold=0)],
+                                   clock=self.clock, max_series=100)
+        for index in range(150):
+            self._request(manager, 1000.0, path=f"/{index}")
+        self.assertEqual(len(manager.series_keys), 100)
+        self.assertEqual(manager.nb_dropped_series, 50)
+        self.assertEqual(len(self._alerts_at(manager, 1001.0)), 100)
+
+    def test_idle_series_are_evicted(self):
+        '''
+        Test case: requests of 100 sections, a ratio rule on the section hits, then only one section requested for
+                   longer than the window, the manager saved in a snapshot and restored, then new sections
+        Test output: series of the idle sections are evicted (not the hits total), those of the new sections reuse
+                     their columns, including in the restored manager
+        '''
+        rule = AlertRule(name='share', metric='section_hits', threshold=0.5, window=10, ratio_to='requests')
+        manager = RuleAlertManager(rules=[rule], clock=self.clock)
+        for index in range(100):
+            self._request(manager, 1000.0, path=f"/{index}")
+        self.assertEqual(self._alerts_at(manager, 1001.0), [])
+        self.assertEqual(manager.nb_series, 101)
+        for second in range(1, 12):
+            self._request(manager, 1000.0 + second, path='/0')
+        self.assertEqual(self._alerts_at(manager, 1012.0), [('share', 'bing.it/0', AlertStatus.OVER_THRESHOLD, 1)])
+        self.assertEqual(manager.nb_series, 2)
+        self.assertEqual(manager.nb_evicted_series, 99)
+        self.assertEqual(len(manager.check_rule), 1)
+        restored = RuleAlertManager(rules=[rule], clock=self.clock)
+        writer = SnapshotWriter()
+        manager.write_state(writer)
+        restored.read_state(SnapshotReader(writer.getvalue()))
+        for current in [manager, restored]:
+            for index in range(100, 110):
+                self._request(current, 1012.0, path=f"/{index}")
+            self.assertEqual(current.nb_series, 12)
+            self.assertEqual(len(current.series_keys), 101)
+        for current in [manager, restored]:
+            self.assertEqual(self._alerts_at(current, 1030.0),
+                             [('share', 'bing.it/0', AlertStatus.UNDER_THRESHOLD, 0)])
+            self.assertEqual(current.nb_series, 1)
+
+    def test_load_rules(self):
+        rules_file, rules_path = tempfile.mkstemp(suffix='.json')
+        self.addCleanup(os.remove, rules_path)
+        with os.fdopen(rules_file, 'w') as rules:
+            json.dump([{"name": "rate", "metric": "section_hits", "threshold": 5, "window": 60,
+                        "aggregation": "mean"}, {"name": "traffic", "metric": "bytes", "threshold": 10000}], rules)
+        self.assertEqual(load_rules(rules_path),
+                         [AlertRule(name='rate', metric='section_hits', threshold=5, window=60,
+                                    aggregation=RuleAggregation.MEAN),
+                          AlertRule(name='traffic', metric='bytes', threshold=10000)])
+        with self.assertRaises(ValueError):
+            RuleAlertManager(rules=[AlertRule(name='unknown', metric='status_codes', threshold=1)])
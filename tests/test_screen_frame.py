@@ -0,0 +1,29 @@
+from unittest import TestCase
+from src.views.screen_frame import ScreenFrame, layout_panels
+
+
+class TestScreenFrame(TestCase):
+
+    def test_only_changed_rows_are_damaged(self):
+        '''
+        Test case: frames of a window drawn one after the other, with lines changing, added, removed and too long
+        Test output: only the rows whose text changed are rewritten, the rows left over are blanked,
+                     lines are clipped to the window
+        '''
+        frame = ScreenFrame(height=4, width=12)
+        self.assertEqual(frame.damaged_rows(['header', 'a: 3', 'b: 2']), [(0, 'header'), (1, 'a: 3'), (2, 'b: 2')])
+        self.assertEqual(frame.damaged_rows(['header', 'a: 3', 'b: 2']), [])
+        self.assertEqual(frame.damaged_rows(['header', 'b: 4', 'a: 3']), [(1, 'b: 4'), (2, 'a: 3')])
+        self.assertEqual(frame.damaged_rows(['header']), [(1, ''), (2, '')])
+        self.assertEqual(frame.damaged_rows(['header', 'a very long section', '1', '2', '3']),
+                         [(1, 'a very long'), (2, '1'), (3, '2')])
+
+    def test_layout_follows_terminal_size(self):
+        '''
+        Test case: panels laid out on a large terminal, then on a smaller one
+        Test output: panels are as wide as the terminal, the last visible panel is clipped, the next are hidden
+        '''
+        self.assertEqual(layout_panels([11, 11, 4], nb_rows=50, nb_columns=200),
+                         [(11, 200, 0, 0), (11, 200, 12, 0), (4, 200, 24, 0)])
+        self.assertEqual(layout_panels([11, 11, 4], nb_rows=20, nb_columns=80),
+                         [(11, 80, 0, 0), (8, 80, 12, 0), None])
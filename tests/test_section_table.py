@@ -0,0 +1,51 @@
+from unittest import TestCase
+from sys import intern
+from src.interfaces.abstract_collector import HTTPInfo
+from src.collectors.section_table import SectionTable
+
+
+class TestSectionTable(TestCase):
+
+    def setUp(self):
+        self.section_table = SectionTable()
+
+    def test_sections_match_extract_section(self):
+        '''
+        Test case: paths covering the extract_section test cases, plus relative paths
+        Test output: the section of the looked up id is the one given by HTTPInfo.extract_section
+        '''
+        for path in ['/section/subsection', '/section', '/', '', '/section/subsection/subsubsection', '//section',
+                     'section/subsection/subsubsection', 'section']:
+            http_info = HTTPInfo(method='GET', host='http://bing.it', path=path, content_length=100)
+            section_id = self.section_table.lookup(http_info.host, http_info.path)
+            self.assertEqual(self.section_table.section(section_id), http_info.extract_section())
+
+    def test_same_section_same_id(self):
+        first_id = self.section_table.lookup('bing.it', '/a/1')
+        self.assertEqual(self.section_table.lookup('bing.it', '/a/2?q=3'), first_id)
+        self.assertEqual(self.section_table.lookup('bing.it', '/a'), first_id)
+        self.assertNotEqual(self.section_table.lookup('bing.fr', '/a'), first_id)
+        self.assertEqual(len(self.section_table), 2)
+
+    def test_sections_are_interned(self):
+        section_id = self.section_table.lookup('bing.it', '/a/1')
+        self.assertIs(self.section_table.section(section_id), intern(''.join(['bing.it', '/a'])))
+
+    def test_released_ids_reused(self):
+        '''
+        Test case: section released, then a new section looked up, then the table loaded from its sections and
+                   released ids
+        Test output: the new section takes the released id, the released section gets a new id when seen again,
+                     the loaded table assigns the same ids
+        '''
+        first_id = self.section_table.lookup('bing.it', '/a')
+        second_id = self.section_table.lookup('bing.it', '/b')
+        self.section_table.release(first_id)
+        self.assertEqual(len(self.section_table), 1)
+        loaded = SectionTable()
+        loaded.load(['' if section is None else section for section in self.section_table.sections],
+                    self.section_table.free_ids)
+        for table in [self.section_table, loaded]:
+            self.assertEqual(table.lookup('bing.it', '/c'), first_id)
+            self.assertEqual(table.lookup('bing.it', '/b'), second_id)
+            self.assertEqual(table.lookup('bing.it', '/a'), 2)
@@ -0,0 +1,127 @@
+import os
+import random
+import tempfile
+from functools import partial
+from unittest import TestCase
+from src.clocks.packet_clock import PacketClock
+from src.clocks.simulated_clock import SimulatedClock
+from src.collectors.basic_collector import BasicCollector
+from src.collectors.section_trie import SectionTrie
+from src.controllers.controller import Controller
+from src.interfaces.abstract_collector import HTTPInfo
+from src.sniffers.pcap_sniffer import PcapSniffer
+from src.stores.snapshot import SnapshotReader, SnapshotWriter
+from tests.packet_builder import build_http_request, build_pcap, build_tcp_frame
+from tests.test_pcap_sniffer import RecordingView
+
+
+class TestSectionTrie(TestCase):
+
+    def setUp(self):
+        self.clock = SimulatedClock(1000.0)
+
+    def _collect(self, trie, path, host='bing.it', content_length=100):
+        self.clock.timestamp += 1
+        trie.collect_http_info(HTTPInfo(method='GET', host=host, path=path, content_length=content_length))
+
+    def _hits(self, hit_infos):
+        return [(hit_info.section, hit_info.nb_hits) for hit_info in hit_infos]
+
+    def test_hits_at_every_depth(self):
+        '''
+        Test case: requests on paths of several depths, with query strings, on two hosts
+        Test output: hits of the hosts and of the path prefixes at each depth (the sections of the collectors at
+                     depth 1), sub-sections of a section, and hits of a section are the totals of its sub-sections
+        '''
+        trie = SectionTrie(max_depth=3, clock=self.clock)
+        for path in ['/api/v2/users/1?id=2', '/api/v2/users/2', '/api/v2/orders', '/api/v1/users', '/img/a.png', '/']:
+            self._collect(trie, path)
+        self._collect(trie, '/api/v2/users', host='qwant.fr', content_length=10)
+        self.assertEqual(self._hits(trie.get_highest_hits(10, depth=0)), [('bing.it', 6), ('qwant.fr', 1)])
+        self.assertEqual(self._hits(trie.get_highest_hits(1, depth=1)), [('bing.it/api', 4)])
+        self.assertEqual(self._hits(trie.get_highest_hits(10, depth=3, section='bing.it/api/v2')),
+                         [('bing.it/api/v2/users', 2), ('bing.it/api/v2/orders', 1)])
+        self.assertEqual(self._hits(trie.get_children('bing.it/api')), [('bing.it/api/v2', 3), ('bing.it/api/v1', 1)])
+        self.assertEqual(trie.get_highest_hits(1, depth=2, section='qwant.fr')[0].traffic, 10)
+        self.assertEqual(self._hits(trie.get_highest_hits(10, depth=1, section='bing.it/')), [('bing.it/', 1)])
+        self.assertEqual(trie.get_highest_hits(10, depth=2, section='bing.it/unknown'), [])
+        with self.assertRaises(ValueError):
+            trie.get_highest_hits(10, depth=4)
+
+    def test_memory_is_bounded(self):
+        '''
+        Test case: a hot endpoint hit all along, identifiers in the paths of a section (more children than the
+                   limit), then a scan of many cold hosts and paths (more sections than the limit)
+        Test output: identifiers beyond the limit are counted in a single child, the number of sections stays
+                     under the limit, the cold ones are pruned while the hot endpoint keeps its hits, and the
+                     hits of the hosts still count every request
+        '''
+        trie = SectionTrie(max_depth=3, max_nodes=100, max_children=10, clock=self.clock)
+        for user in range(30):
+            self._collect(trie, '/api/v2/health')
+            self._collect(trie, f'/api/users/{user}')
+        self.assertEqual(len(trie.get_children('bing.it/api/users')), 11)
+        self.assertEqual(self._hits(trie.get_highest_hits(1, depth=3, section='bing.it/api/users')),
+                         [('bing.it/api/users/*', 20)])
+        for page in range(1000):
+            self._collect(trie, '/api/v2/health')
+            self._collect(trie, '/scan/x', host=f"host{page}")
+            self.assertLessEqual(trie.nb_nodes, 100)
+        self.assertGreater(trie.nb_pruned, 0)
+        self.assertEqual(self._hits(trie.get_highest_hits(1, depth=3)), [('bing.it/api/v2/health', 1030)])
+        self.assertEqual(trie.root.nb_hits, 2060)
+        self.assertEqual(self._hits(trie.get_highest_hits(1, depth=0)), [('bing.it', 1060)])
+
+    def test_batches_and_snapshot(self):
+        '''
+        Test case: random traffic collected in batches and one request at a time, then saved in a snapshot and
+                   restored in a new trie
+        Test output: same hits and traffic of the sections at every depth for the three tries
+        '''
+        generator = random.Random(4)
+        by_batch, by_record = SectionTrie(clock=self.clock), SectionTrie(clock=self.clock)
+        for _ in range(200):
+            self.clock.timestamp += generator.random()
+            batch = [HTTPInfo(method='GET', host=f"host{generator.randrange(3)}",
+                              path=f"/{generator.randrange(5)}/{generator.randrange(5)}/{generator.randrange(5)}",
+                              content_length=generator.randrange(1000))
+                     for _ in range(generator.randrange(20))]
+            by_batch.collect_batch(batch)
+            for http_info in batch:
+                by_record.collect_http_info(http_info)
+        writer = SnapshotWriter()
+        by_batch.write_state(writer)
+        restored = SectionTrie(clock=self.clock)
+        restored.read_state(SnapshotReader(writer.getvalue()))
+        for depth in range(4):
+            expected = sorted(by_record.get_highest_hits(1000, depth), key=lambda hit_info: hit_info.section)
+            for trie in [by_batch, restored]:
+                self.assertEqual(sorted(trie.get_highest_hits(1000, depth), key=lambda hit_info: hit_info.section),
+                                 expected)
+        self.assertEqual(restored.nb_nodes, by_record.nb_nodes)
+        with self.assertRaises(ValueError):
+            SectionTrie(max_depth=2).read_state(SnapshotReader(writer.getvalue()))
+
+    def test_controller_shows_hits_at_depth(self):
+        '''
+        Test case: capture replayed by a controller showing the highest hits two path segments deep
+        Test output: the view shows the sections of depth 2, the collector still counts the sections of depth 1
+        '''
+        capture_file, capture_path = tempfile.mkstemp(suffix='.pcap')
+        self.addCleanup(os.remove, capture_path)
+        paths = ['/api/v2/users', '/api/v2/orders', '/api/v1/users', '/api/v2/users/1']
+        with os.fdopen(capture_file, 'wb') as capture:
+            capture.write(build_pcap([(1000.0 + index, build_tcp_frame(build_http_request(path=path)))
+                                      for index, path in enumerate(paths)]))
+        clock = PacketClock()
+        view = RecordingView()
+        controller = Controller(view=view, update_period=10, http_collector=BasicCollector(clock=clock),
+                                sniffer_factory=partial(PcapSniffer, capture_path=capture_path, clock=clock),
+                                clock=clock, section_depth=3, hits_depth=2)
+        controller.replay()
+        self.assertEqual(self._hits(view.updates[-1]), [('bing.it/api/v2', 3), ('bing.it/api/v1', 1)])
+        self.assertEqual(self._hits(controller.http_collector.get_highest_hits()), [('bing.it/api', 4)])
+        self.assertEqual(controller.get_metrics().counters['section_nodes'], 7)
+        with self.assertRaises(ValueError):
+            Controller(view=view, sniffer_factory=partial(PcapSniffer, capture_path=capture_path), section_depth=1,
+                       hits_depth=2)
@@ -0,0 +1,86 @@
+import random
+from collections import Counter
+from unittest import TestCase
+from src.clocks.simulated_clock import SimulatedClock
+from src.interfaces.abstract_collector import HTTPInfo, HitInfo, TrafficPartial
+from src.collectors.basic_collector import BasicCollector
+from src.collectors.ring_buffer_collector import RingBufferCollector
+from src.collectors.section_windows import SectionWindows
+
+
+class TestSectionWindows(TestCase):
+
+    def setUp(self):
+        self.windows = SectionWindows(window_spans=[10, 120])
+
+    def test_hits_expire_from_each_window(self):
+        '''
+        Test case: hits on two sections at different instants, read over a 10 seconds and a 2 minutes window
+        Test output: each window only counts the hits of its span (as of the tick), ranked by hits
+        '''
+        self.windows.add('a', 100, 1000.0)
+        self.windows.add('a', 100, 1001.5)
+        self.windows.add('b', 10, 1005.0)
+        self.windows.add('b', 10, 1009.9)
+        self.assertEqual(self.windows.top(10, 10, 1010.0), [('a', 2, 200), ('b', 2, 20)])
+        self.windows.add('b', 10, 1012.0)
+        self.assertEqual(self.windows.top(10, 10, 1020.0), [('b', 1, 10)])
+        self.assertEqual(self.windows.top(120, 10, 1020.0), [('b', 3, 30), ('a', 2, 200)])
+        self.assertEqual(self.windows.top(120, 10, 1130.0), [('b', 1, 10)])
+        self.assertEqual(self.windows.top(120, 10, 2000.0), [])
+        with self.assertRaises(ValueError):
+            self.windows.top(600, 10, 2000.0)
+
+    def test_windows_match_full_recount(self):
+        '''
+        Test case: random hits over 15 minutes, windows read at every 10 seconds tick
+        Test output: window counts are the ones of a full recount of the hits of the span
+        '''
+        generator = random.Random(5)
+        hits = sorted((1000 + generator.random() * 900, generator.choice('abcdefgh')) for _ in range(3000))
+        windows = SectionWindows(window_spans=[10, 120, 600])
+        tick, index = 1010.0, 0
+        while tick <= 1900.0:
+            while index < len(hits) and hits[index][0] < tick:
+                windows.add(hits[index][1], 1, hits[index][0])
+                index += 1
+            for span in windows.window_spans:
+                expected = Counter(key for timestamp, key in hits[:index] if timestamp >= tick - span)
+                self.assertEqual({key: nb_hits for key, nb_hits, _ in windows.top(span, 10, tick)}, expected)
+            tick += 10
+
+    def test_late_hits(self):
+        self.windows.add('a', 1, 1100.0)
+        # older than the 10 seconds window, still in the 2 minutes one
+        self.windows.add('b', 1, 1050.0, nb_hits=3)
+        # older than all windows
+        self.windows.add('c', 1, 900.0)
+        self.assertEqual(self.windows.top(10, 10, 1100.0), [('a', 1, 1)])
+        self.assertEqual(self.windows.top(120, 10, 1100.0), [('b', 3, 1), ('a', 1, 1)])
+        self.assertEqual(self.windows.top(120, 10, 1175.0), [('a', 1, 1)])
+
+
+class TestCollectorWindows(TestCase):
+
+    def test_highest_hits_over_window(self):
+        '''
+        Test case: a section hit in the past, another one hit recently, read from both collectors
+        Test output: highest hits since the start and over the window differ, last hits are the actual ones
+        '''
+        for collector_class in [BasicCollector, RingBufferCollector]:
+            clock = SimulatedClock()
+            collector = collector_class(clock=clock, window_spans=[10, 120])
+            for timestamp, path in [(1000.0, '/old'), (1001.0, '/old'), (1002.0, '/old'), (1100.0, '/new')]:
+                clock.timestamp = timestamp
+                collector.collect_http_info(HTTPInfo(method='GET', host='bing.it', path=path, content_length=5))
+            clock.timestamp = 1105.0
+            self.assertEqual([hit.section for hit in collector.get_highest_hits(2)], ['bing.it/old', 'bing.it/new'])
+            self.assertEqual(collector.get_highest_hits(2, window=10),
+                             [HitInfo(section='bing.it/new', nb_hits=1, traffic=5, last_hit_traffic=5,
+                                      last_hit_timestamp=1100.0)])
+            collector.merge_partial(TrafficPartial(section_hits=[HitInfo('bing.it/old', 2, 20, 10, 1104.0)],
+                                                   traffic_per_second={1104: 20}))
+            self.assertEqual([(hit.section, hit.nb_hits, hit.traffic) for hit in collector.get_highest_hits(2, 10)],
+                             [('bing.it/old', 2, 20), ('bing.it/new', 1, 5)])
+            collector.clear()
+            self.assertEqual(collector.get_highest_hits(2, 120), [])
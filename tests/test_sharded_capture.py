@@ -0,0 +1,107 @@
+from threading import Lock
+from unittest import TestCase
+from src.interfaces.abstract_collector import HTTPInfo, HitInfo, TrafficPartial
+from src.interfaces.abstract_sniffer import AbstractSniffer
+from src.clocks.simulated_clock import SimulatedClock
+from src.collectors.basic_collector import BasicCollector
+from src.collectors.ring_buffer_collector import RingBufferCollector
+from src.collectors.partial_collector import PartialCollector
+from src.pipelines.sharded_capture import ShardedCapture
+
+
+class ReplaySniffer(AbstractSniffer):
+    """
+    Sniffer relaying a fixed list of HTTP requests when started.
+    """
+
+    def __init__(self, receive_http_callback):
+        self.receive_http_callback = receive_http_callback
+
+    def start(self):
+        for path in ['/a/1', '/a/2', '/b']:
+            self.receive_http_callback(HTTPInfo(method='POST', host='bing.it', path=path, content_length=100))
+
+    def stop(self):
+        pass
+
+
+class TestPartialMerge(TestCase):
+
+    def test_partial_collector_flush(self):
+        partial_collector = PartialCollector(clock=SimulatedClock(1000.5))
+        partial_collector.collect_http_info(HTTPInfo(method='GET', host='bing.it', path='/a/1', content_length=10))
+        partial_collector.collect_http_info(HTTPInfo(method='GET', host='bing.it', path='/a/2', content_length=20))
+        partial = partial_collector.flush()
+        self.assertEqual(partial, TrafficPartial(section_hits=[HitInfo(section='bing.it/a', nb_hits=2, traffic=30,
+                                                                       last_hit_traffic=20,
+                                                                       last_hit_timestamp=1000.5)],
+                                                 traffic_per_second={1000: 30}))
+        self.assertEqual(partial.statistics.nb_requests, 2)
+        self.assertEqual(partial_collector.flush(), TrafficPartial(section_hits=[], traffic_per_second={}))
+
+    def test_merge_partials_from_workers(self):
+        '''
+        Test case: partials of two workers, with hits on the same section, merged into each collector
+        Test output: hits, traffic and traffic history are the sum of the partials
+        '''
+        partials = [TrafficPartial(section_hits=[HitInfo('bing.it/a', 2, 200, 100, 1001.0),
+                                                 HitInfo('bing.it/b', 1, 50, 50, 1000.0)],
+                                   traffic_per_second={1000: 50, 1001: 200}),
+                    TrafficPartial(section_hits=[HitInfo('bing.it/b', 3, 30, 10, 1002.0)],
+                                   traffic_per_second={1000: 10, 1002: 20})]
+        clock = SimulatedClock(1002.0)
+        for collector in [BasicCollector(clock=clock), RingBufferCollector(clock=clock)]:
+            for partial in partials:
+                collector.merge_partial(partial)
+            self.assertEqual(collector.get_highest_hits(2), [HitInfo('bing.it/b', 4, 80, 10, 1002.0),
+                                                             HitInfo('bing.it/a', 2, 200, 100, 1001.0)])
+            self.assertEqual(collector.get_total_traffic(), 280)
+            self.assertEqual(collector.get_total_traffic_over_period(120), 280)
+            self.assertEqual(collector.get_total_traffic_over_period(1), 220)
+
+    def test_merged_history_is_bounded(self):
+        '''
+        Test case: partials of one second each merged for much longer than the traffic history span
+        Test output: the traffic history only keeps the seconds of the span
+        '''
+        clock = SimulatedClock(1000.0)
+        for collector in [BasicCollector(history_span=120, clock=clock),
+                          RingBufferCollector(history_span=120, clock=clock)]:
+            for second in range(1000, 6000):
+                clock.timestamp = second
+                collector.merge_partial(TrafficPartial(section_hits=[], traffic_per_second={second: 10}))
+            self.assertEqual(collector.get_total_traffic_over_period(100), 1010)
+            if isinstance(collector, BasicCollector):
+                self.assertEqual(len(collector.history_timestamps), 120)
+                self.assertEqual(len(collector.history_traffic), 120)
+
+
+class TestShardedCapture(TestCase):
+
+    def test_partials_of_workers_are_merged(self):
+        '''
+        Test case: two worker processes each relaying the same three requests, then stopped
+        Test output: the collector holds the traffic of both workers
+        '''
+        collector = BasicCollector()
+        sharded_capture = ShardedCapture(nb_workers=2, sniffer_factory=ReplaySniffer, http_collector=collector,
+                                         lock=Lock(), flush_period=0.1)
+        sharded_capture.start()
+        sharded_capture.stop()
+        self.assertEqual(collector.get_total_traffic(), 600)
+        self.assertEqual([(hit.section, hit.nb_hits) for hit in collector.get_highest_hits(2)],
+                         [('bing.it/a', 4), ('bing.it/b', 2)])
+
+    def test_workers_follow_the_clock(self):
+        '''
+        Test case: two worker processes relaying the same three requests with a simulated clock, then stopped
+        Test output: the requests are counted at the time of the simulated clock, not at the current time
+        '''
+        clock = SimulatedClock(1000.0)
+        collector = BasicCollector(clock=clock)
+        sharded_capture = ShardedCapture(nb_workers=2, sniffer_factory=ReplaySniffer, http_collector=collector,
+                                         lock=Lock(), flush_period=0.1, clock=clock)
+        sharded_capture.start()
+        sharded_capture.stop()
+        self.assertEqual([hit.last_hit_timestamp for hit in collector.get_highest_hits(2)], [1000.0, 1000.0])
+        self.assertEqual(collector.get_total_traffic_over_period(10), 600)
@@ -0,0 +1,190 @@
+import os
+import random
+import tempfile
+from functools import partial
+from unittest import TestCase
+from src.alert_managers.rule_alert_manager import RuleAlertManager
+from src.alert_managers.window_alert_manager import WindowAlertManager
+from src.clocks.packet_clock import PacketClock
+from src.clocks.simulated_clock import SimulatedClock
+from src.collectors.basic_collector import BasicCollector
+from src.collectors.ring_buffer_collector import RingBufferCollector
+from src.collectors.space_saving_collector import SpaceSavingCollector
+from src.controllers.controller import Controller
+from src.interfaces.abstract_alert_manager import AlertRule, AlertStatus, RuleAggregation
+from src.interfaces.abstract_collector import HTTPInfo
+from src.sniffers.pcap_sniffer import PcapSniffer
+from src.stores.snapshot import SnapshotReader, SnapshotWriter, write_snapshot_file
+from tests.packet_builder import build_http_request, build_pcap, build_tcp_frame
+from tests.test_pcap_sniffer import RecordingView
+
+
+def _snapshot(*components) -> bytes:
+    writer = SnapshotWriter()
+    for component in components:
+        component.write_state(writer)
+    return writer.getvalue()
+
+
+def _restore(snapshot: bytes, *components) -> None:
+    reader = SnapshotReader(snapshot)
+    for component in components:
+        component.read_state(reader)
+
+
+class TestSnapshot(TestCase):
+
+    def _random_traffic(self, generator, clock, consumers, nb_requests):
+        for _ in range(nb_requests):
+            clock.timestamp += generator.random() * 0.3
+            http_info = HTTPInfo(method=generator.choice(['GET', 'POST']), host=f"host{generator.randrange(5)}",
+                                 path=f"/{generator.randrange(30)}/x", content_length=generator.randrange(1000))
+            for consumer in consumers:
+                consumer.collect_http_info(http_info)
+
+    def test_collectors_restored(self):
+        '''
+        Test case: random traffic collected, collector saved in a snapshot and restored in a new collector,
+                   then the same traffic collected by both
+        Test output: highest hits (since the start and over each window), traffic over the history and summary
+                     statistics of the restored collector are the ones of the original one, before and after
+        '''
+        factories = [partial(BasicCollector, window_spans=[10, 120]),
+                     partial(RingBufferCollector, window_spans=[10, 120]),
+                     partial(SpaceSavingCollector, capacity=20)]
+        for factory in factories:
+            generator = random.Random(3)
+            clock = SimulatedClock(1000.0)
+            collector = factory(clock=clock)
+            self._random_traffic(generator, clock, [collector], 3000)
+            restored = factory(clock=clock)
+            _restore(_snapshot(collector), restored)
+            for _ in range(2):
+                windows = [None] if isinstance(collector, SpaceSavingCollector) else [None, 10, 120]
+                for window in windows:
+                    self.assertEqual(restored.get_highest_hits(10, window), collector.get_highest_hits(10, window))
+                self.assertEqual(restored.get_total_traffic_over_period(120),
+                                 collector.get_total_traffic_over_period(120))
+                self.assertEqual(restored.get_traffic_summary(), collector.get_traffic_summary())
+                self._random_traffic(generator, clock, [collector, restored], 500)
+
+    def test_alert_states_survive_restart(self):
+        '''
+        Test case: traffic over the limit and a rule going over its threshold, alert managers saved in a snapshot
+                   and restored in new ones, then the same traffic for all of them
+        Test output: restored managers emit no alert again for the ongoing incident, then the same recovery
+                     alerts at the same time as the original ones
+        '''
+        clock = SimulatedClock(1000.0)
+        rule = AlertRule(name='rate', metric='section_hits', threshold=0.5, window=10,
+                         aggregation=RuleAggregation.MEAN)
+        managers = [WindowAlertManager(traffic_limit=1000, history_span=20, clock=clock),
+                    RuleAlertManager(rules=[rule], clock=clock)]
+        for second in range(10):
+            clock.timestamp = 1000.0 + second
+            for manager in managers:
+                manager.collect_http_info(HTTPInfo(method='GET', host='bing.it', path='/a', content_length=200))
+        clock.timestamp = 1010.0
+        self.assertEqual([[alert.status for alert in manager.get_alert_infos()] for manager in managers],
+                         [[AlertStatus.OVER_THRESHOLD], [AlertStatus.OVER_THRESHOLD]])
+        restored = [WindowAlertManager(traffic_limit=1000, history_span=20, clock=clock),
+                    RuleAlertManager(rules=[rule], clock=clock)]
+        _restore(_snapshot(*managers), *restored)
+        statuses = []
+        for timestamp in [1012.0, 1021.0, 1030.0]:
+            clock.timestamp = timestamp
+            alert_infos = [manager.get_alert_infos() for manager in restored]
+            self.assertEqual(alert_infos, [manager.get_alert_infos() for manager in managers])
+            statuses.append([[alert.status for alert in manager_alerts] for manager_alerts in alert_infos])
+        self.assertEqual(statuses, [[[], []],
+                                    [[], [AlertStatus.UNDER_THRESHOLD]],
+                                    [[AlertStatus.UNDER_THRESHOLD], []]])
+
+    def test_invalid_snapshot_rejected(self):
+        '''
+        Test case: corrupted snapshot, snapshot of another collector, snapshot of windows of other spans
+        Test output: ValueError for each of them
+        '''
+        collector = BasicCollector(window_spans=[10], clock=SimulatedClock(1000.0))
+        collector.collect_http_info(HTTPInfo(method='GET', host='bing.it', path='/a', content_length=200))
+        snapshot = _snapshot(collector)
+        corrupted = bytearray(snapshot)
+        corrupted[20] ^= 1
+        for restored, data in [(BasicCollector(window_spans=[10]), bytes(corrupted)),
+                               (RingBufferCollector(window_spans=[10]), snapshot),
+                               (BasicCollector(window_spans=[10, 120]), snapshot),
+                               (BasicCollector(window_spans=[10]), snapshot[:-10])]:
+            with self.assertRaises(ValueError):
+                _restore(data, restored)
+
+    def test_controller_hot_restore(self):
+        '''
+        Test case: capture over the traffic limit replayed by a controller saving snapshots, then a new controller
+                   started from the snapshot during the incident
+        Test output: the new controller shows the alert over the limit, does not raise it again, and raises the
+                     recovery when the traffic leaves the window
+        '''
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        capture_path = os.path.join(directory.name, 'capture.pcap')
+        snapshot_path = os.path.join(directory.name, 'state.snapshot')
+        with open(capture_path, 'wb') as capture:
+            capture.write(build_pcap([(1000.0, build_tcp_frame(build_http_request(path='/a', content_length=600))),
+                                      (1001.0, build_tcp_frame(build_http_request(path='/a', content_length=600)))]))
+        clock = PacketClock()
+        view = RecordingView()
+        Controller(view=view, update_period=10, traffic_history_span=20, traffic_limit=1000,
+                   http_collector=BasicCollector(history_span=20, clock=clock),
+                   sniffer_factory=partial(PcapSniffer, capture_path=capture_path, clock=clock),
+                   clock=clock, snapshot_path=snapshot_path).replay()
+        self.assertEqual([alert.status for alert in view.all_alerts], [AlertStatus.OVER_THRESHOLD])
+        clock.timestamp = 1005.0
+        restarted_view = RecordingView()
+        restarted = Controller(view=restarted_view, update_period=10, traffic_history_span=20, traffic_limit=1000,
+                               http_collector=BasicCollector(history_span=20, clock=clock), clock=clock,
+                               sniffer_factory=partial(PcapSniffer, capture_path=capture_path, clock=clock),
+                               snapshot_path=snapshot_path)
+        self.assertEqual(restarted_view.all_alerts, view.all_alerts)
+        self.assertEqual([(hit.section, hit.nb_hits) for hit in restarted.http_collector.get_highest_hits(1)],
+                         [('bing.it/a', 2)])
+        self.assertEqual(restarted._manage_alerts(), [])
+        clock.timestamp = 1022.0
+        self.assertEqual([(alert.status, alert.timestamp) for alert in restarted._manage_alerts()],
+                         [(AlertStatus.UNDER_THRESHOLD, 1021.0)])
+
+    def test_controller_partial_restore_reset(self):
+        '''
+        Test case: snapshot of a controller with alert rules and a section trie, truncated just after the section
+                   of the rule alert manager, restored by a new controller
+        Test output: the snapshot is not restored, and every component restored before the error (the rule alert
+                     manager included) starts again from scratch
+        '''
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        snapshot_path = os.path.join(directory.name, 'state.snapshot')
+        clock = SimulatedClock(1000.0)
+        rule = AlertRule(name='rate', metric='section_hits', threshold=0.5, window=10,
+                         aggregation=RuleAggregation.MEAN)
+        controller = Controller(view=RecordingView(), traffic_limit=1000, alert_rules=[rule], section_depth=2,
+                                http_collector=BasicCollector(clock=clock), clock=clock)
+        for second in range(10):
+            clock.timestamp = 1000.0 + second
+            http_info = HTTPInfo(method='GET', host='bing.it', path='/a', content_length=200)
+            controller.http_collector.collect_http_info(http_info)
+            controller.rule_alert_manager.collect_http_info(http_info)
+        clock.timestamp = 1010.0
+        self.assertEqual([alert.status for alert in controller.rule_alert_manager.get_alert_infos()],
+                         [AlertStatus.OVER_THRESHOLD])
+        components = controller._state_components()
+        self.assertIs(components[-1], controller.section_trie)
+        write_snapshot_file(snapshot_path, _snapshot(*components[:-1]))
+        restarted = Controller(view=RecordingView(), traffic_limit=1000, alert_rules=[rule], section_depth=2,
+                               http_collector=BasicCollector(clock=clock), clock=clock, snapshot_path=snapshot_path)
+        self.assertEqual(restarted.http_collector.get_total_traffic(), 0)
+        self.assertEqual(restarted.rule_alert_manager.nb_series, len(restarted.rule_alert_manager.total_metrics))
+        self.assertEqual(restarted.rule_alert_manager.states.tolist(), [])
+        clock.timestamp = 1011.0
+        restarted.rule_alert_manager.collect_http_info(HTTPInfo(method='GET', host='bing.it', path='/a',
+                                                                content_length=200))
+        clock.timestamp = 1012.0
+        self.assertEqual(restarted.rule_alert_manager.get_alert_infos(), [])
@@ -0,0 +1,76 @@
+from collections import Counter
+from unittest import TestCase
+from src.clocks.simulated_clock import SimulatedClock
+from src.interfaces.abstract_collector import HitInfo, HTTPInfo, TrafficPartial
+from src.collectors.space_saving_collector import SpaceSavingCollector
+from benchmarks.traffic_generator import TrafficGenerator
+
+
+class TestSpaceSavingCollector(TestCase):
+
+    def setUp(self):
+        self.clock = SimulatedClock(1000.0)
+        self.collector = SpaceSavingCollector(capacity=3, clock=self.clock)
+
+    def _hit(self, section, nb_hits, content_length=10):
+        for _ in range(nb_hits):
+            self.collector.collect_http_info(HTTPInfo(method='GET', host='http://bing.it', path=section,
+                                                      content_length=content_length))
+
+    def test_exact_below_capacity(self):
+        self._hit('/a', 3)
+        self._hit('/b', 1)
+        hits = self.collector.get_highest_hits()
+        self.assertEqual([(hit.section, hit.nb_hits, hit.nb_hits_error, hit.traffic) for hit in hits],
+                         [('http://bing.it/a', 3, 0, 30), ('http://bing.it/b', 1, 0, 10)])
+        self.assertNotIn('±', repr(hits[0]))
+
+    def test_eviction_reports_error(self):
+        '''
+        Test case: a fourth section arrives in a collector full of three sections
+        Test output: the section with the fewest hits is evicted, the new section inherits its count as error
+        '''
+        self._hit('/a', 5)
+        self._hit('/b', 3)
+        self._hit('/c', 2)
+        self._hit('/d', 1)
+        hits = {hit.section: hit for hit in self.collector.get_highest_hits()}
+        self.assertEqual(set(hits), {'http://bing.it/a', 'http://bing.it/b', 'http://bing.it/d'})
+        self.assertEqual((hits['http://bing.it/d'].nb_hits, hits['http://bing.it/d'].nb_hits_error), (3, 2))
+        self.assertEqual(hits['http://bing.it/d'].traffic, 10)
+        self.assertIn('3 ± 2', repr(hits['http://bing.it/d']))
+        self.assertEqual(self.collector.get_total_traffic(), 110)
+        self.assertEqual(self.collector.get_total_traffic_over_period(10), 110)
+
+    def test_heavy_hitters_in_fixed_memory(self):
+        '''
+        Test case: 20000 requests over 5000 sections following a Zipf law, counted in 100 counters
+        Test output: memory stays bounded, the 10 most hit sections are found and true counts are within the
+                     reported error bounds, themselves below N / capacity
+        '''
+        collector = SpaceSavingCollector(capacity=100, clock=self.clock)
+        exact = Counter()
+        for _, http_info in TrafficGenerator(nb_sections=5000, zipf_skew=1.2, seed=3).generate(20000):
+            collector.collect_http_info(http_info)
+            exact[http_info.extract_section()] += 1
+        self.assertEqual(len(collector.http_container), 100)
+        hits = collector.get_highest_hits(10)
+        self.assertEqual({hit.section for hit in hits}, {section for section, _ in exact.most_common(10)})
+        for hit in hits:
+            self.assertLessEqual(hit.nb_hits - hit.nb_hits_error, exact[hit.section])
+            self.assertLessEqual(exact[hit.section], hit.nb_hits)
+            self.assertLessEqual(hit.nb_hits_error, collector.get_error_bound())
+
+    def test_merge_partial(self):
+        self._hit('/a', 1)
+        self.collector.merge_partial(TrafficPartial(section_hits=[HitInfo(section='http://bing.it/a', nb_hits=4,
+                                                                          traffic=40, last_hit_timestamp=1000.0),
+                                                                  HitInfo(section='http://bing.it/b', nb_hits=2,
+                                                                          traffic=20, nb_hits_error=1)],
+                                                     traffic_per_second={1000: 60}))
+        hits = self.collector.get_highest_hits()
+        self.assertEqual([(hit.section, hit.nb_hits, hit.nb_hits_error) for hit in hits],
+                         [('http://bing.it/a', 5, 0), ('http://bing.it/b', 2, 1)])
+        self.assertEqual(self.collector.get_total_traffic_over_period(10), 70)
+        self.collector.clear()
+        self.assertEqual(self.collector.get_highest_hits(), [])
@@ -0,0 +1,66 @@
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+from threading import Timer
+from unittest import TestCase
+from src.clocks.real_clock import RealClock
+from src.collectors.basic_collector import BasicCollector
+from src.interfaces.abstract_sniffer import AbstractSniffer
+from src.main import main
+from src.views.multi_view import MultiView
+from src.views.ndjson_view import NDJSONView
+
+ROOT = os.path.join(os.path.dirname(__file__), os.pardir)
+
+
+class IdleSniffer(AbstractSniffer):
+    """
+    Sniffer capturing nothing.
+    """
+
+    def __init__(self, receive_http_callback):
+        self.receive_http_callback = receive_http_callback
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+class TestStartup(TestCase):
+
+    def test_only_selected_backend_imported(self):
+        '''
+        Test case: main module imported in a new interpreter, then the raw socket sniffer
+        Test output: neither scapy, numpy, curses nor asyncio imported on startup, nor by the raw socket sniffer
+        '''
+        code = "import sys\n" \
+               "import src.main\n" \
+               "import src.sniffers.raw_socket_sniffer\n" \
+               "print(sorted(module for module in ['scapy', 'numpy', 'curses', 'asyncio'] if module in sys.modules))"
+        completed = subprocess.run([sys.executable, '-c', code], stdout=subprocess.PIPE, check=True, cwd=ROOT,
+                                   universal_newlines=True)
+        self.assertEqual(completed.stdout.splitlines()[-1], '[]')
+
+    def test_daemon_stops_on_signal(self):
+        '''
+        Test case: headless monitor (export view only) running in the main thread, sent SIGTERM
+        Test output: the monitor stops cleanly: the snapshot is saved when stopping, the previous signal handler
+                     is restored
+        '''
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        snapshot_path = os.path.join(directory.name, 'state.snapshot')
+        view = MultiView([NDJSONView(os.path.join(directory.name, 'events.ndjson'))])
+        self.addCleanup(view.close)
+        previous_handler = signal.getsignal(signal.SIGTERM)
+        timer = Timer(0.5, os.kill, (os.getpid(), signal.SIGTERM))
+        timer.start()
+        self.addCleanup(timer.cancel)
+        clock = RealClock()
+        main(view, BasicCollector(clock=clock), IdleSniffer, clock, snapshot_path=snapshot_path, headless=True)
+        self.assertTrue(os.path.exists(snapshot_path))
+        self.assertIs(signal.getsignal(signal.SIGTERM), previous_handler)
@@ -0,0 +1,174 @@
+import os
+import tempfile
+from unittest import TestCase
+from src.interfaces.abstract_collector import HTTPInfo
+from src.sniffers.pcap_sniffer import PcapSniffer
+from src.sniffers.raw_http_parser import parse_ethernet_segment
+from src.sniffers.tcp_reassembly import TCPReassembler
+from tests.packet_builder import build_http_request, build_pcap, build_tcp_frame
+
+FIN_ACK = 0x11
+RST = 0x04
+SYN = 0x02
+
+
+def _split(data: bytes, *cuts: int):
+    """
+    Segments of data cut at the given offsets, with their sequence numbers (starting at 1000).
+    """
+    bounds = [0, *cuts, len(data)]
+    return [(1000 + start, data[start:end]) for start, end in zip(bounds, bounds[1:])]
+
+
+class TestTCPReassembly(TestCase):
+
+    def setUp(self):
+        self.reassembler = TCPReassembler(server_ports=(80,))
+        self.timestamp = 1000.0
+
+    def _request(self, payload: bytes, seq: int, src_port: int = 40000, flags: int = 0x18) -> None:
+        self._add(build_tcp_frame(payload, src_port=src_port, seq=seq, flags=flags))
+
+    def _response(self, payload: bytes, seq: int, dst_port: int = 40000, flags: int = 0x18) -> None:
+        self._add(build_tcp_frame(payload, src_port=80, dst_port=dst_port, src_ip=bytes([10, 0, 0, 2]),
+                                  dst_ip=bytes([10, 0, 0, 1]), seq=seq, flags=flags))
+
+    def _add(self, frame: bytes) -> None:
+        self.timestamp += 0.01
+        self.reassembler.add_segment(frame, parse_ethernet_segment(frame), self.timestamp)
+
+    def test_headers_split_across_segments(self):
+        '''
+        Test case: request whose headers are cut in the middle of a header and of the empty line ending them,
+                   followed by its body, then a response with a Content-Length in two segments
+        Test output: the request is parsed once its headers are complete, and relayed when its response is
+                     complete, with the bytes of the request and response as content length
+        '''
+        request = build_http_request(method='POST', path='/a/b', content_length=30)
+        response = b"HTTP/1.1 200 OK\r\nContent-Length: 50\r\n\r\n" + b'x' * 50
+        head_end = request.index(b'\r\n\r\n')
+        for seq, payload in _split(request, 20, head_end + 2, head_end + 10):
+            self._request(payload, seq)
+        for seq, payload in _split(response, 60):
+            self.assertEqual(self.reassembler.pop_exchanges(), [])
+            self._response(payload, seq + 5000)
+        self.assertEqual(self.reassembler.pop_exchanges(),
+                         [HTTPInfo(method='POST', host='bing.it', path='/a/b',
+                                   content_length=len(request) + len(response))])
+        self.assertEqual(self.reassembler.buffered, 0)
+
+    def test_out_of_order_and_retransmitted_segments(self):
+        '''
+        Test case: request without Content-Length in three segments received out of order, retransmitted and
+                   overlapping, then the connection closed by the server without response
+        Test output: the request is parsed once, its bytes counted once, and relayed on the close
+        '''
+        request = b"GET /a/1 HTTP/1.1\r\nHost: bing.it\r\nUser-Agent: test\r\n\r\n"
+        segments = _split(request, 10, 30)
+        for seq, payload in [segments[2], segments[0], segments[0], segments[1], segments[2]]:
+            self._request(payload, seq)
+        self._request(request[5:35], 1005)
+        self.assertEqual(self.reassembler.pop_exchanges(), [])
+        self._response(b'', 7000, flags=FIN_ACK)
+        self.assertEqual(self.reassembler.pop_exchanges(),
+                         [HTTPInfo(method='GET', host='bing.it', path='/a/1', content_length=len(request))])
+        self.assertEqual(len(self.reassembler.flows), 0)
+
+    def test_keep_alive_exchanges(self):
+        '''
+        Test case: requests on a persistent connection: chunked response, response to a HEAD request with a
+                   Content-Length, interim 100 Continue before the final response, request with a chunked body
+                   and no response before the next request
+        Test output: each exchange ends with its response, or with the next request, with its bytes transferred
+        '''
+        client, server = 1000, 5000
+        exchanges = [
+            (b"GET /chunked HTTP/1.1\r\nHost: bing.it\r\n\r\n",
+             [b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n5\r\nhello\r\n", b"0\r\n", b"\r\n"]),
+            (b"HEAD /head HTTP/1.1\r\nHost: bing.it\r\n\r\n", [b"HTTP/1.1 200 OK\r\nContent-Length: 1000\r\n\r\n"]),
+            (b"PUT /upload HTTP/1.1\r\nHost: bing.it\r\nContent-Length: 4\r\nExpect: 100-continue\r\n\r\n",
+             [b"HTTP/1.1 100 Continue\r\n\r\n", b"HTTP/1.1 201 Created\r\nContent-Length: 2\r\n\r\nok"]),
+            (b"POST /chunked HTTP/1.1\r\nHost: bing.it\r\nTransfer-Encoding: chunked\r\n\r\n", []),
+        ]
+        expected = []
+        for request, responses in exchanges:
+            self._request(request, client)
+            client += len(request)
+            if request.startswith(b'PUT'):
+                self._request(b'data', client)
+                client += 4
+                request += b'data'
+            if request.startswith(b'POST'):
+                body = b'3\r\nabc\r\n0\r\n\r\n'
+                self._request(body, client)
+                client += len(body)
+                request += body
+            for response in responses:
+                self._response(response, server)
+                server += len(response)
+            path = request.split(b' ')[1].decode()
+            expected.append(HTTPInfo(method=request.split(b' ')[0].decode(), host='bing.it', path=path,
+                                     content_length=len(request) + sum(len(response) for response in responses)))
+        self.assertEqual(self.reassembler.pop_exchanges(), expected[:3])
+        self._request(b"GET /next HTTP/1.1\r\nHost: bing.it\r\n\r\n", client)
+        self.assertEqual(self.reassembler.pop_exchanges(), expected[3:])
+
+    def test_memory_is_bounded(self):
+        '''
+        Test case: SYN flood, many connections with incomplete headers, headers longer than the limit,
+                   too many bytes out of order, then no segment for longer than the idle timeout
+        Test output: handshakes keep no state, the least recently active flows are evicted beyond the maximum,
+                     too long headers and missing bytes are given up, idle flows are evicted with their exchange
+        '''
+        reassembler = self.reassembler = TCPReassembler(server_ports=(80,), max_flows=10, max_head_size=100,
+                                                        max_out_of_order=200, idle_timeout=5)
+        for port in range(1000, 2000):
+            self._request(b'', 0, src_port=port, flags=SYN)
+        self.assertEqual(len(reassembler.flows), 0)
+        for port in range(1000, 1050):
+            self._request(b"GET /a HTTP/1.1\r\nHost: bing.it\r\n", 0, src_port=port)
+        self.assertEqual(len(reassembler.flows), 10)
+        self.assertEqual(reassembler.metrics.flows_evicted, 40)
+        self.assertEqual(reassembler.buffered, 10 * 32)
+        # headers too long
+        self._request(b'X-Long: ' + b'x' * 100 + b"\r\n", 32, src_port=1049)
+        self.assertEqual(reassembler.metrics.decode_failures, 1)
+        self.assertEqual(reassembler.buffered, 9 * 32)
+        # gap given up: the stream resumes with the next request
+        self._request(b'y' * 150, 500, src_port=1048)
+        self._request(b'z' * 100, 800, src_port=1048)
+        self._request(b"GET /b HTTP/1.1\r\nHost: bing.it\r\n\r\n", 1000, src_port=1048)
+        self.assertEqual(reassembler.metrics.stream_gaps, 2)
+        self.assertEqual(reassembler.pop_exchanges(), [])
+        self._request(b'', 0, src_port=1047, flags=RST)
+        self.assertEqual(reassembler.pop_exchanges(), [])
+        self.timestamp += 10
+        self._request(b'', 0, src_port=1000, flags=SYN)
+        self.assertEqual(len(reassembler.flows), 0)
+        self.assertEqual(reassembler.buffered, 0)
+        self.assertEqual([http_info.path for http_info in reassembler.pop_exchanges()], ['/b'])
+
+    def test_pcap_replay_with_reassembly(self):
+        '''
+        Test case: capture of a request split in two segments and its response, replayed with the reassembly,
+                   and a request without response still open at the end of the capture
+        Test output: both requests relayed, with the bytes transferred as content length
+        '''
+        request = build_http_request(path='/a/1', content_length=10)
+        response = b"HTTP/1.1 204 No Content\r\n\r\n"
+        frames = [(1000.0, build_tcp_frame(request[:25], seq=1)),
+                  (1000.1, build_tcp_frame(request[25:], seq=26)),
+                  (1000.2, build_tcp_frame(response, src_port=80, dst_port=40000, src_ip=bytes([10, 0, 0, 2]),
+                                           dst_ip=bytes([10, 0, 0, 1]))),
+                  (1001.0, build_tcp_frame(build_http_request(path='/b', content_length=0), src_port=40001))]
+        capture_file, capture_path = tempfile.mkstemp(suffix='.pcap')
+        self.addCleanup(os.remove, capture_path)
+        with os.fdopen(capture_file, 'wb') as capture:
+            capture.write(build_pcap(frames))
+        received = []
+        sniffer = PcapSniffer(received.append, capture_path=capture_path, reassemble=True)
+        sniffer.replay()
+        self.assertEqual([(http_info.path, http_info.content_length) for http_info in received],
+                         [('/a/1', len(request) + len(response)),
+                          ('/b', len(build_http_request(path='/b', content_length=0)))])
+        self.assertEqual(sniffer.metrics.http_parsed, 2)
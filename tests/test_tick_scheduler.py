@@ -0,0 +1,101 @@
+from threading import Event
+from typing import List
+from unittest import TestCase
+from src.interfaces.abstract_collector import HitInfo
+from src.interfaces.abstract_sniffer import AbstractSniffer
+from src.interfaces.abstract_view import AbstractView
+from src.clocks.simulated_clock import SimulatedClock
+from src.clocks.tick_scheduler import TickScheduler
+from src.controllers.controller import Controller
+
+
+class IdleSniffer(AbstractSniffer):
+
+    def __init__(self, receive_http_callback):
+        self.receive_http_callback = receive_http_callback
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+class StoppingView(AbstractView):
+    """
+    View keeping the clock time of every update, stopping the controller after nb_updates updates.
+    """
+
+    def __init__(self, clock, nb_updates):
+        super().__init__(clock)
+        self.nb_updates = nb_updates
+        self.controller = None
+        self.update_times: List[float] = []
+
+    def update_highest_hits(self, highest_hits: List[HitInfo]) -> None:
+        self.update_times.append(self.clock.now())
+        if len(self.update_times) == self.nb_updates:
+            self.controller.stop()
+
+    def print_alert_info(self) -> None:
+        pass
+
+
+class TestTickScheduler(TestCase):
+
+    def setUp(self):
+        self.clock = SimulatedClock(1003.7)
+        self.stop_event = Event()
+
+    def test_ticks_on_fixed_boundaries(self):
+        '''
+        Test case: ticks handled in a varying time (less than a period)
+        Test output: ticks are on the multiples of the period, the handling time does not delay the next ticks
+        '''
+        scheduler = TickScheduler(clock=self.clock, period=10)
+        ticks = []
+        for handling_time in [0.0, 3.0, 9.5]:
+            ticks.append(scheduler.wait_next_tick(self.stop_event))
+            self.clock.advance(handling_time)
+        ticks.append(scheduler.wait_next_tick(self.stop_event))
+        self.assertEqual(ticks, [1010.0, 1020.0, 1030.0, 1040.0])
+        self.assertEqual(self.clock.now(), 1040.0)
+        self.assertEqual(scheduler.nb_skipped_ticks, 0)
+
+    def test_late_ticks_are_skipped(self):
+        '''
+        Test case: tick handled in more than two periods
+        Test output: the next tick is the last boundary passed, the ticks before it are skipped
+        '''
+        scheduler = TickScheduler(clock=self.clock, period=10)
+        self.assertEqual(scheduler.wait_next_tick(self.stop_event), 1010.0)
+        self.clock.advance(25)
+        self.assertEqual(scheduler.wait_next_tick(self.stop_event), 1030.0)
+        self.assertEqual(self.clock.now(), 1035.0)
+        self.assertEqual(scheduler.nb_skipped_ticks, 1)
+        self.assertEqual(scheduler.wait_next_tick(self.stop_event), 1040.0)
+
+    def test_wait_interrupted(self):
+        scheduler = TickScheduler(clock=self.clock, period=10)
+        self.stop_event.set()
+        self.assertIsNone(scheduler.wait_next_tick(self.stop_event))
+        self.assertEqual(self.clock.now(), 1003.7)
+
+    def test_due_ticks(self):
+        scheduler = TickScheduler(clock=self.clock, period=0.1, start=1000.0)
+        self.assertEqual(len(list(scheduler.due_ticks(1000.05))), 0)
+        # ticks are computed from their index: no rounding error accumulated over thousands of ticks
+        ticks = list(scheduler.due_ticks(1300.0))
+        self.assertEqual(len(ticks), 3000)
+        self.assertEqual(ticks[-1], 1300.0)
+
+    def test_controller_runs_on_simulated_clock(self):
+        '''
+        Test case: controller started with a simulated clock, stopped by the view after 3 updates
+        Test output: updates happen at the tick times, without waiting for the wall clock
+        '''
+        view = StoppingView(self.clock, nb_updates=3)
+        controller = Controller(view=view, update_period=10, sniffer_factory=IdleSniffer, clock=self.clock)
+        view.controller = controller
+        controller.start()
+        self.assertEqual(view.update_times, [1010.0, 1020.0, 1030.0])
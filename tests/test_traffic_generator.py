@@ -0,0 +1,44 @@
+import argparse
+import json
+from collections import Counter
+from unittest import TestCase
+from benchmarks.traffic_generator import TrafficGenerator
+from benchmarks.bench_pipeline import COLLECTORS, run
+
+
+class TestTrafficGenerator(TestCase):
+
+    def test_stream_is_reproducible(self):
+        generator = TrafficGenerator(rate=100, nb_sections=50, seed=7)
+        first = list(generator.generate(1000))
+        self.assertEqual(first, list(TrafficGenerator(rate=100, nb_sections=50, seed=7).generate(1000)))
+        timestamps = [timestamp for timestamp, _ in first]
+        self.assertEqual(timestamps, sorted(timestamps))
+        # Poisson arrivals at 100 requests per second: about 10 seconds of traffic
+        self.assertAlmostEqual(timestamps[-1] - generator.start, 10, delta=2)
+
+    def test_zipf_skew(self):
+        '''
+        Test case: sections hit following a Zipf law of exponent 1, then uniformly
+        Test output: the most popular section is hit about twice as often as the second one, and all sections
+                     are hit alike when uniform
+        '''
+        hits = Counter(http_info.extract_section()
+                       for _, http_info in TrafficGenerator(nb_sections=100, zipf_skew=1.0).generate(20000))
+        first, second = TrafficGenerator().section_of(0), TrafficGenerator().section_of(1)
+        self.assertAlmostEqual(hits[''.join(first)] / hits[''.join(second)], 2, delta=0.3)
+        uniform_hits = Counter(http_info.extract_section()
+                               for _, http_info in TrafficGenerator(nb_sections=10, zipf_skew=0).generate(20000))
+        self.assertEqual(len(uniform_hits), 10)
+        self.assertLess(max(uniform_hits.values()) / min(uniform_hits.values()), 1.2)
+
+    def test_benchmark_report_is_machine_readable(self):
+        args = argparse.Namespace(requests=2000, rate=100.0, sections=50, zipf=1.0, hosts=5, seed=0, repeat=1,
+                                  frames=0, rules=8, collectors=list(COLLECTORS))
+        report = json.loads(json.dumps(run(args)))
+        self.assertEqual(set(report['results']['collect']), set(COLLECTORS))
+        self.assertGreater(report['results']['collect']['basic']['ns_per_request'], 0)
+        # 20 seconds of traffic: a tick every 10 seconds
+        self.assertGreaterEqual(report['results']['tick']['ring']['get_highest_hits']['count'], 1)
+        self.assertGreater(report['results']['memory']['basic']['peak_bytes'], 0)
+        self.assertEqual(report['results']['alert_rules']['rules'], 8)
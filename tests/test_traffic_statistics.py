@@ -0,0 +1,102 @@
+import random
+from unittest import TestCase
+from src.clocks.simulated_clock import SimulatedClock
+from src.interfaces.abstract_collector import HTTPInfo, TrafficSummary
+from src.collectors.partial_collector import PartialCollector
+from src.collectors.ring_buffer_collector import RingBufferCollector
+from src.stats.hyper_log_log import HyperLogLog
+from src.stats.quantile_sketch import QuantileSketch
+from src.stats.traffic_statistics import TrafficStatistics, MAX_METHODS, OTHER_METHODS
+from src.views.format_summary import format_summary
+
+
+class TestSketches(TestCase):
+
+    def test_hyper_log_log_estimate(self):
+        '''
+        Test case: 50000 distinct hosts added twice, split between two sketches then merged, and a few hosts
+        Test output: estimates are within a few standard errors (1.6%), small cardinalities are about exact
+        '''
+        first, second = HyperLogLog(), HyperLogLog()
+        for index in range(50000):
+            host = f"host{index}.example.com"
+            first.add(host)
+            (first if index % 2 else second).add(host)
+        self.assertAlmostEqual(second.estimate(), 25000, delta=25000 * 0.05)
+        second.merge(first)
+        self.assertAlmostEqual(second.estimate(), 50000, delta=50000 * 0.05)
+        self.assertEqual(len(second.registers), 4096)
+        few = HyperLogLog()
+        for host in ['a', 'b', 'c', 'a']:
+            few.add(host)
+        self.assertEqual(few.estimate(), 3)
+        with self.assertRaises(ValueError):
+            few.merge(HyperLogLog(precision=10))
+
+    def test_quantiles_within_relative_accuracy(self):
+        '''
+        Test case: log-normal content lengths (plus empty requests), split between two sketches then merged
+        Test output: percentiles are within 1% of the exact ones
+        '''
+        generator = random.Random(1)
+        values = [int(generator.lognormvariate(7, 1.5)) for _ in range(20000)] + [0] * 100
+        first, second = QuantileSketch(), QuantileSketch()
+        for index, value in enumerate(values):
+            (first if index % 3 else second).add(value)
+        first.merge(second)
+        values.sort()
+        for fraction in [0.5, 0.95, 0.99]:
+            exact = values[int(fraction * (len(values) - 1))]
+            self.assertAlmostEqual(first.quantile(fraction), exact, delta=exact * 0.01 + 1)
+        self.assertEqual(first.quantile(0.001), 0)
+        self.assertEqual(QuantileSketch().quantile(0.5), 0)
+
+
+class TestTrafficStatistics(TestCase):
+
+    def test_summary(self):
+        '''
+        Test case: requests of several methods from two hosts over 20 seconds
+        Test output: summary counts requests, traffic, methods and hosts, rates are over the last 10 seconds
+        '''
+        statistics = TrafficStatistics(rate_span=10)
+        for second in range(20):
+            statistics.add(HTTPInfo(method='GET', host='bing.it', path='/', content_length=100), 1000.0 + second)
+            if second >= 10:
+                statistics.add(HTTPInfo(method='POST', host='qwant.fr', path='/', content_length=1000),
+                               1000.0 + second)
+        summary = statistics.summary(1020.0)
+        self.assertIsInstance(summary, TrafficSummary)
+        self.assertEqual((summary.nb_requests, summary.total_traffic), (30, 12000))
+        self.assertEqual((summary.request_rate, summary.traffic_rate), (2.0, 1100.0))
+        self.assertEqual((summary.methods, summary.nb_hosts), ({'GET': 20, 'POST': 10}, 2))
+        self.assertAlmostEqual(summary.content_length_p50, 100, delta=1)
+        self.assertAlmostEqual(summary.content_length_p99, 1000, delta=10)
+        self.assertEqual(format_summary(summary)[1], 'methods: GET 66.7% | POST 33.3%')
+
+    def test_methods_are_bounded(self):
+        statistics = TrafficStatistics()
+        for index in range(MAX_METHODS + 5):
+            statistics.add(HTTPInfo(method=f"M{index}", host='bing.it', path='/', content_length=0), 1000.0)
+        self.assertEqual(len(statistics.methods), MAX_METHODS + 1)
+        self.assertEqual(statistics.methods[OTHER_METHODS], 5)
+
+    def test_merged_partials(self):
+        '''
+        Test case: requests collected by two workers, merged into a collector
+        Test output: the summary of the collector is the one of all the requests
+        '''
+        clock = SimulatedClock(1000.0)
+        workers = [PartialCollector(clock=clock), PartialCollector(clock=clock)]
+        for index in range(100):
+            workers[index % 2].collect_http_info(HTTPInfo(method='GET' if index % 4 else 'PUT',
+                                                          host=f"host{index % 7}", path='/a', content_length=index))
+        collector = RingBufferCollector(clock=clock)
+        for worker in workers:
+            collector.merge_partial(worker.flush())
+        clock.timestamp = 1001.0
+        summary = collector.get_traffic_summary()
+        self.assertEqual((summary.nb_requests, summary.total_traffic), (100, 4950))
+        self.assertEqual((summary.methods, summary.nb_hosts), ({'GET': 75, 'PUT': 25}, 7))
+        self.assertAlmostEqual(summary.content_length_p50, 49, delta=1)
+        self.assertEqual(summary.request_rate, 10.0)
@@ -0,0 +1,180 @@
+import os
+import random
+import tempfile
+from contextlib import nullcontext
+from functools import partial
+from unittest import TestCase
+from src.clocks.packet_clock import PacketClock
+from src.clocks.simulated_clock import SimulatedClock
+from src.interfaces.abstract_alert_manager import AlertInfo, AlertStatus
+from src.interfaces.abstract_collector import HTTPInfo
+from src.collectors.basic_collector import BasicCollector
+from src.collectors.ring_buffer_collector import RingBufferCollector
+from src.controllers.controller import Controller
+from src.sniffers.pcap_sniffer import PcapSniffer
+from src.stores.traffic_recorder import TrafficRecorder, restore_collector
+from src.stores.traffic_store import TrafficStore
+from tests.packet_builder import build_http_request, build_pcap, build_tcp_frame
+from tests.test_pcap_sniffer import RecordingView
+
+
+class TestTrafficStore(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def _open(self):
+        store = TrafficStore(self.directory)
+        self.addCleanup(store.close)
+        return store
+
+    def test_range_queries(self):
+        '''
+        Test case: records of three buckets appended in two batches, then queried over ranges of buckets
+        Test output: totals per bucket and per section over the range, records in bucket order,
+                     records out of bucket order are rejected
+        '''
+        store = self._open()
+        store.append([(1000, 'bing.it/a', 2, 200), (1000, 'bing.it/b', 1, 10)])
+        store.append([(1001, 'bing.it/a', 1, 100), (1005, 'qwant.fr/c', 3, 3000)])
+        self.assertEqual(store.total_traffic(1000, 1002), 310)
+        self.assertEqual(store.traffic_per_bucket(1001, 2000), {1001: 100, 1005: 3000})
+        self.assertEqual(store.section_totals(0, 1002), {'bing.it/a': (3, 300), 'bing.it/b': (1, 10)})
+        self.assertEqual(list(store.records(1001, 1006)), [(1001, 'bing.it/a', 1, 100), (1005, 'qwant.fr/c', 3, 3000)])
+        self.assertEqual(store.total_traffic(2000, 3000), 0)
+        with self.assertRaises(ValueError):
+            store.append([(1004, 'bing.it/a', 1, 1)])
+
+    def test_reopen_after_partial_write(self):
+        '''
+        Test case: store closed after records and alerts, a record and a section then written partially (crash)
+        Test output: the store is opened again with the records and alerts written entirely, and appended to
+        '''
+        store = self._open()
+        store.append([(1000, 'bing.it/a', 2, 200), (1001, 'bing.it/b', 1, 10)])
+        alert = AlertInfo(status=AlertStatus.OVER_THRESHOLD, traffic_value=12000, timestamp=1001.5)
+        store.append_alerts([alert])
+        store.close()
+        with open(os.path.join(self.directory, 'bytes.i8'), 'ab') as column:
+            column.write(b'\x01\x02\x03')
+        with open(os.path.join(self.directory, 'sections.txt'), 'a') as sections:
+            sections.write('bing.it/parti')
+        store = self._open()
+        self.assertEqual((store.nb_records, store.sections), (2, ['bing.it/a', 'bing.it/b']))
+        self.assertEqual(store.read_alerts(), [alert])
+        store.append([(1002, 'bing.it/c', 1, 5)])
+        self.assertEqual(store.section_totals(1000, 1003),
+                         {'bing.it/a': (2, 200), 'bing.it/b': (1, 10), 'bing.it/c': (1, 5)})
+
+    def test_reopen_with_line_separators_in_sections(self):
+        '''
+        Test case: sections with line separators in their paths ('\\r', '\\x85', '\\u2028', '\\n'), then a plain
+                   section, store opened again and appended to
+        Test output: the section dictionary is the same ('\\n' escaped), the totals are reported under the right
+                     sections
+        '''
+        store = self._open()
+        sections = ['h/a\x85b', 'h/c\rd', 'h/e\u2028f\x1cg', 'h/i\nj', 'h/h']
+        store.append([(1000, section, 1, 10 * (index + 1)) for index, section in enumerate(sections)])
+        store.close()
+        store = self._open()
+        stored_sections = ['h/a\x85b', 'h/c\rd', 'h/e\u2028f\x1cg', 'h/i\\nj', 'h/h']
+        self.assertEqual(store.sections, stored_sections)
+        store.append([(1001, 'h/i\nj', 1, 1), (1001, 'h/h', 1, 1)])
+        self.assertEqual(store.sections, stored_sections)
+        self.assertEqual(store.section_totals(1000, 1001),
+                         {section: (1, 10 * (index + 1)) for index, section in enumerate(stored_sections)})
+
+    def test_warm_restart_rebuilds_windows(self):
+        '''
+        Test case: random traffic over 15 minutes recorded while collected, then restored into a new collector
+        Test output: the sliding windows and the traffic history of the restored collector are the ones of the
+                     collector which saw the traffic
+        '''
+        generator = random.Random(7)
+        clock = SimulatedClock()
+        collector = RingBufferCollector(clock=clock, window_spans=[10, 120, 600])
+        recorder = TrafficRecorder(store=self._open(), clock=clock, flush_records=100)
+        for _ in range(5000):
+            clock.timestamp = 1000 + generator.random() * 900 if clock.timestamp < 1000 \
+                else clock.timestamp + generator.random() * 0.36
+            http_info = HTTPInfo(method='GET', host='bing.it', path=f"/{generator.randrange(20)}",
+                                 content_length=generator.choice([10, 100]))
+            collector.collect_http_info(http_info)
+            recorder.collect_http_info(http_info)
+        recorder.flush(close_bucket=True)
+        end = int(clock.timestamp)
+        restored = RingBufferCollector(clock=clock, window_spans=[10, 120, 600])
+        restore_collector(recorder.store, restored, end - 600, end + 1)
+        clock.timestamp = end + 1.0
+        for window in [10, 120, 600]:
+            self.assertEqual([(hit.section, hit.nb_hits, hit.traffic)
+                              for hit in restored.get_highest_hits(20, window)],
+                             [(hit.section, hit.nb_hits, hit.traffic)
+                              for hit in collector.get_highest_hits(20, window)])
+        self.assertEqual(restored.get_total_traffic_over_period(120), collector.get_total_traffic_over_period(120))
+
+    def test_controller_restores_alerts_and_traffic(self):
+        '''
+        Test case: capture replayed by a controller recording in a store, then a new controller on the same store
+        Test output: the new controller shows the alerts recorded, and its collector has the traffic recorded
+        '''
+        capture_file, capture_path = tempfile.mkstemp(suffix='.pcap')
+        self.addCleanup(os.remove, capture_path)
+        with os.fdopen(capture_file, 'wb') as capture:
+            capture.write(build_pcap([(1000.0, build_tcp_frame(build_http_request(path='/a', content_length=600))),
+                                      (1001.0, build_tcp_frame(build_http_request(path='/a', content_length=600))),
+                                      (1025.0, build_tcp_frame(build_http_request(path='/b', content_length=100)))]))
+        store = self._open()
+        clock = PacketClock()
+        view = RecordingView()
+        Controller(view=view, update_period=10, traffic_history_span=20, traffic_limit=1000,
+                   http_collector=BasicCollector(history_span=20, clock=clock),
+                   sniffer_factory=partial(PcapSniffer, capture_path=capture_path, clock=clock),
+                   clock=clock, traffic_store=store).replay()
+        self.assertEqual(len(view.all_alerts), 2)
+        clock.timestamp = 1026.0
+        restarted_view = RecordingView()
+        restarted = Controller(view=restarted_view, update_period=10, traffic_history_span=20, traffic_limit=1000,
+                               http_collector=BasicCollector(history_span=20, clock=clock), clock=clock,
+                               sniffer_factory=partial(PcapSniffer, capture_path=capture_path, clock=clock),
+                               traffic_store=store, restore_span=30)
+        self.assertEqual(restarted_view.all_alerts, view.all_alerts)
+        self.assertEqual([(hit.section, hit.nb_hits) for hit in restarted.http_collector.get_highest_hits(2)],
+                         [('bing.it/a', 2), ('bing.it/b', 1)])
+        self.assertEqual(restarted.http_collector.get_total_traffic_over_period(20), 100)
+        self.assertEqual(restarted.window_alert_manager.window_traffic, 100)
+        self.assertEqual(restarted.window_alert_manager.get_alert_infos(), [])
+
+    def test_older_capture_replayed_into_store(self):
+        '''
+        Test case: capture replayed by a controller recording in a store, then an older capture (ending after the
+                   first one started) replayed by a new controller on the same store
+        Test output: the second replay runs to its end, only the buckets of the older capture not older than the
+                     last one stored are recorded, the others are counted as stale
+        '''
+        capture_paths = []
+        for requests in [[(1000.0, '/a'), (1005.0, '/a')], [(900.0, '/b'), (950.0, '/b'), (1005.0, '/c')]]:
+            capture_file, capture_path = tempfile.mkstemp(suffix='.pcap')
+            self.addCleanup(os.remove, capture_path)
+            with os.fdopen(capture_file, 'wb') as capture:
+                capture.write(build_pcap([(timestamp, build_tcp_frame(build_http_request(path=path,
+                                                                                         content_length=100)))
+                                          for timestamp, path in requests]))
+            capture_paths.append(capture_path)
+        store = self._open()
+        controllers = []
+        for capture_path in capture_paths:
+            clock = PacketClock()
+            controller = Controller(view=RecordingView(), update_period=10, traffic_history_span=20,
+                                    http_collector=BasicCollector(history_span=20, clock=clock),
+                                    sniffer_factory=partial(PcapSniffer, capture_path=capture_path, clock=clock),
+                                    clock=clock, traffic_store=store)
+            with self.assertLogs('TrafficRecorder', level='WARNING') if controllers else nullcontext():
+                controller.replay()
+            controllers.append(controller)
+        self.assertEqual(list(store.records(0, 2000)),
+                         [(1000, 'bing.it/a', 1, 100), (1005, 'bing.it/a', 1, 100), (1005, 'bing.it/c', 1, 100)])
+        self.assertEqual([controller.get_metrics().counters['stale_records'] for controller in controllers], [0, 2])